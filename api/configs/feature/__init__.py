@@ -5,6 +5,7 @@ from pydantic import (
     Field,
     HttpUrl,
     NegativeInt,
+    NonNegativeFloat,
     NonNegativeInt,
     PositiveFloat,
     PositiveInt,
@@ -48,6 +49,23 @@ class SecurityConfig(BaseSettings):
     )
 
 
+class AnnotationReplyConfig(BaseSettings):
+    """
+    Configuration for annotation reply
+    """
+
+    ANNOTATION_REPLY_INDEX_MAX_ANNOTATIONS: NonNegativeInt = Field(
+        description="Maximum number of annotations of an app searched in process instead of in the vector store,"
+        " 0 to always search the vector store",
+        default=200,
+    )
+
+    ANNOTATION_REPLY_INDEX_MAX_APPS: PositiveInt = Field(
+        description="Maximum number of apps whose annotations are cached in process for annotation reply",
+        default=128,
+    )
+
+
 class AppExecutionConfig(BaseSettings):
     """
     Configuration parameters for application execution
@@ -66,6 +84,22 @@ class AppExecutionConfig(BaseSettings):
         default=5000,
     )
 
+    APP_STREAM_COALESCE_ENABLED: bool = Field(
+        description="Merge consecutive text chunks waiting in the queue of a generate task into one streamed chunk",
+        default=False,
+    )
+
+    APP_STREAM_COALESCE_WINDOW_MS: NonNegativeInt = Field(
+        description="Time in milliseconds to wait for more text chunks to merge into a text chunk,"
+        " 0 to only merge the text chunks already queued",
+        default=20,
+    )
+
+    APP_STREAM_COALESCE_MAX_CHARS: PositiveInt = Field(
+        description="Maximum number of characters of text chunks merged into one streamed chunk",
+        default=512,
+    )
+
 
 class CodeExecutionSandboxConfig(BaseSettings):
     """
@@ -175,6 +209,16 @@ class PluginConfig(BaseSettings):
         default=15728640 * 12,
     )
 
+    PLUGIN_PROVIDER_CACHE_TTL: NonNegativeInt = Field(
+        description="Seconds plugin model and tool provider declarations are cached in process, 0 to disable",
+        default=60,
+    )
+
+    PLUGIN_PROVIDER_CACHE_MAX_SIZE: PositiveInt = Field(
+        description="Maximum number of tenant provider declarations cached in process",
+        default=1000,
+    )
+
 
 class MarketplaceConfig(BaseSettings):
     """
@@ -508,11 +552,43 @@ class WorkflowConfig(BaseSettings):
         default=3,
     )
 
+    WORKFLOW_COMPILED_GRAPH_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of compiled workflow graphs kept in memory per process, 0 disables the cache",
+        default=256,
+    )
+
+    WORKFLOW_TASK_SCHEDULER_MAX_WORKERS: PositiveInt = Field(
+        description="Maximum number of worker threads shared by all parallel branches and iterations in a process",
+        default=100,
+    )
+
+    WORKFLOW_TASK_SCHEDULER_TENANT_MAX_WORKERS: PositiveInt = Field(
+        description="Maximum number of shared worker threads a single tenant can occupy",
+        default=50,
+    )
+
+    WORKFLOW_TASK_SCHEDULER_ADMISSION_TIMEOUT: NonNegativeFloat = Field(
+        description="Seconds a parallel task waits for a busy shared pool before running in the submitting thread",
+        default=0.5,
+    )
+
     MAX_VARIABLE_SIZE: PositiveInt = Field(
         description="Maximum size in bytes for a single variable in workflows. Default to 200 KB.",
         default=200 * 1024,
     )
 
+    DOCUMENT_EXTRACTOR_TIMEOUT: PositiveInt = Field(
+        description="Maximum seconds spent waiting for the text of a file or PDF page range extracted by the"
+        " extraction worker processes",
+        default=300,
+    )
+
+    DOCUMENT_EXTRACTOR_CACHE_ENABLED: bool = Field(
+        description="Save the text extracted by document extractor nodes to storage, keyed by the file content hash,"
+        " the saved texts are never removed",
+        default=False,
+    )
+
 
 class WorkflowNodeExecutionConfig(BaseSettings):
     """
@@ -669,6 +745,42 @@ class MailConfig(BaseSettings):
     )
 
 
+class QueryEmbeddingConfig(BaseSettings):
+    """
+    Configuration for the embedding of retrieval queries
+    """
+
+    QUERY_EMBEDDING_BATCH_ENABLED: bool = Field(
+        description="Embed the queries of concurrent requests using the same embedding model with one model call",
+        default=False,
+    )
+
+    QUERY_EMBEDDING_BATCH_WINDOW_MS: NonNegativeInt = Field(
+        description="Time in milliseconds the first query of a batch waits for other queries to embed with it",
+        default=5,
+    )
+
+    QUERY_EMBEDDING_BATCH_MAX_SIZE: PositiveInt = Field(
+        description="Maximum number of queries embedded by one model call, also bounded by the model max chunks",
+        default=32,
+    )
+
+    QUERY_EMBEDDING_CACHE_TTL: PositiveInt = Field(
+        description="Time in seconds a query embedding is kept in redis after its last use",
+        default=86400,
+    )
+
+    QUERY_EMBEDDING_CACHE_MEMORY_TTL: PositiveInt = Field(
+        description="Time in seconds a query embedding is kept in the in-process cache",
+        default=600,
+    )
+
+    QUERY_EMBEDDING_CACHE_MEMORY_MAX_SIZE: NonNegativeInt = Field(
+        description="Maximum size in bytes of the in-process query embedding cache, 0 to disable it",
+        default=16 * 1024 * 1024,
+    )
+
+
 class RagEtlConfig(BaseSettings):
     """
     Configuration for RAG ETL processes
@@ -701,6 +813,19 @@ class RagEtlConfig(BaseSettings):
         default="false",
     )
 
+    ETL_PROCESS_POOL_MAX_WORKERS: NonNegativeInt = Field(
+        description="Maximum number of worker processes extracting PDF, spreadsheet and unstructured documents"
+        " out of the indexing worker process, and the files of document extractor nodes out of the API process,"
+        " 0 extracts them in the calling process",
+        default=0,
+    )
+
+    ETL_PDF_PAGES_PER_TASK: PositiveInt = Field(
+        description="PDF files with more pages are split into page ranges of this size extracted in parallel"
+        " by the extraction worker processes",
+        default=50,
+    )
+
 
 class DataSetConfig(BaseSettings):
     """
@@ -737,6 +862,33 @@ class DataSetConfig(BaseSettings):
         default=30,
     )
 
+    PLAN_SANDBOX_CLEAN_WORKFLOW_RUN_DAY_SETTING: NonNegativeInt = Field(
+        description="Interval in days for workflow run cleanup operations - plan: sandbox, 0 to keep workflow runs",
+        default=0,
+    )
+
+
+class DataRetentionConfig(BaseSettings):
+    """
+    Configuration for the deletion of expired messages, workflow runs and embeddings
+    """
+
+    DATA_RETENTION_BATCH_SIZE: PositiveInt = Field(
+        description="Number of rows walked per batch by the cleanup tasks, deleted with one statement per table",
+        default=1000,
+    )
+
+    DATA_RETENTION_BATCH_INTERVAL_MS: NonNegativeInt = Field(
+        description="Time in milliseconds the cleanup tasks sleep between batches to throttle the database load",
+        default=100,
+    )
+
+    DATA_RETENTION_MAX_RUNTIME: NonNegativeInt = Field(
+        description="Time in seconds after which a cleanup task stops, resumed from where it stopped by its next run,"
+        " 0 for no limit",
+        default=0,
+    )
+
 
 class WorkspaceConfig(BaseSettings):
     """
@@ -764,6 +916,53 @@ class IndexingConfig(BaseSettings):
         default=50,
     )
 
+    INDEXING_DOCUMENT_WORKERS: PositiveInt = Field(
+        description="Number of documents of one indexing task indexed concurrently, 1 indexes them one after another."
+        " Each holds a database session, besides the embedding threads",
+        default=4,
+    )
+
+    INDEXING_PIPELINE_PAGE_BATCH_SIZE: PositiveInt = Field(
+        description="Number of extracted pages split together by one indexing pipeline task",
+        default=20,
+    )
+
+    INDEXING_PIPELINE_SPLIT_WORKERS: PositiveInt = Field(
+        description="Number of threads splitting pages of one document in the indexing pipeline",
+        default=2,
+    )
+
+    INDEXING_PIPELINE_EMBEDDING_BATCH_SIZE: PositiveInt = Field(
+        description="Number of chunks embedded and upserted together by one indexing pipeline task",
+        default=64,
+    )
+
+    INDEXING_PIPELINE_EMBEDDING_WORKERS: PositiveInt = Field(
+        description="Number of chunk batches embedded and upserted at once, each with its own database session,"
+        " shared by the documents an indexing task indexes concurrently",
+        default=10,
+    )
+
+    INDEXING_PIPELINE_QUEUE_SIZE: PositiveInt = Field(
+        description="Maximum number of chunk batches waiting between the stages of the indexing pipeline",
+        default=4,
+    )
+
+    QA_GENERATION_MAX_CONCURRENCY: PositiveInt = Field(
+        description="Maximum number of concurrent LLM requests generating QA pairs of one document",
+        default=10,
+    )
+
+    QA_GENERATION_MAX_RETRIES: NonNegativeInt = Field(
+        description="Maximum number of retries of a rate limited QA generation request",
+        default=5,
+    )
+
+    QA_GENERATION_CHECKPOINT_TTL: PositiveInt = Field(
+        description="Time-to-live in seconds of generated QA pairs kept to resume a retried indexing task",
+        default=86400,
+    )
+
 
 class MultiModalTransferConfig(BaseSettings):
     MULTIMODAL_SEND_FORMAT: Literal["base64", "url"] = Field(
@@ -779,6 +978,28 @@ class CeleryBeatConfig(BaseSettings):
     )
 
 
+class ProviderUsageLedgerConfig(BaseSettings):
+    """
+    Configuration for the redis ledger of provider quota usage
+    """
+
+    PROVIDER_USAGE_LEDGER_ENABLED: bool = Field(
+        description="Record hosted quota usage and provider last use in redis, written back to the database"
+        " in batches by a beat task, instead of updating the provider row on every call",
+        default=False,
+    )
+
+    PROVIDER_USAGE_LEDGER_FLUSH_INTERVAL: PositiveInt = Field(
+        description="Interval in seconds of the beat task writing the provider usage ledger back to the database",
+        default=60,
+    )
+
+    PROVIDER_USAGE_LEDGER_FLUSH_BATCH_SIZE: PositiveInt = Field(
+        description="Number of provider quota counters written back to the database per transaction",
+        default=500,
+    )
+
+
 class PositionConfig(BaseSettings):
     POSITION_PROVIDER_PINS: str = Field(
         description="Comma-separated list of pinned model providers",
@@ -876,12 +1097,14 @@ class AccountConfig(BaseSettings):
 
 class FeatureConfig(
     # place the configs in alphabet order
+    AnnotationReplyConfig,
     AppExecutionConfig,
     AuthConfig,  # Changed from OAuthConfig to AuthConfig
     BillingConfig,
     CodeExecutionSandboxConfig,
     PluginConfig,
     MarketplaceConfig,
+    DataRetentionConfig,
     DataSetConfig,
     EndpointConfig,
     FileAccessConfig,
@@ -895,6 +1118,8 @@ class FeatureConfig(
     ModerationConfig,
     MultiModalTransferConfig,
     PositionConfig,
+    ProviderUsageLedgerConfig,
+    QueryEmbeddingConfig,
     RagEtlConfig,
     SecurityConfig,
     ToolConfig,
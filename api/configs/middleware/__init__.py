@@ -1,4 +1,5 @@
 import os
+import tempfile
 from typing import Any, Literal, Optional
 from urllib.parse import parse_qsl, quote_plus
 
@@ -72,6 +73,41 @@ class StorageConfig(BaseSettings):
         deprecated=True,
     )
 
+    STORAGE_READ_CHUNK_SIZE: PositiveInt = Field(
+        description="Size in bytes of the chunks read when streaming files from storage.",
+        default=64 * 1024,
+    )
+
+    STORAGE_MULTIPART_CHUNK_SIZE: PositiveInt = Field(
+        description="Size in bytes of the parts uploaded when streaming files to storage.",
+        default=8 * 1024 * 1024,
+    )
+
+    STORAGE_CACHE_ENABLED: bool = Field(
+        description="Enable the local read-through cache of immutable storage objects such as uploaded and tool files.",
+        default=False,
+    )
+
+    STORAGE_CACHE_DIRECTORY: str = Field(
+        description="Directory of the local storage cache, shared by the processes of the host.",
+        default=os.path.join(tempfile.gettempdir(), "dify-storage-cache"),
+    )
+
+    STORAGE_CACHE_MAX_SIZE: NonNegativeInt = Field(
+        description="Maximum size in bytes of the local storage cache on disk.",
+        default=1024 * 1024 * 1024,
+    )
+
+    STORAGE_CACHE_MEMORY_MAX_SIZE: NonNegativeInt = Field(
+        description="Maximum size in bytes of the in-memory tier of the storage cache, 0 to disable it.",
+        default=64 * 1024 * 1024,
+    )
+
+    STORAGE_CACHE_MEMORY_MAX_OBJECT_SIZE: NonNegativeInt = Field(
+        description="Objects larger than this size in bytes are only cached on disk.",
+        default=1024 * 1024,
+    )
+
 
 class VectorStoreConfig(BaseSettings):
     VECTOR_STORE: Optional[str] = Field(
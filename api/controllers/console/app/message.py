@@ -31,6 +31,7 @@ from models.model import AppMode, Conversation, Message, MessageAnnotation, Mess
 from services.annotation_service import AppAnnotationService
 from services.errors.conversation import ConversationNotExistsError
 from services.errors.message import MessageNotExistsError, SuggestedQuestionsAfterAnswerDisabledError
+from services.message_page_loader import MessagePageLoader
 from services.message_service import MessageService
 
 
@@ -109,6 +110,7 @@ class ChatMessageListApi(Resource):
                 has_more = True
 
         history_messages = list(reversed(history_messages))
+        MessagePageLoader.preload(history_messages)
 
         return InfiniteScrollPagination(data=history_messages, limit=args["limit"], has_more=has_more)
 
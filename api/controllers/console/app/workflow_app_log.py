@@ -1,6 +1,6 @@
 from dateutil.parser import isoparse
 from flask_restful import Resource, marshal_with, reqparse
-from flask_restful.inputs import int_range
+from flask_restful.inputs import boolean, int_range
 from sqlalchemy.orm import Session
 
 from controllers.console import api
@@ -9,6 +9,7 @@ from controllers.console.wraps import account_initialization_required, setup_req
 from core.workflow.entities.workflow_execution import WorkflowExecutionStatus
 from extensions.ext_database import db
 from fields.workflow_app_log_fields import workflow_app_log_pagination_fields
+from libs.helper import uuid_value
 from libs.login import login_required
 from models import App
 from models.model import AppMode
@@ -50,6 +51,8 @@ class WorkflowAppLogApi(Resource):
         )
         parser.add_argument("page", type=int_range(1, 99999), default=1, location="args")
         parser.add_argument("limit", type=int_range(1, 100), default=20, location="args")
+        parser.add_argument("last_id", type=uuid_value, location="args")
+        parser.add_argument("include_total", type=boolean, default=True, location="args")
         args = parser.parse_args()
 
         args.status = WorkflowExecutionStatus(args.status) if args.status else None
@@ -73,6 +76,8 @@ class WorkflowAppLogApi(Resource):
                 limit=args.limit,
                 created_by_end_user_session_id=args.created_by_end_user_session_id,
                 created_by_account=args.created_by_account,
+                last_id=args.last_id,
+                include_total=args.include_total,
             )
 
             return workflow_app_log_pagination
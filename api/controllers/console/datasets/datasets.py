@@ -32,6 +32,7 @@ from libs.login import login_required
 from models import ApiToken, Dataset, Document, DocumentSegment, UploadFile
 from models.dataset import DatasetPermissionEnum
 from services.dataset_service import DatasetPermissionService, DatasetService, DocumentService
+from services.dataset_statistics_service import DatasetStatisticsService
 
 
 def _validate_name(name):
@@ -76,7 +77,11 @@ class DatasetListApi(Resource):
         for embedding_model in embedding_models:
             model_names.append(f"{embedding_model.model}:{embedding_model.provider.provider}")
 
+        DatasetStatisticsService.preload_datasets(datasets)
         data = marshal(datasets, dataset_detail_fields)
+        partial_member_lists = DatasetPermissionService.get_datasets_partial_member_lists(
+            [item["id"] for item in data if item.get("permission") == "partial_members"]
+        )
         for item in data:
             # convert embedding_model_provider to plugin standard format
             if item["indexing_technique"] == "high_quality" and item["embedding_model_provider"]:
@@ -90,8 +95,7 @@ class DatasetListApi(Resource):
                 item["embedding_available"] = True
 
             if item.get("permission") == "partial_members":
-                part_users_list = DatasetPermissionService.get_dataset_partial_member_list(item["id"])
-                item.update({"partial_member_list": part_users_list})
+                item.update({"partial_member_list": partial_member_lists[item["id"]]})
             else:
                 item.update({"partial_member_list": []})
 
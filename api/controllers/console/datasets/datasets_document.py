@@ -52,6 +52,7 @@ from fields.document_fields import (
 from libs.login import login_required
 from models import Dataset, DatasetProcessRule, Document, DocumentSegment, UploadFile
 from services.dataset_service import DatasetService, DocumentService
+from services.dataset_statistics_service import DatasetStatisticsService
 from services.entities.knowledge_entities.knowledge_entities import KnowledgeConfig
 
 
@@ -208,24 +209,8 @@ class DatasetDocumentListApi(Resource):
 
         paginated_documents = db.paginate(select=query, page=page, per_page=limit, max_per_page=100, error_out=False)
         documents = paginated_documents.items
+        DatasetStatisticsService.preload_documents(documents, with_segment_progress=fetch)
         if fetch:
-            for document in documents:
-                completed_segments = (
-                    db.session.query(DocumentSegment)
-                    .filter(
-                        DocumentSegment.completed_at.isnot(None),
-                        DocumentSegment.document_id == str(document.id),
-                        DocumentSegment.status != "re_segment",
-                    )
-                    .count()
-                )
-                total_segments = (
-                    db.session.query(DocumentSegment)
-                    .filter(DocumentSegment.document_id == str(document.id), DocumentSegment.status != "re_segment")
-                    .count()
-                )
-                document.completed_segments = completed_segments
-                document.total_segments = total_segments
             data = marshal(documents, document_with_segments_fields)
         else:
             data = marshal(documents, document_fields)
@@ -2,7 +2,7 @@ import logging
 
 from dateutil.parser import isoparse
 from flask_restful import Resource, fields, marshal_with, reqparse
-from flask_restful.inputs import int_range
+from flask_restful.inputs import boolean, int_range
 from sqlalchemy.orm import Session
 from werkzeug.exceptions import InternalServerError
 
@@ -28,7 +28,7 @@ from core.workflow.entities.workflow_execution import WorkflowExecutionStatus
 from extensions.ext_database import db
 from fields.workflow_app_log_fields import workflow_app_log_pagination_fields
 from libs import helper
-from libs.helper import TimestampField
+from libs.helper import TimestampField, uuid_value
 from models.model import App, AppMode, EndUser
 from models.workflow import WorkflowRun
 from services.app_generate_service import AppGenerateService
@@ -151,6 +151,8 @@ class WorkflowAppLogApi(Resource):
         )
         parser.add_argument("page", type=int_range(1, 99999), default=1, location="args")
         parser.add_argument("limit", type=int_range(1, 100), default=20, location="args")
+        parser.add_argument("last_id", type=uuid_value, location="args")
+        parser.add_argument("include_total", type=boolean, default=True, location="args")
         args = parser.parse_args()
 
         args.status = WorkflowExecutionStatus(args.status) if args.status else None
@@ -174,6 +176,8 @@ class WorkflowAppLogApi(Resource):
                 limit=args.limit,
                 created_by_end_user_session_id=args.created_by_end_user_session_id,
                 created_by_account=args.created_by_account,
+                last_id=args.last_id,
+                include_total=args.include_total,
             )
 
             return workflow_app_log_pagination
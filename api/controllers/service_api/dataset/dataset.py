@@ -18,6 +18,7 @@ from fields.tag_fields import tag_fields
 from libs.login import current_user
 from models.dataset import Dataset, DatasetPermissionEnum
 from services.dataset_service import DatasetPermissionService, DatasetService, DocumentService
+from services.dataset_statistics_service import DatasetStatisticsService
 from services.entities.knowledge_entities.knowledge_entities import RetrievalModel
 from services.tag_service import TagService
 
@@ -60,6 +61,7 @@ class DatasetListApi(DatasetApiResource):
         for embedding_model in embedding_models:
             model_names.append(f"{embedding_model.model}:{embedding_model.provider.provider}")
 
+        DatasetStatisticsService.preload_datasets(datasets)
         data = marshal(datasets, dataset_detail_fields)
         for item in data:
             if item["indexing_technique"] == "high_quality" and item["embedding_model_provider"]:
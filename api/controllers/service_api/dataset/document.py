@@ -31,6 +31,7 @@ from fields.document_fields import document_fields, document_status_fields
 from libs.login import current_user
 from models.dataset import Dataset, Document, DocumentSegment
 from services.dataset_service import DatasetService, DocumentService
+from services.dataset_statistics_service import DatasetStatisticsService
 from services.entities.knowledge_entities.knowledge_entities import KnowledgeConfig
 from services.file_service import FileService
 
@@ -412,6 +413,7 @@ class DocumentListApi(DatasetApiResource):
 
         paginated_documents = db.paginate(select=query, page=page, per_page=limit, max_per_page=100, error_out=False)
         documents = paginated_documents.items
+        DatasetStatisticsService.preload_documents(documents)
 
         response = {
             "data": marshal(documents, document_fields),
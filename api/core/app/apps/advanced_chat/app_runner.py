@@ -156,7 +156,7 @@ class AdvancedChatAppRunner(WorkflowBasedAppRunner):
             )
 
             # init graph
-            graph = self._init_graph(graph_config=workflow.graph_dict)
+            graph = self._init_graph_of_workflow(workflow)
 
         db.session.close()
 
@@ -167,7 +167,7 @@ class AdvancedChatAppRunner(WorkflowBasedAppRunner):
             workflow_id=workflow.id,
             workflow_type=WorkflowType.value_of(workflow.type),
             graph=graph,
-            graph_config=workflow.graph_dict,
+            graph_config=self._get_graph_config(workflow, graph),
             user_id=self.application_generate_entity.user_id,
             user_from=(
                 UserFrom.ACCOUNT
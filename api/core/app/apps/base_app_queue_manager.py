@@ -2,7 +2,7 @@ import queue
 import time
 from abc import abstractmethod
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, Optional, cast
 
 from sqlalchemy.orm import DeclarativeMeta
 
@@ -12,12 +12,17 @@ from core.app.entities.queue_entities import (
     AppQueueEvent,
     MessageQueueMessage,
     QueueErrorEvent,
+    QueueLLMChunkEvent,
     QueuePingEvent,
     QueueStopEvent,
+    QueueTextChunkEvent,
     WorkflowQueueMessage,
 )
 from extensions.ext_redis import redis_client
 
+# no message left aside by the coalescing of text chunks
+_NO_MESSAGE: Any = object()
+
 
 class PublishFrom(Enum):
     APPLICATION_MANAGER = 1
@@ -51,12 +56,19 @@ class AppQueueManager:
         listen_timeout = dify_config.APP_MAX_EXECUTION_TIME
         start_time = time.time()
         last_ping_time: int | float = 0
+        next_message = _NO_MESSAGE
         while True:
             try:
-                message = self._q.get(timeout=1)
+                if next_message is not _NO_MESSAGE:
+                    message, next_message = next_message, _NO_MESSAGE
+                else:
+                    message = self._q.get(timeout=1)
                 if message is None:
                     break
 
+                if dify_config.APP_STREAM_COALESCE_ENABLED and self._is_coalescible(message.event):
+                    message, next_message = self._coalesce_text_chunks(message)
+
                 yield message
             except queue.Empty:
                 continue
@@ -73,6 +85,92 @@ class AppQueueManager:
                     self.publish(QueuePingEvent(), PublishFrom.TASK_PIPELINE)
                     last_ping_time = elapsed_time // 10
 
+    def _coalesce_text_chunks(
+        self, message: WorkflowQueueMessage | MessageQueueMessage
+    ) -> tuple[WorkflowQueueMessage | MessageQueueMessage, Any]:
+        """
+        Merge the text chunks following a text chunk in the queue into it, waiting for them
+        APP_STREAM_COALESCE_WINDOW_MS at most, so the task pipeline handles and streams them once
+        :param message: message of the first text chunk
+        :return: merged message and the first message that could not be merged, if any
+        """
+        deadline = time.monotonic() + dify_config.APP_STREAM_COALESCE_WINDOW_MS / 1000
+        max_chars = dify_config.APP_STREAM_COALESCE_MAX_CHARS
+        texts = [self._get_chunk_text(message.event)]
+        length = len(texts[0])
+        last_message = message
+        next_message = _NO_MESSAGE
+        while length < max_chars:
+            try:
+                timeout = deadline - time.monotonic()
+                candidate = self._q.get(timeout=timeout) if timeout > 0 else self._q.get_nowait()
+            except queue.Empty:
+                break
+            if candidate is None or not self._can_coalesce(last_message.event, candidate.event):
+                next_message = candidate
+                break
+            text = self._get_chunk_text(candidate.event)
+            texts.append(text)
+            length += len(text)
+            last_message = candidate
+
+        if last_message is message:
+            return message, next_message
+        return self._with_chunk_text(last_message, "".join(texts)), next_message
+
+    @staticmethod
+    def _is_coalescible(event: AppQueueEvent) -> bool:
+        if isinstance(event, QueueTextChunkEvent):
+            return True
+        if isinstance(event, QueueLLMChunkEvent):
+            # chunks carrying tool calls, usage or a finish reason are streamed as they are
+            delta = event.chunk.delta
+            return (
+                isinstance(delta.message.content, str)
+                and not delta.message.tool_calls
+                and delta.usage is None
+                and delta.finish_reason is None
+            )
+        return False
+
+    @staticmethod
+    def _can_coalesce(event: AppQueueEvent, next_event: AppQueueEvent) -> bool:
+        if isinstance(event, QueueTextChunkEvent) and isinstance(next_event, QueueTextChunkEvent):
+            return (
+                event.from_variable_selector == next_event.from_variable_selector
+                and event.in_iteration_id == next_event.in_iteration_id
+                and event.in_loop_id == next_event.in_loop_id
+            )
+        if isinstance(event, QueueLLMChunkEvent) and isinstance(next_event, QueueLLMChunkEvent):
+            # the usage and finish reason of the last merged chunk are kept
+            return (
+                event.chunk.delta.usage is None
+                and event.chunk.delta.finish_reason is None
+                and isinstance(next_event.chunk.delta.message.content, str)
+                and not next_event.chunk.delta.message.tool_calls
+            )
+        return False
+
+    @staticmethod
+    def _get_chunk_text(event: AppQueueEvent) -> str:
+        if isinstance(event, QueueTextChunkEvent):
+            return event.text
+        return cast(QueueLLMChunkEvent, event).chunk.delta.message.content  # type: ignore
+
+    @staticmethod
+    def _with_chunk_text(
+        message: WorkflowQueueMessage | MessageQueueMessage, text: str
+    ) -> WorkflowQueueMessage | MessageQueueMessage:
+        event = message.event
+        if isinstance(event, QueueTextChunkEvent):
+            merged_event: AppQueueEvent = event.model_copy(update={"text": text})
+        else:
+            chunk = cast(QueueLLMChunkEvent, event).chunk
+            delta_message = chunk.delta.message.model_copy(update={"content": text})
+            delta = chunk.delta.model_copy(update={"message": delta_message})
+            merged_event = event.model_copy(update={"chunk": chunk.model_copy(update={"delta": delta})})
+        return message.model_copy(update={"event": merged_event})
+
     def stop_listen(self) -> None:
         """
         Stop listen to queue
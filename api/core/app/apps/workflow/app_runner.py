@@ -111,7 +111,7 @@ class WorkflowAppRunner(WorkflowBasedAppRunner):
             )
 
             # init graph
-            graph = self._init_graph(graph_config=workflow.graph_dict)
+            graph = self._init_graph_of_workflow(workflow)
 
         # RUN WORKFLOW
         workflow_entry = WorkflowEntry(
@@ -120,7 +120,7 @@ class WorkflowAppRunner(WorkflowBasedAppRunner):
             workflow_id=workflow.id,
             workflow_type=WorkflowType.value_of(workflow.type),
             graph=graph,
-            graph_config=workflow.graph_dict,
+            graph_config=self._get_graph_config(workflow, graph),
             user_id=self.application_generate_entity.user_id,
             user_from=(
                 UserFrom.ACCOUNT
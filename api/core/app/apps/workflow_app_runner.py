@@ -59,12 +59,13 @@ from core.workflow.graph_engine.entities.event import (
     ParallelBranchRunStartedEvent,
     ParallelBranchRunSucceededEvent,
 )
-from core.workflow.graph_engine.entities.graph import Graph
+from core.workflow.graph_engine.entities.graph import Graph, compiled_graph_cache
 from core.workflow.nodes import NodeType
 from core.workflow.nodes.node_mapping import NODE_TYPE_CLASSES_MAPPING
 from core.workflow.variable_loader import DUMMY_VARIABLE_LOADER, VariableLoader, load_into_variable_pool
 from core.workflow.workflow_entry import WorkflowEntry
 from extensions.ext_database import db
+from libs.helper import generate_text_hash
 from models.model import App
 from models.workflow import Workflow
 
@@ -77,7 +78,34 @@ class WorkflowBasedAppRunner(AppRunner):
     def _get_app_id(self) -> str:
         raise NotImplementedError("not implemented")
 
-    def _init_graph(self, graph_config: Mapping[str, Any]) -> Graph:
+    def _get_graph_cache_key(self, workflow: Workflow) -> str:
+        """
+        Get compiled graph cache key of workflow, changes whenever the graph is edited
+        """
+        return f"{workflow.id}:{generate_text_hash(workflow.graph)}"
+
+    def _init_graph_of_workflow(self, workflow: Workflow) -> Graph:
+        """
+        Init graph of workflow through the compiled graph cache,
+        the graph json is only decoded when the graph is not cached yet
+        """
+        cache_key = self._get_graph_cache_key(workflow)
+        graph = compiled_graph_cache.get(cache_key=cache_key)
+        if graph is None:
+            graph = self._init_graph(graph_config=workflow.graph_dict, cache_key=cache_key)
+
+        return graph
+
+    def _get_graph_config(self, workflow: Workflow, graph: Graph) -> Mapping[str, Any]:
+        """
+        Get graph config of workflow, reusing the config decoded along with a cached graph
+        """
+        if graph.cache_key and graph.graph_config:
+            return graph.graph_config
+
+        return workflow.graph_dict
+
+    def _init_graph(self, graph_config: Mapping[str, Any], cache_key: Optional[str] = None) -> Graph:
         """
         Init graph
         """
@@ -90,7 +118,7 @@ class WorkflowBasedAppRunner(AppRunner):
         if not isinstance(graph_config.get("edges"), list):
             raise ValueError("edges in workflow graph must be a list")
         # init graph
-        graph = Graph.init(graph_config=graph_config)
+        graph = Graph.init(graph_config=graph_config, cache_key=cache_key)
 
         if not graph:
             raise ValueError("graph not found in workflow")
@@ -93,7 +93,9 @@ class StreamResponse(BaseModel):
     task_id: str
 
     def to_dict(self):
-        return jsonable_encoder(self)
+        # model_dump in json mode already returns JSON types, jsonable_encoder would walk the
+        # node inputs and outputs a second time in python
+        return self.model_dump(mode="json", by_alias=True)
 
 
 class ErrorStreamResponse(StreamResponse):
@@ -2,12 +2,15 @@ import logging
 from typing import Optional
 
 from core.app.entities.app_invoke_entities import InvokeFrom
+from core.app.features.annotation_reply.annotation_reply_index import (
+    AnnotationReplyIndex,
+    get_annotation_embeddings,
+    get_annotation_reply_index,
+)
 from core.rag.datasource.vdb.vector_factory import Vector
-from extensions.ext_database import db
 from models.dataset import Dataset
-from models.model import App, AppAnnotationSetting, Message, MessageAnnotation
+from models.model import App, Message, MessageAnnotation
 from services.annotation_service import AppAnnotationService
-from services.dataset_service import DatasetCollectionBindingService
 
 logger = logging.getLogger(__name__)
 
@@ -25,65 +28,78 @@ class AnnotationReplyFeature:
         :param invoke_from: invoke from
         :return:
         """
-        annotation_setting = (
-            db.session.query(AppAnnotationSetting).filter(AppAnnotationSetting.app_id == app_record.id).first()
-        )
-
-        if not annotation_setting:
-            return None
+        try:
+            index = get_annotation_reply_index(app_record.id, app_record.tenant_id)
+            if not index.enabled:
+                return None
 
-        collection_binding_detail = annotation_setting.collection_binding_detail
+            annotation_id = index.match_question(query)
+            score = 1.0
+            if annotation_id is None:
+                match = self._search(app_record, index, query)
+                if match is None:
+                    return None
+                annotation_id, score = match
 
-        try:
-            score_threshold = annotation_setting.score_threshold or 1
-            embedding_provider_name = collection_binding_detail.provider_name
-            embedding_model_name = collection_binding_detail.model_name
+            annotation = AppAnnotationService.get_annotation_by_id(annotation_id)
+            if annotation:
+                if invoke_from in {InvokeFrom.SERVICE_API, InvokeFrom.WEB_APP}:
+                    from_source = "api"
+                else:
+                    from_source = "console"
 
-            dataset_collection_binding = DatasetCollectionBindingService.get_dataset_collection_binding(
-                embedding_provider_name, embedding_model_name, "annotation"
-            )
+                # insert annotation history
+                AppAnnotationService.add_annotation_history(
+                    annotation.id,
+                    app_record.id,
+                    annotation.question,
+                    annotation.content,
+                    query,
+                    user_id,
+                    message.id,
+                    from_source,
+                    score,
+                )
 
-            dataset = Dataset(
-                id=app_record.id,
-                tenant_id=app_record.tenant_id,
-                indexing_technique="high_quality",
-                embedding_model_provider=embedding_provider_name,
-                embedding_model=embedding_model_name,
-                collection_binding_id=dataset_collection_binding.id,
-            )
+                return annotation
+        except Exception as e:
+            logger.warning(f"Query annotation failed, exception: {str(e)}.")
+            return None
 
-            vector = Vector(dataset, attributes=["doc_id", "annotation_id", "app_id"])
+        return None
 
-            documents = vector.search_by_vector(
-                query=query, top_k=1, score_threshold=score_threshold, filter={"group_id": [dataset.id]}
+    def _search(self, app_record: App, index: AnnotationReplyIndex, query: str) -> Optional[tuple[str, float]]:
+        """
+        Search the annotation whose question is the most similar to the query,
+        in process for small annotation sets, in the vector store otherwise
+        :param app_record: app record
+        :param index: annotation reply index of the app
+        :param query: query
+        :return: annotation id and score
+        """
+        if index.embeddings is not None:
+            if not index.annotation_ids:
+                return None
+            embeddings = get_annotation_embeddings(
+                app_record.tenant_id, index.embedding_provider_name, index.embedding_model_name
             )
+            return index.search(embeddings.embed_query(query))
 
-            if documents and documents[0].metadata:
-                annotation_id = documents[0].metadata["annotation_id"]
-                score = documents[0].metadata["score"]
-                annotation = AppAnnotationService.get_annotation_by_id(annotation_id)
-                if annotation:
-                    if invoke_from in {InvokeFrom.SERVICE_API, InvokeFrom.WEB_APP}:
-                        from_source = "api"
-                    else:
-                        from_source = "console"
+        dataset = Dataset(
+            id=app_record.id,
+            tenant_id=app_record.tenant_id,
+            indexing_technique="high_quality",
+            embedding_model_provider=index.embedding_provider_name,
+            embedding_model=index.embedding_model_name,
+            collection_binding_id=index.collection_binding_id,
+        )
 
-                    # insert annotation history
-                    AppAnnotationService.add_annotation_history(
-                        annotation.id,
-                        app_record.id,
-                        annotation.question,
-                        annotation.content,
-                        query,
-                        user_id,
-                        message.id,
-                        from_source,
-                        score,
-                    )
+        vector = Vector(dataset, attributes=["doc_id", "annotation_id", "app_id"])
 
-                    return annotation
-        except Exception as e:
-            logger.warning(f"Query annotation failed, exception: {str(e)}.")
-            return None
+        documents = vector.search_by_vector(
+            query=query, top_k=1, score_threshold=index.score_threshold, filter={"group_id": [dataset.id]}
+        )
 
+        if documents and documents[0].metadata:
+            return documents[0].metadata["annotation_id"], documents[0].metadata["score"]
         return None
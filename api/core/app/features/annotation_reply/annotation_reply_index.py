@@ -0,0 +1,176 @@
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from configs import dify_config
+from core.model_manager import ModelManager
+from core.model_runtime.entities.model_entities import ModelType
+from core.rag.embedding.cached_embedding import CacheEmbedding
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.model import AppAnnotationSetting, MessageAnnotation
+from services.dataset_service import DatasetCollectionBindingService
+
+_VERSION_KEY_PREFIX = "annotation_reply_index_version"
+_VERSION_KEY_TTL = 24 * 60 * 60
+
+
+@dataclass
+class AnnotationReplyIndex:
+    """
+    In-process snapshot of the annotation reply setting and annotations of an app, cached per app
+    until the annotations or the setting of the app are written.
+    """
+
+    version: str
+    enabled: bool = False
+    score_threshold: float = 1
+    embedding_provider_name: str = ""
+    embedding_model_name: str = ""
+    collection_binding_id: str = ""
+    # normalized question hash -> annotation id
+    questions: dict[bytes, str] = field(default_factory=dict)
+    # normalized question embeddings, one row per annotation id, None when the annotations
+    # are too many to be searched in process and the vector store is searched instead
+    annotation_ids: list[str] = field(default_factory=list)
+    embeddings: Optional[np.ndarray] = None
+
+    def match_question(self, query: str) -> Optional[str]:
+        """
+        Find the annotation whose question is the query, ignoring case and whitespace
+
+        :param query: query
+        :return: annotation id
+        """
+        return self.questions.get(_hash_question(query))
+
+    def search(self, query_embedding: list[float]) -> Optional[tuple[str, float]]:
+        """
+        Find the annotation whose question is the most similar to the query
+
+        :param query_embedding: embedding of the query
+        :return: annotation id and cosine similarity score, when reaching the score threshold
+        """
+        if self.embeddings is None or not self.annotation_ids:
+            return None
+
+        vector = np.asarray(query_embedding, dtype=np.float32)
+        scores = self.embeddings @ (vector / np.linalg.norm(vector))
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        if score < self.score_threshold:
+            return None
+        return self.annotation_ids[best], score
+
+
+_indexes: OrderedDict[str, AnnotationReplyIndex] = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_annotation_reply_index(app_id: str, tenant_id: str) -> AnnotationReplyIndex:
+    """
+    Get the annotation reply index of an app, rebuilt when the annotations of the app changed
+
+    :param app_id: app id
+    :param tenant_id: tenant id
+    :return: annotation reply index
+    """
+    # read the version before the annotations, a write in between only causes another rebuild
+    version = _get_version(app_id)
+    with _indexes_lock:
+        index = _indexes.get(app_id)
+        if index is not None and index.version == version:
+            _indexes.move_to_end(app_id)
+            return index
+
+    index = _build_index(app_id, tenant_id, version)
+    with _indexes_lock:
+        _indexes[app_id] = index
+        _indexes.move_to_end(app_id)
+        while len(_indexes) > dify_config.ANNOTATION_REPLY_INDEX_MAX_APPS:
+            _indexes.popitem(last=False)
+    return index
+
+
+def invalidate_annotation_reply_index(app_id: str) -> None:
+    """
+    Invalidate the annotation reply index of an app in every process, after its annotations
+    or annotation reply setting are written
+
+    :param app_id: app id
+    """
+    redis_client.set(_version_key(app_id), uuid.uuid4().hex, ex=_VERSION_KEY_TTL)
+
+
+def _build_index(app_id: str, tenant_id: str, version: str) -> AnnotationReplyIndex:
+    annotation_setting = db.session.query(AppAnnotationSetting).filter(AppAnnotationSetting.app_id == app_id).first()
+    if not annotation_setting:
+        return AnnotationReplyIndex(version=version)
+
+    collection_binding_detail = annotation_setting.collection_binding_detail
+    index = AnnotationReplyIndex(
+        version=version,
+        enabled=True,
+        score_threshold=annotation_setting.score_threshold or 1,
+        embedding_provider_name=collection_binding_detail.provider_name,
+        embedding_model_name=collection_binding_detail.model_name,
+    )
+    index.collection_binding_id = DatasetCollectionBindingService.get_dataset_collection_binding(
+        index.embedding_provider_name, index.embedding_model_name, "annotation"
+    ).id
+
+    annotations = (
+        db.session.query(MessageAnnotation.id, MessageAnnotation.question)
+        .filter(MessageAnnotation.app_id == app_id, MessageAnnotation.question.isnot(None))
+        .order_by(MessageAnnotation.created_at)
+        .all()
+    )
+    index.questions = {_hash_question(question): annotation_id for annotation_id, question in annotations}
+
+    if not annotations:
+        index.embeddings = np.empty((0, 0), dtype=np.float32)
+    elif len(annotations) <= dify_config.ANNOTATION_REPLY_INDEX_MAX_ANNOTATIONS:
+        # the question embeddings are cached in the embeddings table when the annotations are indexed
+        embeddings = get_annotation_embeddings(
+            tenant_id, index.embedding_provider_name, index.embedding_model_name
+        ).embed_documents([question for _, question in annotations])
+        # questions failing to embed are left to the vector store
+        if len(embeddings) == len(annotations):
+            index.annotation_ids = [annotation_id for annotation_id, _ in annotations]
+            index.embeddings = np.asarray(embeddings, dtype=np.float32)
+
+    return index
+
+
+def get_annotation_embeddings(tenant_id: str, provider_name: str, model_name: str) -> CacheEmbedding:
+    model_instance = ModelManager().get_model_instance(
+        tenant_id=tenant_id,
+        provider=provider_name,
+        model_type=ModelType.TEXT_EMBEDDING,
+        model=model_name,
+    )
+    return CacheEmbedding(model_instance)
+
+
+def _get_version(app_id: str) -> str:
+    key = _version_key(app_id)
+    version = redis_client.get(key)
+    if version is None:
+        token = uuid.uuid4().hex
+        if redis_client.set(key, token, ex=_VERSION_KEY_TTL, nx=True):
+            return token
+        version = redis_client.get(key) or token
+    return version.decode("utf-8") if isinstance(version, bytes) else str(version)
+
+
+def _version_key(app_id: str) -> str:
+    return f"{_VERSION_KEY_PREFIX}:{app_id}"
+
+
+def _hash_question(question: str) -> bytes:
+    return hashlib.sha256(" ".join(question.split()).casefold().encode("utf-8")).digest()
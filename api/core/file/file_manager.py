@@ -1,5 +1,6 @@
 import base64
 from collections.abc import Mapping
+from typing import Optional
 
 from configs import dify_config
 from core.helper import ssrf_proxy
@@ -11,7 +12,7 @@ from core.model_runtime.entities import (
 )
 from core.model_runtime.entities.message_entities import PromptMessageContentUnionTypes
 from core.tools.signature import sign_tool_file
-from extensions.ext_storage import storage
+from extensions.ext_storage import storage, storage_cache
 
 from . import helpers
 from .enums import FileAttribute
@@ -73,7 +74,7 @@ def to_prompt_message_content(
 
 def download(f: File, /):
     if f.transfer_method in (FileTransferMethod.TOOL_FILE, FileTransferMethod.LOCAL_FILE):
-        return _download_file_content(f._storage_key)
+        return _download_file_content(f._storage_key, version=f.related_id)
     elif f.transfer_method == FileTransferMethod.REMOTE_URL:
         response = ssrf_proxy.get(f.remote_url, follow_redirects=True)
         response.raise_for_status()
@@ -81,7 +82,7 @@ def download(f: File, /):
     raise ValueError(f"unsupported transfer method: {f.transfer_method}")
 
 
-def _download_file_content(path: str, /):
+def _download_file_content(path: str, /, *, version: Optional[str] = None):
     """
     Download and return the contents of a file as bytes.
 
@@ -89,6 +90,7 @@ def _download_file_content(path: str, /):
 
     Args:
         path (str): The path to the file in storage.
+        version (Optional[str]): Version of the file content, files with a version are read through the storage cache.
 
     Returns:
         bytes: The contents of the file as a bytes object.
@@ -96,7 +98,7 @@ def _download_file_content(path: str, /):
     Raises:
         ValueError: If the loaded file is not a bytes object.
     """
-    data = storage.load(path, stream=False)
+    data = storage_cache.load(path, version) if version else storage.load(path, stream=False)
     if not isinstance(data, bytes):
         raise ValueError(f"file {path} is not a bytes object")
     return data
@@ -108,9 +110,10 @@ def _get_encoded_string(f: File, /):
             response = ssrf_proxy.get(f.remote_url, follow_redirects=True)
             response.raise_for_status()
             data = response.content
-        case FileTransferMethod.LOCAL_FILE:
-            data = _download_file_content(f._storage_key)
-        case FileTransferMethod.TOOL_FILE:
+        case FileTransferMethod.LOCAL_FILE | FileTransferMethod.TOOL_FILE:
+            # upload and tool files are immutable, their record id versions the content
+            if f.related_id:
+                return storage_cache.load_base64(f._storage_key, f.related_id)
             data = _download_file_content(f._storage_key)
 
     encoded_string = base64.b64encode(data).decode("utf-8")
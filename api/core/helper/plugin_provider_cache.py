@@ -0,0 +1,176 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from configs import dify_config
+from extensions.ext_redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+# how long a finished installation task is remembered as already invalidated, in seconds
+TASK_INVALIDATED_TTL = 24 * 60 * 60
+
+
+@dataclass
+class _CacheEntry:
+    value: Any
+    version: str
+    expires_at: float
+
+
+@dataclass
+class _Flight:
+    done: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    error: Optional[BaseException] = None
+
+
+class PluginProviderCache:
+    """
+    Process level cache of plugin provider declarations fetched from the plugin daemon.
+
+    Entries are scoped to a tenant and stamped with the tenant's plugin installation version,
+    which is bumped in redis whenever a plugin is installed, upgraded or uninstalled, so every
+    process drops its stale declarations on the next lookup. Concurrent misses of the same key
+    share a single fetch.
+    """
+
+    def __init__(self, name: str, ttl: int, max_size: int) -> None:
+        """
+        :param name: name of the cached declarations
+        :param ttl: seconds an entry is kept, bounds staleness of changes made outside of dify, 0 to disable
+        :param max_size: max entries kept, least recently used entries are evicted first
+        """
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple[str, Hashable], _CacheEntry] = OrderedDict()
+        self._flights: dict[tuple[str, Hashable, str], _Flight] = {}
+        self._lock = threading.Lock()
+
+    def get_or_fetch(self, tenant_id: str, key: Hashable, fetch_fn: Callable[[], Any]) -> Any:
+        """
+        Get the cached declarations, fetch them if they are missing, expired or stale
+
+        :param tenant_id: tenant id
+        :param key: key of the declarations in the tenant
+        :param fetch_fn: fetch the declarations from the plugin daemon, errors are not cached
+        :return: cached declarations, shared between callers and must not be mutated
+        """
+        if self.ttl <= 0:
+            return fetch_fn()
+
+        version = self.get_installation_version(tenant_id)
+        cache_key = (tenant_id, key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry and entry.version == version and entry.expires_at > time.monotonic():
+                self._entries.move_to_end(cache_key)
+                return entry.value
+
+            flight_key = (tenant_id, key, version)
+            flight = self._flights.get(flight_key)
+            is_leader = flight is None
+            if flight is None:
+                flight = self._flights[flight_key] = _Flight()
+
+        if not is_leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = fetch_fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            with self._lock:
+                self._entries[cache_key] = _CacheEntry(
+                    value=flight.value, version=version, expires_at=time.monotonic() + self.ttl
+                )
+                self._entries.move_to_end(cache_key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        finally:
+            with self._lock:
+                self._flights.pop(flight_key, None)
+            flight.done.set()
+
+        return flight.value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def get_installation_version(tenant_id: str) -> str:
+        """
+        Get the plugin installation version of a tenant
+
+        :param tenant_id: tenant id
+        :return: version stamp
+        """
+        try:
+            version = redis_client.get(PluginProviderCache._version_key(tenant_id))
+        except Exception:
+            logger.exception("Failed to get plugin installation version")
+            return ""
+
+        if isinstance(version, bytes):
+            version = version.decode("utf-8")
+        return str(version or 0)
+
+    @staticmethod
+    def invalidate(tenant_id: str) -> None:
+        """
+        Bump the plugin installation version of a tenant, cached declarations of the tenant
+        are refetched by every process on their next lookup
+
+        :param tenant_id: tenant id
+        """
+        try:
+            redis_client.incr(PluginProviderCache._version_key(tenant_id))
+        except Exception:
+            logger.exception("Failed to bump plugin installation version")
+
+    @staticmethod
+    def invalidate_on_task_success(tenant_id: str, task_id: str) -> None:
+        """
+        Bump the plugin installation version of a tenant once for a finished installation task,
+        however often the task is polled
+
+        :param tenant_id: tenant id
+        :param task_id: plugin installation task id
+        """
+        try:
+            if not redis_client.set(
+                f"plugin_installation_task_invalidated:{task_id}", 1, nx=True, ex=TASK_INVALIDATED_TTL
+            ):
+                return
+        except Exception:
+            logger.exception("Failed to mark plugin installation task")
+
+        PluginProviderCache.invalidate(tenant_id)
+
+    @staticmethod
+    def _version_key(tenant_id: str) -> str:
+        return f"plugin_installation_version:tenant_id:{tenant_id}"
+
+
+plugin_model_provider_cache = PluginProviderCache(
+    name="plugin_model_providers",
+    ttl=dify_config.PLUGIN_PROVIDER_CACHE_TTL,
+    max_size=dify_config.PLUGIN_PROVIDER_CACHE_MAX_SIZE,
+)
+
+plugin_tool_provider_cache = PluginProviderCache(
+    name="plugin_tool_providers",
+    ttl=dify_config.PLUGIN_PROVIDER_CACHE_TTL,
+    max_size=dify_config.PLUGIN_PROVIDER_CACHE_MAX_SIZE,
+)
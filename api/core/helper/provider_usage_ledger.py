@@ -0,0 +1,248 @@
+from datetime import datetime
+from typing import Optional
+
+from redis.exceptions import ResponseError
+from sqlalchemy import BigInteger, and_, bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from configs import dify_config
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.provider import Provider, ProviderType
+
+
+class ProviderUsageLedger:
+    """
+    Redis ledger of the hosted quota used and the last use of providers, folded back into the providers table
+    in batches by the `flush_provider_usage_ledger_task` beat task instead of updating the provider row of a
+    tenant on every LLM call and message.
+
+    The quota used is kept as an absolute counter per (tenant, provider, quota type), seeded from the
+    providers table on first use, and written back with GREATEST(), so a flush interrupted before its
+    bookkeeping is simply applied again. A flush renames the set of updated counters to a flushing set once
+    and writes it back, counters updated meanwhile are left to the next flush, as are the counters updated
+    before a flush that finds the leftovers of a crashed one.
+    """
+
+    _KEY_PREFIX = "provider_usage_ledger"
+    _DIRTY_KEY = f"{_KEY_PREFIX}:dirty"
+    _FLUSHING_KEY = f"{_KEY_PREFIX}:flushing"
+    _LAST_USED_KEY = f"{_KEY_PREFIX}:last_used"
+    # idle counters expire once written back, to be seeded again from the providers table
+    _QUOTA_KEY_TTL = 7 * 24 * 60 * 60
+
+    @property
+    def enabled(self) -> bool:
+        return dify_config.PROVIDER_USAGE_LEDGER_ENABLED
+
+    def deduct_quota(self, *, tenant_id: str, provider_name: str, quota_type: str, amount: int) -> bool:
+        """
+        Deduct hosted quota, unless the quota is already used up
+
+        :param tenant_id: workspace id
+        :param provider_name: provider name of the provider record
+        :param quota_type: quota type of the provider record
+        :param amount: quota to deduct
+        :return: False when the quota is used up or the provider record does not exist
+        """
+        key = self._quota_key(tenant_id, provider_name, quota_type)
+        limit = redis_client.hget(key, "limit")
+        if limit is None:
+            limit = self._seed_quota(key, tenant_id, provider_name, quota_type)
+            if limit is None:
+                return False
+
+        pipeline = redis_client.pipeline(transaction=False)
+        pipeline.hincrby(key, "used", amount)
+        pipeline.sadd(self._DIRTY_KEY, key)
+        used, _ = pipeline.execute()
+
+        limit = int(limit)
+        if limit != -1 and used - amount >= limit:
+            # the quota was used up before this deduction, same as the `quota_limit > quota_used` update filter
+            redis_client.hincrby(key, "used", -amount)
+            return False
+        return True
+
+    def touch_last_used(self, *, tenant_id: str, provider_name: str, last_used: datetime) -> None:
+        """
+        Record the last use of the provider records of a provider
+
+        :param tenant_id: workspace id
+        :param provider_name: provider name
+        :param last_used: naive UTC time of the use
+        """
+        redis_client.hset(self._LAST_USED_KEY, f"{tenant_id}:{provider_name}", last_used.isoformat())
+
+    def get_quota_used(self, tenant_id: str, provider_name: str, quota_type: str) -> Optional[int]:
+        """
+        Get the quota used recorded by the ledger, including usage not written back yet
+
+        :return: quota used, None when the ledger has no counter for the provider record
+        """
+        used = redis_client.hget(self._quota_key(tenant_id, provider_name, quota_type), "used")
+        return int(used) if used is not None else None
+
+    def flush(self) -> int:
+        """
+        Write the quota used and last uses recorded since the previous flush back to the providers table
+
+        :return: number of provider counters written back
+        """
+        return self._flush_quota() + self._flush_last_used()
+
+    def _flush_quota(self) -> int:
+        batch_size = dify_config.PROVIDER_USAGE_LEDGER_FLUSH_BATCH_SIZE
+        flushed = 0
+        try:
+            # fails when a crashed flush left its keys
+            redis_client.renamenx(self._DIRTY_KEY, self._FLUSHING_KEY)
+        except ResponseError:
+            # no key updated since the previous flush
+            pass
+
+        while True:
+            keys = [self._decode(key) for key in redis_client.srandmember(self._FLUSHING_KEY, batch_size) or []]
+            if not keys:
+                return flushed
+
+            pipeline = redis_client.pipeline(transaction=False)
+            for key in keys:
+                pipeline.hgetall(key)
+            counters = {
+                key: {self._decode(field): self._decode(value) for field, value in counter.items()}
+                for key, counter in zip(keys, pipeline.execute())
+            }
+            # counters expired, or recreated without their seed by a deduction racing the expiry
+            counters = {key: counter for key, counter in counters.items() if "tenant_id" in counter}
+
+            limits = self._write_back_quota(list(counters.values()))
+
+            pipeline = redis_client.pipeline(transaction=False)
+            for key, counter in counters.items():
+                limit = limits.get((counter["tenant_id"], counter["provider_name"], counter["quota_type"]))
+                if limit is not None:
+                    # pick up quota limit changes made by billing
+                    pipeline.hset(key, "limit", limit)
+                pipeline.expire(key, self._QUOTA_KEY_TTL)
+            pipeline.srem(self._FLUSHING_KEY, *keys)
+            pipeline.execute()
+            flushed += len(counters)
+
+    @staticmethod
+    def _write_back_quota(counters: list[dict[str, str]]) -> dict[tuple[str, str, str], int]:
+        if not counters:
+            return {}
+
+        stmt = (
+            update(Provider)
+            .where(
+                Provider.tenant_id == bindparam("b_tenant_id"),
+                Provider.provider_name == bindparam("b_provider_name"),
+                Provider.provider_type == ProviderType.SYSTEM.value,
+                Provider.quota_type == bindparam("b_quota_type"),
+            )
+            .values(quota_used=func.greatest(Provider.quota_used, bindparam("b_quota_used", type_=BigInteger)))
+        )
+        with Session(db.engine) as session:
+            # executemany on the connection, the session would run an ORM bulk update by primary key
+            session.connection().execute(
+                stmt,
+                [
+                    {
+                        "b_tenant_id": counter["tenant_id"],
+                        "b_provider_name": counter["provider_name"],
+                        "b_quota_type": counter["quota_type"],
+                        "b_quota_used": int(counter["used"]),
+                    }
+                    for counter in counters
+                ],
+            )
+            rows = session.execute(
+                select(Provider.tenant_id, Provider.provider_name, Provider.quota_type, Provider.quota_limit).where(
+                    Provider.tenant_id.in_({counter["tenant_id"] for counter in counters}),
+                    Provider.provider_type == ProviderType.SYSTEM.value,
+                )
+            ).all()
+            session.commit()
+
+        return {
+            (tenant_id, provider_name, quota_type or ""): quota_limit
+            for tenant_id, provider_name, quota_type, quota_limit in rows
+            if quota_limit is not None
+        }
+
+    def _flush_last_used(self) -> int:
+        last_used = {
+            self._decode(field): self._decode(value)
+            for field, value in (redis_client.hgetall(self._LAST_USED_KEY) or {}).items()
+        }
+        if not last_used:
+            return 0
+
+        stmt = (
+            update(Provider)
+            .where(
+                and_(
+                    Provider.tenant_id == bindparam("b_tenant_id"),
+                    Provider.provider_name == bindparam("b_provider_name"),
+                )
+            )
+            .values(
+                last_used=func.greatest(
+                    func.coalesce(Provider.last_used, bindparam("b_last_used")), bindparam("b_last_used")
+                )
+            )
+        )
+        params = []
+        for field, value in last_used.items():
+            tenant_id, provider_name = field.split(":", 1)
+            params.append(
+                {
+                    "b_tenant_id": tenant_id,
+                    "b_provider_name": provider_name,
+                    "b_last_used": datetime.fromisoformat(value),
+                }
+            )
+        with Session(db.engine) as session:
+            session.connection().execute(stmt, params)
+            session.commit()
+
+        # uses recorded meanwhile are lost, last_used is informational and a later use records it again
+        redis_client.hdel(self._LAST_USED_KEY, *last_used.keys())
+        return len(last_used)
+
+    def _seed_quota(self, key: str, tenant_id: str, provider_name: str, quota_type: str) -> Optional[str]:
+        with Session(db.engine) as session:
+            provider = session.execute(
+                select(Provider.quota_used, Provider.quota_limit).where(
+                    Provider.tenant_id == tenant_id,
+                    Provider.provider_name == provider_name,
+                    Provider.provider_type == ProviderType.SYSTEM.value,
+                    Provider.quota_type == quota_type,
+                )
+            ).first()
+        if provider is None or provider.quota_limit is None:
+            return None
+
+        pipeline = redis_client.pipeline(transaction=False)
+        # concurrent seeds keep the first counter
+        pipeline.hsetnx(key, "used", provider.quota_used or 0)
+        pipeline.hsetnx(key, "limit", provider.quota_limit)
+        pipeline.hsetnx(key, "tenant_id", tenant_id)
+        pipeline.hsetnx(key, "provider_name", provider_name)
+        pipeline.hsetnx(key, "quota_type", quota_type)
+        pipeline.expire(key, self._QUOTA_KEY_TTL)
+        pipeline.execute()
+        return str(provider.quota_limit)
+
+    @classmethod
+    def _quota_key(cls, tenant_id: str, provider_name: str, quota_type: str) -> str:
+        return f"{cls._KEY_PREFIX}:quota:{tenant_id}:{provider_name}:{quota_type}"
+
+    @staticmethod
+    def _decode(value) -> str:
+        return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+
+provider_usage_ledger = ProviderUsageLedger()
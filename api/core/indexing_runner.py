@@ -6,9 +6,10 @@ import re
 import threading
 import time
 import uuid
+from collections.abc import Iterator
 from typing import Any, Optional, cast
 
-from flask import current_app
+from flask import Flask, current_app
 from flask_login import current_user
 from sqlalchemy.orm.exc import ObjectDeletedError
 
@@ -20,10 +21,13 @@ from core.model_runtime.entities.model_entities import ModelType
 from core.rag.cleaner.clean_processor import CleanProcessor
 from core.rag.datasource.keyword.keyword_factory import Keyword
 from core.rag.docstore.dataset_docstore import DatasetDocumentStore
+from core.rag.embedding.embedding_usage import EmbeddingTokenCache, EmbeddingUsageRecorder, record_embedding_usage
 from core.rag.extractor.entity.extract_setting import ExtractSetting
 from core.rag.index_processor.constant.index_type import IndexType
 from core.rag.index_processor.index_processor_base import BaseIndexProcessor
 from core.rag.index_processor.index_processor_factory import IndexProcessorFactory
+from core.rag.index_processor.indexing_pipeline import IndexingPipeline
+from core.rag.index_processor.qa_generation import QAGenerationCheckpoint
 from core.rag.models.document import ChildDocument, Document
 from core.rag.splitter.fixed_text_splitter import (
     EnhanceRecursiveCharacterTextSplitter,
@@ -38,6 +42,7 @@ from libs import helper
 from models.dataset import ChildChunk, Dataset, DatasetProcessRule, DocumentSegment
 from models.dataset import Document as DatasetDocument
 from models.model import UploadFile
+from services.entities.knowledge_entities.knowledge_entities import ParentMode
 from services.feature_service import FeatureService
 
 
@@ -45,59 +50,126 @@ class IndexingRunner:
     def __init__(self):
         self.storage = storage
         self.model_manager = ModelManager()
+        self.embedding_token_cache = EmbeddingTokenCache()
+        # chunk loads running at once, each with its own database session, across the documents indexed concurrently
+        self._load_slots = threading.BoundedSemaphore(dify_config.INDEXING_PIPELINE_EMBEDDING_WORKERS)
 
     def run(self, dataset_documents: list[DatasetDocument]):
         """Run the indexing process."""
-        for dataset_document in dataset_documents:
-            try:
-                # get dataset
-                dataset = db.session.query(Dataset).filter_by(id=dataset_document.dataset_id).first()
-
-                if not dataset:
-                    raise ValueError("no dataset found")
-
-                # get the process rule
-                processing_rule = (
-                    db.session.query(DatasetProcessRule)
-                    .filter(DatasetProcessRule.id == dataset_document.dataset_process_rule_id)
-                    .first()
+        if not dataset_documents:
+            return
+
+        # the datasets and process rules shared by the documents, queried once
+        dataset_ids = {dataset_document.dataset_id for dataset_document in dataset_documents}
+        datasets = {
+            dataset.id: dataset for dataset in db.session.query(Dataset).filter(Dataset.id.in_(dataset_ids)).all()
+        }
+        process_rule_ids = {dataset_document.dataset_process_rule_id for dataset_document in dataset_documents}
+        processing_rules = {
+            processing_rule.id: processing_rule
+            for processing_rule in db.session.query(DatasetProcessRule)
+            .filter(DatasetProcessRule.id.in_(process_rule_ids))
+            .all()
+        }
+
+        workers = min(dify_config.INDEXING_DOCUMENT_WORKERS, len(dataset_documents))
+        if workers <= 1:
+            for dataset_document in dataset_documents:
+                self._run_document(
+                    dataset_document,
+                    datasets.get(dataset_document.dataset_id),
+                    processing_rules.get(dataset_document.dataset_process_rule_id),
                 )
-                if not processing_rule:
-                    raise ValueError("no process rule found")
-                index_type = dataset_document.doc_form
-                index_processor = IndexProcessorFactory(index_type).init_index_processor()
-                # extract
-                text_docs = self._extract(index_processor, dataset_document, processing_rule.to_dict())
-
-                # transform
-                documents = self._transform(
-                    index_processor, dataset, text_docs, dataset_document.doc_language, processing_rule.to_dict()
-                )
-                # save segment
-                self._load_segments(dataset, dataset_document, documents)
-
-                # load
-                self._load(
-                    index_processor=index_processor,
-                    dataset=dataset,
-                    dataset_document=dataset_document,
-                    documents=documents,
+            return
+
+        # index the documents concurrently, each in its own app context and database session
+        flask_app = current_app._get_current_object()  # type: ignore
+        progress = _IndexingProgress(len(dataset_documents))
+
+        def run_document(
+            document_id: str,
+            dataset_document: DatasetDocument,
+            dataset: Optional[Dataset],
+            processing_rule: Optional[DatasetProcessRule],
+        ) -> None:
+            with flask_app.app_context():
+                try:
+                    # attach copies of the loaded rows to the session of the thread without querying them again
+                    self._run_document(
+                        db.session.merge(dataset_document, load=False),
+                        db.session.merge(dataset, load=False) if dataset else None,
+                        db.session.merge(processing_rule, load=False) if processing_rule else None,
+                    )
+                finally:
+                    progress.document_done(document_id)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    run_document,
+                    dataset_document.id,
+                    dataset_document,
+                    datasets.get(dataset_document.dataset_id),
+                    processing_rules.get(dataset_document.dataset_process_rule_id),
                 )
-            except DocumentIsPausedError:
-                raise DocumentIsPausedError("Document paused, document id: {}".format(dataset_document.id))
-            except ProviderTokenNotInitError as e:
-                dataset_document.indexing_status = "error"
-                dataset_document.error = str(e.description)
-                dataset_document.stopped_at = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
-                db.session.commit()
-            except ObjectDeletedError:
-                logging.warning("Document deleted, document id: {}".format(dataset_document.id))
-            except Exception as e:
-                logging.exception("consume document failed")
-                dataset_document.indexing_status = "error"
-                dataset_document.error = str(e)
-                dataset_document.stopped_at = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
-                db.session.commit()
+                for dataset_document in dataset_documents
+            ]
+
+        # a paused document does not stop the other documents, it is reported once they are done
+        for future in futures:
+            future.result()
+
+    def _run_document(
+        self,
+        dataset_document: DatasetDocument,
+        dataset: Optional[Dataset],
+        processing_rule: Optional[DatasetProcessRule],
+    ) -> None:
+        try:
+            if not dataset:
+                raise ValueError("no dataset found")
+
+            if not processing_rule:
+                raise ValueError("no process rule found")
+            process_rule = processing_rule.to_dict()
+            index_type = dataset_document.doc_form
+            index_processor = IndexProcessorFactory(index_type).init_index_processor()
+            if self._is_pipeline_supported(dataset, dataset_document, process_rule):
+                self._run_pipeline(index_processor, dataset, dataset_document, process_rule)
+                return
+
+            # extract
+            text_docs = self._extract(index_processor, dataset_document, process_rule)
+
+            # transform
+            documents = self._transform(
+                index_processor, dataset, text_docs, dataset_document.doc_language, process_rule
+            )
+            # save segment
+            self._load_segments(dataset, dataset_document, documents)
+
+            # load
+            self._load(
+                index_processor=index_processor,
+                dataset=dataset,
+                dataset_document=dataset_document,
+                documents=documents,
+            )
+        except DocumentIsPausedError:
+            raise DocumentIsPausedError("Document paused, document id: {}".format(dataset_document.id))
+        except ProviderTokenNotInitError as e:
+            dataset_document.indexing_status = "error"
+            dataset_document.error = str(e.description)
+            dataset_document.stopped_at = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+            db.session.commit()
+        except ObjectDeletedError:
+            logging.warning("Document deleted, document id: {}".format(dataset_document.id))
+        except Exception as e:
+            logging.exception("consume document failed")
+            dataset_document.indexing_status = "error"
+            dataset_document.error = str(e)
+            dataset_document.stopped_at = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+            db.session.commit()
 
     def run_in_splitting_status(self, dataset_document: DatasetDocument):
         """Run the indexing process when the index_status is splitting."""
@@ -587,6 +659,130 @@ class IndexingRunner:
                 DatasetDocument.error: None,
             },
         )
+        self._delete_qa_generation_checkpoint(dataset_document)
+
+    @staticmethod
+    def _is_pipeline_supported(dataset: Dataset, dataset_document: DatasetDocument, process_rule: dict) -> bool:
+        """
+        Whether the document can be split page by page and indexed through the streaming pipeline.
+        Economy datasets build one keyword index of the whole document and full-doc parent-child
+        chunks span every page, so both need the whole document at once.
+        """
+        if dataset.indexing_technique != "high_quality":
+            return False
+
+        if dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX:
+            rules = process_rule.get("rules") or {}
+            return rules.get("parent_mode") != ParentMode.FULL_DOC
+
+        return True
+
+    def _run_pipeline(
+        self,
+        index_processor: BaseIndexProcessor,
+        dataset: Dataset,
+        dataset_document: DatasetDocument,
+        process_rule: dict,
+    ) -> None:
+        """
+        extract, split, save segments and load the document with overlapping stages
+        """
+        text_docs = self._extract(index_processor, dataset_document, process_rule)
+
+        flask_app = current_app._get_current_object()  # type: ignore
+        splitter_embedding_model_instance = self._get_splitter_embedding_model_instance(dataset)
+        embedding_model_instance = self.model_manager.get_model_instance(
+            tenant_id=dataset.tenant_id,
+            provider=dataset.embedding_model_provider,
+            model_type=ModelType.TEXT_EMBEDDING,
+            model=dataset.embedding_model,
+        )
+        doc_store = DatasetDocumentStore(
+            dataset=dataset, user_id=dataset_document.created_by, document_id=dataset_document.id
+        )
+        splitting_completed_at = None
+
+        def split(pages: list[Document]) -> list[Document]:
+            with flask_app.app_context():
+                return index_processor.transform(
+                    pages,
+                    embedding_model_instance=splitter_embedding_model_instance,
+                    process_rule=process_rule,
+                    tenant_id=dataset.tenant_id,
+                    doc_language=dataset_document.doc_language,
+                )
+
+        def persist(chunks: list[Document]) -> None:
+            nonlocal splitting_completed_at
+            if splitting_completed_at is None:
+                self._update_document_index_status(document_id=dataset_document.id, after_indexing_status="indexing")
+            else:
+                self._check_document_paused_status(dataset_document.id)
+
+            doc_store.add_documents(
+                docs=chunks,
+                save_child=dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX,
+                token_cache=self.embedding_token_cache,
+            )
+            db.session.query(DocumentSegment).filter(
+                DocumentSegment.document_id == dataset_document.id,
+                DocumentSegment.index_node_id.in_([chunk.metadata["doc_id"] for chunk in chunks]),
+            ).update(
+                {
+                    DocumentSegment.status: "indexing",
+                    DocumentSegment.indexing_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
+                }
+            )
+            db.session.commit()
+            splitting_completed_at = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+
+        def load(chunks: list[Document]) -> int:
+            return self._process_chunk(
+                flask_app, index_processor, chunks, dataset, dataset_document, embedding_model_instance
+            )
+
+        pipeline = IndexingPipeline(
+            split_fn=split,
+            persist_fn=persist,
+            load_fn=load,
+            page_batch_size=dify_config.INDEXING_PIPELINE_PAGE_BATCH_SIZE,
+            split_workers=dify_config.INDEXING_PIPELINE_SPLIT_WORKERS,
+            load_batch_size=dify_config.INDEXING_PIPELINE_EMBEDDING_BATCH_SIZE,
+            load_workers=dify_config.INDEXING_PIPELINE_EMBEDDING_WORKERS,
+            queue_size=dify_config.INDEXING_PIPELINE_QUEUE_SIZE,
+        )
+        indexing_start_at = time.perf_counter()
+        # hand the pages over to the pipeline so split pages can be freed
+        stats = pipeline.run(self._release_pages(text_docs))
+        indexing_end_at = time.perf_counter()
+
+        # update document status to completed
+        cur_time = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+        self._update_document_index_status(
+            document_id=dataset_document.id,
+            after_indexing_status="completed",
+            extra_update_params={
+                DatasetDocument.cleaning_completed_at: splitting_completed_at or cur_time,
+                DatasetDocument.splitting_completed_at: splitting_completed_at or cur_time,
+                DatasetDocument.tokens: stats.tokens,
+                DatasetDocument.completed_at: cur_time,
+                DatasetDocument.indexing_latency: indexing_end_at - indexing_start_at,
+                DatasetDocument.error: None,
+            },
+        )
+        self._delete_qa_generation_checkpoint(dataset_document)
+
+    @staticmethod
+    def _delete_qa_generation_checkpoint(dataset_document: DatasetDocument) -> None:
+        # the generated QA pairs are indexed, there is nothing left to resume
+        if dataset_document.doc_form == IndexType.QA_INDEX:
+            QAGenerationCheckpoint.delete(dataset_document.id)
+
+    @staticmethod
+    def _release_pages(text_docs: list[Document]) -> Iterator[Document]:
+        text_docs.reverse()
+        while text_docs:
+            yield text_docs.pop()
 
     @staticmethod
     def _process_keyword_index(flask_app, dataset_id, document_id, documents):
@@ -614,19 +810,25 @@ class IndexingRunner:
                 db.session.commit()
 
     def _process_chunk(
-        self, flask_app, index_processor, chunk_documents, dataset, dataset_document, embedding_model_instance
-    ):
-        with flask_app.app_context():
+        self,
+        flask_app: Flask,
+        index_processor: BaseIndexProcessor,
+        chunk_documents: list[Document],
+        dataset: Dataset,
+        dataset_document: DatasetDocument,
+        embedding_model_instance: Optional[ModelInstance],
+    ) -> int:
+        with self._load_slots, flask_app.app_context():
             # check document is paused
             self._check_document_paused_status(dataset_document.id)
 
+            # load index
+            with record_embedding_usage() as usage_recorder:
+                index_processor.load(dataset, chunk_documents, with_keywords=False)
+
             tokens = 0
             if embedding_model_instance:
-                page_content_list = [document.page_content for document in chunk_documents]
-                tokens += sum(embedding_model_instance.get_text_embedding_num_tokens(page_content_list))
-
-            # load index
-            index_processor.load(dataset, chunk_documents, with_keywords=False)
+                tokens = self._get_embedding_tokens(embedding_model_instance, chunk_documents, usage_recorder)
 
             document_ids = [document.metadata["doc_id"] for document in chunk_documents]
             db.session.query(DocumentSegment).filter(
@@ -646,6 +848,35 @@ class IndexingRunner:
 
             return tokens
 
+    def _get_embedding_tokens(
+        self,
+        embedding_model_instance: ModelInstance,
+        chunk_documents: list[Document],
+        usage_recorder: EmbeddingUsageRecorder,
+    ) -> int:
+        """
+        Tokens of the embedded chunks: the usage reported by the embedding model, plus the cached
+        token counts of texts whose embeddings were already stored and weren't sent to the model.
+        The tokens of parent-child documents are those of their parent chunks, which are not embedded,
+        taken from the counts cached when their segments were saved.
+        """
+        if any(document.children for document in chunk_documents):
+            return sum(
+                self.embedding_token_cache.get_num_tokens(
+                    embedding_model_instance, [document.page_content for document in chunk_documents]
+                )
+            )
+
+        embedded_texts = set(usage_recorder.embedded_texts)
+        loaded_texts: list[str] = [document.page_content for document in chunk_documents]
+        not_embedded_texts = [text for text in loaded_texts if text not in embedded_texts]
+        if not not_embedded_texts:
+            return usage_recorder.tokens
+
+        return usage_recorder.tokens + sum(
+            self.embedding_token_cache.get_num_tokens(embedding_model_instance, not_embedded_texts)
+        )
+
     @staticmethod
     def _check_document_paused_status(document_id: str):
         indexing_cache_key = "document_{}_is_paused".format(document_id)
@@ -683,6 +914,23 @@ class IndexingRunner:
         db.session.query(DocumentSegment).filter_by(document_id=dataset_document_id).update(update_params)
         db.session.commit()
 
+    def _get_splitter_embedding_model_instance(self, dataset: Dataset) -> Optional[ModelInstance]:
+        if dataset.indexing_technique != "high_quality":
+            return None
+
+        if dataset.embedding_model_provider:
+            return self.model_manager.get_model_instance(
+                tenant_id=dataset.tenant_id,
+                provider=dataset.embedding_model_provider,
+                model_type=ModelType.TEXT_EMBEDDING,
+                model=dataset.embedding_model,
+            )
+
+        return self.model_manager.get_default_model_instance(
+            tenant_id=dataset.tenant_id,
+            model_type=ModelType.TEXT_EMBEDDING,
+        )
+
     def _transform(
         self,
         index_processor: BaseIndexProcessor,
@@ -692,20 +940,7 @@ class IndexingRunner:
         process_rule: dict,
     ) -> list[Document]:
         # get embedding model instance
-        embedding_model_instance = None
-        if dataset.indexing_technique == "high_quality":
-            if dataset.embedding_model_provider:
-                embedding_model_instance = self.model_manager.get_model_instance(
-                    tenant_id=dataset.tenant_id,
-                    provider=dataset.embedding_model_provider,
-                    model_type=ModelType.TEXT_EMBEDDING,
-                    model=dataset.embedding_model,
-                )
-            else:
-                embedding_model_instance = self.model_manager.get_default_model_instance(
-                    tenant_id=dataset.tenant_id,
-                    model_type=ModelType.TEXT_EMBEDDING,
-                )
+        embedding_model_instance = self._get_splitter_embedding_model_instance(dataset)
 
         documents = index_processor.transform(
             text_docs,
@@ -724,7 +959,11 @@ class IndexingRunner:
         )
 
         # add document segments
-        doc_store.add_documents(docs=documents, save_child=dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX)
+        doc_store.add_documents(
+            docs=documents,
+            save_child=dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX,
+            token_cache=self.embedding_token_cache,
+        )
 
         # update document status to indexing
         cur_time = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
@@ -748,6 +987,30 @@ class IndexingRunner:
         pass
 
 
+class _IndexingProgress:
+    """
+    Progress of the documents of one indexing run, logged as each document is done
+    """
+
+    def __init__(self, total: int) -> None:
+        self._total = total
+        self._done = 0
+        self._lock = threading.Lock()
+        self._start_at = time.perf_counter()
+
+    def document_done(self, document_id: str) -> None:
+        with self._lock:
+            self._done += 1
+            done = self._done
+        logging.info(
+            "Indexed document %s, %s/%s documents done in %.2fs",
+            document_id,
+            done,
+            self._total,
+            time.perf_counter() - self._start_at,
+        )
+
+
 class DocumentIsPausedError(Exception):
     pass
 
@@ -8,6 +8,7 @@ from typing import Optional
 from pydantic import BaseModel
 
 import contexts
+from core.helper.plugin_provider_cache import plugin_model_provider_cache
 from core.helper.position_helper import get_provider_position_map, sort_to_dict_by_position_map
 from core.model_runtime.entities.model_entities import AIModelEntity, ModelType
 from core.model_runtime.entities.provider_entities import ProviderConfig, ProviderEntity, SimpleProviderEntity
@@ -91,15 +92,22 @@ class ModelProviderFactory:
             plugin_model_providers = []
             contexts.plugin_model_providers.set(plugin_model_providers)
 
-            # Fetch plugin model providers
-            plugin_providers = self.plugin_model_manager.fetch_model_providers(self.tenant_id)
+            # Fetch plugin model providers, shared between requests of the tenant
+            plugin_providers = plugin_model_provider_cache.get_or_fetch(
+                self.tenant_id, "model_providers", self._fetch_plugin_model_providers
+            )
 
             for provider in plugin_providers:
-                provider.declaration.provider = provider.plugin_id + "/" + provider.declaration.provider
-                plugin_model_providers.append(provider)
+                plugin_model_providers.append(provider.model_copy(deep=True))
 
             return plugin_model_providers
 
+    def _fetch_plugin_model_providers(self) -> list[PluginModelProviderEntity]:
+        plugin_providers = self.plugin_model_manager.fetch_model_providers(self.tenant_id)
+        for provider in plugin_providers:
+            provider.declaration.provider = provider.plugin_id + "/" + provider.declaration.provider
+        return list(plugin_providers)
+
     def get_provider_schema(self, provider: str) -> ProviderEntity:
         """
         Get provider schema
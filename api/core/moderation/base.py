@@ -75,6 +75,18 @@ class Moderation(Extensible, ABC):
         """
         raise NotImplementedError
 
+    def moderation_for_outputs_stream(self, text: str, offset: int) -> ModerationOutputsResult:
+        """
+        Moderation for streamed outputs.
+        Called with the LLM output streamed so far each time new content is appended to it,
+        extensions able to review only the content appended since the previous call can override it.
+
+        :param text: LLM output content streamed so far
+        :param offset: length of the content already reviewed by the previous calls
+        :return:
+        """
+        return self.moderation_for_outputs(text)
+
     @classmethod
     def _validate_inputs_and_outputs_config(cls, config: dict, is_preset_response_required: bool) -> None:
         # inputs_config
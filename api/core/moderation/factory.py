@@ -47,3 +47,14 @@ class ModerationFactory:
         :return:
         """
         return self.__extension_instance.moderation_for_outputs(text)
+
+    def moderation_for_outputs_stream(self, text: str, offset: int) -> ModerationOutputsResult:
+        """
+        Moderation for streamed outputs.
+        Called with the LLM output streamed so far each time new content is appended to it.
+
+        :param text: LLM output content streamed so far
+        :param offset: length of the content already reviewed by the previous calls
+        :return:
+        """
+        return self.__extension_instance.moderation_for_outputs_stream(text, offset)
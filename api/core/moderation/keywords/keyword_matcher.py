@@ -0,0 +1,77 @@
+from collections import deque
+from collections.abc import Iterable
+from functools import lru_cache
+
+
+class KeywordMatcher:
+    """
+    Case-insensitive Aho-Corasick automaton over a set of keywords, scanning a text in a single pass
+    whatever the number of keywords.
+    """
+
+    def __init__(self, keywords: Iterable[str]) -> None:
+        # goto transitions, failure links and whether a keyword ends at the node, by node index
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[bool] = [False]
+        self.max_keyword_length = 0
+
+        for keyword in keywords:
+            keyword = keyword.lower()
+            if not keyword:
+                continue
+            self.max_keyword_length = max(self.max_keyword_length, len(keyword))
+            node = 0
+            for char in keyword:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(False)
+                node = next_node
+            self._output[node] = True
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, next_node in self._goto[node].items():
+                queue.append(next_node)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_node] = self._goto[fail].get(char, 0)
+                # a keyword ending at a suffix of the node also ends at the node
+                self._output[next_node] = self._output[next_node] or self._output[self._fail[next_node]]
+
+    def search(self, text: str) -> bool:
+        """
+        Check whether the text contains any of the keywords, ignoring case
+
+        :param text: text to scan
+        :return: True when a keyword is found
+        """
+        if not self.max_keyword_length:
+            return False
+
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for char in text.lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                return True
+        return False
+
+
+@lru_cache(maxsize=256)
+def get_keyword_matcher(keywords: str) -> KeywordMatcher:
+    """
+    Get the matcher of a keywords moderation config, compiled once per config
+
+    :param keywords: keywords separated by new lines, as in the moderation config
+    :return: matcher
+    """
+    return KeywordMatcher(keyword for keyword in keywords.split("\n") if keyword)
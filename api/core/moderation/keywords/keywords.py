@@ -1,7 +1,5 @@
-from collections.abc import Sequence
-from typing import Any
-
 from core.moderation.base import Moderation, ModerationAction, ModerationInputsResult, ModerationOutputsResult
+from core.moderation.keywords.keyword_matcher import KeywordMatcher, get_keyword_matcher
 
 
 class KeywordsModeration(Moderation):
@@ -40,34 +38,36 @@ class KeywordsModeration(Moderation):
             if query:
                 inputs["query__"] = query
 
-            # Filter out empty values
-            keywords_list = [keyword for keyword in self.config["keywords"].split("\n") if keyword]
-
-            flagged = self._is_violated(inputs, keywords_list)
+            flagged = self._is_violated(inputs, self._get_matcher())
 
         return ModerationInputsResult(
             flagged=flagged, action=ModerationAction.DIRECT_OUTPUT, preset_response=preset_response
         )
 
     def moderation_for_outputs(self, text: str) -> ModerationOutputsResult:
+        return self.moderation_for_outputs_stream(text, 0)
+
+    def moderation_for_outputs_stream(self, text: str, offset: int) -> ModerationOutputsResult:
         flagged = False
         preset_response = ""
         if self.config is None:
             raise ValueError("The config is not set.")
 
         if self.config["outputs_config"]["enabled"]:
-            # Filter out empty values
-            keywords_list = [keyword for keyword in self.config["keywords"].split("\n") if keyword]
+            matcher = self._get_matcher()
+            # text before the offset was scanned already, only keywords spanning the offset can start before it
+            start = max(0, offset - matcher.max_keyword_length + 1)
 
-            flagged = self._is_violated({"text": text}, keywords_list)
+            flagged = matcher.search(text[start:])
             preset_response = self.config["outputs_config"]["preset_response"]
 
         return ModerationOutputsResult(
             flagged=flagged, action=ModerationAction.DIRECT_OUTPUT, preset_response=preset_response
         )
 
-    def _is_violated(self, inputs: dict, keywords_list: list) -> bool:
-        return any(self._check_keywords_in_value(keywords_list, value) for value in inputs.values())
+    def _get_matcher(self) -> KeywordMatcher:
+        assert self.config is not None
+        return get_keyword_matcher(self.config["keywords"])
 
-    def _check_keywords_in_value(self, keywords_list: Sequence[str], value: Any) -> bool:
-        return any(keyword.lower() in str(value).lower() for keyword in keywords_list)
+    def _is_violated(self, inputs: dict, matcher: KeywordMatcher) -> bool:
+        return any(matcher.search(str(value)) for value in inputs.values())
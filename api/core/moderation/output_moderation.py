@@ -1,10 +1,9 @@
 import logging
 import threading
-import time
 from typing import Any, Optional
 
 from flask import Flask, current_app
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 
 from configs import dify_config
 from core.app.apps.base_app_queue_manager import AppQueueManager, PublishFrom
@@ -34,6 +33,15 @@ class OutputModeration(BaseModel):
     final_output: Optional[str] = None
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    # tokens appended since the last moderation pass, joined into the buffer by the worker
+    _pending_tokens: list[str] = PrivateAttr(default_factory=list)
+    _pending_length: int = PrivateAttr(default=0)
+    _pending_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    # set once enough tokens are pending for a moderation pass, or when the thread is stopped
+    _pending_event: threading.Event = PrivateAttr(default_factory=threading.Event)
+    _buffer_size: int = PrivateAttr(default=0)
+    _moderation_factory: Optional[ModerationFactory] = PrivateAttr(default=None)
+
     def should_direct_output(self) -> bool:
         return self.final_output is not None
 
@@ -41,11 +49,15 @@ class OutputModeration(BaseModel):
         return self.final_output or ""
 
     def append_new_token(self, token: str) -> None:
-        self.buffer += token
-
         if not self.thread:
             self.thread = self.start_thread()
 
+        with self._pending_lock:
+            self._pending_tokens.append(token)
+            self._pending_length += len(token)
+            if self._pending_length >= self._buffer_size:
+                self._pending_event.set()
+
     def moderation_completion(self, completion: str, public_event: bool = False) -> tuple[str, bool]:
         self.buffer = completion
         self.is_final_chunk = True
@@ -71,12 +83,12 @@ class OutputModeration(BaseModel):
         return final_output, True
 
     def start_thread(self) -> threading.Thread:
-        buffer_size = dify_config.MODERATION_BUFFER_SIZE
+        self._buffer_size = max(dify_config.MODERATION_BUFFER_SIZE, 1)
         thread = threading.Thread(
             target=self.worker,
             kwargs={
                 "flask_app": current_app._get_current_object(),  # type: ignore
-                "buffer_size": buffer_size if buffer_size > 0 else dify_config.MODERATION_BUFFER_SIZE,
+                "buffer_size": self._buffer_size,
             },
         )
 
@@ -87,23 +99,30 @@ class OutputModeration(BaseModel):
     def stop_thread(self):
         if self.thread and self.thread.is_alive():
             self.thread_running = False
+            self._pending_event.set()
 
     def worker(self, flask_app: Flask, buffer_size: int):
         with flask_app.app_context():
-            current_length = 0
             while self.thread_running:
-                moderation_buffer = self.buffer
-                buffer_length = len(moderation_buffer)
-                if not self.is_final_chunk:
-                    chunk_length = buffer_length - current_length
-                    if 0 <= chunk_length < buffer_size:
-                        time.sleep(1)
-                        continue
+                # woken up by append_new_token once buffer_size characters are pending, or by stop_thread
+                self._pending_event.wait()
+                if not self.thread_running:
+                    break
 
-                current_length = buffer_length
+                with self._pending_lock:
+                    self._pending_event.clear()
+                    pending_tokens, self._pending_tokens = self._pending_tokens, []
+                    self._pending_length = 0
+
+                moderated_length = len(self.buffer)
+                self.buffer += "".join(pending_tokens)
+                moderation_buffer = self.buffer
 
                 result = self.moderation(
-                    tenant_id=self.tenant_id, app_id=self.app_id, moderation_buffer=moderation_buffer
+                    tenant_id=self.tenant_id,
+                    app_id=self.app_id,
+                    moderation_buffer=moderation_buffer,
+                    moderated_length=moderated_length,
                 )
 
                 if not result or not result.flagged:
@@ -113,7 +132,8 @@ class OutputModeration(BaseModel):
                     final_output = result.preset_response
                     self.final_output = final_output
                 else:
-                    final_output = result.text + self.buffer[len(moderation_buffer) :]
+                    with self._pending_lock:
+                        final_output = result.text + "".join(self._pending_tokens)
 
                 # trigger replace event
                 if self.thread_running:
@@ -127,13 +147,18 @@ class OutputModeration(BaseModel):
                 if result.action == ModerationAction.DIRECT_OUTPUT:
                     break
 
-    def moderation(self, tenant_id: str, app_id: str, moderation_buffer: str) -> Optional[ModerationOutputsResult]:
+    def moderation(
+        self, tenant_id: str, app_id: str, moderation_buffer: str, moderated_length: int = 0
+    ) -> Optional[ModerationOutputsResult]:
         try:
-            moderation_factory = ModerationFactory(
-                name=self.rule.type, app_id=app_id, tenant_id=tenant_id, config=self.rule.config
-            )
+            if self._moderation_factory is None:
+                self._moderation_factory = ModerationFactory(
+                    name=self.rule.type, app_id=app_id, tenant_id=tenant_id, config=self.rule.config
+                )
 
-            result: ModerationOutputsResult = moderation_factory.moderation_for_outputs(moderation_buffer)
+            result: ModerationOutputsResult = self._moderation_factory.moderation_for_outputs_stream(
+                moderation_buffer, moderated_length
+            )
             return result
         except Exception as e:
             logger.exception(f"Moderation Output error, app_id: {app_id}")
@@ -1,4 +1,5 @@
 from collections.abc import Generator
+from tempfile import SpooledTemporaryFile
 from typing import Any, Optional
 
 from pydantic import BaseModel
@@ -10,6 +11,9 @@ from core.tools.entities.tool_entities import ToolInvokeMessage, ToolParameter
 
 
 class PluginToolManager(BasePluginClient):
+    # blobs larger than this are spilled to disk while their chunks are received
+    BLOB_SPOOL_MAX_MEMORY_SIZE = 1024 * 1024
+
     def fetch_tool_providers(self, tenant_id: str) -> list[PluginToolProviderEntity]:
         """
         Fetch tool providers for the given tenant.
@@ -111,61 +115,57 @@ class PluginToolManager(BasePluginClient):
             },
         )
 
-        class FileChunk:
-            """
-            Only used for internal processing.
-            """
-
-            bytes_written: int
-            total_length: int
-            data: bytearray
-
-            def __init__(self, total_length: int):
-                self.bytes_written = 0
-                self.total_length = total_length
-                self.data = bytearray(total_length)
-
-        files: dict[str, FileChunk] = {}
-        for resp in response:
-            if resp.type == ToolInvokeMessage.MessageType.BLOB_CHUNK:
-                assert isinstance(resp.message, ToolInvokeMessage.BlobChunkMessage)
-                # Get blob chunk information
-                chunk_id = resp.message.id
-                total_length = resp.message.total_length
-                blob_data = resp.message.blob
-                is_end = resp.message.end
-
-                # Initialize buffer for this file if it doesn't exist
-                if chunk_id not in files:
-                    files[chunk_id] = FileChunk(total_length)
-
-                # If this is the final chunk, yield a complete blob message
-                if is_end:
-                    yield ToolInvokeMessage(
-                        type=ToolInvokeMessage.MessageType.BLOB,
-                        message=ToolInvokeMessage.BlobMessage(blob=files[chunk_id].data),
-                        meta=resp.meta,
-                    )
+        # spill blob chunks to temporary files instead of buffering whole files in memory
+        files: dict[str, SpooledTemporaryFile] = {}
+        try:
+            for resp in response:
+                if resp.type == ToolInvokeMessage.MessageType.BLOB_CHUNK:
+                    assert isinstance(resp.message, ToolInvokeMessage.BlobChunkMessage)
+                    # Get blob chunk information
+                    chunk_id = resp.message.id
+                    blob_data = resp.message.blob
+                    is_end = resp.message.end
+
+                    # Initialize spool file for this file if it doesn't exist
+                    if chunk_id not in files:
+                        files[chunk_id] = self._create_blob_file()
+
+                    # If this is the final chunk, yield a complete blob message
+                    if is_end:
+                        file = files.pop(chunk_id)
+                        size = file.tell()
+                        file.seek(0)
+                        yield ToolInvokeMessage(
+                            type=ToolInvokeMessage.MessageType.BLOB,
+                            message=ToolInvokeMessage.BlobFileMessage(file=file, size=size),
+                            meta=resp.meta,
+                        )
+                    else:
+                        # Check if file is too large (30MB limit)
+                        if files[chunk_id].tell() + len(blob_data) > 30 * 1024 * 1024:
+                            # Delete the file if it's too large
+                            files.pop(chunk_id).close()
+                            # Skip yielding this message
+                            raise ValueError("File is too large which reached the limit of 30MB")
+
+                        # Check if single chunk is too large (8KB limit)
+                        if len(blob_data) > 8192:
+                            # Skip yielding this message
+                            raise ValueError("File chunk is too large which reached the limit of 8KB")
+
+                        # Append the blob data to the spool file
+                        files[chunk_id].write(blob_data)
                 else:
-                    # Check if file is too large (30MB limit)
-                    if files[chunk_id].bytes_written + len(blob_data) > 30 * 1024 * 1024:
-                        # Delete the file if it's too large
-                        del files[chunk_id]
-                        # Skip yielding this message
-                        raise ValueError("File is too large which reached the limit of 30MB")
-
-                    # Check if single chunk is too large (8KB limit)
-                    if len(blob_data) > 8192:
-                        # Skip yielding this message
-                        raise ValueError("File chunk is too large which reached the limit of 8KB")
-
-                    # Append the blob data to the buffer
-                    files[chunk_id].data[
-                        files[chunk_id].bytes_written : files[chunk_id].bytes_written + len(blob_data)
-                    ] = blob_data
-                    files[chunk_id].bytes_written += len(blob_data)
-            else:
-                yield resp
+                    yield resp
+        finally:
+            for file in files.values():
+                file.close()
+
+    def _create_blob_file(self) -> SpooledTemporaryFile:
+        """
+        Create the temporary file a blob is spilled to, closed by the caller
+        """
+        return SpooledTemporaryFile(max_size=self.BLOB_SPOOL_MAX_MEMORY_SIZE)
 
     def validate_provider_credentials(
         self, tenant_id: str, user_id: str, provider: str, credentials: dict[str, Any]
@@ -5,6 +5,7 @@ from sqlalchemy import func
 
 from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
+from core.rag.embedding.embedding_usage import EmbeddingTokenCache
 from core.rag.models.document import Document
 from extensions.ext_database import db
 from models.dataset import ChildChunk, Dataset, DocumentSegment
@@ -60,7 +61,13 @@ class DatasetDocumentStore:
 
         return output
 
-    def add_documents(self, docs: Sequence[Document], allow_update: bool = True, save_child: bool = False) -> None:
+    def add_documents(
+        self,
+        docs: Sequence[Document],
+        allow_update: bool = True,
+        save_child: bool = False,
+        token_cache: Optional[EmbeddingTokenCache] = None,
+    ) -> None:
         max_position = (
             db.session.query(func.max(DocumentSegment.position))
             .filter(DocumentSegment.document_id == self._document_id)
@@ -81,7 +88,10 @@ class DatasetDocumentStore:
 
         if embedding_model:
             page_content_list = [doc.page_content for doc in docs]
-            tokens_list = embedding_model.get_text_embedding_num_tokens(page_content_list)
+            if token_cache:
+                tokens_list = token_cache.get_num_tokens(embedding_model, page_content_list)
+            else:
+                tokens_list = embedding_model.get_text_embedding_num_tokens(page_content_list)
         else:
             tokens_list = [0] * len(docs)
 
@@ -1,4 +1,3 @@
-import base64
 import logging
 from typing import Any, Optional, cast
 
@@ -11,8 +10,10 @@ from core.model_manager import ModelInstance
 from core.model_runtime.entities.model_entities import ModelPropertyKey
 from core.model_runtime.model_providers.__base.text_embedding_model import TextEmbeddingModel
 from core.rag.embedding.embedding_base import Embeddings
+from core.rag.embedding.embedding_usage import get_embedding_usage_recorder
+from core.rag.embedding.query_embedding_batcher import query_embedding_batcher
+from core.rag.embedding.query_embedding_cache import query_embedding_cache
 from extensions.ext_database import db
-from extensions.ext_redis import redis_client
 from libs import helper
 from models.dataset import Embedding
 
@@ -55,12 +56,15 @@ class CacheEmbedding(Embeddings):
                     if model_schema and ModelPropertyKey.MAX_CHUNKS in model_schema.model_properties
                     else 1
                 )
+                usage_recorder = get_embedding_usage_recorder()
                 for i in range(0, len(embedding_queue_texts), max_chunks):
                     batch_texts = embedding_queue_texts[i : i + max_chunks]
 
                     embedding_result = self._model_instance.invoke_text_embedding(
                         texts=batch_texts, user=self._user, input_type=EmbeddingInputType.DOCUMENT
                     )
+                    if usage_recorder:
+                        usage_recorder.record(batch_texts, embedding_result.usage)
 
                     for vector in embedding_result.embeddings:
                         try:
@@ -102,41 +106,33 @@ class CacheEmbedding(Embeddings):
 
     def embed_query(self, text: str) -> list[float]:
         """Embed query text."""
-        # use doc embedding cache or store if not exists
-        hash = helper.generate_text_hash(text)
-        embedding_cache_key = f"{self._model_instance.provider}_{self._model_instance.model}_{hash}"
-        embedding = redis_client.get(embedding_cache_key)
-        if embedding:
-            redis_client.expire(embedding_cache_key, 600)
-            decoded_embedding = np.frombuffer(base64.b64decode(embedding), dtype="float")
-            return [float(x) for x in decoded_embedding]
+        # use query embedding cache or store if not exists
+        provider, model = self._model_instance.provider, self._model_instance.model
+        embedding = query_embedding_cache.get(provider, model, text)
+        if embedding is not None:
+            return embedding
         try:
-            embedding_result = self._model_instance.invoke_text_embedding(
-                texts=[text], user=self._user, input_type=EmbeddingInputType.QUERY
-            )
-
-            embedding_results = embedding_result.embeddings[0]
-            # FIXME: type ignore for numpy here
-            embedding_results = (embedding_results / np.linalg.norm(embedding_results)).tolist()  # type: ignore
-            if np.isnan(embedding_results).any():
+            if query_embedding_batcher.enabled:
+                vector = np.array(query_embedding_batcher.embed_query(self._model_instance, text, self._user))
+            else:
+                embedding_result = self._model_instance.invoke_text_embedding(
+                    texts=[text], user=self._user, input_type=EmbeddingInputType.QUERY
+                )
+                vector = np.array(embedding_result.embeddings[0])
+            normalized = vector / np.linalg.norm(vector)
+            if np.isnan(normalized).any():
                 raise ValueError("Normalized embedding is nan please try again")
+            embedding_results = cast(list[float], normalized.tolist())
         except Exception as ex:
             if dify_config.DEBUG:
                 logging.exception(f"Failed to embed query text '{text[:10]}...({len(text)} chars)'")
             raise ex
 
         try:
-            # encode embedding to base64
-            embedding_vector = np.array(embedding_results)
-            vector_bytes = embedding_vector.tobytes()
-            # Transform to Base64
-            encoded_vector = base64.b64encode(vector_bytes)
-            # Transform to string
-            encoded_str = encoded_vector.decode("utf-8")
-            redis_client.setex(embedding_cache_key, 600, encoded_str)
+            query_embedding_cache.set(provider, model, text, embedding_results)
         except Exception as ex:
             if dify_config.DEBUG:
                 logging.exception(f"Failed to add embedding to redis for the text '{text[:10]}...({len(text)} chars)'")
             raise ex
 
-        return embedding_results  # type: ignore
+        return embedding_results
@@ -0,0 +1,90 @@
+import threading
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from core.model_manager import ModelInstance
+from core.model_runtime.entities.text_embedding_entities import EmbeddingUsage
+from libs import helper
+
+
+class EmbeddingTokenCache:
+    """
+    Token counts of texts keyed by embedding model and text hash, so a chunk is tokenized
+    at most once per indexing job.
+    """
+
+    def __init__(self) -> None:
+        self._tokens: dict[tuple[str, str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def get_num_tokens(self, model_instance: ModelInstance, texts: list[str]) -> list[int]:
+        """
+        Get number of tokens of texts, only uncached texts are sent to the model
+
+        :param model_instance: embedding model instance
+        :param texts: texts
+        :return: number of tokens of each text
+        """
+        keys = [self._key(model_instance, text) for text in texts]
+        with self._lock:
+            tokens = [self._tokens.get(key) for key in keys]
+
+        missing_indices = [i for i, count in enumerate(tokens) if count is None]
+        if missing_indices:
+            missing_tokens = model_instance.get_text_embedding_num_tokens([texts[i] for i in missing_indices])
+            with self._lock:
+                for i, count in zip(missing_indices, missing_tokens):
+                    tokens[i] = count
+                    self._tokens[keys[i]] = count
+
+        return [count or 0 for count in tokens]
+
+    def get(self, model_instance: ModelInstance, text: str) -> Optional[int]:
+        with self._lock:
+            return self._tokens.get(self._key(model_instance, text))
+
+    def set(self, model_instance: ModelInstance, text: str, tokens: int) -> None:
+        with self._lock:
+            self._tokens[self._key(model_instance, text)] = tokens
+
+    @staticmethod
+    def _key(model_instance: ModelInstance, text: str) -> tuple[str, str, str]:
+        return model_instance.provider, model_instance.model, helper.generate_text_hash(text)
+
+
+class EmbeddingUsageRecorder:
+    """
+    Collects the usage reported by the embedding model for the texts embedded while it is active.
+    """
+
+    def __init__(self) -> None:
+        self.tokens = 0
+        self.embedded_texts: list[str] = []
+
+    def record(self, texts: list[str], usage: EmbeddingUsage) -> None:
+        self.tokens += usage.total_tokens
+        self.embedded_texts.extend(texts)
+
+
+_embedding_usage_recorder: ContextVar[Optional[EmbeddingUsageRecorder]] = ContextVar(
+    "embedding_usage_recorder", default=None
+)
+
+
+@contextmanager
+def record_embedding_usage() -> Generator[EmbeddingUsageRecorder, None, None]:
+    """
+    Record usage of the document embeddings made in the current context
+    """
+    recorder = EmbeddingUsageRecorder()
+    token = _embedding_usage_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _embedding_usage_recorder.reset(token)
+
+
+def get_embedding_usage_recorder() -> Optional[EmbeddingUsageRecorder]:
+    return _embedding_usage_recorder.get()
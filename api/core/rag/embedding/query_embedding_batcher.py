@@ -0,0 +1,173 @@
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Optional, cast
+
+from opentelemetry.metrics import get_meter
+
+from configs import dify_config
+from core.entities.embedding_type import EmbeddingInputType
+from core.model_manager import ModelInstance
+from core.model_runtime.entities.model_entities import ModelPropertyKey
+from core.model_runtime.model_providers.__base.text_embedding_model import TextEmbeddingModel
+
+_meter = get_meter("query_embedding_batcher")
+_batch_size_histogram = _meter.create_histogram(
+    "embedding.query_batch.size",
+    description="Number of distinct query texts embedded by one batched embedding call",
+    unit="{text}",
+)
+_batch_latency_histogram = _meter.create_histogram(
+    "embedding.query_batch.latency",
+    description="Time from the first query of a batch to its embeddings, including the batching window",
+    unit="s",
+)
+
+
+@dataclass
+class QueryEmbeddingBatcherStats:
+    queries: int = 0
+    batches: int = 0
+    deduplicated: int = 0
+
+    @property
+    def average_batch_size(self) -> float:
+        return (self.queries - self.deduplicated) / self.batches if self.batches else 0.0
+
+
+@dataclass
+class _Batch:
+    max_size: int
+    started_at: float = field(default_factory=time.perf_counter)
+    futures: dict[str, Future[list[float]]] = field(default_factory=dict)
+    full: threading.Event = field(default_factory=threading.Event)
+    closed: bool = False
+
+
+class QueryEmbeddingBatcher:
+    """
+    Gathers the query embeddings requested concurrently in the process for the same tenant, model,
+    credentials and user into one embedding call.
+
+    The first query of a batch waits QUERY_EMBEDDING_BATCH_WINDOW_MS, or until the batch holds
+    QUERY_EMBEDDING_BATCH_MAX_SIZE texts, then embeds the texts gathered meanwhile and hands each
+    query its embedding. A text already waiting for its embedding is not embedded again.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._open_batches: dict[tuple[str, ...], _Batch] = {}
+        # embeddings waited for by (batch key, text), until the batch embedding them is done
+        self._pending: dict[tuple[tuple[str, ...], str], Future[list[float]]] = {}
+        self._max_chunks: dict[tuple[str, ...], int] = {}
+        self.stats = QueryEmbeddingBatcherStats()
+
+    @property
+    def enabled(self) -> bool:
+        return dify_config.QUERY_EMBEDDING_BATCH_ENABLED
+
+    def embed_query(self, model_instance: ModelInstance, text: str, user: Optional[str] = None) -> list[float]:
+        """
+        Embed a query text along with the query texts embedded concurrently with the same model
+
+        :param model_instance: text embedding model instance
+        :param text: query text
+        :param user: unique user id
+        :return: embedding of the text, as returned by the model
+        """
+        key = self._batch_key(model_instance, user)
+        max_size = min(dify_config.QUERY_EMBEDDING_BATCH_MAX_SIZE, self._get_max_chunks(model_instance, key))
+
+        batch = None
+        with self._lock:
+            self.stats.queries += 1
+            future = self._pending.get((key, text))
+            if future is not None:
+                self.stats.deduplicated += 1
+            else:
+                open_batch = self._open_batches.get(key)
+                if open_batch is None:
+                    # the first query of a batch embeds it
+                    batch = open_batch = self._open_batches[key] = _Batch(max_size=max_size)
+                future = open_batch.futures[text] = self._pending[(key, text)] = Future[list[float]]()
+                if len(open_batch.futures) >= open_batch.max_size:
+                    del self._open_batches[key]
+                    open_batch.full.set()
+
+        if batch is not None:
+            self._embed_batch(model_instance, user, key, batch)
+        return future.result()
+
+    def _embed_batch(
+        self, model_instance: ModelInstance, user: Optional[str], key: tuple[str, ...], batch: _Batch
+    ) -> None:
+        try:
+            batch.full.wait(dify_config.QUERY_EMBEDDING_BATCH_WINDOW_MS / 1000)
+            self._close_batch(key, batch)
+            texts = list(batch.futures)
+            embedding_result = model_instance.invoke_text_embedding(
+                texts=texts, user=user, input_type=EmbeddingInputType.QUERY
+            )
+            if len(embedding_result.embeddings) != len(texts):
+                raise ValueError(f"Expected {len(texts)} query embeddings, got {len(embedding_result.embeddings)}")
+            for text, embedding in zip(texts, embedding_result.embeddings):
+                batch.futures[text].set_result(embedding)
+        except BaseException as e:
+            # the queries waiting for the batch must not hang, whatever interrupted it
+            self._close_batch(key, batch)
+            for future in batch.futures.values():
+                if not future.done():
+                    future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            with self._lock:
+                for text in batch.futures:
+                    self._pending.pop((key, text), None)
+            attributes = {"provider": model_instance.provider, "model": model_instance.model}
+            _batch_size_histogram.record(len(batch.futures), attributes)
+            _batch_latency_histogram.record(time.perf_counter() - batch.started_at, attributes)
+
+    def _close_batch(self, key: tuple[str, ...], batch: _Batch) -> None:
+        # no query joins the batch once it is closed
+        with self._lock:
+            if batch.closed:
+                return
+            batch.closed = True
+            if self._open_batches.get(key) is batch:
+                del self._open_batches[key]
+            self.stats.batches += 1
+
+    def _get_max_chunks(self, model_instance: ModelInstance, key: tuple[str, ...]) -> int:
+        # tenant, provider and model
+        model_key = key[:3]
+        max_chunks = self._max_chunks.get(model_key)
+        if max_chunks is None:
+            model_type_instance = cast(TextEmbeddingModel, model_instance.model_type_instance)
+            model_schema = model_type_instance.get_model_schema(model_instance.model, model_instance.credentials)
+            max_chunks = (
+                model_schema.model_properties[ModelPropertyKey.MAX_CHUNKS]
+                if model_schema and ModelPropertyKey.MAX_CHUNKS in model_schema.model_properties
+                else 1
+            )
+            self._max_chunks[model_key] = max_chunks
+        return max_chunks
+
+    @staticmethod
+    def _batch_key(model_instance: ModelInstance, user: Optional[str]) -> tuple[str, ...]:
+        credentials_hash = hashlib.sha256(
+            json.dumps(model_instance.credentials, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        return (
+            model_instance.provider_model_bundle.configuration.tenant_id,
+            model_instance.provider,
+            model_instance.model,
+            credentials_hash,
+            user or "",
+        )
+
+
+query_embedding_batcher = QueryEmbeddingBatcher()
@@ -0,0 +1,154 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, cast
+
+import numpy as np
+from opentelemetry.metrics import get_meter
+
+from configs import dify_config
+from extensions.ext_redis import redis_client
+from libs import helper
+
+_lookup_counter = get_meter("query_embedding_cache").create_counter(
+    "embedding.query_cache.lookups",
+    description="Query embedding cache lookups by tier serving them: memory, redis or miss",
+    unit="{lookup}",
+)
+
+
+@dataclass
+class QueryEmbeddingCacheStats:
+    memory_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.memory_hits + self.redis_hits + self.misses
+        return (self.memory_hits + self.redis_hits) / lookups if lookups else 0.0
+
+
+class QueryEmbeddingCache:
+    """
+    Cache of normalized query embeddings in redis, with an in-process tier for hot queries.
+
+    Embeddings are stored as raw float64 bytes. Redis entries expire `ttl` seconds after their
+    last hit, entries of the process tier `memory_ttl` seconds after they were cached there; the
+    process tier is bounded by `memory_max_size` bytes, least recently used entries are evicted
+    first.
+    """
+
+    def __init__(self, ttl: int, memory_ttl: int, memory_max_size: int) -> None:
+        """
+        :param ttl: seconds a redis entry is kept after its last hit
+        :param memory_ttl: seconds an entry is kept in the process tier
+        :param memory_max_size: max bytes of the process tier, 0 disables it
+        """
+        self.ttl = ttl
+        self.memory_ttl = memory_ttl
+        self.memory_max_size = memory_max_size
+        self.stats = QueryEmbeddingCacheStats()
+
+        # key -> (expiry on the monotonic clock, embedding bytes)
+        self._memory: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+
+    def get(self, provider: str, model: str, text: str) -> Optional[list[float]]:
+        """
+        Get the cached embedding of a query text
+
+        :param provider: embedding model provider
+        :param model: embedding model name
+        :param text: query text
+        :return: normalized embedding, None when it is not cached
+        """
+        key = self._cache_key(provider, model, text)
+        data = self._memory_get(key)
+        if data is not None:
+            self._record("memory")
+            return cast(list[float], np.frombuffer(data, dtype=np.float64).tolist())
+
+        pipeline = redis_client.pipeline(transaction=False)
+        pipeline.get(key)
+        pipeline.expire(key, self.ttl)
+        data, _ = pipeline.execute()
+        if not data:
+            self._record("miss")
+            return None
+
+        self._record("redis")
+        self._memory_put(key, data)
+        return cast(list[float], np.frombuffer(data, dtype=np.float64).tolist())
+
+    def set(self, provider: str, model: str, text: str, embedding: list[float]) -> None:
+        """
+        Cache the normalized embedding of a query text
+
+        :param provider: embedding model provider
+        :param model: embedding model name
+        :param text: query text
+        :param embedding: normalized embedding
+        """
+        key = self._cache_key(provider, model, text)
+        data = np.asarray(embedding, dtype=np.float64).tobytes()
+        redis_client.setex(key, self.ttl, data)
+        self._memory_put(key, data)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+
+    def _record(self, tier: str) -> None:
+        with self._lock:
+            if tier == "memory":
+                self.stats.memory_hits += 1
+            elif tier == "redis":
+                self.stats.redis_hits += 1
+            else:
+                self.stats.misses += 1
+        _lookup_counter.add(1, {"tier": tier})
+
+    @staticmethod
+    def _cache_key(provider: str, model: str, text: str) -> str:
+        # base64 encoded embeddings were cached under the key without the prefix
+        return f"query_embedding:{provider}_{model}_{helper.generate_text_hash(text)}"
+
+    def _memory_get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if expires_at <= time.monotonic():
+                del self._memory[key]
+                self._memory_size -= len(data)
+                return None
+            self._memory.move_to_end(key)
+            return data
+
+    def _memory_put(self, key: str, data: bytes) -> None:
+        if len(data) > self.memory_max_size:
+            return
+
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_size -= len(previous[1])
+            self._memory[key] = (time.monotonic() + self.memory_ttl, data)
+            self._memory_size += len(data)
+            while self._memory_size > self.memory_max_size:
+                _, (_, evicted) = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted)
+                self.stats.evictions += 1
+
+
+query_embedding_cache = QueryEmbeddingCache(
+    ttl=dify_config.QUERY_EMBEDDING_CACHE_TTL,
+    memory_ttl=dify_config.QUERY_EMBEDDING_CACHE_MEMORY_TTL,
+    memory_max_size=dify_config.QUERY_EMBEDDING_CACHE_MEMORY_MAX_SIZE,
+)
@@ -10,6 +10,7 @@ from core.rag.extractor.csv_extractor import CSVExtractor
 from core.rag.extractor.entity.datasource_type import DatasourceType
 from core.rag.extractor.entity.extract_setting import ExtractSetting
 from core.rag.extractor.excel_extractor import ExcelExtractor
+from core.rag.extractor.extraction_pool import extract_out_of_process
 from core.rag.extractor.extractor_base import BaseExtractor
 from core.rag.extractor.firecrawl.firecrawl_web_extractor import FirecrawlWebExtractor
 from core.rag.extractor.html_extractor import HtmlExtractor
@@ -29,7 +30,7 @@ from core.rag.extractor.unstructured.unstructured_xml_extractor import Unstructu
 from core.rag.extractor.watercrawl.extractor import WaterCrawlWebExtractor
 from core.rag.extractor.word_extractor import WordExtractor
 from core.rag.models.document import Document
-from extensions.ext_storage import storage
+from extensions.ext_storage import storage_cache
 from models.model import UploadFile
 
 SUPPORT_URL_CONTENT_TYPES = ["application/pdf", "text/plain", "application/json"]
@@ -38,6 +39,21 @@ USER_AGENT = (
     " Safari/537.36"
 )
 
+# CPU-bound extractors only reading their file, run in the extraction pool when it is enabled,
+# PdfExtractor splits large files into page ranges itself
+OUT_OF_PROCESS_EXTRACTORS = (
+    CSVExtractor,
+    ExcelExtractor,
+    UnstructuredEmailExtractor,
+    UnstructuredEpubExtractor,
+    UnstructuredMarkdownExtractor,
+    UnstructuredMsgExtractor,
+    UnstructuredPPTExtractor,
+    UnstructuredPPTXExtractor,
+    UnstructuredWordExtractor,
+    UnstructuredXmlExtractor,
+)
+
 
 class ExtractProcessor:
     @classmethod
@@ -100,7 +116,7 @@ class ExtractProcessor:
                     suffix = Path(upload_file.key).suffix
                     # FIXME mypy: Cannot determine type of 'tempfile._get_candidate_names' better not use it here
                     file_path = f"{temp_dir}/{next(tempfile._get_candidate_names())}{suffix}"  # type: ignore
-                    storage.download(upload_file.key, file_path)
+                    storage_cache.download(upload_file.key, upload_file.id, file_path)
                 input_file = Path(file_path)
                 file_extension = input_file.suffix.lower()
                 etl_type = dify_config.ETL_TYPE
@@ -162,6 +178,8 @@ class ExtractProcessor:
                     else:
                         # txt
                         extractor = TextExtractor(file_path, autodetect_encoding=True)
+                if isinstance(extractor, OUT_OF_PROCESS_EXTRACTORS):
+                    return extract_out_of_process(extractor)
                 return extractor.extract()
         elif extract_setting.datasource_type == DatasourceType.NOTION.value:
             assert extract_setting.notion_info is not None, "notion_info is required"
@@ -0,0 +1,124 @@
+"""Process pool running CPU-bound document extraction outside of the worker process."""
+
+import logging
+import multiprocessing
+import threading
+from collections import deque
+from collections.abc import Callable, Generator, Iterator, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Optional, TypeVar, cast
+
+from configs import dify_config
+from core.rag.extractor.extractor_base import BaseExtractor
+from core.rag.models.document import Document
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_extraction_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Get the process pool shared by the extractions of this process, created on first use.
+
+    :return: the pool, None when `ETL_PROCESS_POOL_MAX_WORKERS` is 0
+    """
+    global _pool
+    if dify_config.ETL_PROCESS_POOL_MAX_WORKERS <= 0:
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            # spawned workers do not inherit the threads, sockets and gevent patching of the celery worker
+            _pool = ProcessPoolExecutor(
+                max_workers=dify_config.ETL_PROCESS_POOL_MAX_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_extraction_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _discard_broken_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a pool whose worker died, e.g. killed by the OOM killer, the next extraction starts a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def extract_out_of_process(extractor: BaseExtractor) -> list[Document]:
+    """
+    Run `extractor.extract()` in the extraction pool, or in the current process when the pool is disabled.
+    The extractor must be picklable and must not use the database or storage.
+
+    :param extractor: extractor
+    :return: extracted documents
+    """
+    pool = get_extraction_pool()
+    if pool is None:
+        return cast(list[Document], extractor.extract())
+
+    future: Future[list[Document]] = pool.submit(_extract, extractor)
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        _discard_broken_pool(pool)
+        raise
+
+
+def map_in_order(
+    fn: Callable[..., T], tasks: Sequence[tuple[Any, ...]], timeout: Optional[float] = None
+) -> Generator[T, None, None]:
+    """
+    Run `fn(*task)` for each task in the extraction pool, yielding the results in task order as they complete.
+    At most twice as many tasks as pool workers are in flight, so results are not buffered faster than the
+    caller consumes them. Runs in the current process when the pool is disabled.
+
+    :param fn: module level function
+    :param tasks: arguments of the calls
+    :param timeout: seconds to wait for each result in the pool, raises TimeoutError when exceeded
+    :return: results of the calls
+    """
+    pool = get_extraction_pool()
+    if pool is None:
+        for task in tasks:
+            yield fn(*task)
+        return
+
+    max_in_flight = dify_config.ETL_PROCESS_POOL_MAX_WORKERS * 2
+    pending: Iterator[tuple[Any, ...]] = iter(tasks)
+    in_flight: deque[Future[T]] = deque()
+    try:
+        for task in pending:
+            in_flight.append(pool.submit(fn, *task))
+            if len(in_flight) >= max_in_flight:
+                break
+
+        while in_flight:
+            result = in_flight.popleft().result(timeout)
+            next_task = next(pending, None)
+            if next_task is not None:
+                in_flight.append(pool.submit(fn, *next_task))
+            yield result
+    except BrokenProcessPool:
+        _discard_broken_pool(pool)
+        raise
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+
+def _extract(extractor: BaseExtractor) -> list[Document]:
+    return cast(list[Document], extractor.extract())
@@ -1,9 +1,11 @@
 """Abstract interface for document loader implementations."""
 
 from collections.abc import Iterator
-from typing import Optional, cast
+from typing import Optional, Union, cast
 
+from configs import dify_config
 from core.rag.extractor.blob.blob import Blob
+from core.rag.extractor.extraction_pool import get_extraction_pool, map_in_order
 from core.rag.extractor.extractor_base import BaseExtractor
 from core.rag.models.document import Document
 from extensions.ext_storage import storage
@@ -57,12 +59,48 @@ class PdfExtractor(BaseExtractor):
         with blob.as_bytes_io() as file_path:
             pdf_reader = pypdfium2.PdfDocument(file_path, autoclose=True)
             try:
-                for page_number, page in enumerate(pdf_reader):
-                    text_page = page.get_textpage()
-                    content = text_page.get_text_range()
-                    text_page.close()
-                    page.close()
-                    metadata = {"source": blob.source, "page": page_number}
-                    yield Document(page_content=content, metadata=metadata)
+                page_ranges = get_page_ranges(len(pdf_reader))
+                if get_extraction_pool() is None or len(page_ranges) == 1:
+                    for page_number, page in enumerate(pdf_reader):
+                        text_page = page.get_textpage()
+                        content = text_page.get_text_range()
+                        text_page.close()
+                        page.close()
+                        metadata = {"source": blob.source, "page": page_number}
+                        yield Document(page_content=content, metadata=metadata)
+                    return
             finally:
                 pdf_reader.close()
+
+        # large files are split into page ranges extracted by the extraction pool, streamed back in page order
+        source = str(blob.path) if blob.data is None else blob.as_bytes()
+        page_number = 0
+        for contents in map_in_order(extract_page_range, [(source, start, stop) for start, stop in page_ranges]):
+            for content in contents:
+                metadata = {"source": blob.source, "page": page_number}
+                yield Document(page_content=content, metadata=metadata)
+                page_number += 1
+
+
+def get_page_ranges(page_count: int) -> list[tuple[int, int]]:
+    """Split the pages of a PDF file into the (start, stop) ranges extracted by separate extraction pool tasks."""
+    pages_per_task = dify_config.ETL_PDF_PAGES_PER_TASK
+    return [(start, min(start + pages_per_task, page_count)) for start in range(0, max(page_count, 1), pages_per_task)]
+
+
+def extract_page_range(source: Union[str, bytes], start: int, stop: int) -> list[str]:
+    """Extract the text of the pages from `start` to `stop` of a PDF file path or content, in a pool worker."""
+    import pypdfium2  # type: ignore
+
+    pdf_reader = pypdfium2.PdfDocument(source, autoclose=True)
+    try:
+        contents = []
+        for page_number in range(start, stop):
+            page = pdf_reader[page_number]
+            text_page = page.get_textpage()
+            contents.append(text_page.get_text_range())
+            text_page.close()
+            page.close()
+        return contents
+    finally:
+        pdf_reader.close()
@@ -0,0 +1,179 @@
+import queue
+import threading
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from core.rag.models.document import Document
+from libs import helper
+
+
+@dataclass
+class IndexingPipelineStats:
+    pages: int = 0
+    chunks: int = 0
+    tokens: int = 0
+    peak_in_flight_chunks: int = 0
+
+
+class IndexingPipeline:
+    """
+    Streams extracted pages through the indexing stages:
+
+    split (`split_workers` threads) -> persist (calling thread, page order) -> load (`load_workers` threads)
+
+    Pages are split in batches of `page_batch_size`, at most `split_workers + queue_size` batches
+    are in flight before the persist stage. Persisted chunks are handed to the load stage in batches
+    of `load_batch_size`, at most `queue_size` batches wait for a load worker, so a slow embedding
+    model throttles splitting instead of letting every chunk of the document pile up in memory.
+    Chunks are routed to the load workers by the hash of their content, so the same text is never
+    loaded by two threads at once, which would risk database insertion deadlocks.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        split_fn: Callable[[list[Document]], list[Document]],
+        persist_fn: Callable[[list[Document]], None],
+        load_fn: Callable[[list[Document]], int],
+        page_batch_size: int = 20,
+        split_workers: int = 2,
+        load_batch_size: int = 64,
+        load_workers: int = 10,
+        queue_size: int = 4,
+    ) -> None:
+        """
+        :param split_fn: clean and split a batch of pages into chunks
+        :param persist_fn: save chunks as segments, called in page order from the calling thread
+        :param load_fn: embed and upsert chunks, returns the tokens used
+        """
+        self.split_fn = split_fn
+        self.persist_fn = persist_fn
+        self.load_fn = load_fn
+        self.page_batch_size = page_batch_size
+        self.split_workers = split_workers
+        self.load_batch_size = load_batch_size
+        self.load_workers = load_workers
+        self.queue_size = queue_size
+
+        self._stats = IndexingPipelineStats()
+        self._stats_lock = threading.Lock()
+        self._in_flight_chunks = 0
+        self._load_queues: list[queue.Queue] = [queue.Queue() for _ in range(load_workers)]
+        self._load_slots = threading.Semaphore(queue_size)
+        self._failed = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    def run(self, pages: Iterable[Document]) -> IndexingPipelineStats:
+        """
+        Run all stages until every page is loaded
+
+        :param pages: extracted pages, consumed lazily
+        :return: pipeline stats
+        """
+        with (
+            ThreadPoolExecutor(max_workers=self.split_workers, thread_name_prefix="indexing-split") as split_executor,
+            ThreadPoolExecutor(max_workers=self.load_workers, thread_name_prefix="indexing-load") as load_executor,
+        ):
+            for load_queue in self._load_queues:
+                load_executor.submit(self._load_worker, load_queue)
+            try:
+                self._split_and_persist(split_executor, pages)
+            except BaseException as e:
+                self._fail(e)
+            finally:
+                for load_queue in self._load_queues:
+                    load_queue.put(self._STOP)
+
+        if self._error is not None:
+            raise self._error
+
+        return self._stats
+
+    def _split_and_persist(self, split_executor: ThreadPoolExecutor, pages: Iterable[Document]) -> None:
+        split_futures: deque[Future] = deque()
+        max_split_in_flight = self.split_workers + self.queue_size
+        try:
+            for page_batch in self._batch(pages, self.page_batch_size):
+                self._raise_if_failed()
+                with self._stats_lock:
+                    self._stats.pages += len(page_batch)
+                split_futures.append(split_executor.submit(self.split_fn, page_batch))
+                if len(split_futures) >= max_split_in_flight:
+                    self._persist(split_futures.popleft().result())
+
+            while split_futures:
+                self._persist(split_futures.popleft().result())
+        finally:
+            for future in split_futures:
+                future.cancel()
+
+    def _persist(self, chunks: list[Document]) -> None:
+        self._raise_if_failed()
+        if not chunks:
+            return
+
+        self.persist_fn(chunks)
+        # distribute chunks into groups by the hash of their content, one group per load worker
+        chunk_groups: list[list[Document]] = [[] for _ in range(self.load_workers)]
+        for chunk in chunks:
+            chunk_groups[int(helper.generate_text_hash(chunk.page_content), 16) % self.load_workers].append(chunk)
+
+        for load_queue, chunk_group in zip(self._load_queues, chunk_groups):
+            for start in range(0, len(chunk_group), self.load_batch_size):
+                chunk_batch = chunk_group[start : start + self.load_batch_size]
+                with self._stats_lock:
+                    self._stats.chunks += len(chunk_batch)
+                    self._in_flight_chunks += len(chunk_batch)
+                    self._stats.peak_in_flight_chunks = max(self._stats.peak_in_flight_chunks, self._in_flight_chunks)
+                self._put(load_queue, chunk_batch)
+
+    def _put(self, load_queue: queue.Queue, chunk_batch: list[Document]) -> None:
+        while True:
+            self._raise_if_failed()
+            if self._load_slots.acquire(timeout=0.1):
+                load_queue.put(chunk_batch)
+                return
+
+    def _load_worker(self, load_queue: queue.Queue) -> None:
+        while True:
+            chunk_batch = load_queue.get()
+            if chunk_batch is self._STOP:
+                return
+
+            self._load_slots.release()
+            try:
+                # keep draining after a failure so the producer never blocks on a full queue
+                if not self._failed.is_set():
+                    tokens = self.load_fn(chunk_batch)
+                    with self._stats_lock:
+                        self._stats.tokens += tokens
+            except BaseException as e:
+                self._fail(e)
+            finally:
+                with self._stats_lock:
+                    self._in_flight_chunks -= len(chunk_batch)
+
+    def _fail(self, error: BaseException) -> None:
+        with self._stats_lock:
+            if self._error is None:
+                self._error = error
+        self._failed.set()
+
+    def _raise_if_failed(self) -> None:
+        if self._failed.is_set() and self._error is not None:
+            raise self._error
+
+    @staticmethod
+    def _batch(pages: Iterable[Document], size: int) -> Iterator[list[Document]]:
+        batch: list[Document] = []
+        for page in pages:
+            batch.append(page)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
@@ -100,14 +100,16 @@ class ParentChildIndexProcessor(BaseIndexProcessor):
 
     def load(self, dataset: Dataset, documents: list[Document], with_keywords: bool = True, **kwargs):
         if dataset.indexing_technique == "high_quality":
-            vector = Vector(dataset)
-            for document in documents:
-                child_documents = document.children
-                if child_documents:
-                    formatted_child_documents = [
-                        Document(**child_document.model_dump()) for child_document in child_documents
-                    ]
-                    vector.create(formatted_child_documents)
+            # children of all parents are embedded and upserted together, so small parents still fill
+            # whole embedding batches, parents and their children keep their order
+            formatted_child_documents = [
+                Document(**child_document.model_dump())
+                for document in documents
+                for child_document in document.children or []
+            ]
+            if formatted_child_documents:
+                vector = Vector(dataset)
+                vector.create(formatted_child_documents)
 
     def clean(self, dataset: Dataset, node_ids: Optional[list[str]], with_keywords: bool = True, **kwargs):
         # node_ids is segment's node_ids
@@ -2,7 +2,6 @@
 
 import logging
 import re
-import threading
 import uuid
 from typing import Optional
 
@@ -10,6 +9,7 @@ import pandas as pd
 from flask import Flask, current_app
 from werkzeug.datastructures import FileStorage
 
+from configs import dify_config
 from core.llm_generator.llm_generator import LLMGenerator
 from core.rag.cleaner.clean_processor import CleanProcessor
 from core.rag.datasource.retrieval_service import RetrievalService
@@ -17,6 +17,7 @@ from core.rag.datasource.vdb.vector_factory import Vector
 from core.rag.extractor.entity.extract_setting import ExtractSetting
 from core.rag.extractor.extract_processor import ExtractProcessor
 from core.rag.index_processor.index_processor_base import BaseIndexProcessor
+from core.rag.index_processor.qa_generation import QAGenerationCheckpoint, QAGenerationScheduler
 from core.rag.models.document import Document
 from core.tools.utils.text_processing_utils import remove_leading_symbols
 from libs import helper
@@ -82,24 +83,12 @@ class QAIndexProcessor(BaseIndexProcessor):
                 kwargs.get("doc_language", "English"),
             )
         else:
-            for i in range(0, len(all_documents), 10):
-                threads = []
-                sub_documents = all_documents[i : i + 10]
-                for doc in sub_documents:
-                    document_format_thread = threading.Thread(
-                        target=self._format_qa_document,
-                        kwargs={
-                            "flask_app": current_app._get_current_object(),  # type: ignore
-                            "tenant_id": kwargs.get("tenant_id"),  # type: ignore
-                            "document_node": doc,
-                            "all_qa_documents": all_qa_documents,
-                            "document_language": kwargs.get("doc_language", "English"),
-                        },
-                    )
-                    threads.append(document_format_thread)
-                    document_format_thread.start()
-                for thread in threads:
-                    thread.join()
+            all_qa_documents = self._generate_qa_documents(
+                current_app._get_current_object(),  # type: ignore
+                kwargs.get("tenant_id"),  # type: ignore
+                all_documents,
+                kwargs.get("doc_language", "English"),
+            )
         return all_qa_documents
 
     def format_by_template(self, file: FileStorage, **kwargs) -> list[Document]:
@@ -161,6 +150,40 @@ class QAIndexProcessor(BaseIndexProcessor):
                 docs.append(doc)
         return docs
 
+    def _generate_qa_documents(
+        self, flask_app: Flask, tenant_id: str, document_nodes: list[Document], document_language: str
+    ) -> list[Document]:
+        document_nodes = [node for node in document_nodes if node.page_content and node.page_content.strip()]
+        if not document_nodes:
+            return []
+
+        checkpoint = None
+        document_id = (document_nodes[0].metadata or {}).get("document_id")
+        if document_id:
+            checkpoint = QAGenerationCheckpoint(
+                document_id=document_id,
+                document_language=document_language,
+                ttl=dify_config.QA_GENERATION_CHECKPOINT_TTL,
+            )
+
+        def generate(document_node: Document) -> list[dict[str, str]]:
+            with flask_app.app_context():
+                response = LLMGenerator.generate_qa_document(tenant_id, document_node.page_content, document_language)
+                return self._format_split_text(response)
+
+        scheduler = QAGenerationScheduler(
+            generate_fn=generate,
+            max_concurrency=dify_config.QA_GENERATION_MAX_CONCURRENCY,
+            max_retries=dify_config.QA_GENERATION_MAX_RETRIES,
+            checkpoint=checkpoint,
+        )
+        all_qa_documents = []
+        for document_node, document_qa_list in zip(document_nodes, scheduler.run(document_nodes)):
+            for result in document_qa_list or []:
+                all_qa_documents.append(self._build_qa_document(document_node, result))
+
+        return all_qa_documents
+
     def _format_qa_document(self, flask_app: Flask, tenant_id: str, document_node, all_qa_documents, document_language):
         format_documents = []
         if document_node.page_content is None or not document_node.page_content.strip():
@@ -172,21 +195,25 @@ class QAIndexProcessor(BaseIndexProcessor):
                 document_qa_list = self._format_split_text(response)
                 qa_documents = []
                 for result in document_qa_list:
-                    qa_document = Document(page_content=result["question"], metadata=document_node.metadata.copy())
-                    if qa_document.metadata is not None:
-                        doc_id = str(uuid.uuid4())
-                        hash = helper.generate_text_hash(result["question"])
-                        qa_document.metadata["answer"] = result["answer"]
-                        qa_document.metadata["doc_id"] = doc_id
-                        qa_document.metadata["doc_hash"] = hash
-                    qa_documents.append(qa_document)
+                    qa_documents.append(self._build_qa_document(document_node, result))
                 format_documents.extend(qa_documents)
             except Exception as e:
                 logging.exception("Failed to format qa document")
 
             all_qa_documents.extend(format_documents)
 
-    def _format_split_text(self, text):
+    @staticmethod
+    def _build_qa_document(document_node: Document, result: dict[str, str]) -> Document:
+        qa_document = Document(page_content=result["question"], metadata=document_node.metadata.copy())
+        if qa_document.metadata is not None:
+            doc_id = str(uuid.uuid4())
+            hash = helper.generate_text_hash(result["question"])
+            qa_document.metadata["answer"] = result["answer"]
+            qa_document.metadata["doc_id"] = doc_id
+            qa_document.metadata["doc_hash"] = hash
+        return qa_document
+
+    def _format_split_text(self, text: str) -> list[dict[str, str]]:
         regex = r"Q\d+:\s*(.*?)\s*A\d+:\s*([\s\S]*?)(?=Q\d+:|$)"
         matches = re.findall(regex, text, re.UNICODE)
 
@@ -0,0 +1,170 @@
+import json
+import logging
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Optional
+
+from core.errors.error import InvokeRateLimitError
+from core.model_runtime.errors.invoke import InvokeRateLimitError as ModelInvokeRateLimitError
+from core.rag.models.document import Document
+from extensions.ext_redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+QAPairs = list[dict[str, str]]
+
+
+class QAGenerationCheckpoint:
+    """
+    QA pairs generated for the chunks of a document, kept in one redis hash per document so a retried
+    indexing task resumes instead of generating them again. The hash is deleted once the document is indexed.
+    """
+
+    def __init__(self, document_id: str, document_language: str, ttl: int) -> None:
+        self.document_id = document_id
+        self.document_language = document_language
+        self.ttl = ttl
+
+    def get(self, chunk_hash: str) -> Optional[QAPairs]:
+        try:
+            cached = redis_client.hget(self._key(self.document_id), self._field(chunk_hash))
+        except Exception:
+            logger.exception("Failed to read qa generation checkpoint")
+            return None
+
+        return json.loads(cached) if cached else None
+
+    def set(self, chunk_hash: str, qa_pairs: QAPairs) -> None:
+        key = self._key(self.document_id)
+        try:
+            pipeline = redis_client.pipeline(transaction=False)
+            pipeline.hset(key, self._field(chunk_hash), json.dumps(qa_pairs))
+            pipeline.expire(key, self.ttl)
+            pipeline.execute()
+        except Exception:
+            logger.exception("Failed to write qa generation checkpoint")
+
+    @staticmethod
+    def delete(document_id: str) -> None:
+        """
+        Delete the QA pairs kept for a document
+
+        :param document_id: document id
+        """
+        try:
+            redis_client.delete(QAGenerationCheckpoint._key(document_id))
+        except Exception:
+            logger.exception("Failed to delete qa generation checkpoint")
+
+    def _field(self, chunk_hash: str) -> str:
+        return f"{self.document_language}:{chunk_hash}"
+
+    @staticmethod
+    def _key(document_id: str) -> str:
+        return f"qa_generation_checkpoint:{document_id}"
+
+
+class QAGenerationScheduler:
+    """
+    Generates QA pairs of chunks with a sliding window of in-flight LLM requests.
+
+    A new request starts as soon as one finishes. The window adapts to the provider quota with
+    AIMD: it is halved on a rate limit error, the chunk is retried after a backoff, and it grows
+    by one after a window's worth of successful requests, up to `max_concurrency`.
+    """
+
+    def __init__(
+        self,
+        generate_fn: Callable[[Document], QAPairs],
+        max_concurrency: int = 10,
+        max_retries: int = 5,
+        backoff: float = 1.0,
+        checkpoint: Optional[QAGenerationCheckpoint] = None,
+    ) -> None:
+        """
+        :param generate_fn: generate the QA pairs of a chunk
+        :param max_concurrency: max LLM requests in flight
+        :param max_retries: max retries of a rate limited chunk
+        :param backoff: seconds to wait before retrying a rate limited chunk, doubled on each retry
+        :param checkpoint: checkpoint of generated QA pairs
+        """
+        self.generate_fn = generate_fn
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.checkpoint = checkpoint
+        self.concurrency = max_concurrency
+        self.peak_in_flight = 0
+        self.rate_limited_count = 0
+        self._successes_since_increase = 0
+        self._decrease_count = 0
+
+    def run(self, chunks: list[Document]) -> list[Optional[QAPairs]]:
+        """
+        Generate QA pairs of all chunks
+
+        :param chunks: chunks with a `doc_hash` metadata
+        :return: QA pairs of each chunk, in chunk order, None if the generation failed
+        """
+        results: list[Optional[QAPairs]] = [None] * len(chunks)
+        pending: deque[tuple[int, int]] = deque()
+        for index, chunk in enumerate(chunks):
+            cached = self.checkpoint.get(chunk.metadata["doc_hash"]) if self.checkpoint else None
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.append((index, 0))
+
+        in_flight: dict[Future, tuple[int, int, int]] = {}
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="qa-generation") as executor:
+            while pending or in_flight:
+                while pending and len(in_flight) < self.concurrency:
+                    index, attempt = pending.popleft()
+                    future = executor.submit(self._generate, chunks[index], attempt)
+                    in_flight[future] = (index, attempt, self._decrease_count)
+                self.peak_in_flight = max(self.peak_in_flight, len(in_flight))
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, attempt, decrease_count = in_flight.pop(future)
+                    try:
+                        results[index] = future.result()
+                    except (InvokeRateLimitError, ModelInvokeRateLimitError):
+                        self._on_rate_limited(decrease_count)
+                        if attempt < self.max_retries:
+                            pending.append((index, attempt + 1))
+                        else:
+                            logger.exception("Failed to format qa document, rate limit retries exhausted")
+                        continue
+                    except Exception:
+                        logger.exception("Failed to format qa document")
+                        continue
+
+                    self._on_success()
+
+        return results
+
+    def _generate(self, chunk: Document, attempt: int) -> QAPairs:
+        if attempt:
+            time.sleep(self.backoff * 2 ** (attempt - 1))
+
+        qa_pairs = self.generate_fn(chunk)
+        if self.checkpoint:
+            self.checkpoint.set(chunk.metadata["doc_hash"], qa_pairs)
+        return qa_pairs
+
+    def _on_rate_limited(self, decrease_count: int) -> None:
+        self.rate_limited_count += 1
+        # requests started before the last decrease hit the same limit, halve once per window
+        if decrease_count == self._decrease_count:
+            self.concurrency = max(1, self.concurrency // 2)
+            self._decrease_count += 1
+        self._successes_since_increase = 0
+
+    def _on_success(self) -> None:
+        self._successes_since_increase += 1
+        if self._successes_since_increase >= self.concurrency and self.concurrency < self.max_concurrency:
+            self.concurrency += 1
+            self._successes_since_increase = 0
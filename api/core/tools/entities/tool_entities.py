@@ -2,7 +2,8 @@ import base64
 import enum
 from collections.abc import Mapping
 from enum import Enum
-from typing import Any, Optional, Union
+from tempfile import SpooledTemporaryFile
+from typing import Any, Optional, Union, cast
 
 from pydantic import BaseModel, ConfigDict, Field, ValidationInfo, field_serializer, field_validator, model_validator
 
@@ -120,6 +121,20 @@ class ToolInvokeMessage(BaseModel):
     class BlobMessage(BaseModel):
         blob: bytes
 
+    class BlobFileMessage(BaseModel):
+        """
+        A blob received in chunks and spilled to a temporary file, owned and closed by the consumer.
+        """
+
+        model_config = ConfigDict(arbitrary_types_allowed=True)
+
+        file: SpooledTemporaryFile = Field(..., description="The file of the blob, positioned at the start")
+        size: int = Field(..., description="The size of the blob")
+
+        def read(self) -> bytes:
+            self.file.seek(0)
+            return cast(bytes, self.file.read())
+
     class BlobChunkMessage(BaseModel):
         id: str = Field(..., description="The id of the blob")
         sequence: int = Field(..., description="The sequence of the chunk")
@@ -194,7 +209,15 @@ class ToolInvokeMessage(BaseModel):
         plain text, image url or link url
     """
     message: (
-        JsonMessage | TextMessage | BlobChunkMessage | BlobMessage | LogMessage | FileMessage | None | VariableMessage
+        JsonMessage
+        | TextMessage
+        | BlobChunkMessage
+        | BlobMessage
+        | BlobFileMessage
+        | LogMessage
+        | FileMessage
+        | None
+        | VariableMessage
     )
     meta: dict[str, Any] | None = None
 
@@ -212,6 +235,8 @@ class ToolInvokeMessage(BaseModel):
     def serialize_message(self, v):
         if isinstance(v, self.BlobMessage):
             return {"blob": base64.b64encode(v.blob).decode("utf-8")}
+        if isinstance(v, self.BlobFileMessage):
+            return {"blob": base64.b64encode(v.read()).decode("utf-8")}
         return v
 
 
@@ -6,7 +6,7 @@ import os
 import time
 from collections.abc import Generator
 from mimetypes import guess_extension, guess_type
-from typing import Optional, Union
+from typing import IO, Optional, Union
 from uuid import uuid4
 
 import httpx
@@ -15,7 +15,7 @@ from sqlalchemy.orm import Session
 from configs import dify_config
 from core.helper import ssrf_proxy
 from extensions.ext_database import db as global_db
-from extensions.ext_storage import storage
+from extensions.ext_storage import storage, storage_cache
 from models.model import MessageFile
 from models.tools import ToolFile
 
@@ -76,6 +76,49 @@ class ToolFileManager:
         mimetype: str,
         filename: Optional[str] = None,
     ) -> ToolFile:
+        filepath, present_filename = self._build_file_path(tenant_id, mimetype, filename)
+        storage.save(filepath, file_binary)
+
+        return self._create_tool_file(
+            user_id=user_id,
+            tenant_id=tenant_id,
+            conversation_id=conversation_id,
+            filepath=filepath,
+            mimetype=mimetype,
+            present_filename=present_filename,
+            size=len(file_binary),
+        )
+
+    def create_file_by_stream(
+        self,
+        *,
+        user_id: str,
+        tenant_id: str,
+        conversation_id: Optional[str],
+        file: IO[bytes],
+        size: int,
+        mimetype: str,
+        filename: Optional[str] = None,
+    ) -> ToolFile:
+        """
+        create a tool file from a file object, streamed to storage without reading it into memory
+        """
+        filepath, present_filename = self._build_file_path(tenant_id, mimetype, filename)
+        file.seek(0)
+        storage.save_stream(filepath, file)
+
+        return self._create_tool_file(
+            user_id=user_id,
+            tenant_id=tenant_id,
+            conversation_id=conversation_id,
+            filepath=filepath,
+            mimetype=mimetype,
+            present_filename=present_filename,
+            size=size,
+        )
+
+    @staticmethod
+    def _build_file_path(tenant_id: str, mimetype: str, filename: Optional[str]) -> tuple[str, str]:
         extension = guess_extension(mimetype) or ".bin"
         unique_name = uuid4().hex
         unique_filename = f"{unique_name}{extension}"
@@ -85,9 +128,19 @@ class ToolFileManager:
             has_extension = len(filename.split(".")) > 1
             # Add extension flexibly
             present_filename = filename if has_extension else f"{filename}{extension}"
-        filepath = f"tools/{tenant_id}/{unique_filename}"
-        storage.save(filepath, file_binary)
+        return f"tools/{tenant_id}/{unique_filename}", present_filename
 
+    def _create_tool_file(
+        self,
+        *,
+        user_id: str,
+        tenant_id: str,
+        conversation_id: Optional[str],
+        filepath: str,
+        mimetype: str,
+        present_filename: str,
+        size: int,
+    ) -> ToolFile:
         with Session(self._engine, expire_on_commit=False) as session:
             tool_file = ToolFile(
                 user_id=user_id,
@@ -96,7 +149,7 @@ class ToolFileManager:
                 file_key=filepath,
                 mimetype=mimetype,
                 name=present_filename,
-                size=len(file_binary),
+                size=size,
             )
 
             session.add(tool_file)
@@ -168,7 +221,7 @@ class ToolFileManager:
         if not tool_file:
             return None
 
-        blob = storage.load_once(tool_file.file_key)
+        blob = storage_cache.load(tool_file.file_key, tool_file.id)
 
         return blob, tool_file.mimetype
 
@@ -212,7 +265,7 @@ class ToolFileManager:
         if not tool_file:
             return None
 
-        blob = storage.load_once(tool_file.file_key)
+        blob = storage_cache.load(tool_file.file_key, tool_file.id)
 
         return blob, tool_file.mimetype
 
@@ -9,7 +9,9 @@ from typing import TYPE_CHECKING, Any, Union, cast
 from yarl import URL
 
 import contexts
+from core.helper.plugin_provider_cache import plugin_tool_provider_cache
 from core.plugin.entities.plugin import ToolProviderID
+from core.plugin.entities.plugin_daemon import PluginToolProviderEntity
 from core.plugin.impl.tool import PluginToolManager
 from core.tools.__base.tool_provider import ToolProviderController
 from core.tools.__base.tool_runtime import ToolRuntime
@@ -114,10 +116,10 @@ class ToolManager:
             if provider in plugin_tool_providers:
                 return plugin_tool_providers[provider]
 
-            manager = PluginToolManager()
-            provider_entity = manager.fetch_tool_provider(tenant_id, provider)
-            if not provider_entity:
-                raise ToolProviderNotFoundError(f"plugin provider {provider} not found")
+            provider_entity = plugin_tool_provider_cache.get_or_fetch(
+                tenant_id, provider, lambda: cls._fetch_plugin_provider(provider, tenant_id)
+            )
+            provider_entity = provider_entity.model_copy(deep=True)
 
             controller = PluginToolProviderController(
                 entity=provider_entity.declaration,
@@ -130,6 +132,15 @@ class ToolManager:
 
         return controller
 
+    @classmethod
+    def _fetch_plugin_provider(cls, provider: str, tenant_id: str) -> PluginToolProviderEntity:
+        manager = PluginToolManager()
+        provider_entity = manager.fetch_tool_provider(tenant_id, provider)
+        if not provider_entity:
+            raise ToolProviderNotFoundError(f"plugin provider {provider} not found")
+
+        return provider_entity
+
     @classmethod
     def get_builtin_tool(cls, provider: str, tool_name: str, tenant_id: str) -> BuiltinTool | PluginTool | None:
         """
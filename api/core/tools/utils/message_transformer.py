@@ -63,19 +63,31 @@ class ToolFileMessageTransformer:
                 filename = meta.get("filename", None)
                 # if message is str, encode it to bytes
 
-                if not isinstance(message.message, ToolInvokeMessage.BlobMessage):
-                    raise ValueError("unexpected message type")
-
-                assert isinstance(message.message.blob, bytes)
                 tool_file_manager = ToolFileManager()
-                tool_file = tool_file_manager.create_file_by_raw(
-                    user_id=user_id,
-                    tenant_id=tenant_id,
-                    conversation_id=conversation_id,
-                    file_binary=message.message.blob,
-                    mimetype=mimetype,
-                    filename=filename,
-                )
+                if isinstance(message.message, ToolInvokeMessage.BlobFileMessage):
+                    # blobs of plugin tools are received in chunks and spilled to a temporary file
+                    with message.message.file as blob_file:
+                        tool_file = tool_file_manager.create_file_by_stream(
+                            user_id=user_id,
+                            tenant_id=tenant_id,
+                            conversation_id=conversation_id,
+                            file=blob_file,
+                            size=message.message.size,
+                            mimetype=mimetype,
+                            filename=filename,
+                        )
+                elif isinstance(message.message, ToolInvokeMessage.BlobMessage):
+                    assert isinstance(message.message.blob, bytes)
+                    tool_file = tool_file_manager.create_file_by_raw(
+                        user_id=user_id,
+                        tenant_id=tenant_id,
+                        conversation_id=conversation_id,
+                        file_binary=message.message.blob,
+                        mimetype=mimetype,
+                        filename=filename,
+                    )
+                else:
+                    raise ValueError("unexpected message type")
 
                 url = cls.get_tool_file_url(tool_file_id=tool_file.id, extension=guess_extension(tool_file.mimetype))
 
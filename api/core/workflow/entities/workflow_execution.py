@@ -10,7 +10,9 @@ from datetime import UTC, datetime
 from enum import StrEnum
 from typing import Any, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
+
+from core.workflow.workflow_type_encoder import EncodedPayload, EncodedPayloadCache
 
 
 class WorkflowType(StrEnum):
@@ -54,6 +56,15 @@ class WorkflowExecution(BaseModel):
     started_at: datetime = Field(...)
     finished_at: Optional[datetime] = None
 
+    # JSON of the outputs, shared by the stream responses and the repository
+    _encoded_payloads: EncodedPayloadCache = PrivateAttr(default_factory=EncodedPayloadCache)
+
+    def get_encoded_outputs(self) -> EncodedPayload:
+        """
+        Get the outputs converted to JSON, converted once until the outputs are assigned again.
+        """
+        return self._encoded_payloads.get("outputs", self.outputs)
+
     @property
     def elapsed_time(self) -> float:
         """
@@ -9,11 +9,12 @@ and don't contain implementation details like tenant_id, app_id, etc.
 from collections.abc import Mapping
 from datetime import datetime
 from enum import StrEnum
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from core.workflow.nodes.enums import NodeType
+from core.workflow.workflow_type_encoder import EncodedPayload, EncodedPayloadCache
 
 
 class WorkflowNodeExecutionMetadataKey(StrEnum):
@@ -106,6 +107,21 @@ class WorkflowNodeExecution(BaseModel):
     created_at: datetime  # When execution started
     finished_at: Optional[datetime] = None  # When execution completed
 
+    # JSON of the execution data, shared by the stream responses and the repository
+    _encoded_payloads: EncodedPayloadCache = PrivateAttr(default_factory=EncodedPayloadCache)
+
+    def get_encoded_payload(self, name: Literal["inputs", "process_data", "outputs"]) -> EncodedPayload:
+        """
+        Get execution data converted to JSON, converted once until the field is assigned again.
+
+        Args:
+            name: The name of the execution data field
+
+        Returns:
+            The encoded payload of the field
+        """
+        return self._encoded_payloads.get(name, getattr(self, name))
+
     def update_from_mapping(
         self,
         inputs: Optional[Mapping[str, Any]] = None,
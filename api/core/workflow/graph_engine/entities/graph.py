@@ -1,5 +1,6 @@
+import threading
 import uuid
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from collections.abc import Mapping
 from typing import Any, Optional, cast
 
@@ -52,14 +53,43 @@ class Graph(BaseModel):
     )
     answer_stream_generate_routes: AnswerStreamGenerateRoute = Field(..., description="answer stream generate routes")
     end_stream_param: EndStreamParam = Field(..., description="end stream param")
+    cache_key: Optional[str] = Field(default=None, description="compiled graph cache key, None if not cached")
+    graph_config: Mapping[str, Any] = Field(
+        default_factory=dict, exclude=True, repr=False, description="graph config the graph was compiled from"
+    )
 
     @classmethod
-    def init(cls, graph_config: Mapping[str, Any], root_node_id: Optional[str] = None) -> "Graph":
+    def init(
+        cls, graph_config: Mapping[str, Any], root_node_id: Optional[str] = None, cache_key: Optional[str] = None
+    ) -> "Graph":
         """
         Init graph
 
+        When `cache_key` is given, the compiled graph is shared through `compiled_graph_cache`
+        and a per-run fork of it is returned. The key must change whenever `graph_config` changes.
+
         :param graph_config: graph config
         :param root_node_id: root node id
+        :param cache_key: compiled graph cache key, e.g. workflow id and graph hash
+        :return: graph
+        """
+        if cache_key:
+            return compiled_graph_cache.get_or_compile(
+                cache_key=cache_key, graph_config=graph_config, root_node_id=root_node_id
+            )
+
+        return cls._compile(graph_config=graph_config, root_node_id=root_node_id)
+
+    @classmethod
+    def _compile(
+        cls, graph_config: Mapping[str, Any], root_node_id: Optional[str] = None, cache_key: Optional[str] = None
+    ) -> "Graph":
+        """
+        Compile graph config into a graph
+
+        :param graph_config: graph config
+        :param root_node_id: root node id
+        :param cache_key: compiled graph cache key
         :return: graph
         """
         # edge configs
@@ -200,10 +230,30 @@ class Graph(BaseModel):
             node_parallel_mapping=node_parallel_mapping,
             answer_stream_generate_routes=answer_stream_generate_routes,
             end_stream_param=end_stream_param,
+            cache_key=cache_key,
+            graph_config=graph_config,
         )
 
         return graph
 
+    def fork(self) -> "Graph":
+        """
+        Fork a graph for a single run.
+
+        Node configs, parallels and the graph config are shared read-only. Node ids, edges and
+        the stream routes are copied, the stream processors update answer dependencies in place.
+
+        :return: graph
+        """
+        return self.model_copy(
+            update={
+                "node_ids": self.node_ids.copy(),
+                "edge_mapping": {node_id: edges.copy() for node_id, edges in self.edge_mapping.items()},
+                "answer_stream_generate_routes": self.answer_stream_generate_routes.model_copy(deep=True),
+                "end_stream_param": self.end_stream_param.model_copy(deep=True),
+            }
+        )
+
     def add_extra_edge(
         self, source_node_id: str, target_node_id: str, run_condition: Optional[RunCondition] = None
     ) -> None:
@@ -717,3 +767,78 @@ class Graph(BaseModel):
                 return True
 
         return False
+
+
+class CompiledGraphCache:
+    """
+    Process level LRU cache of compiled graphs, keyed by (cache key, root node id).
+
+    Compiling a graph recomputes edge mappings, parallels and stream routes, which is
+    deterministic for a given graph config, so published workflows and the iteration / loop
+    sub graphs inside them only need to be compiled once per process.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._graphs: OrderedDict[tuple[str, str], Graph] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compile(
+        self, cache_key: str, graph_config: Mapping[str, Any], root_node_id: Optional[str] = None
+    ) -> Graph:
+        """
+        Get a fork of the compiled graph, compiling and caching it on a miss
+
+        :param cache_key: compiled graph cache key
+        :param graph_config: graph config
+        :param root_node_id: root node id
+        :return: graph
+        """
+        graph = self.get(cache_key=cache_key, root_node_id=root_node_id)
+        if graph is not None:
+            return graph
+
+        # compile outside the lock, a concurrent miss on the same key just compiles twice
+        graph = Graph._compile(graph_config=graph_config, root_node_id=root_node_id, cache_key=cache_key)
+        with self._lock:
+            key = (cache_key, root_node_id or "")
+            self._graphs[key] = graph
+            self._graphs.move_to_end(key)
+            while len(self._graphs) > self.capacity:
+                self._graphs.popitem(last=False)
+
+        return graph.fork()
+
+    def get(self, cache_key: str, root_node_id: Optional[str] = None) -> Optional[Graph]:
+        """
+        Get a fork of the compiled graph without compiling it
+
+        :param cache_key: compiled graph cache key
+        :param root_node_id: root node id
+        :return: graph, None if not cached
+        """
+        key = (cache_key, root_node_id or "")
+        with self._lock:
+            graph = self._graphs.get(key)
+            if graph is None:
+                return None
+
+            self._graphs.move_to_end(key)
+
+        return graph.fork()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._graphs.clear()
+
+    def __contains__(self, key: tuple[str, Optional[str]]) -> bool:
+        cache_key, root_node_id = key
+        with self._lock:
+            return (cache_key, root_node_id or "") in self._graphs
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._graphs)
+
+
+compiled_graph_cache = CompiledGraphCache(capacity=dify_config.WORKFLOW_COMPILED_GRAPH_CACHE_SIZE)
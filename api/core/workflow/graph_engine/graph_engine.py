@@ -1,10 +1,12 @@
 import contextvars
 import logging
 import queue
+import threading
 import time
 import uuid
-from collections.abc import Generator, Mapping
-from concurrent.futures import ThreadPoolExecutor, wait
+from collections.abc import Callable, Generator, Mapping
+from concurrent.futures import Executor, Future
+from concurrent.futures import wait as wait_futures
 from copy import copy, deepcopy
 from datetime import UTC, datetime
 from typing import Any, Optional, cast
@@ -19,7 +21,6 @@ from core.workflow.entities.variable_pool import VariablePool, VariableValue
 from core.workflow.entities.workflow_node_execution import WorkflowNodeExecutionMetadataKey, WorkflowNodeExecutionStatus
 from core.workflow.graph_engine.condition_handlers.condition_manager import ConditionManager
 from core.workflow.graph_engine.entities.event import (
-    BaseAgentEvent,
     BaseIterationEvent,
     BaseLoopEvent,
     GraphEngineEvent,
@@ -42,6 +43,7 @@ from core.workflow.graph_engine.entities.graph import Graph, GraphEdge
 from core.workflow.graph_engine.entities.graph_init_params import GraphInitParams
 from core.workflow.graph_engine.entities.graph_runtime_state import GraphRuntimeState
 from core.workflow.graph_engine.entities.runtime_route_state import RouteNodeState
+from core.workflow.graph_engine.task_scheduler import WorkflowTaskScheduler, workflow_task_scheduler
 from core.workflow.nodes import NodeType
 from core.workflow.nodes.agent.agent_node import AgentNode
 from core.workflow.nodes.agent.entities import AgentNodeData
@@ -61,32 +63,136 @@ from models.workflow import WorkflowType
 logger = logging.getLogger(__name__)
 
 
-class GraphEngineThreadPool(ThreadPoolExecutor):
+class GraphEngineThreadPool(Executor):
+    """
+    Task group of one workflow run or parallel iteration, running on the process wide
+    `workflow_task_scheduler` instead of owning threads.
+
+    `max_workers` caps the running tasks of the group, `max_submit_count` the outstanding ones.
+    """
+
     def __init__(
         self,
-        max_workers=None,
-        thread_name_prefix="",
-        initializer=None,
-        initargs=(),
-        max_submit_count=dify_config.MAX_SUBMIT_COUNT,
+        max_workers: int = 10,
+        max_submit_count: int = dify_config.MAX_SUBMIT_COUNT,
+        tenant_id: str = "",
+        scheduler: Optional[WorkflowTaskScheduler] = None,
     ) -> None:
-        super().__init__(max_workers, thread_name_prefix, initializer, initargs)
+        self.max_workers = max_workers
         self.max_submit_count = max_submit_count
+        self.tenant_id = tenant_id
+        self.group_id = str(uuid.uuid4())
+        self.scheduler = scheduler or workflow_task_scheduler
         self.submit_count = 0
+        self._submit_count_lock = threading.Lock()
+        self._futures: set[Future] = set()
 
     def submit(self, fn, /, *args, **kwargs):
-        self.submit_count += 1
-        self.check_is_full()
+        with self._submit_count_lock:
+            self.submit_count += 1
+            try:
+                self.check_is_full()
+            except ValueError:
+                self.submit_count -= 1
+                raise
+
+        try:
+            future = self.scheduler.submit(self.tenant_id, self.group_id, self.max_workers, fn, *args, **kwargs)
+        except Exception:
+            with self._submit_count_lock:
+                self.submit_count -= 1
+            raise
 
-        return super().submit(fn, *args, **kwargs)
+        with self._submit_count_lock:
+            self._futures.add(future)
+        future.add_done_callback(self.task_done_callback)
+        return future
 
     def task_done_callback(self, future):
-        self.submit_count -= 1
+        with self._submit_count_lock:
+            self.submit_count -= 1
+            self._futures.discard(future)
 
     def check_is_full(self) -> None:
         if self.submit_count > self.max_submit_count:
             raise ValueError(f"Max submit count {self.max_submit_count} of workflow thread pool reached.")
 
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._submit_count_lock:
+            futures = list(self._futures)
+
+        if cancel_futures:
+            for future in futures:
+                future.cancel()
+
+        if wait:
+            wait_futures(futures)
+
+
+class _TaskDone:
+    """
+    Completion marker of a task submitted through a `GraphEngineEventChannel`
+    """
+
+    __slots__ = ("future",)
+
+    def __init__(self, future: Future) -> None:
+        self.future = future
+
+
+class GraphEngineEventChannel:
+    """
+    Single event channel fed by tasks running in a thread pool.
+
+    Tasks put their events into the channel, and the done callback of each task's future puts a
+    completion marker after every event of that task. The consumer blocks on the channel and
+    stops as soon as all submitted tasks are done, a task dying without reporting can't hang it.
+    """
+
+    def __init__(self) -> None:
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._futures: list[Future] = []
+        self._pending_count = 0
+
+    def submit(self, thread_pool: Executor, fn: Callable[..., None], /, **kwargs) -> Future:
+        """
+        Submit a task to the thread pool, the task is expected to put its events into this channel
+        """
+        future = thread_pool.submit(fn, **kwargs)
+        self._futures.append(future)
+        self._pending_count += 1
+        future.add_done_callback(self._on_task_done)
+        return future
+
+    def put(self, event: Any) -> None:
+        self._queue.put(event)
+
+    def events(self) -> Generator[Any, None, None]:
+        """
+        Yield events in arrival order until all submitted tasks are done,
+        re-raise the exception of a task that failed without reporting
+        """
+        while self._pending_count > 0:
+            item = self._queue.get()
+            if not isinstance(item, _TaskDone):
+                yield item
+                continue
+
+            self._pending_count -= 1
+            if not item.future.cancelled() and item.future.exception() is not None:
+                raise cast(BaseException, item.future.exception())
+
+    def cancel_pending(self) -> None:
+        for future in self._futures:
+            if not future.done():
+                future.cancel()
+
+    def wait(self) -> None:
+        wait_futures(self._futures)
+
+    def _on_task_done(self, future: Future) -> None:
+        self._queue.put(_TaskDone(future))
+
 
 class GraphEngine:
     workflow_thread_pool_mapping: dict[str, GraphEngineThreadPool] = {}
@@ -121,7 +227,9 @@ class GraphEngine:
             self.is_main_thread_pool = False
         else:
             self.thread_pool = GraphEngineThreadPool(
-                max_workers=thread_pool_max_workers, max_submit_count=thread_pool_max_submit_count
+                max_workers=thread_pool_max_workers,
+                max_submit_count=thread_pool_max_submit_count,
+                tenant_id=tenant_id,
             )
             self.thread_pool_id = str(uuid.uuid4())
             self.is_main_thread_pool = True
@@ -466,13 +574,9 @@ class GraphEngine:
         if not parallel:
             raise GraphRunFailedError(f"Parallel {parallel_id} not found.")
 
-        # run parallel nodes, run in new thread and use queue to get results
-        q: queue.Queue = queue.Queue()
+        # run parallel nodes in the thread pool, their events and completions arrive through one channel
+        channel = GraphEngineEventChannel()
 
-        # Create a list to store the threads
-        futures = []
-
-        # new thread
         for edge in edge_mappings:
             if (
                 edge.target_node_id not in self.graph.node_parallel_mapping
@@ -480,46 +584,26 @@ class GraphEngine:
             ):
                 continue
 
-            future = self.thread_pool.submit(
+            channel.submit(
+                self.thread_pool,
                 self._run_parallel_node,
-                **{
-                    "flask_app": current_app._get_current_object(),  # type: ignore[attr-defined]
-                    "q": q,
-                    "context": contextvars.copy_context(),
-                    "parallel_id": parallel_id,
-                    "parallel_start_node_id": edge.target_node_id,
-                    "parent_parallel_id": in_parallel_id,
-                    "parent_parallel_start_node_id": parallel_start_node_id,
-                    "handle_exceptions": handle_exceptions,
-                },
+                flask_app=current_app._get_current_object(),  # type: ignore[attr-defined]
+                q=channel,
+                context=contextvars.copy_context(),
+                parallel_id=parallel_id,
+                parallel_start_node_id=edge.target_node_id,
+                parent_parallel_id=in_parallel_id,
+                parent_parallel_start_node_id=parallel_start_node_id,
+                handle_exceptions=handle_exceptions,
             )
 
-            future.add_done_callback(self.thread_pool.task_done_callback)
-
-            futures.append(future)
-
-        succeeded_count = 0
-        while True:
-            try:
-                event = q.get(timeout=1)
-                if event is None:
-                    break
-
-                yield event
-                if not isinstance(event, BaseAgentEvent) and event.parallel_id == parallel_id:
-                    if isinstance(event, ParallelBranchRunSucceededEvent):
-                        succeeded_count += 1
-                        if succeeded_count == len(futures):
-                            q.put(None)
-
-                        continue
-                    elif isinstance(event, ParallelBranchRunFailedEvent):
-                        raise GraphRunFailedError(event.error)
-            except queue.Empty:
-                continue
+        for event in channel.events():
+            yield event
+            if isinstance(event, ParallelBranchRunFailedEvent) and event.parallel_id == parallel_id:
+                raise GraphRunFailedError(event.error)
 
         # wait all threads
-        wait(futures)
+        channel.wait()
 
         # get final node id
         final_node_id = parallel.end_to_node_id
@@ -530,7 +614,7 @@ class GraphEngine:
         self,
         flask_app: Flask,
         context: contextvars.Context,
-        q: queue.Queue,
+        q: GraphEngineEventChannel,
         parallel_id: str,
         parallel_start_node_id: str,
         parent_parallel_id: Optional[str] = None,
@@ -0,0 +1,231 @@
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from configs import dify_config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _QueuedTask:
+    future: Future
+    tenant_id: str
+    nested: bool
+    fn: Callable[..., Any]
+    args: tuple
+    kwargs: dict[str, Any]
+
+
+class WorkflowTaskScheduler:
+    """
+    Process wide bounded worker pool shared by all graph engines and parallel iterations.
+
+    Admission is limited globally, per tenant (fair share of the pool among tenants with running
+    tasks) and per group, i.e. per run or parallel iteration (the caller's own `max_workers`).
+    A task held back by its tenant or group cap is queued with its group and started once a
+    running task releases its slot. Only a task finding the whole pool busy waits up to
+    `admission_timeout` seconds and is then run inline in the submitting thread, which throttles
+    the submitter instead of growing a queue, so a parent task blocked on its children can't
+    starve them of threads. Tasks submitted by a task of the pool skip the tenant cap, whose
+    slots may all be held by their waiting parents.
+    """
+
+    def __init__(self, max_workers: int, tenant_max_workers: int, admission_timeout: float) -> None:
+        self.max_workers = max_workers
+        self.tenant_max_workers = tenant_max_workers
+        self.admission_timeout = admission_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="workflow-task")
+        self._condition = threading.Condition()
+        self._running_count = 0
+        self._waiting_count = 0
+        self._tenant_running_count: dict[str, int] = defaultdict(int)
+        self._group_running_count: dict[str, int] = defaultdict(int)
+        # tasks held back by their tenant or group cap, by group in submission order
+        self._queues: dict[str, deque[_QueuedTask]] = {}
+        self._queue_max_workers: dict[str, int] = {}
+        self._queued_count = 0
+        self._submitted_count = 0
+        self._inline_count = 0
+        self._local = threading.local()
+
+    def submit(
+        self,
+        tenant_id: str,
+        group_id: str,
+        group_max_workers: int,
+        fn: Callable[..., Any],
+        /,
+        *args,
+        **kwargs,
+    ) -> Future:
+        """
+        Submit a task, queue it while its tenant or group is at its cap, run it inline when the
+        pool stays busy
+
+        :param tenant_id: tenant id the task is accounted to
+        :param group_id: id of the submitting run or parallel iteration
+        :param group_max_workers: max running tasks of the group
+        :param fn: task
+        :return: future of the task
+        """
+        nested = getattr(self._local, "in_task", False)
+        deadline = time.monotonic() + self.admission_timeout
+        with self._condition:
+            self._submitted_count += 1
+            self._waiting_count += 1
+            try:
+                while self._running_count >= self.max_workers and group_id not in self._queues:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+                if self._running_count >= self.max_workers and group_id not in self._queues:
+                    self._inline_count += 1
+                    admitted = False
+                elif group_id in self._queues or not self._can_admit(tenant_id, group_id, group_max_workers, nested):
+                    # behind the queued tasks of its group, or held back by its tenant or group cap
+                    task = _QueuedTask(Future(), tenant_id, nested, fn, args, kwargs)
+                    self._queues.setdefault(group_id, deque()).append(task)
+                    self._queue_max_workers[group_id] = group_max_workers
+                    self._queued_count += 1
+                    return task.future
+                else:
+                    self._admit(tenant_id, group_id)
+                    admitted = True
+            finally:
+                self._waiting_count -= 1
+
+        if not admitted:
+            logger.debug("Workflow task scheduler saturated, running task inline, tenant_id=%s", tenant_id)
+            return self._run_inline(fn, *args, **kwargs)
+
+        try:
+            return self._executor.submit(self._run_admitted, tenant_id, group_id, fn, *args, **kwargs)
+        except Exception:
+            self._release(tenant_id, group_id)
+            raise
+
+    def tenant_quota(self) -> int:
+        """
+        Fair share of the pool for one tenant, given the tenants currently running tasks
+        """
+        with self._condition:
+            return self._tenant_quota()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Scheduler metrics: running, waiting for admission and queued tasks, active tenants, inline
+        fallbacks
+        """
+        with self._condition:
+            return {
+                "max_workers": self.max_workers,
+                "running": self._running_count,
+                "waiting": self._waiting_count,
+                "queued": self._queued_count,
+                "active_tenants": len(self._tenant_running_count),
+                "submitted": self._submitted_count,
+                "inline": self._inline_count,
+            }
+
+    def _can_admit(self, tenant_id: str, group_id: str, group_max_workers: int, nested: bool) -> bool:
+        if self._running_count >= self.max_workers:
+            return False
+
+        if self._group_running_count.get(group_id, 0) >= group_max_workers:
+            return False
+
+        return nested or self._tenant_running_count.get(tenant_id, 0) < self._tenant_quota(tenant_id)
+
+    def _tenant_quota(self, tenant_id: Optional[str] = None) -> int:
+        active_tenants = len(self._tenant_running_count)
+        if tenant_id is not None and tenant_id not in self._tenant_running_count:
+            active_tenants += 1
+
+        fair_share = self.max_workers // max(active_tenants, 1)
+        return max(1, min(self.tenant_max_workers, fair_share))
+
+    def _admit(self, tenant_id: str, group_id: str) -> None:
+        self._running_count += 1
+        self._tenant_running_count[tenant_id] += 1
+        self._group_running_count[group_id] += 1
+
+    def _run_admitted(self, tenant_id: str, group_id: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        in_task = getattr(self._local, "in_task", False)
+        self._local.in_task = True
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._local.in_task = in_task
+            self._release(tenant_id, group_id)
+
+    def _run_queued(self, group_id: str, task: _QueuedTask) -> None:
+        try:
+            result = self._run_admitted(task.tenant_id, group_id, task.fn, *task.args, **task.kwargs)
+        except BaseException as e:
+            task.future.set_exception(e)
+        else:
+            task.future.set_result(result)
+
+    def _release(self, tenant_id: str, group_id: str) -> None:
+        with self._condition:
+            self._unaccount(tenant_id, group_id)
+            self._start_queued()
+            self._condition.notify_all()
+
+    def _unaccount(self, tenant_id: str, group_id: str) -> None:
+        self._running_count -= 1
+        self._tenant_running_count[tenant_id] -= 1
+        if self._tenant_running_count[tenant_id] <= 0:
+            del self._tenant_running_count[tenant_id]
+        self._group_running_count[group_id] -= 1
+        if self._group_running_count[group_id] <= 0:
+            del self._group_running_count[group_id]
+
+    def _start_queued(self) -> None:
+        for group_id in list(self._queues):
+            queue = self._queues[group_id]
+            while queue:
+                task = queue[0]
+                if not self._can_admit(task.tenant_id, group_id, self._queue_max_workers[group_id], task.nested):
+                    break
+
+                queue.popleft()
+                self._queued_count -= 1
+                if not task.future.set_running_or_notify_cancel():
+                    continue
+
+                self._admit(task.tenant_id, group_id)
+                try:
+                    self._executor.submit(self._run_queued, group_id, task)
+                except Exception as e:
+                    self._unaccount(task.tenant_id, group_id)
+                    task.future.set_exception(e)
+
+            if not queue:
+                del self._queues[group_id]
+                del self._queue_max_workers[group_id]
+
+    @staticmethod
+    def _run_inline(fn: Callable[..., Any], *args, **kwargs) -> Future:
+        future: Future = Future()
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+workflow_task_scheduler = WorkflowTaskScheduler(
+    max_workers=dify_config.WORKFLOW_TASK_SCHEDULER_MAX_WORKERS,
+    tenant_max_workers=dify_config.WORKFLOW_TASK_SCHEDULER_TENANT_MAX_WORKERS,
+    admission_timeout=dify_config.WORKFLOW_TASK_SCHEDULER_ADMISSION_TIMEOUT,
+)
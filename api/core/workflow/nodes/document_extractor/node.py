@@ -1,11 +1,12 @@
 import csv
+import hashlib
 import io
 import json
 import logging
 import os
 import tempfile
 from collections.abc import Mapping, Sequence
-from typing import Any, cast
+from typing import Any, Optional, cast
 
 import chardet
 import docx
@@ -23,18 +24,24 @@ from docx.text.paragraph import Paragraph
 from configs import dify_config
 from core.file import File, FileTransferMethod, file_manager
 from core.helper import ssrf_proxy
+from core.rag.extractor.extraction_pool import get_extraction_pool, map_in_order
+from core.rag.extractor.pdf_extractor import extract_page_range, get_page_ranges
 from core.variables import ArrayFileSegment
 from core.variables.segments import ArrayStringSegment, FileSegment
 from core.workflow.entities.node_entities import NodeRunResult
 from core.workflow.entities.workflow_node_execution import WorkflowNodeExecutionStatus
 from core.workflow.nodes.base import BaseNode
 from core.workflow.nodes.enums import NodeType
+from extensions.ext_storage import storage
 
 from .entities import DocumentExtractorNodeData
 from .exc import DocumentExtractorError, FileDownloadError, TextExtractionError, UnsupportedFileTypeError
 
 logger = logging.getLogger(__name__)
 
+# bump when the extracted text of a file type changes, to ignore the texts cached before
+EXTRACTION_CACHE_VERSION = "1"
+
 
 class DocumentExtractorNode(BaseNode[DocumentExtractorNodeData]):
     """
@@ -66,7 +73,7 @@ class DocumentExtractorNode(BaseNode[DocumentExtractorNodeData]):
 
         try:
             if isinstance(value, list):
-                extracted_text_list = list(map(_extract_text_from_file, value))
+                extracted_text_list = _extract_text_from_files(value)
                 return NodeRunResult(
                     status=WorkflowNodeExecutionStatus.SUCCEEDED,
                     inputs=inputs,
@@ -74,7 +81,7 @@ class DocumentExtractorNode(BaseNode[DocumentExtractorNodeData]):
                     outputs={"text": ArrayStringSegment(value=extracted_text_list)},
                 )
             elif isinstance(value, File):
-                extracted_text = _extract_text_from_file(value)
+                extracted_text = _extract_text_from_files([value])[0]
                 return NodeRunResult(
                     status=WorkflowNodeExecutionStatus.SUCCEEDED,
                     inputs=inputs,
@@ -370,13 +377,142 @@ def _download_file_content(file: File) -> bytes:
 
 def _extract_text_from_file(file: File):
     file_content = _download_file_content(file)
-    if file.extension:
-        extracted_text = _extract_text_by_file_extension(file_content=file_content, file_extension=file.extension)
-    elif file.mime_type:
-        extracted_text = _extract_text_by_mime_type(file_content=file_content, mime_type=file.mime_type)
+    return _extract_text(file_content, file.extension, file.mime_type)
+
+
+def _extract_text(
+    file_content: bytes,
+    file_extension: Optional[str],
+    mime_type: Optional[str],
+    page_range: Optional[tuple[int, int]] = None,
+) -> str:
+    """Extract text from the content of a file, or of the PDF pages of `page_range`, also run by the extraction pool."""
+    if page_range is not None:
+        try:
+            return "".join(extract_page_range(file_content, *page_range))
+        except Exception as e:
+            raise TextExtractionError(f"Failed to extract text from PDF: {str(e)}") from e
+    if file_extension:
+        return _extract_text_by_file_extension(file_content=file_content, file_extension=file_extension)
+    elif mime_type:
+        return _extract_text_by_mime_type(file_content=file_content, mime_type=mime_type)
     else:
         raise UnsupportedFileTypeError("Unable to determine file type: MIME type or file extension is missing")
-    return extracted_text
+
+
+def _extract_text_from_files(files: Sequence[File]) -> list[str]:
+    """
+    Extract text from files, reusing the texts cached for the same content.
+    When the extraction pool is enabled, the files left are extracted by its worker processes,
+    large PDF files split into page ranges.
+    """
+    texts: list[Optional[str]] = [None] * len(files)
+    # file index, content, extraction cache key
+    pending: list[tuple[int, bytes, Optional[str]]] = []
+    # index of the files of the same content and type as a pending file, and of that file
+    duplicates: list[tuple[int, int]] = []
+    pending_keys: dict[str, int] = {}
+    for i, file in enumerate(files):
+        if not file.extension and not file.mime_type:
+            raise UnsupportedFileTypeError("Unable to determine file type: MIME type or file extension is missing")
+        file_content = _download_file_content(file)
+        cache_key = _get_extraction_cache_key(file, file_content)
+        if cache_key in pending_keys:
+            duplicates.append((i, pending_keys[cache_key]))
+            continue
+        texts[i] = _load_cached_text(cache_key)
+        if texts[i] is None:
+            pending.append((i, file_content, cache_key))
+            if cache_key:
+                pending_keys[cache_key] = i
+
+    if not pending:
+        return cast(list[str], texts)
+
+    split_pdf = get_extraction_pool() is not None
+    # file index of the extraction tasks, and their arguments
+    task_files: list[int] = []
+    tasks: list[tuple[bytes, Optional[str], Optional[str], Optional[tuple[int, int]]]] = []
+    for i, file_content, _ in pending:
+        page_ranges = _get_pdf_page_ranges(files[i], file_content) if split_pdf else [None]
+        for page_range in page_ranges:
+            task_files.append(i)
+            tasks.append((file_content, files[i].extension, files[i].mime_type, page_range))
+
+    file_texts: dict[int, list[str]] = {i: [] for i, _, _ in pending}
+    results = map_in_order(_extract_text, tasks, timeout=dify_config.DOCUMENT_EXTRACTOR_TIMEOUT)
+    try:
+        for i in task_files:
+            try:
+                file_texts[i].append(next(results))
+            except TimeoutError as e:
+                raise TextExtractionError(
+                    f"Timed out extracting text from {files[i].filename} after "
+                    f"{dify_config.DOCUMENT_EXTRACTOR_TIMEOUT} seconds"
+                ) from e
+    finally:
+        # cancels the tasks not started yet when a file fails
+        results.close()
+
+    for i, _, cache_key in pending:
+        texts[i] = "".join(file_texts[i])
+        _save_cached_text(cache_key, texts[i])
+    for i, pending_index in duplicates:
+        texts[i] = texts[pending_index]
+    return cast(list[str], texts)
+
+
+def _get_pdf_page_ranges(file: File, file_content: bytes) -> list[Optional[tuple[int, int]]]:
+    """Page ranges of large PDF files extracted by separate tasks, other files are extracted whole."""
+    is_pdf = file.extension == ".pdf" if file.extension else file.mime_type == "application/pdf"
+    if not is_pdf:
+        return [None]
+
+    try:
+        pdf_document = pypdfium2.PdfDocument(io.BytesIO(file_content), autoclose=True)
+        page_count = len(pdf_document)
+        pdf_document.close()
+    except Exception:
+        # let the extraction task report the error
+        return [None]
+
+    page_ranges = get_page_ranges(page_count)
+    return [None] if len(page_ranges) == 1 else list(page_ranges)
+
+
+def _get_extraction_cache_key(file: File, file_content: bytes) -> Optional[str]:
+    if not dify_config.DOCUMENT_EXTRACTOR_CACHE_ENABLED:
+        return None
+
+    # the file type selects the extractor, files of the same content and type share their text
+    file_type = file.extension or f"mime:{file.mime_type}"
+    digest = hashlib.sha256(f"{EXTRACTION_CACHE_VERSION}:{file_type}:".encode())
+    digest.update(file_content)
+    return f"document_extractor/{digest.hexdigest()}.txt"
+
+
+def _load_cached_text(cache_key: Optional[str]) -> Optional[str]:
+    if not cache_key:
+        return None
+    try:
+        # not every storage backend raises FileNotFoundError for a missing object
+        if not storage.exists(cache_key):
+            return None
+        return storage.load_once(cache_key).decode("utf-8")
+    except FileNotFoundError:
+        return None
+    except Exception:
+        logger.warning("Failed to load the cached text of %s", cache_key, exc_info=True)
+        return None
+
+
+def _save_cached_text(cache_key: Optional[str], text: Optional[str]) -> None:
+    if not cache_key or text is None:
+        return
+    try:
+        storage.save(cache_key, text.encode("utf-8"))
+    except Exception:
+        logger.warning("Failed to cache the text of %s", cache_key, exc_info=True)
 
 
 def _extract_text_from_csv(file_content: bytes) -> str:
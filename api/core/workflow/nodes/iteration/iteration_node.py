@@ -2,9 +2,7 @@ import contextvars
 import logging
 import uuid
 from collections.abc import Generator, Mapping, Sequence
-from concurrent.futures import Future, wait
 from datetime import UTC, datetime
-from queue import Empty, Queue
 from typing import TYPE_CHECKING, Any, Optional, cast
 
 from flask import Flask, current_app
@@ -51,7 +49,7 @@ from .exc import (
 )
 
 if TYPE_CHECKING:
-    from core.workflow.graph_engine.graph_engine import GraphEngine
+    from core.workflow.graph_engine.graph_engine import GraphEngine, GraphEngineEventChannel
 logger = logging.getLogger(__name__)
 
 
@@ -121,7 +119,9 @@ class IterationNode(BaseNode[IterationNodeData]):
         root_node_id = self.node_data.start_node_id
 
         # init graph
-        iteration_graph = Graph.init(graph_config=graph_config, root_node_id=root_node_id)
+        iteration_graph = Graph.init(
+            graph_config=graph_config, root_node_id=root_node_id, cache_key=self.graph.cache_key
+        )
 
         if not iteration_graph:
             raise IterationGraphNotFoundError("iteration graph not found")
@@ -133,7 +133,7 @@ class IterationNode(BaseNode[IterationNodeData]):
         variable_pool.add([self.node_id, "item"], iterator_list_value[0])
 
         # init graph engine
-        from core.workflow.graph_engine.graph_engine import GraphEngine, GraphEngineThreadPool
+        from core.workflow.graph_engine.graph_engine import GraphEngine, GraphEngineEventChannel, GraphEngineThreadPool
 
         graph_engine = GraphEngine(
             tenant_id=self.tenant_id,
@@ -178,16 +178,18 @@ class IterationNode(BaseNode[IterationNodeData]):
         outputs: list[Any] = [None] * len(iterator_list_value)
         try:
             if self.node_data.is_parallel:
-                futures: list[Future] = []
-                q: Queue = Queue()
+                channel = GraphEngineEventChannel()
                 thread_pool = GraphEngineThreadPool(
-                    max_workers=self.node_data.parallel_nums, max_submit_count=dify_config.MAX_SUBMIT_COUNT
+                    max_workers=self.node_data.parallel_nums,
+                    max_submit_count=dify_config.MAX_SUBMIT_COUNT,
+                    tenant_id=self.tenant_id,
                 )
                 for index, item in enumerate(iterator_list_value):
-                    future: Future = thread_pool.submit(
+                    channel.submit(
+                        thread_pool,
                         self._run_single_iter_parallel,
                         flask_app=current_app._get_current_object(),  # type: ignore
-                        q=q,
+                        q=channel,
                         context=contextvars.copy_context(),
                         iterator_list_value=iterator_list_value,
                         inputs=inputs,
@@ -199,33 +201,18 @@ class IterationNode(BaseNode[IterationNodeData]):
                         item=item,
                         iter_run_map=iter_run_map,
                     )
-                    future.add_done_callback(thread_pool.task_done_callback)
-                    futures.append(future)
-                succeeded_count = 0
-                while True:
-                    try:
-                        event = q.get(timeout=1)
-                        if event is None:
-                            break
-                        if isinstance(event, IterationRunNextEvent):
-                            succeeded_count += 1
-                            if succeeded_count == len(futures):
-                                q.put(None)
+                for event in channel.events():
+                    yield event
+                    if isinstance(event, RunCompletedEvent):
+                        channel.cancel_pending()
+                        yield event
+                        break
+                    if isinstance(event, IterationRunFailedEvent):
                         yield event
-                        if isinstance(event, RunCompletedEvent):
-                            q.put(None)
-                            for f in futures:
-                                if not f.done():
-                                    f.cancel()
-                            yield event
-                        if isinstance(event, IterationRunFailedEvent):
-                            q.put(None)
-                            yield event
-                    except Empty:
-                        continue
+                        break
 
                 # wait all threads
-                wait(futures)
+                channel.wait()
             else:
                 for _ in range(len(iterator_list_value)):
                     yield from self._run_single_iter(
@@ -584,7 +571,7 @@ class IterationNode(BaseNode[IterationNodeData]):
         *,
         flask_app: Flask,
         context: contextvars.Context,
-        q: Queue,
+        q: "GraphEngineEventChannel",
         iterator_list_value: Sequence[str],
         inputs: Mapping[str, list],
         outputs: list,
@@ -9,6 +9,7 @@ from configs import dify_config
 from core.app.entities.app_invoke_entities import ModelConfigWithCredentialsEntity
 from core.entities.provider_entities import QuotaUnit
 from core.file.models import File
+from core.helper.provider_usage_ledger import provider_usage_ledger
 from core.memory.token_buffer_memory import TokenBufferMemory
 from core.model_manager import ModelInstance, ModelManager
 from core.model_runtime.entities.llm_entities import LLMUsage
@@ -136,6 +137,21 @@ def deduct_llm_quota(tenant_id: str, model_instance: ModelInstance, usage: LLMUs
             used_quota = 1
 
     if used_quota is not None and system_configuration.current_quota_type is not None:
+        if provider_usage_ledger.enabled:
+            provider_name = ModelProviderID(model_instance.provider).provider_name
+            provider_usage_ledger.deduct_quota(
+                tenant_id=tenant_id,
+                provider_name=provider_name,
+                quota_type=system_configuration.current_quota_type.value,
+                amount=used_quota,
+            )
+            provider_usage_ledger.touch_last_used(
+                tenant_id=tenant_id,
+                provider_name=provider_name,
+                last_used=datetime.now(tz=UTC).replace(tzinfo=None),
+            )
+            return
+
         with Session(db.engine) as session:
             stmt = (
                 update(Provider)
@@ -6,6 +6,7 @@ from pydantic import BaseModel
 
 from core.file.models import File
 from core.variables import Segment
+from libs.jsonutil import dumps_json
 
 
 class WorkflowRuntimeTypeEncoder(json.JSONEncoder):
@@ -47,3 +48,49 @@ class WorkflowRuntimeTypeConverter:
                 res_list.append(self._to_json_encodable_recursive(item))
             return res_list
         return value
+
+
+class EncodedPayload:
+    """
+    A runtime value of a workflow or node execution converted to JSON once,
+    shared by its stream responses and its persistence.
+    """
+
+    def __init__(self, value: Mapping[str, Any] | None) -> None:
+        self.value = value
+        self._data: Mapping[str, Any] | None = None
+        self._json: bytes | None = None
+
+    @property
+    def data(self) -> Mapping[str, Any] | None:
+        """the value converted to JSON encodable types"""
+        if self._data is None and self.value is not None:
+            self._data = WorkflowRuntimeTypeConverter().to_json_encodable(self.value)
+        return self._data
+
+    @property
+    def json(self) -> bytes:
+        """the value serialized to UTF-8 encoded JSON"""
+        if self._json is None:
+            self._json = dumps_json(self.data, encoder=WorkflowRuntimeTypeEncoder)
+        return self._json
+
+    @property
+    def text(self) -> str:
+        return self.json.decode("utf-8")
+
+
+class EncodedPayloadCache:
+    """
+    The encoded payloads of the fields of an execution, kept as long as the fields are not reassigned.
+    """
+
+    def __init__(self) -> None:
+        self._payloads: dict[str, EncodedPayload] = {}
+
+    def get(self, name: str, value: Mapping[str, Any] | None) -> EncodedPayload:
+        payload = self._payloads.get(name)
+        if payload is None or payload.value is not value:
+            payload = EncodedPayload(value)
+            self._payloads[name] = payload
+        return payload
@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 from configs import dify_config
 from core.app.entities.app_invoke_entities import AgentChatAppGenerateEntity, ChatAppGenerateEntity
 from core.entities.provider_entities import QuotaUnit, SystemConfiguration
+from core.helper.provider_usage_ledger import provider_usage_ledger
 from core.plugin.entities.plugin import ModelProviderID
 from events.message_event import message_was_created
 from extensions.ext_database import db
@@ -40,6 +41,7 @@ class _ProviderUpdateValues(BaseModel):
 
     last_used: Optional[datetime] = None
     quota_used: Optional[Any] = None  # Can be Provider.quota_used + int expression
+    quota_deducted: Optional[int] = None  # Quota added by the quota_used expression, for the usage ledger
 
 
 class _ProviderUpdateOperation(BaseModel):
@@ -114,7 +116,9 @@ def handle(sender: Message, **kwargs):
                     provider_type=ProviderType.SYSTEM.value,
                     quota_type=provider_configuration.system_configuration.current_quota_type.value,
                 ),
-                values=_ProviderUpdateValues(quota_used=Provider.quota_used + used_quota, last_used=current_time),
+                values=_ProviderUpdateValues(
+                    quota_used=Provider.quota_used + used_quota, quota_deducted=used_quota, last_used=current_time
+                ),
                 additional_filters=_ProviderUpdateAdditionalFilters(
                     quota_limit_check=True  # Provider.quota_limit > Provider.quota_used
                 ),
@@ -122,6 +126,10 @@ def handle(sender: Message, **kwargs):
             )
             updates_to_perform.append(quota_update)
 
+    if provider_usage_ledger.enabled:
+        _record_provider_updates_in_ledger(updates_to_perform)
+        return
+
     # Execute all updates
     start_time = time_module.perf_counter()
     try:
@@ -177,6 +185,31 @@ def _calculate_quota_usage(
         return None
 
 
+def _record_provider_updates_in_ledger(updates_to_perform: list[_ProviderUpdateOperation]):
+    """Record the Provider updates in the provider usage ledger, written back to the database by a beat task."""
+    for update_operation in updates_to_perform:
+        filters = update_operation.filters
+        used_quota = update_operation.values.quota_deducted
+        if used_quota is not None and filters.quota_type is not None:
+            if not provider_usage_ledger.deduct_quota(
+                tenant_id=filters.tenant_id,
+                provider_name=filters.provider_name,
+                quota_type=filters.quota_type,
+                amount=used_quota,
+            ):
+                logger.warning(
+                    f"No quota deducted in the provider usage ledger. "
+                    f"This may indicate quota limit exceeded or provider not found. "
+                    f"Filters: {filters.model_dump()}"
+                )
+        if update_operation.values.last_used is not None:
+            provider_usage_ledger.touch_last_used(
+                tenant_id=filters.tenant_id,
+                provider_name=filters.provider_name,
+                last_used=update_operation.values.last_used,
+            )
+
+
 def _execute_provider_updates(updates_to_perform: list[_ProviderUpdateOperation]):
     """Execute all Provider updates in a single transaction."""
     if not updates_to_perform:
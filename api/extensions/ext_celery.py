@@ -70,8 +70,10 @@ def init_app(app: DifyApp) -> Celery:
         "schedule.create_tidb_serverless_task",
         "schedule.update_tidb_serverless_status_task",
         "schedule.clean_messages",
+        "schedule.clean_workflow_runs_task",
         "schedule.mail_clean_document_notify_task",
         "schedule.queue_monitor_task",
+        "schedule.flush_provider_usage_ledger_task",
     ]
     day = dify_config.CELERY_BEAT_SCHEDULER_TIME
     beat_schedule = {
@@ -106,7 +108,17 @@ def init_app(app: DifyApp) -> Celery:
                 minutes=dify_config.QUEUE_MONITOR_INTERVAL if dify_config.QUEUE_MONITOR_INTERVAL else 30
             ),
         },
+        # also runs with the ledger disabled, to write back the usage recorded before it was disabled
+        "flush_provider_usage_ledger_task": {
+            "task": "schedule.flush_provider_usage_ledger_task.flush_provider_usage_ledger_task",
+            "schedule": timedelta(seconds=dify_config.PROVIDER_USAGE_LEDGER_FLUSH_INTERVAL),
+        },
     }
+    if dify_config.PLAN_SANDBOX_CLEAN_WORKFLOW_RUN_DAY_SETTING:
+        beat_schedule["clean_workflow_runs_task"] = {
+            "task": "schedule.clean_workflow_runs_task.clean_workflow_runs_task",
+            "schedule": timedelta(days=day),
+        }
     celery_app.conf.update(beat_schedule=beat_schedule, imports=imports)
 
     return celery_app
@@ -1,12 +1,14 @@
 import logging
 from collections.abc import Callable, Generator
-from typing import Literal, Union, overload
+from contextlib import AbstractContextManager
+from typing import IO, Literal, Optional, Union, overload
 
 from flask import Flask
 
 from configs import dify_config
 from dify_app import DifyApp
-from extensions.storage.base_storage import BaseStorage
+from extensions.storage.base_storage import BaseStorage, BinaryWriter
+from extensions.storage.storage_cache import StorageCache
 from extensions.storage.storage_type import StorageType
 
 logger = logging.getLogger(__name__)
@@ -75,6 +77,12 @@ class Storage:
     def save(self, filename, data):
         self.storage_runner.save(filename, data)
 
+    def save_stream(self, filename: str, stream: IO[bytes]) -> None:
+        self.storage_runner.save_stream(filename, stream)
+
+    def open_writer(self, filename: str) -> AbstractContextManager[BinaryWriter]:
+        return self.storage_runner.open_writer(filename)
+
     @overload
     def load(self, filename: str, /, *, stream: Literal[False] = False) -> bytes: ...
 
@@ -93,6 +101,9 @@ class Storage:
     def load_stream(self, filename: str) -> Generator:
         return self.storage_runner.load_stream(filename)
 
+    def load_range(self, filename: str, start: int, length: Optional[int] = None) -> bytes:
+        return self.storage_runner.load_range(filename, start, length)
+
     def download(self, filename, target_filepath):
         self.storage_runner.download(filename, target_filepath)
 
@@ -108,6 +119,14 @@ class Storage:
 
 storage = Storage()
 
+storage_cache = StorageCache(
+    storage,
+    directory=dify_config.STORAGE_CACHE_DIRECTORY,
+    max_size=dify_config.STORAGE_CACHE_MAX_SIZE if dify_config.STORAGE_CACHE_ENABLED else 0,
+    memory_max_size=dify_config.STORAGE_CACHE_MEMORY_MAX_SIZE,
+    memory_max_object_size=dify_config.STORAGE_CACHE_MEMORY_MAX_OBJECT_SIZE,
+)
+
 
 def init_app(app: DifyApp):
     storage.init_app(app)
@@ -1,7 +1,9 @@
 import logging
 from collections.abc import Generator
+from typing import IO, Optional
 
 import boto3  # type: ignore
+from boto3.s3.transfer import TransferConfig  # type: ignore
 from botocore.client import Config  # type: ignore
 from botocore.exceptions import ClientError  # type: ignore
 
@@ -51,6 +53,18 @@ class AwsS3Storage(BaseStorage):
     def save(self, filename, data):
         self.client.put_object(Bucket=self.bucket_name, Key=filename, Body=data)
 
+    def save_stream(self, filename: str, stream: IO[bytes]) -> None:
+        # streams larger than a part are sent as a multipart upload
+        self.client.upload_fileobj(
+            stream,
+            self.bucket_name,
+            filename,
+            Config=TransferConfig(
+                multipart_threshold=dify_config.STORAGE_MULTIPART_CHUNK_SIZE,
+                multipart_chunksize=dify_config.STORAGE_MULTIPART_CHUNK_SIZE,
+            ),
+        )
+
     def load_once(self, filename: str) -> bytes:
         try:
             data: bytes = self.client.get_object(Bucket=self.bucket_name, Key=filename)["Body"].read()
@@ -64,7 +78,7 @@ class AwsS3Storage(BaseStorage):
     def load_stream(self, filename: str) -> Generator:
         try:
             response = self.client.get_object(Bucket=self.bucket_name, Key=filename)
-            yield from response["Body"].iter_chunks()
+            yield from response["Body"].iter_chunks(chunk_size=dify_config.STORAGE_READ_CHUNK_SIZE)
         except ClientError as ex:
             if ex.response["Error"]["Code"] == "NoSuchKey":
                 raise FileNotFoundError("file not found")
@@ -73,8 +87,26 @@ class AwsS3Storage(BaseStorage):
             else:
                 raise
 
+    def load_range(self, filename: str, start: int, length: Optional[int] = None) -> bytes:
+        byte_range = f"bytes={start}-" if length is None else f"bytes={start}-{start + length - 1}"
+        try:
+            response = self.client.get_object(Bucket=self.bucket_name, Key=filename, Range=byte_range)
+        except ClientError as ex:
+            if ex.response["Error"]["Code"] == "NoSuchKey":
+                raise FileNotFoundError("File not found")
+            else:
+                raise
+        data: bytes = response["Body"].read()
+        return data
+
     def download(self, filename, target_filepath):
-        self.client.download_file(self.bucket_name, filename, target_filepath)
+        try:
+            self.client.download_file(self.bucket_name, filename, target_filepath)
+        except ClientError as ex:
+            if ex.response["Error"]["Code"] in {"404", "NoSuchKey"}:
+                raise FileNotFoundError("File not found")
+            else:
+                raise
 
     def exists(self, filename):
         try:
@@ -1,7 +1,8 @@
 from collections.abc import Generator
 from datetime import UTC, datetime, timedelta
-from typing import Optional
+from typing import IO, Optional
 
+from azure.core.exceptions import ResourceNotFoundError
 from azure.identity import ChainedTokenCredential, DefaultAzureCredential
 from azure.storage.blob import AccountSasPermissions, BlobServiceClient, ResourceTypes, generate_account_sas
 
@@ -31,25 +32,49 @@ class AzureBlobStorage(BaseStorage):
         blob_container = client.get_container_client(container=self.bucket_name)
         blob_container.upload_blob(filename, data)
 
+    def save_stream(self, filename: str, stream: IO[bytes]) -> None:
+        # streams larger than a block are staged block by block and committed as a block list
+        client = self._sync_client()
+        blob_container = client.get_container_client(container=self.bucket_name)
+        blob_container.upload_blob(filename, stream)
+
     def load_once(self, filename: str) -> bytes:
         client = self._sync_client()
         blob = client.get_container_client(container=self.bucket_name)
         blob = blob.get_blob_client(blob=filename)
-        data: bytes = blob.download_blob().readall()
+        try:
+            data: bytes = blob.download_blob().readall()
+        except ResourceNotFoundError:
+            raise FileNotFoundError("File not found")
         return data
 
     def load_stream(self, filename: str) -> Generator:
         client = self._sync_client()
         blob = client.get_blob_client(container=self.bucket_name, blob=filename)
-        blob_data = blob.download_blob()
+        try:
+            blob_data = blob.download_blob()
+        except ResourceNotFoundError:
+            raise FileNotFoundError("File not found")
         yield from blob_data.chunks()
 
+    def load_range(self, filename: str, start: int, length: Optional[int] = None) -> bytes:
+        client = self._sync_client()
+        blob = client.get_blob_client(container=self.bucket_name, blob=filename)
+        try:
+            data: bytes = blob.download_blob(offset=start, length=length).readall()
+        except ResourceNotFoundError:
+            raise FileNotFoundError("File not found")
+        return data
+
     def download(self, filename, target_filepath):
         client = self._sync_client()
 
         blob = client.get_blob_client(container=self.bucket_name, blob=filename)
-        with open(target_filepath, "wb") as my_blob:
+        try:
             blob_data = blob.download_blob()
+        except ResourceNotFoundError:
+            raise FileNotFoundError("File not found")
+        with open(target_filepath, "wb") as my_blob:
             blob_data.readinto(my_blob)
 
     def exists(self, filename):
@@ -65,8 +90,14 @@ class AzureBlobStorage(BaseStorage):
         blob_container.delete_blob(filename)
 
     def _sync_client(self):
+        # transfer sizes of streamed uploads and downloads
+        transfer_config = {
+            "max_single_put_size": dify_config.STORAGE_MULTIPART_CHUNK_SIZE,
+            "max_block_size": dify_config.STORAGE_MULTIPART_CHUNK_SIZE,
+            "max_chunk_get_size": dify_config.STORAGE_READ_CHUNK_SIZE,
+        }
         if self.account_key == "managedidentity":
-            return BlobServiceClient(account_url=self.account_url, credential=self.credential)  # type: ignore
+            return BlobServiceClient(account_url=self.account_url, credential=self.credential, **transfer_config)  # type: ignore
 
         cache_key = "azure_blob_sas_token_{}_{}".format(self.account_name, self.account_key)
         cache_result = redis_client.get(cache_key)
@@ -81,4 +112,4 @@ class AzureBlobStorage(BaseStorage):
                 expiry=datetime.now(UTC).replace(tzinfo=None) + timedelta(hours=1),
             )
             redis_client.set(cache_key, sas_token, ex=3000)
-        return BlobServiceClient(account_url=self.account_url or "", credential=sas_token)
+        return BlobServiceClient(account_url=self.account_url or "", credential=sas_token, **transfer_config)
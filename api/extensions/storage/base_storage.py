@@ -1,7 +1,25 @@
 """Abstract interface for file storage implementations."""
 
+import shutil
 from abc import ABC, abstractmethod
 from collections.abc import Generator
+from contextlib import contextmanager
+from tempfile import SpooledTemporaryFile
+from typing import IO, Optional, Protocol
+
+from configs import dify_config
+
+
+class BinaryReader(Protocol):
+    """Readable binary stream, e.g. a file opened in "rb" mode or a storage backend's reader."""
+
+    def read(self, size: int = -1, /) -> bytes: ...
+
+
+class BinaryWriter(Protocol):
+    """Writable binary stream, e.g. a file opened in "wb" mode or a storage backend's writer."""
+
+    def write(self, data: bytes, /) -> object: ...
 
 
 class BaseStorage(ABC):
@@ -11,6 +29,25 @@ class BaseStorage(ABC):
     def save(self, filename, data):
         raise NotImplementedError
 
+    def save_stream(self, filename: str, stream: IO[bytes]) -> None:
+        """
+        Save the content of a readable binary stream.
+        Backends supporting multipart uploads send it in parts of `STORAGE_MULTIPART_CHUNK_SIZE`,
+        the default implementation reads the whole stream into memory.
+        """
+        self.save(filename, stream.read())
+
+    @contextmanager
+    def open_writer(self, filename: str) -> Generator[BinaryWriter, None, None]:
+        """
+        Open a writable binary file, its content is saved when the context exits without error.
+        The default implementation spools the content to a temporary file and saves it with `save_stream`.
+        """
+        with SpooledTemporaryFile(max_size=dify_config.STORAGE_MULTIPART_CHUNK_SIZE) as file:
+            yield file
+            file.seek(0)
+            self.save_stream(filename, file)
+
     @abstractmethod
     def load_once(self, filename: str) -> bytes:
         raise NotImplementedError
@@ -19,6 +56,14 @@ class BaseStorage(ABC):
     def load_stream(self, filename: str) -> Generator:
         raise NotImplementedError
 
+    def load_range(self, filename: str, start: int, length: Optional[int] = None) -> bytes:
+        """
+        Load `length` bytes starting at `start`, or up to the end of the file if `length` is None.
+        The default implementation loads the whole file.
+        """
+        data = self.load_once(filename)
+        return data[start:] if length is None else data[start : start + length]
+
     @abstractmethod
     def download(self, filename, target_filepath):
         raise NotImplementedError
@@ -38,3 +83,7 @@ class BaseStorage(ABC):
         If a storage backend doesn't support scanning, it will raise NotImplementedError.
         """
         raise NotImplementedError("This storage backend doesn't support scanning")
+
+    @staticmethod
+    def _copy_stream(source: BinaryReader, target: BinaryWriter) -> None:
+        shutil.copyfileobj(source, target, dify_config.STORAGE_READ_CHUNK_SIZE)
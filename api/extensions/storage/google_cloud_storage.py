@@ -2,7 +2,9 @@ import base64
 import io
 import json
 from collections.abc import Generator
+from typing import IO, Optional
 
+from google.api_core.exceptions import NotFound  # type: ignore
 from google.cloud import storage as google_cloud_storage  # type: ignore
 
 from configs import dify_config
@@ -32,22 +34,37 @@ class GoogleCloudStorage(BaseStorage):
         with io.BytesIO(data) as stream:
             blob.upload_from_file(stream)
 
+    def save_stream(self, filename: str, stream: IO[bytes]) -> None:
+        # setting a chunk size makes the upload resumable, sent chunk by chunk
+        bucket = self.client.get_bucket(self.bucket_name)
+        blob = bucket.blob(filename, chunk_size=self._multipart_chunk_size())
+        blob.upload_from_file(stream)
+
     def load_once(self, filename: str) -> bytes:
         bucket = self.client.get_bucket(self.bucket_name)
-        blob = bucket.get_blob(filename)
+        blob = self._get_blob(bucket, filename)
         data: bytes = blob.download_as_bytes()
         return data
 
     def load_stream(self, filename: str) -> Generator:
         bucket = self.client.get_bucket(self.bucket_name)
-        blob = bucket.get_blob(filename)
-        with blob.open(mode="rb") as blob_stream:
-            while chunk := blob_stream.read(4096):
+        blob = self._get_blob(bucket, filename)
+        with blob.open(mode="rb", chunk_size=dify_config.STORAGE_READ_CHUNK_SIZE) as blob_stream:
+            while chunk := blob_stream.read(dify_config.STORAGE_READ_CHUNK_SIZE):
                 yield chunk
 
+    def load_range(self, filename: str, start: int, length: Optional[int] = None) -> bytes:
+        bucket = self.client.get_bucket(self.bucket_name)
+        blob = bucket.blob(filename)
+        try:
+            data: bytes = blob.download_as_bytes(start=start, end=None if length is None else start + length - 1)
+        except NotFound:
+            raise FileNotFoundError("File not found")
+        return data
+
     def download(self, filename, target_filepath):
         bucket = self.client.get_bucket(self.bucket_name)
-        blob = bucket.get_blob(filename)
+        blob = self._get_blob(bucket, filename)
         blob.download_to_filename(target_filepath)
 
     def exists(self, filename):
@@ -58,3 +75,15 @@ class GoogleCloudStorage(BaseStorage):
     def delete(self, filename):
         bucket = self.client.get_bucket(self.bucket_name)
         bucket.delete_blob(filename)
+
+    @staticmethod
+    def _get_blob(bucket, filename: str):
+        blob = bucket.get_blob(filename)
+        if blob is None:
+            raise FileNotFoundError("File not found")
+        return blob
+
+    @staticmethod
+    def _multipart_chunk_size() -> int:
+        # resumable upload chunks must be a multiple of 256KB
+        return max(1, dify_config.STORAGE_MULTIPART_CHUNK_SIZE // (256 * 1024)) * 256 * 1024
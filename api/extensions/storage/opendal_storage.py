@@ -1,12 +1,15 @@
 import logging
 import os
 from collections.abc import Generator
+from contextlib import contextmanager
 from pathlib import Path
+from typing import IO, Optional
 
 import opendal  # type: ignore[import]
 from dotenv import dotenv_values
 
-from extensions.storage.base_storage import BaseStorage
+from configs import dify_config
+from extensions.storage.base_storage import BaseStorage, BinaryWriter
 
 logger = logging.getLogger(__name__)
 
@@ -44,30 +47,69 @@ class OpenDALStorage(BaseStorage):
         self.op.write(path=filename, bs=data)
         logger.debug(f"file {filename} saved")
 
+    def save_stream(self, filename: str, stream: IO[bytes]) -> None:
+        with self.open_writer(filename) as writer:
+            # opendal writers upload each write as a part on services supporting multipart uploads
+            while chunk := stream.read(dify_config.STORAGE_MULTIPART_CHUNK_SIZE):
+                writer.write(chunk)
+
+    @contextmanager
+    def open_writer(self, filename: str) -> Generator[BinaryWriter, None, None]:
+        writer = self.op.open(path=filename, mode="wb")
+        try:
+            yield writer
+        except BaseException:
+            # closing commits the written content, drop the partial file
+            writer.close()
+            self.op.delete(path=filename)
+            raise
+        writer.close()
+        logger.debug(f"file {filename} saved as stream")
+
     def load_once(self, filename: str) -> bytes:
-        if not self.exists(filename):
+        try:
+            content: bytes = self.op.read(path=filename)
+        except opendal.exceptions.NotFound:
             raise FileNotFoundError("File not found")
-
-        content: bytes = self.op.read(path=filename)
         logger.debug(f"file {filename} loaded")
         return content
 
     def load_stream(self, filename: str) -> Generator:
-        if not self.exists(filename):
+        try:
+            file = self.op.open(path=filename, mode="rb")
+        except opendal.exceptions.NotFound:
             raise FileNotFoundError("File not found")
 
-        batch_size = 4096
-        file = self.op.open(path=filename, mode="rb")
-        while chunk := file.read(batch_size):
-            yield chunk
+        with file:
+            while chunk := file.read(dify_config.STORAGE_READ_CHUNK_SIZE):
+                yield chunk
         logger.debug(f"file {filename} loaded as stream")
 
+    def load_range(self, filename: str, start: int, length: Optional[int] = None) -> bytes:
+        try:
+            file = self.op.open(path=filename, mode="rb")
+        except opendal.exceptions.NotFound:
+            raise FileNotFoundError("File not found")
+
+        with file:
+            file.seek(start)
+            content: bytes = file.read() if length is None else file.read(length)
+        return content
+
     def download(self, filename: str, target_filepath: str):
-        if not self.exists(filename):
+        try:
+            file = self.op.open(path=filename, mode="rb")
+        except opendal.exceptions.NotFound:
             raise FileNotFoundError("File not found")
 
-        with Path(target_filepath).open("wb") as f:
-            f.write(self.op.read(path=filename))
+        # write next to the target and move it in place, the target is never left half written
+        part_filepath = Path(f"{target_filepath}.part")
+        try:
+            with file, part_filepath.open("wb") as f:
+                self._copy_stream(file, f)
+            part_filepath.replace(target_filepath)
+        finally:
+            part_filepath.unlink(missing_ok=True)
         logger.debug(f"file {filename} downloaded to {target_filepath}")
 
     def exists(self, filename: str) -> bool:
@@ -0,0 +1,259 @@
+import base64
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Union
+
+from opentelemetry.metrics import get_meter
+
+if TYPE_CHECKING:
+    from extensions.ext_storage import Storage
+
+logger = logging.getLogger(__name__)
+
+_lookup_counter = get_meter("storage_cache").create_counter(
+    "storage.cache.lookups",
+    description="Storage cache lookups by tier serving them: memory, disk or miss",
+    unit="{lookup}",
+)
+
+
+@dataclass
+class StorageCacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+
+
+class StorageCache:
+    """
+    Read-through cache of storage objects on the local disk, with an in-memory tier for small objects
+    and their base64 encodings.
+
+    Entries are keyed by the object key and a version supplied by the caller, e.g. the id of the
+    upload or tool file record, so only objects whose content never changes under a version should
+    be read through it. The disk tier is shared by the processes of the host and bounded by
+    `max_size`: least recently used files are evicted first, hits refresh the file mtime.
+    """
+
+    def __init__(
+        self,
+        storage: "Storage",
+        directory: str,
+        max_size: int,
+        memory_max_size: int,
+        memory_max_object_size: int,
+    ) -> None:
+        """
+        :param storage: storage to read through
+        :param directory: directory of the disk tier
+        :param max_size: max bytes of the disk tier, 0 disables the cache
+        :param memory_max_size: max bytes of the memory tier, 0 disables it
+        :param memory_max_object_size: objects larger than this are only cached on disk
+        """
+        self.storage = storage
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.memory_max_size = memory_max_size
+        self.memory_max_object_size = memory_max_object_size
+        self.stats = StorageCacheStats()
+
+        self._memory: OrderedDict[tuple[str, str, str], Union[bytes, str]] = OrderedDict()
+        self._memory_size = 0
+        self._disk_size: int | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def load(self, filename: str, version: str) -> bytes:
+        """
+        Load an object, from the cache when possible
+
+        :param filename: object key
+        :param version: version of the object content
+        :return: content
+        """
+        if not self.enabled:
+            return self.storage.load_once(filename)
+
+        data = self._memory_get((filename, version, "raw"))
+        if isinstance(data, bytes):
+            self._record("memory")
+            return data
+
+        cache_path = self._cache_path(filename, version)
+        try:
+            data = cache_path.read_bytes()
+            os.utime(cache_path)
+            self._record("disk")
+        except FileNotFoundError:
+            data = self.storage.load_once(filename)
+            self._record("miss")
+            self._disk_put(cache_path, data)
+
+        self._memory_put((filename, version, "raw"), data, len(data))
+        return data
+
+    def load_base64(self, filename: str, version: str) -> str:
+        """
+        Load the base64 encoding of an object, memoized in the memory tier
+
+        :param filename: object key
+        :param version: version of the object content
+        :return: base64 encoded content
+        """
+        encoded = self._memory_get((filename, version, "base64")) if self.enabled else None
+        if isinstance(encoded, str):
+            self._record("memory")
+            return encoded
+
+        encoded = base64.b64encode(self.load(filename, version)).decode("utf-8")
+        if self.enabled:
+            self._memory_put((filename, version, "base64"), encoded, len(encoded))
+        return encoded
+
+    def download(self, filename: str, version: str, target_filepath: str) -> None:
+        """
+        Download an object to a local file, copied from the disk tier when possible
+
+        :param filename: object key
+        :param version: version of the object content
+        :param target_filepath: local file path
+        """
+        if not self.enabled:
+            self.storage.download(filename, target_filepath)
+            return
+
+        cache_path = self._cache_path(filename, version)
+        try:
+            shutil.copyfile(cache_path, target_filepath)
+            os.utime(cache_path)
+            self._record("disk")
+            return
+        except FileNotFoundError:
+            pass
+
+        self.storage.download(filename, target_filepath)
+        self._record("miss")
+        size = os.path.getsize(target_filepath)
+        if size <= self.max_size:
+            self._disk_put_file(cache_path, target_filepath, size)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+            self._disk_size = None
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _record(self, tier: str) -> None:
+        with self._lock:
+            if tier == "memory":
+                self.stats.memory_hits += 1
+            elif tier == "disk":
+                self.stats.disk_hits += 1
+            else:
+                self.stats.misses += 1
+        _lookup_counter.add(1, {"tier": tier})
+
+    def _cache_path(self, filename: str, version: str) -> Path:
+        digest = hashlib.sha256(f"{filename}\0{version}".encode()).hexdigest()
+        return self.directory / digest[:2] / digest
+
+    def _memory_get(self, key: tuple[str, str, str]) -> Union[bytes, str, None]:
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+            return value
+
+    def _memory_put(self, key: tuple[str, str, str], value: Union[bytes, str], size: int) -> None:
+        if size > self.memory_max_object_size or size > self.memory_max_size:
+            return
+
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_size -= len(previous)
+            self._memory[key] = value
+            self._memory_size += size
+            while self._memory_size > self.memory_max_size:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted)
+
+    def _disk_put(self, cache_path: Path, data: bytes) -> None:
+        if len(data) > self.max_size:
+            return
+
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=cache_path.parent, delete=False) as file:
+                file.write(data)
+            os.replace(file.name, cache_path)
+        except OSError:
+            logger.exception("Failed to write storage cache file")
+            return
+
+        self._add_disk_size(len(data))
+
+    def _disk_put_file(self, cache_path: Path, source_filepath: str, size: int) -> None:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=cache_path.parent, delete=False) as file:
+                pass
+            shutil.copyfile(source_filepath, file.name)
+            os.replace(file.name, cache_path)
+        except OSError:
+            logger.exception("Failed to write storage cache file")
+            return
+
+        self._add_disk_size(size)
+
+    def _add_disk_size(self, size: int) -> None:
+        with self._lock:
+            if self._disk_size is None:
+                self._disk_size = self._scan()[1]
+            else:
+                self._disk_size += size
+            if self._disk_size <= self.max_size:
+                return
+
+            # other processes of the host share the directory, evict based on a fresh scan
+            files, disk_size = self._scan()
+            files.sort(key=lambda file: file[1])
+            for path, _, file_size in files:
+                if disk_size <= self.max_size * 0.9:
+                    break
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                disk_size -= file_size
+                self.stats.evictions += 1
+            self._disk_size = disk_size
+
+    def _scan(self) -> tuple[list[tuple[Path, float, int]], int]:
+        files = []
+        disk_size = 0
+        for path in self.directory.glob("*/*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((path, stat.st_mtime, stat.st_size))
+            disk_size += stat.st_size
+        return files, disk_size
@@ -1,7 +1,14 @@
 import json
+from collections.abc import Callable
+from typing import Any, Optional
 
 from pydantic import BaseModel
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
 
 class PydanticModelEncoder(json.JSONEncoder):
     def default(self, o):
@@ -9,3 +16,25 @@ class PydanticModelEncoder(json.JSONEncoder):
             return o.model_dump()
         else:
             super().default(o)
+
+
+def dumps_json(
+    value: Any,
+    default: Optional[Callable[[Any], Any]] = None,
+    encoder: Optional[type[json.JSONEncoder]] = None,
+) -> bytes:
+    """
+    Serialize a value to UTF-8 encoded JSON, with orjson when it is installed.
+    Values orjson cannot serialize, like integers over 64 bits, fall back to the json module.
+
+    :param value: value to serialize
+    :param default: function converting the objects orjson cannot serialize
+    :param encoder: JSON encoder used by the json module
+    :return: JSON bytes
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=default, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(value, cls=encoder).encode("utf-8")
@@ -0,0 +1,38 @@
+"""add keyset pagination indexes for workflow app logs and runs
+
+Revision ID: 3f6b1a9e5c27
+Revises: 8d4c2f61a7b3
+Create Date: 2025-06-26 10:00:00.000000
+
+"""
+from alembic import op
+import models as models
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6b1a9e5c27'
+down_revision = '8d4c2f61a7b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the new indexes start with the columns of the indexes they replace
+    with op.batch_alter_table('workflow_app_logs', schema=None) as batch_op:
+        batch_op.create_index('workflow_app_log_app_created_at_idx', ['tenant_id', 'app_id', 'created_at', 'id'], unique=False)
+        batch_op.drop_index('workflow_app_log_app_idx')
+
+    with op.batch_alter_table('workflow_runs', schema=None) as batch_op:
+        batch_op.create_index('workflow_run_triggered_from_created_at_idx', ['tenant_id', 'app_id', 'triggered_from', 'created_at', 'id'], unique=False)
+        batch_op.drop_index('workflow_run_triggerd_from_idx')
+
+
+def downgrade():
+    with op.batch_alter_table('workflow_runs', schema=None) as batch_op:
+        batch_op.create_index('workflow_run_triggerd_from_idx', ['tenant_id', 'app_id', 'triggered_from'], unique=False)
+        batch_op.drop_index('workflow_run_triggered_from_created_at_idx')
+
+    with op.batch_alter_table('workflow_app_logs', schema=None) as batch_op:
+        batch_op.create_index('workflow_app_log_app_idx', ['tenant_id', 'app_id'], unique=False)
+        batch_op.drop_index('workflow_app_log_app_created_at_idx')
@@ -1,3 +1,5 @@
+from typing import Any
+
 from sqlalchemy.orm import DeclarativeBase
 
 from models.engine import metadata
@@ -5,3 +7,20 @@ from models.engine import metadata
 
 class Base(DeclarativeBase):
     metadata = metadata
+
+
+NOT_PRELOADED = object()
+
+
+class PreloadedAttributesMixin:
+    """
+    Lets a listing load the related rows and statistics of a whole page with a few batched queries,
+    properties then return the preloaded values instead of querying them row by row.
+    """
+
+    def preload_attributes(self, **attributes: Any) -> None:
+        preloaded = self.__dict__.setdefault("_preloaded_attributes", {})
+        preloaded.update(attributes)
+
+    def _get_preloaded_attribute(self, name: str) -> Any:
+        return self.__dict__.get("_preloaded_attributes", {}).get(name, NOT_PRELOADED)
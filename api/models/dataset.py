@@ -22,7 +22,7 @@ from extensions.ext_storage import storage
 from services.entities.knowledge_entities.knowledge_entities import ParentMode, Rule
 
 from .account import Account
-from .base import Base
+from .base import NOT_PRELOADED, Base, PreloadedAttributesMixin
 from .engine import db
 from .model import App, Tag, TagBinding, UploadFile
 from .types import StringUUID
@@ -34,7 +34,7 @@ class DatasetPermissionEnum(enum.StrEnum):
     PARTIAL_TEAM = "partial_members"
 
 
-class Dataset(Base):
+class Dataset(PreloadedAttributesMixin, Base):
     __tablename__ = "datasets"
     __table_args__ = (
         db.PrimaryKeyConstraint("id", name="dataset_pkey"),
@@ -101,6 +101,8 @@ class Dataset(Base):
 
     @property
     def app_count(self):
+        if (app_count := self._get_preloaded_attribute("app_count")) is not NOT_PRELOADED:
+            return app_count
         return (
             db.session.query(func.count(AppDatasetJoin.id))
             .filter(AppDatasetJoin.dataset_id == self.id, App.id == AppDatasetJoin.app_id)
@@ -109,10 +111,15 @@ class Dataset(Base):
 
     @property
     def document_count(self):
+        if (document_count := self._get_preloaded_attribute("document_count")) is not NOT_PRELOADED:
+            return document_count
         return db.session.query(func.count(Document.id)).filter(Document.dataset_id == self.id).scalar()
 
     @property
     def available_document_count(self):
+        available_document_count = self._get_preloaded_attribute("available_document_count")
+        if available_document_count is not NOT_PRELOADED:
+            return available_document_count
         return (
             db.session.query(func.count(Document.id))
             .filter(
@@ -126,6 +133,9 @@ class Dataset(Base):
 
     @property
     def available_segment_count(self):
+        available_segment_count = self._get_preloaded_attribute("available_segment_count")
+        if available_segment_count is not NOT_PRELOADED:
+            return available_segment_count
         return (
             db.session.query(func.count(DocumentSegment.id))
             .filter(
@@ -138,6 +148,8 @@ class Dataset(Base):
 
     @property
     def word_count(self):
+        if (word_count := self._get_preloaded_attribute("word_count")) is not NOT_PRELOADED:
+            return word_count
         return (
             db.session.query(Document)
             .with_entities(func.coalesce(func.sum(Document.word_count), 0))
@@ -147,6 +159,8 @@ class Dataset(Base):
 
     @property
     def doc_form(self):
+        if (doc_form := self._get_preloaded_attribute("doc_form")) is not NOT_PRELOADED:
+            return doc_form
         document = db.session.query(Document).filter(Document.dataset_id == self.id).first()
         if document:
             return document.doc_form
@@ -165,6 +179,8 @@ class Dataset(Base):
 
     @property
     def tags(self):
+        if (tags := self._get_preloaded_attribute("tags")) is not NOT_PRELOADED:
+            return tags
         tags = (
             db.session.query(Tag)
             .join(TagBinding, Tag.id == TagBinding.tag_id)
@@ -183,6 +199,9 @@ class Dataset(Base):
     def external_knowledge_info(self):
         if self.provider != "external":
             return None
+        external_knowledge_info = self._get_preloaded_attribute("external_knowledge_info")
+        if external_knowledge_info is not NOT_PRELOADED:
+            return external_knowledge_info
         external_knowledge_binding = (
             db.session.query(ExternalKnowledgeBindings).filter(ExternalKnowledgeBindings.dataset_id == self.id).first()
         )
@@ -195,6 +214,12 @@ class Dataset(Base):
         )
         if not external_knowledge_api:
             return None
+        return self.build_external_knowledge_info(external_knowledge_binding, external_knowledge_api)
+
+    @staticmethod
+    def build_external_knowledge_info(
+        external_knowledge_binding: "ExternalKnowledgeBindings", external_knowledge_api: "ExternalKnowledgeApis"
+    ) -> dict[str, Any]:
         return {
             "external_knowledge_id": external_knowledge_binding.external_knowledge_id,
             "external_knowledge_api_id": external_knowledge_api.id,
@@ -204,7 +229,9 @@ class Dataset(Base):
 
     @property
     def doc_metadata(self):
-        dataset_metadatas = db.session.query(DatasetMetadata).filter(DatasetMetadata.dataset_id == self.id).all()
+        dataset_metadatas = self._get_preloaded_attribute("dataset_metadatas")
+        if dataset_metadatas is NOT_PRELOADED:
+            dataset_metadatas = db.session.query(DatasetMetadata).filter(DatasetMetadata.dataset_id == self.id).all()
 
         doc_metadata = [
             {
@@ -298,7 +325,7 @@ class DatasetProcessRule(Base):
             return None
 
 
-class Document(Base):
+class Document(PreloadedAttributesMixin, Base):
     __tablename__ = "documents"
     __table_args__ = (
         db.PrimaryKeyConstraint("id", name="document_pkey"),
@@ -402,12 +429,14 @@ class Document(Base):
     def data_source_detail_dict(self):
         if self.data_source_info:
             if self.data_source_type == "upload_file":
-                data_source_info_dict = json.loads(self.data_source_info)
-                file_detail = (
-                    db.session.query(UploadFile)
-                    .filter(UploadFile.id == data_source_info_dict["upload_file_id"])
-                    .one_or_none()
-                )
+                file_detail = self._get_preloaded_attribute("upload_file")
+                if file_detail is NOT_PRELOADED:
+                    data_source_info_dict = json.loads(self.data_source_info)
+                    file_detail = (
+                        db.session.query(UploadFile)
+                        .filter(UploadFile.id == data_source_info_dict["upload_file_id"])
+                        .one_or_none()
+                    )
                 if file_detail:
                     return {
                         "upload_file": {
@@ -432,6 +461,8 @@ class Document(Base):
 
     @property
     def dataset_process_rule(self):
+        if (dataset_process_rule := self._get_preloaded_attribute("dataset_process_rule")) is not NOT_PRELOADED:
+            return dataset_process_rule
         if self.dataset_process_rule_id:
             return db.session.get(DatasetProcessRule, self.dataset_process_rule_id)
         return None
@@ -442,10 +473,38 @@ class Document(Base):
 
     @property
     def segment_count(self):
+        if (segment_count := self._get_preloaded_attribute("segment_count")) is not NOT_PRELOADED:
+            return segment_count
         return db.session.query(DocumentSegment).filter(DocumentSegment.document_id == self.id).count()
 
+    @property
+    def completed_segments(self):
+        if (completed_segments := self._get_preloaded_attribute("completed_segments")) is not NOT_PRELOADED:
+            return completed_segments
+        return (
+            db.session.query(DocumentSegment)
+            .filter(
+                DocumentSegment.completed_at.isnot(None),
+                DocumentSegment.document_id == self.id,
+                DocumentSegment.status != "re_segment",
+            )
+            .count()
+        )
+
+    @property
+    def total_segments(self):
+        if (total_segments := self._get_preloaded_attribute("total_segments")) is not NOT_PRELOADED:
+            return total_segments
+        return (
+            db.session.query(DocumentSegment)
+            .filter(DocumentSegment.document_id == self.id, DocumentSegment.status != "re_segment")
+            .count()
+        )
+
     @property
     def hit_count(self):
+        if (hit_count := self._get_preloaded_attribute("hit_count")) is not NOT_PRELOADED:
+            return hit_count
         return (
             db.session.query(DocumentSegment)
             .with_entities(func.coalesce(func.sum(DocumentSegment.hit_count), 0))
@@ -469,14 +528,17 @@ class Document(Base):
     @property
     def doc_metadata_details(self):
         if self.doc_metadata:
-            document_metadatas = (
-                db.session.query(DatasetMetadata)
-                .join(DatasetMetadataBinding, DatasetMetadataBinding.metadata_id == DatasetMetadata.id)
-                .filter(
-                    DatasetMetadataBinding.dataset_id == self.dataset_id, DatasetMetadataBinding.document_id == self.id
+            document_metadatas = self._get_preloaded_attribute("document_metadatas")
+            if document_metadatas is NOT_PRELOADED:
+                document_metadatas = (
+                    db.session.query(DatasetMetadata)
+                    .join(DatasetMetadataBinding, DatasetMetadataBinding.metadata_id == DatasetMetadata.id)
+                    .filter(
+                        DatasetMetadataBinding.dataset_id == self.dataset_id,
+                        DatasetMetadataBinding.document_id == self.id,
+                    )
+                    .all()
                 )
-                .all()
-            )
             metadata_list = []
             for metadata in document_metadatas:
                 metadata_dict = {
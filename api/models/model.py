@@ -27,7 +27,7 @@ from core.file import helpers as file_helpers
 from libs.helper import generate_string
 
 from .account import Account, Tenant
-from .base import Base
+from .base import NOT_PRELOADED, Base, PreloadedAttributesMixin
 from .engine import db
 from .enums import CreatorUserRole
 from .types import StringUUID
@@ -892,7 +892,7 @@ class Conversation(Base):
         }
 
 
-class Message(Base):
+class Message(PreloadedAttributesMixin, Base):
     __tablename__ = "messages"
     __table_args__ = (
         PrimaryKeyConstraint("id", name="message_pkey"),
@@ -1047,6 +1047,9 @@ class Message(Base):
 
     @property
     def user_feedback(self):
+        feedbacks = self._get_preloaded_attribute("feedbacks")
+        if feedbacks is not NOT_PRELOADED:
+            return next((feedback for feedback in feedbacks if feedback.from_source == "user"), None)
         feedback = (
             db.session.query(MessageFeedback)
             .filter(MessageFeedback.message_id == self.id, MessageFeedback.from_source == "user")
@@ -1056,6 +1059,9 @@ class Message(Base):
 
     @property
     def admin_feedback(self):
+        feedbacks = self._get_preloaded_attribute("feedbacks")
+        if feedbacks is not NOT_PRELOADED:
+            return next((feedback for feedback in feedbacks if feedback.from_source == "admin"), None)
         feedback = (
             db.session.query(MessageFeedback)
             .filter(MessageFeedback.message_id == self.id, MessageFeedback.from_source == "admin")
@@ -1065,16 +1071,23 @@ class Message(Base):
 
     @property
     def feedbacks(self):
+        if (feedbacks := self._get_preloaded_attribute("feedbacks")) is not NOT_PRELOADED:
+            return feedbacks
         feedbacks = db.session.query(MessageFeedback).filter(MessageFeedback.message_id == self.id).all()
         return feedbacks
 
     @property
     def annotation(self):
+        if (annotation := self._get_preloaded_attribute("annotation")) is not NOT_PRELOADED:
+            return annotation
         annotation = db.session.query(MessageAnnotation).filter(MessageAnnotation.message_id == self.id).first()
         return annotation
 
     @property
     def annotation_hit_history(self):
+        annotation = self._get_preloaded_attribute("annotation_hit_history")
+        if annotation is not NOT_PRELOADED:
+            return annotation
         annotation_history = (
             db.session.query(AppAnnotationHitHistory).filter(AppAnnotationHitHistory.message_id == self.id).first()
         )
@@ -1107,6 +1120,8 @@ class Message(Base):
 
     @property
     def agent_thoughts(self):
+        if (agent_thoughts := self._get_preloaded_attribute("agent_thoughts")) is not NOT_PRELOADED:
+            return agent_thoughts
         return (
             db.session.query(MessageAgentThought)
             .filter(MessageAgentThought.message_id == self.id)
@@ -1122,12 +1137,17 @@ class Message(Base):
     def message_files(self):
         from factories import file_factory
 
-        message_files = db.session.query(MessageFile).filter(MessageFile.message_id == self.id).all()
-        current_app = db.session.query(App).filter(App.id == self.app_id).first()
+        message_files = self._get_preloaded_attribute("message_file_rows")
+        if message_files is NOT_PRELOADED:
+            message_files = db.session.query(MessageFile).filter(MessageFile.message_id == self.id).all()
+        current_app = self._get_preloaded_attribute("app")
+        if current_app is NOT_PRELOADED:
+            current_app = db.session.query(App).filter(App.id == self.app_id).first()
         if not current_app:
             raise ValueError(f"App {self.app_id} not found")
 
         files = []
+        tool_file_id_backfilled = False
         for message_file in message_files:
             if message_file.transfer_method == FileTransferMethod.LOCAL_FILE.value:
                 if message_file.upload_file_id is None:
@@ -1158,6 +1178,7 @@ class Message(Base):
                 if message_file.upload_file_id is None:
                     assert message_file.url is not None
                     message_file.upload_file_id = message_file.url.split("/")[-1].split(".")[0]
+                    tool_file_id_backfilled = True
                 mapping = {
                     "id": message_file.id,
                     "type": message_file.type,
@@ -1179,7 +1200,9 @@ class Message(Base):
             for (file, message_file) in zip(files, message_files)
         ]
 
-        db.session.commit()
+        # committing expires every loaded message of the page, only commit the backfilled tool file ids
+        if tool_file_id_backfilled:
+            db.session.commit()
         return result
 
     @property
@@ -1239,7 +1262,7 @@ class Message(Base):
         )
 
 
-class MessageFeedback(Base):
+class MessageFeedback(PreloadedAttributesMixin, Base):
     __tablename__ = "message_feedbacks"
     __table_args__ = (
         db.PrimaryKeyConstraint("id", name="message_feedback_pkey"),
@@ -1262,6 +1285,9 @@ class MessageFeedback(Base):
 
     @property
     def from_account(self):
+        account = self._get_preloaded_attribute("from_account")
+        if account is not NOT_PRELOADED:
+            return account
         account = db.session.query(Account).filter(Account.id == self.from_account_id).first()
         return account
 
@@ -1322,7 +1348,7 @@ class MessageFile(Base):
     created_at: Mapped[datetime] = db.Column(db.DateTime, nullable=False, server_default=func.current_timestamp())
 
 
-class MessageAnnotation(Base):
+class MessageAnnotation(PreloadedAttributesMixin, Base):
     __tablename__ = "message_annotations"
     __table_args__ = (
         db.PrimaryKeyConstraint("id", name="message_annotation_pkey"),
@@ -1344,13 +1370,15 @@ class MessageAnnotation(Base):
 
     @property
     def account(self):
+        account = self._get_preloaded_attribute("account")
+        if account is not NOT_PRELOADED:
+            return account
         account = db.session.query(Account).filter(Account.id == self.account_id).first()
         return account
 
     @property
     def annotation_create_account(self):
-        account = db.session.query(Account).filter(Account.id == self.account_id).first()
-        return account
+        return self.account
 
 
 class AppAnnotationHitHistory(Base):
@@ -2,13 +2,11 @@ import datetime
 import time
 
 import click
-from sqlalchemy import text
-from werkzeug.exceptions import NotFound
 
 import app
 from configs import dify_config
 from extensions.ext_database import db
-from models.dataset import Embedding
+from services.data_retention_service import EMBEDDING_RETENTION, DataRetentionService
 
 
 @app.celery.task(queue="dataset")
@@ -17,26 +15,10 @@ def clean_embedding_cache_task():
     clean_days = int(dify_config.PLAN_SANDBOX_CLEAN_DAY_SETTING)
     start_at = time.perf_counter()
     thirty_days_ago = datetime.datetime.now() - datetime.timedelta(days=clean_days)
-    while True:
-        try:
-            embedding_ids = (
-                db.session.query(Embedding.id)
-                .filter(Embedding.created_at < thirty_days_ago)
-                .order_by(Embedding.created_at.desc())
-                .limit(100)
-                .all()
-            )
-            embedding_ids = [embedding_id[0] for embedding_id in embedding_ids]
-        except NotFound:
-            break
-        if embedding_ids:
-            for embedding_id in embedding_ids:
-                db.session.execute(
-                    text("DELETE FROM embeddings WHERE id = :embedding_id"), {"embedding_id": embedding_id}
-                )
-
-            db.session.commit()
-        else:
-            break
+    deleted = DataRetentionService(db.engine).clean(EMBEDDING_RETENTION, thirty_days_ago)
     end_at = time.perf_counter()
-    click.echo(click.style("Cleaned embedding cache from db success latency: {}".format(end_at - start_at), fg="green"))
+    click.echo(
+        click.style(
+            "Cleaned {} embedding cache from db success latency: {}".format(deleted, end_at - start_at), fg="green"
+        )
+    )
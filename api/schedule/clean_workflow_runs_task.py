@@ -0,0 +1,26 @@
+import datetime
+import time
+
+import click
+
+import app
+from configs import dify_config
+from extensions.ext_database import db
+from services.data_retention_service import WORKFLOW_RUN_RETENTION, DataRetentionService
+
+
+@app.celery.task(queue="dataset")
+def clean_workflow_runs_task():
+    """Delete the workflow runs, node executions and app logs of sandbox plan workspaces once expired."""
+    click.echo(click.style("Start clean workflow runs.", fg="green"))
+    start_at = time.perf_counter()
+    plan_sandbox_clean_workflow_run_day = datetime.datetime.now() - datetime.timedelta(
+        days=dify_config.PLAN_SANDBOX_CLEAN_WORKFLOW_RUN_DAY_SETTING
+    )
+    deleted = DataRetentionService(db.engine).clean(WORKFLOW_RUN_RETENTION, plan_sandbox_clean_workflow_run_day)
+    end_at = time.perf_counter()
+    click.echo(
+        click.style(
+            "Cleaned {} workflow runs from db success latency: {}".format(deleted, end_at - start_at), fg="green"
+        )
+    )
@@ -0,0 +1,24 @@
+import logging
+import time
+
+import click
+
+import app
+from core.helper.provider_usage_ledger import provider_usage_ledger
+
+
+@app.celery.task(queue="dataset")
+def flush_provider_usage_ledger_task():
+    """Write the provider quota usage and last uses recorded in redis back to the providers table."""
+    start_at = time.perf_counter()
+    try:
+        flushed = provider_usage_ledger.flush()
+    except Exception:
+        logging.exception(click.style("Failed to flush the provider usage ledger", fg="red"))
+        return
+
+    if flushed:
+        end_at = time.perf_counter()
+        logging.info(
+            click.style(f"Flushed {flushed} provider usage counters, latency: {end_at - start_at:.3f}s", fg="green")
+        )
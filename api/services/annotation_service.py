@@ -8,6 +8,7 @@ from sqlalchemy import or_, select
 from werkzeug.datastructures import FileStorage
 from werkzeug.exceptions import NotFound
 
+from core.app.features.annotation_reply.annotation_reply_index import invalidate_annotation_reply_index
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
 from models.model import App, AppAnnotationHitHistory, AppAnnotationSetting, Message, MessageAnnotation
@@ -60,6 +61,7 @@ class AppAnnotationService:
             )
         db.session.add(annotation)
         db.session.commit()
+        invalidate_annotation_reply_index(app_id)
         # if annotation reply is enabled , add annotation to index
         annotation_setting = (
             db.session.query(AppAnnotationSetting).filter(AppAnnotationSetting.app_id == app_id).first()
@@ -180,6 +182,7 @@ class AppAnnotationService:
         )
         db.session.add(annotation)
         db.session.commit()
+        invalidate_annotation_reply_index(app_id)
         # if annotation reply is enabled , add annotation to index
         annotation_setting = (
             db.session.query(AppAnnotationSetting).filter(AppAnnotationSetting.app_id == app_id).first()
@@ -215,6 +218,7 @@ class AppAnnotationService:
         annotation.question = args["question"]
 
         db.session.commit()
+        invalidate_annotation_reply_index(app_id)
         # if annotation reply is enabled , add annotation to index
         app_annotation_setting = (
             db.session.query(AppAnnotationSetting).filter(AppAnnotationSetting.app_id == app_id).first()
@@ -260,6 +264,7 @@ class AppAnnotationService:
                 db.session.delete(annotation_hit_history)
 
         db.session.commit()
+        invalidate_annotation_reply_index(app_id)
         # if annotation reply is enabled , delete annotation index
         app_annotation_setting = (
             db.session.query(AppAnnotationSetting).filter(AppAnnotationSetting.app_id == app_id).first()
@@ -434,6 +439,7 @@ class AppAnnotationService:
         annotation_setting.updated_at = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
         db.session.add(annotation_setting)
         db.session.commit()
+        invalidate_annotation_reply_index(app_id)
 
         collection_binding_detail = annotation_setting.collection_binding_detail
 
@@ -0,0 +1,218 @@
+import datetime
+import json
+import logging
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import Engine, delete, literal, select, tuple_
+from sqlalchemy.orm import Session, sessionmaker
+
+from configs import dify_config
+from extensions.ext_redis import redis_client
+from models.base import Base
+from models.dataset import Embedding
+from models.model import (
+    App,
+    Message,
+    MessageAgentThought,
+    MessageAnnotation,
+    MessageChain,
+    MessageFeedback,
+    MessageFile,
+)
+from models.web import SavedMessage
+from models.workflow import WorkflowAppLog, WorkflowNodeExecutionModel, WorkflowRun
+from services.feature_service import FeatureService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RetentionTarget:
+    """
+    Model whose rows created before a retention date are deleted, along with the rows of its related models
+    """
+
+    name: str
+    model: type[Base]
+    # related model and its column referencing the id of the model
+    related: Sequence[tuple[type[Base], str]] = field(default_factory=tuple)
+    # column of the app or tenant owning the rows, when only the rows of sandbox plan tenants are deleted
+    app_id_column: Optional[str] = None
+    tenant_id_column: Optional[str] = None
+
+
+MESSAGE_RETENTION = RetentionTarget(
+    name="messages",
+    model=Message,
+    related=(
+        (MessageFeedback, "message_id"),
+        (MessageAnnotation, "message_id"),
+        (MessageChain, "message_id"),
+        (MessageAgentThought, "message_id"),
+        (MessageFile, "message_id"),
+        (SavedMessage, "message_id"),
+    ),
+    app_id_column="app_id",
+)
+
+WORKFLOW_RUN_RETENTION = RetentionTarget(
+    name="workflow_runs",
+    model=WorkflowRun,
+    related=(
+        (WorkflowNodeExecutionModel, "workflow_run_id"),
+        (WorkflowAppLog, "workflow_run_id"),
+    ),
+    tenant_id_column="tenant_id",
+)
+
+EMBEDDING_RETENTION = RetentionTarget(name="embeddings", model=Embedding)
+
+
+class DataRetentionService:
+    """
+    Deletes the rows of a retention target created before a date, in batches walked in (created_at, id) order
+    with keyset pagination, with one DELETE per table per batch.
+
+    The position reached is kept in redis after each batch, a run stopped by DATA_RETENTION_MAX_RUNTIME or a
+    crash is resumed by the next one, and the position is cleared once a run reaches the retention date.
+    """
+
+    _CURSOR_KEY_PREFIX = "data_retention_cursor"
+    _CURSOR_KEY_TTL = 7 * 24 * 60 * 60
+    _PLAN_CACHE_TTL = 600
+
+    def __init__(self, session_factory: sessionmaker | Engine):
+        if isinstance(session_factory, Engine):
+            self._session_factory = sessionmaker(bind=session_factory, expire_on_commit=False)
+        else:
+            self._session_factory = session_factory
+
+    def clean(
+        self,
+        target: RetentionTarget,
+        before: datetime.datetime,
+        batch_size: Optional[int] = None,
+        batch_interval: Optional[float] = None,
+        max_runtime: Optional[float] = None,
+    ) -> int:
+        """
+        Delete the rows of a retention target created before a date
+
+        :param target: retention target
+        :param before: rows created before this date are deleted
+        :param batch_size: rows walked per batch, DATA_RETENTION_BATCH_SIZE by default
+        :param batch_interval: seconds slept between batches, DATA_RETENTION_BATCH_INTERVAL_MS by default
+        :param max_runtime: seconds after which the run stops, DATA_RETENTION_MAX_RUNTIME by default, 0 for no limit
+        :return: number of rows of the table deleted
+        """
+        batch_size = batch_size or dify_config.DATA_RETENTION_BATCH_SIZE
+        if batch_interval is None:
+            batch_interval = dify_config.DATA_RETENTION_BATCH_INTERVAL_MS / 1000
+        if max_runtime is None:
+            max_runtime = dify_config.DATA_RETENTION_MAX_RUNTIME
+
+        table = target.model.__table__
+        owner_column = target.app_id_column or target.tenant_id_column
+        columns = [table.c.id, table.c.created_at]
+        if owner_column:
+            columns.append(table.c[owner_column])
+
+        start_at = time.perf_counter()
+        cursor = self._load_cursor(target)
+        deleted = 0
+        while True:
+            with self._session_factory() as session:
+                stmt = select(*columns).where(table.c.created_at < before)
+                if cursor:
+                    # the created_at bound lets the created_at index drive the row value comparison
+                    stmt = stmt.where(
+                        table.c.created_at >= cursor[0],
+                        tuple_(table.c.created_at, table.c.id)
+                        > tuple_(literal(cursor[0], table.c.created_at.type), literal(cursor[1], table.c.id.type)),
+                    )
+                rows = session.execute(stmt.order_by(table.c.created_at, table.c.id).limit(batch_size)).all()
+                if not rows:
+                    self._clear_cursor(target)
+                    break
+
+                if owner_column:
+                    ids = self._filter_sandbox_rows(session, target, rows)
+                else:
+                    ids = [row[0] for row in rows]
+
+                if ids:
+                    for related_model, column in target.related:
+                        session.execute(
+                            delete(related_model).where(getattr(related_model, column).in_(ids)),
+                            execution_options={"synchronize_session": False},
+                        )
+                    deleted += session.execute(
+                        delete(target.model).where(table.c.id.in_(ids)),
+                        execution_options={"synchronize_session": False},
+                    ).rowcount
+                    session.commit()
+
+            if len(rows) < batch_size:
+                self._clear_cursor(target)
+                break
+            cursor = (rows[-1][1], rows[-1][0])
+            self._save_cursor(target, cursor)
+            if max_runtime and time.perf_counter() - start_at >= max_runtime:
+                logger.info(
+                    "Data retention of %s stopped after %ss, %s rows deleted", target.name, max_runtime, deleted
+                )
+                break
+            if batch_interval:
+                time.sleep(batch_interval)
+
+        return deleted
+
+    def _filter_sandbox_rows(self, session: Session, target: RetentionTarget, rows: Sequence) -> list[str]:
+        if target.app_id_column:
+            app_ids = {row[2] for row in rows}
+            app_tenants: dict[str, str] = dict(
+                session.execute(select(App.id, App.tenant_id).where(App.id.in_(app_ids))).tuples().all()
+            )
+            for app_id in app_ids - app_tenants.keys():
+                logger.warning("Expected App record to exist, but none was found, app_id=%s", app_id)
+            row_tenants = [app_tenants.get(row[2]) for row in rows]
+        else:
+            row_tenants = [row[2] for row in rows]
+
+        # the plans of the tenants of the batch, resolved once per batch
+        plans = self._get_tenant_plans({tenant_id for tenant_id in row_tenants if tenant_id})
+        return [row[0] for row, tenant_id in zip(rows, row_tenants) if tenant_id and plans[tenant_id] == "sandbox"]
+
+    def _get_tenant_plans(self, tenant_ids: set[str]) -> dict[str, str]:
+        if not tenant_ids:
+            return {}
+
+        tenant_ids_list = list(tenant_ids)
+        cached = redis_client.mget([f"features:{tenant_id}" for tenant_id in tenant_ids_list])
+        plans = {}
+        for tenant_id, plan in zip(tenant_ids_list, cached):
+            if plan is None:
+                plan = FeatureService.get_features(tenant_id).billing.subscription.plan
+                redis_client.setex(f"features:{tenant_id}", self._PLAN_CACHE_TTL, plan)
+            plans[tenant_id] = plan.decode() if isinstance(plan, bytes) else plan
+        return plans
+
+    def _load_cursor(self, target: RetentionTarget) -> Optional[tuple[datetime.datetime, str]]:
+        value = redis_client.get(self._cursor_key(target))
+        if not value:
+            return None
+        cursor = json.loads(value)
+        return datetime.datetime.fromisoformat(cursor["created_at"]), cursor["id"]
+
+    def _save_cursor(self, target: RetentionTarget, cursor: tuple[datetime.datetime, str]) -> None:
+        value = json.dumps({"created_at": cursor[0].isoformat(), "id": str(cursor[1])})
+        redis_client.setex(self._cursor_key(target), self._CURSOR_KEY_TTL, value)
+
+    def _clear_cursor(self, target: RetentionTarget) -> None:
+        redis_client.delete(self._cursor_key(target))
+
+    def _cursor_key(self, target: RetentionTarget) -> str:
+        return f"{self._CURSOR_KEY_PREFIX}:{target.name}"
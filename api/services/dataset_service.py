@@ -2729,6 +2729,28 @@ class DatasetPermissionService:
 
         return user_list
 
+    @classmethod
+    def get_datasets_partial_member_lists(cls, dataset_ids: list[str]) -> dict[str, list[str]]:
+        """
+        Get the partial member account ids of several datasets with one query
+
+        :param dataset_ids: dataset ids
+        :return: account ids by dataset id
+        """
+        partial_member_lists: dict[str, list[str]] = {dataset_id: [] for dataset_id in dataset_ids}
+        if not dataset_ids:
+            return partial_member_lists
+
+        user_list_query = (
+            db.session.query(DatasetPermission.dataset_id, DatasetPermission.account_id)
+            .filter(DatasetPermission.dataset_id.in_(dataset_ids))
+            .all()
+        )
+        for user in user_list_query:
+            partial_member_lists[user.dataset_id].append(user.account_id)
+
+        return partial_member_lists
+
     @classmethod
     def update_partial_member_list(cls, tenant_id, dataset_id, user_list):
         try:
@@ -0,0 +1,241 @@
+from collections import defaultdict
+from collections.abc import Sequence
+from typing import Any
+
+from sqlalchemy import case, func, select
+
+from extensions.ext_database import db
+from models.dataset import (
+    AppDatasetJoin,
+    Dataset,
+    DatasetMetadata,
+    DatasetMetadataBinding,
+    DatasetProcessRule,
+    Document,
+    DocumentSegment,
+    ExternalKnowledgeApis,
+    ExternalKnowledgeBindings,
+)
+from models.model import App, Tag, TagBinding, UploadFile
+
+
+class DatasetStatisticsService:
+    """
+    Loads the statistics shown in dataset and document listings for a whole page at once,
+    so a page costs a constant number of queries instead of several queries per row.
+    """
+
+    @staticmethod
+    def preload_datasets(datasets: Sequence[Dataset]) -> None:
+        """
+        Preload app count, document/segment statistics, doc form, tags, metadata and
+        external knowledge info of a page of datasets
+
+        :param datasets: datasets of the page
+        """
+        if not datasets:
+            return
+
+        dataset_ids = [dataset.id for dataset in datasets]
+        app_counts: dict[str, int] = dict(
+            db.session.execute(  # type: ignore
+                select(AppDatasetJoin.dataset_id, func.count(AppDatasetJoin.id))
+                .join(App, App.id == AppDatasetJoin.app_id)
+                .where(AppDatasetJoin.dataset_id.in_(dataset_ids))
+                .group_by(AppDatasetJoin.dataset_id)
+            ).all()
+        )
+
+        available_document = (
+            (Document.indexing_status == "completed") & (Document.enabled == True) & (Document.archived == False)
+        )
+        document_statistics = {
+            row.dataset_id: row
+            for row in db.session.execute(
+                select(
+                    Document.dataset_id,
+                    func.count(Document.id).label("document_count"),
+                    func.coalesce(func.sum(case((available_document, 1), else_=0)), 0).label(
+                        "available_document_count"
+                    ),
+                    func.coalesce(func.sum(Document.word_count), 0).label("word_count"),
+                    func.min(Document.doc_form).label("doc_form"),
+                )
+                .where(Document.dataset_id.in_(dataset_ids))
+                .group_by(Document.dataset_id)
+            ).all()
+        }
+
+        available_segment_counts: dict[str, int] = dict(
+            db.session.execute(  # type: ignore
+                select(DocumentSegment.dataset_id, func.count(DocumentSegment.id))
+                .where(
+                    DocumentSegment.dataset_id.in_(dataset_ids),
+                    DocumentSegment.status == "completed",
+                    DocumentSegment.enabled == True,
+                )
+                .group_by(DocumentSegment.dataset_id)
+            ).all()
+        )
+
+        tenant_ids = {dataset.tenant_id for dataset in datasets}
+        tags: dict[tuple[str, str], list[Tag]] = defaultdict(list)
+        for target_id, tenant_id, tag in db.session.execute(
+            select(TagBinding.target_id, TagBinding.tenant_id, Tag)
+            .join(Tag, Tag.id == TagBinding.tag_id)
+            .where(
+                TagBinding.target_id.in_(dataset_ids),
+                TagBinding.tenant_id.in_(tenant_ids),
+                Tag.tenant_id == TagBinding.tenant_id,
+                Tag.type == "knowledge",
+            )
+        ).all():
+            tags[(target_id, tenant_id)].append(tag)
+
+        dataset_metadatas: dict[str, list[DatasetMetadata]] = defaultdict(list)
+        for dataset_metadata in db.session.scalars(
+            select(DatasetMetadata).where(DatasetMetadata.dataset_id.in_(dataset_ids))
+        ).all():
+            dataset_metadatas[dataset_metadata.dataset_id].append(dataset_metadata)
+
+        external_knowledge_infos = DatasetStatisticsService._load_external_knowledge_infos(
+            [dataset.id for dataset in datasets if dataset.provider == "external"]
+        )
+
+        for dataset in datasets:
+            statistics = document_statistics.get(dataset.id)
+            dataset.preload_attributes(
+                app_count=app_counts.get(dataset.id, 0),
+                document_count=statistics.document_count if statistics else 0,
+                available_document_count=statistics.available_document_count if statistics else 0,
+                word_count=statistics.word_count if statistics else 0,
+                doc_form=statistics.doc_form if statistics else None,
+                available_segment_count=available_segment_counts.get(dataset.id, 0),
+                tags=tags.get((dataset.id, dataset.tenant_id), []),
+                dataset_metadatas=dataset_metadatas.get(dataset.id, []),
+                external_knowledge_info=external_knowledge_infos.get(dataset.id),
+            )
+
+    @staticmethod
+    def preload_documents(documents: Sequence[Document], with_segment_progress: bool = False) -> None:
+        """
+        Preload segment count, hit count, upload file, metadata and process rule of a page of documents
+
+        :param documents: documents of the page
+        :param with_segment_progress: also preload `completed_segments` and `total_segments`
+        """
+        if not documents:
+            return
+
+        document_ids = [document.id for document in documents]
+        segment_statistics = {
+            row.document_id: row
+            for row in db.session.execute(
+                select(
+                    DocumentSegment.document_id,
+                    func.count(DocumentSegment.id).label("segment_count"),
+                    func.coalesce(func.sum(DocumentSegment.hit_count), 0).label("hit_count"),
+                    func.coalesce(
+                        func.sum(case((DocumentSegment.status != "re_segment", 1), else_=0)),
+                        0,
+                    ).label("total_segments"),
+                    func.coalesce(
+                        func.sum(
+                            case(
+                                (
+                                    (DocumentSegment.completed_at.isnot(None))
+                                    & (DocumentSegment.status != "re_segment"),
+                                    1,
+                                ),
+                                else_=0,
+                            )
+                        ),
+                        0,
+                    ).label("completed_segments"),
+                )
+                .where(DocumentSegment.document_id.in_(document_ids))
+                .group_by(DocumentSegment.document_id)
+            ).all()
+        }
+
+        upload_file_ids = {
+            document.id: document.data_source_info_dict.get("upload_file_id")
+            for document in documents
+            if document.data_source_type == "upload_file" and document.data_source_info_dict
+        }
+        upload_files: dict[str, UploadFile] = {}
+        if upload_file_ids:
+            upload_files = {
+                upload_file.id: upload_file
+                for upload_file in db.session.scalars(
+                    select(UploadFile).where(UploadFile.id.in_(set(upload_file_ids.values())))
+                ).all()
+            }
+
+        document_metadatas: dict[str, list[DatasetMetadata]] = defaultdict(list)
+        metadata_document_ids = [document.id for document in documents if document.doc_metadata]
+        if metadata_document_ids:
+            for document_id, dataset_metadata in db.session.execute(
+                select(DatasetMetadataBinding.document_id, DatasetMetadata)
+                .join(DatasetMetadata, DatasetMetadataBinding.metadata_id == DatasetMetadata.id)
+                .where(DatasetMetadataBinding.document_id.in_(metadata_document_ids))
+            ).all():
+                document_metadatas[document_id].append(dataset_metadata)
+
+        process_rule_ids = {document.dataset_process_rule_id for document in documents} - {None}
+        process_rules: dict[str, DatasetProcessRule] = {}
+        if process_rule_ids:
+            process_rules = {
+                process_rule.id: process_rule
+                for process_rule in db.session.scalars(
+                    select(DatasetProcessRule).where(DatasetProcessRule.id.in_(process_rule_ids))
+                ).all()
+            }
+
+        for document in documents:
+            statistics = segment_statistics.get(document.id)
+            preloaded: dict[str, Any] = {
+                "segment_count": statistics.segment_count if statistics else 0,
+                "hit_count": statistics.hit_count if statistics else 0,
+                "document_metadatas": document_metadatas.get(document.id, []),
+                "dataset_process_rule": process_rules.get(document.dataset_process_rule_id),
+            }
+            if document.id in upload_file_ids:
+                preloaded["upload_file"] = upload_files.get(upload_file_ids[document.id])
+            if with_segment_progress:
+                preloaded["completed_segments"] = statistics.completed_segments if statistics else 0
+                preloaded["total_segments"] = statistics.total_segments if statistics else 0
+            document.preload_attributes(**preloaded)
+
+    @staticmethod
+    def _load_external_knowledge_infos(dataset_ids: list[str]) -> dict[str, dict[str, Any]]:
+        if not dataset_ids:
+            return {}
+
+        bindings = {
+            binding.dataset_id: binding
+            for binding in db.session.scalars(
+                select(ExternalKnowledgeBindings).where(ExternalKnowledgeBindings.dataset_id.in_(dataset_ids))
+            ).all()
+        }
+        if not bindings:
+            return {}
+
+        external_knowledge_apis = {
+            external_knowledge_api.id: external_knowledge_api
+            for external_knowledge_api in db.session.scalars(
+                select(ExternalKnowledgeApis).where(
+                    ExternalKnowledgeApis.id.in_({binding.external_knowledge_api_id for binding in bindings.values()})
+                )
+            ).all()
+        }
+
+        external_knowledge_infos = {}
+        for dataset_id, binding in bindings.items():
+            external_knowledge_api = external_knowledge_apis.get(binding.external_knowledge_api_id)
+            if external_knowledge_api:
+                external_knowledge_infos[dataset_id] = Dataset.build_external_knowledge_info(
+                    binding, external_knowledge_api
+                )
+
+        return external_knowledge_infos
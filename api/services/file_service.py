@@ -2,7 +2,7 @@ import datetime
 import hashlib
 import os
 import uuid
-from typing import Any, Literal, Union
+from typing import IO, Any, Literal, Union
 
 from flask_login import current_user
 from werkzeug.exceptions import NotFound
@@ -32,7 +32,7 @@ class FileService:
     def upload_file(
         *,
         filename: str,
-        content: bytes,
+        content: Union[bytes, IO[bytes]],
         mimetype: str,
         user: Union[Account, EndUser, Any],
         source: Literal["datasets"] | None = None,
@@ -52,7 +52,12 @@ class FileService:
             raise UnsupportedFileTypeError()
 
         # get file size
-        file_size = len(content)
+        if isinstance(content, bytes):
+            file_size = len(content)
+        else:
+            content.seek(0, os.SEEK_END)
+            file_size = content.tell()
+            content.seek(0)
 
         # check if the file size is exceeded
         if not FileService.is_file_size_within_limit(extension=extension, file_size=file_size):
@@ -70,7 +75,12 @@ class FileService:
         file_key = "upload_files/" + (current_tenant_id or "") + "/" + file_uuid + "." + extension
 
         # save file to storage
-        storage.save(file_key, content)
+        if isinstance(content, bytes):
+            storage.save(file_key, content)
+            file_hash = hashlib.sha3_256(content).hexdigest()
+        else:
+            file_hash = FileService._hash_stream(content)
+            storage.save_stream(file_key, content)
 
         # save file to db
         upload_file = UploadFile(
@@ -85,7 +95,7 @@ class FileService:
             created_by=user.id,
             created_at=datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
             used=False,
-            hash=hashlib.sha3_256(content).hexdigest(),
+            hash=file_hash,
             source_url=source_url,
         )
 
@@ -99,6 +109,17 @@ class FileService:
 
         return upload_file
 
+    @staticmethod
+    def _hash_stream(stream: IO[bytes]) -> str:
+        """
+        hash a seekable stream chunk by chunk and rewind it
+        """
+        file_hash = hashlib.sha3_256()
+        while chunk := stream.read(dify_config.STORAGE_READ_CHUNK_SIZE):
+            file_hash.update(chunk)
+        stream.seek(0)
+        return file_hash.hexdigest()
+
     @staticmethod
     def is_file_size_within_limit(*, extension: str, file_size: int) -> bool:
         if extension in IMAGE_EXTENSIONS:
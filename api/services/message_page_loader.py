@@ -0,0 +1,101 @@
+from collections import defaultdict
+from collections.abc import Sequence
+
+from sqlalchemy import select
+
+from extensions.ext_database import db
+from models.account import Account
+from models.model import (
+    App,
+    AppAnnotationHitHistory,
+    Message,
+    MessageAgentThought,
+    MessageAnnotation,
+    MessageFeedback,
+    MessageFile,
+)
+
+
+class MessagePageLoader:
+    """
+    Loads the relationships serialized by the message history APIs for a whole page of messages
+    with one `IN` query per relationship, instead of one query per message and relationship.
+    """
+
+    @staticmethod
+    def preload(messages: Sequence[Message]) -> None:
+        """
+        Preload feedbacks, annotations, annotation hit histories, their accounts, agent thoughts,
+        message files and apps of a page of messages
+
+        :param messages: messages of the page
+        """
+        if not messages:
+            return
+
+        message_ids = [message.id for message in messages]
+
+        feedbacks: dict[str, list[MessageFeedback]] = defaultdict(list)
+        for feedback in db.session.scalars(
+            select(MessageFeedback).where(MessageFeedback.message_id.in_(message_ids))
+        ).all():
+            feedbacks[feedback.message_id].append(feedback)
+
+        annotations: dict[str, MessageAnnotation] = {}
+        for annotation in db.session.scalars(
+            select(MessageAnnotation).where(MessageAnnotation.message_id.in_(message_ids))
+        ).all():
+            annotations.setdefault(annotation.message_id, annotation)
+
+        hit_annotations: dict[str, MessageAnnotation] = {}
+        for message_id, annotation in db.session.execute(
+            select(AppAnnotationHitHistory.message_id, MessageAnnotation)
+            .join(MessageAnnotation, MessageAnnotation.id == AppAnnotationHitHistory.annotation_id)
+            .where(AppAnnotationHitHistory.message_id.in_(message_ids))
+        ).all():
+            hit_annotations.setdefault(message_id, annotation)
+
+        agent_thoughts: dict[str, list[MessageAgentThought]] = defaultdict(list)
+        for agent_thought in db.session.scalars(
+            select(MessageAgentThought)
+            .where(MessageAgentThought.message_id.in_(message_ids))
+            .order_by(MessageAgentThought.position.asc())
+        ).all():
+            agent_thoughts[agent_thought.message_id].append(agent_thought)
+
+        message_files: dict[str, list[MessageFile]] = defaultdict(list)
+        for message_file in db.session.scalars(
+            select(MessageFile).where(MessageFile.message_id.in_(message_ids))
+        ).all():
+            message_files[message_file.message_id].append(message_file)
+
+        account_ids = {feedback.from_account_id for rows in feedbacks.values() for feedback in rows}
+        account_ids |= {annotation.account_id for annotation in annotations.values()}
+        account_ids |= {annotation.account_id for annotation in hit_annotations.values()}
+        account_ids.discard(None)
+        accounts: dict[str, Account] = {}
+        if account_ids:
+            accounts = {
+                account.id: account
+                for account in db.session.scalars(select(Account).where(Account.id.in_(account_ids))).all()
+            }
+        for rows in feedbacks.values():
+            for feedback in rows:
+                feedback.preload_attributes(from_account=accounts.get(feedback.from_account_id))
+        for annotation in [*annotations.values(), *hit_annotations.values()]:
+            annotation.preload_attributes(account=accounts.get(annotation.account_id))
+
+        apps = {
+            app.id: app
+            for app in db.session.scalars(select(App).where(App.id.in_({message.app_id for message in messages}))).all()
+        }
+
+        for message in messages:
+            message.preload_attributes(
+                feedbacks=feedbacks.get(message.id, []),
+                annotation=annotations.get(message.id),
+                annotation_hit_history=hit_annotations.get(message.id),
+                agent_thoughts=agent_thoughts.get(message.id, []),
+                message_file_rows=message_files.get(message.id, []),
+                app=apps.get(message.app_id),
+            )
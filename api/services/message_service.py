@@ -21,6 +21,7 @@ from services.errors.message import (
     MessageNotExistsError,
     SuggestedQuestionsAfterAnswerDisabledError,
 )
+from services.message_page_loader import MessagePageLoader
 from services.workflow_service import WorkflowService
 
 
@@ -85,6 +86,8 @@ class MessageService:
         if order == "asc":
             history_messages = list(reversed(history_messages))
 
+        MessagePageLoader.preload(history_messages)
+
         return InfiniteScrollPagination(data=history_messages, limit=limit, has_more=has_more)
 
     @classmethod
@@ -134,6 +137,8 @@ class MessageService:
             has_more = True
             history_messages = history_messages[:-1]
 
+        MessagePageLoader.preload(history_messages)
+
         return InfiniteScrollPagination(data=history_messages, limit=limit, has_more=has_more)
 
     @classmethod
@@ -9,6 +9,7 @@ from configs import dify_config
 from core.helper import marketplace
 from core.helper.download import download_with_size_limit
 from core.helper.marketplace import download_plugin_pkg
+from core.helper.plugin_provider_cache import PluginProviderCache
 from core.plugin.entities.bundle import PluginBundleDependency
 from core.plugin.entities.plugin import (
     GenericProviderID,
@@ -20,6 +21,7 @@ from core.plugin.entities.plugin import (
 from core.plugin.entities.plugin_daemon import (
     PluginDecodeResponse,
     PluginInstallTask,
+    PluginInstallTaskStatus,
     PluginListResponse,
     PluginVerification,
 )
@@ -207,7 +209,12 @@ class PluginService:
     @staticmethod
     def fetch_install_task(tenant_id: str, task_id: str) -> PluginInstallTask:
         manager = PluginInstaller()
-        return manager.fetch_plugin_installation_task(tenant_id, task_id)
+        task = manager.fetch_plugin_installation_task(tenant_id, task_id)
+        # installations finish asynchronously in the plugin daemon, the first poll seeing the task succeed
+        # invalidates the cached declarations
+        if task.status == PluginInstallTaskStatus.Success:
+            PluginProviderCache.invalidate_on_task_success(tenant_id, task_id)
+        return task
 
     @staticmethod
     def delete_install_task(tenant_id: str, task_id: str) -> bool:
@@ -269,7 +276,7 @@ class PluginService:
             # check if the plugin is available to install
             PluginService._check_plugin_installation_scope(response.verification)
 
-        return manager.upgrade_plugin(
+        install_response = manager.upgrade_plugin(
             tenant_id,
             original_plugin_unique_identifier,
             new_plugin_unique_identifier,
@@ -278,6 +285,8 @@ class PluginService:
                 "plugin_unique_identifier": new_plugin_unique_identifier,
             },
         )
+        PluginProviderCache.invalidate(tenant_id)
+        return install_response
 
     @staticmethod
     def upgrade_plugin_with_github(
@@ -293,7 +302,7 @@ class PluginService:
         """
         PluginService._check_marketplace_only_permission()
         manager = PluginInstaller()
-        return manager.upgrade_plugin(
+        install_response = manager.upgrade_plugin(
             tenant_id,
             original_plugin_unique_identifier,
             new_plugin_unique_identifier,
@@ -304,6 +313,8 @@ class PluginService:
                 "package": package,
             },
         )
+        PluginProviderCache.invalidate(tenant_id)
+        return install_response
 
     @staticmethod
     def upload_pkg(tenant_id: str, pkg: bytes, verify_signature: bool = False) -> PluginDecodeResponse:
@@ -361,12 +372,14 @@ class PluginService:
 
         manager = PluginInstaller()
 
-        return manager.install_from_identifiers(
+        install_response = manager.install_from_identifiers(
             tenant_id,
             plugin_unique_identifiers,
             PluginInstallationSource.Package,
             [{}],
         )
+        PluginProviderCache.invalidate(tenant_id)
+        return install_response
 
     @staticmethod
     def install_from_github(tenant_id: str, plugin_unique_identifier: str, repo: str, version: str, package: str):
@@ -377,7 +390,7 @@ class PluginService:
         PluginService._check_marketplace_only_permission()
 
         manager = PluginInstaller()
-        return manager.install_from_identifiers(
+        install_response = manager.install_from_identifiers(
             tenant_id,
             [plugin_unique_identifier],
             PluginInstallationSource.Github,
@@ -389,6 +402,8 @@ class PluginService:
                 }
             ],
         )
+        PluginProviderCache.invalidate(tenant_id)
+        return install_response
 
     @staticmethod
     def fetch_marketplace_pkg(tenant_id: str, plugin_unique_identifier: str) -> PluginDeclaration:
@@ -448,7 +463,7 @@ class PluginService:
                 # check if the plugin is available to install
                 PluginService._check_plugin_installation_scope(response.verification)
 
-        return manager.install_from_identifiers(
+        install_response = manager.install_from_identifiers(
             tenant_id,
             plugin_unique_identifiers,
             PluginInstallationSource.Marketplace,
@@ -459,11 +474,15 @@ class PluginService:
                 for plugin_unique_identifier in plugin_unique_identifiers
             ],
         )
+        PluginProviderCache.invalidate(tenant_id)
+        return install_response
 
     @staticmethod
     def uninstall(tenant_id: str, plugin_installation_id: str) -> bool:
         manager = PluginInstaller()
-        return manager.uninstall(tenant_id, plugin_installation_id)
+        uninstalled = manager.uninstall(tenant_id, plugin_installation_id)
+        PluginProviderCache.invalidate(tenant_id)
+        return uninstalled
 
     @staticmethod
     def check_tools_existence(tenant_id: str, provider_ids: Sequence[GenericProviderID]) -> Sequence[bool]:
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import and_, func, or_, select
+from sqlalchemy import and_, func, or_, select, tuple_
 from sqlalchemy.orm import Session
 
 from core.workflow.entities.workflow_execution import WorkflowExecutionStatus
@@ -23,6 +23,8 @@ class WorkflowAppService:
         limit: int = 20,
         created_by_end_user_session_id: str | None = None,
         created_by_account: str | None = None,
+        last_id: str | None = None,
+        include_total: bool = True,
     ) -> dict:
         """
         Get paginate workflow app logs using SQLAlchemy 2.0 style
@@ -36,6 +38,8 @@ class WorkflowAppService:
         :param limit: items per page
         :param created_by_end_user_session_id: filter by end user session id
         :param created_by_account: filter by account email
+        :param last_id: id of the last log of the previous page, to get the next page without an offset
+        :param include_total: whether to count the logs matching the filters, total is None otherwise
         :return: Pagination object
         """
         # Build base statement using SQLAlchemy 2.0 style
@@ -95,24 +99,41 @@ class WorkflowAppService:
                 ),
             )
 
-        stmt = stmt.order_by(WorkflowAppLog.created_at.desc())
-
-        # Get total count using the same filters
-        count_stmt = select(func.count()).select_from(stmt.subquery())
-        total = session.scalar(count_stmt) or 0
-
-        # Apply pagination limits
-        offset_stmt = stmt.offset((page - 1) * limit).limit(limit)
+        # Get total count using the same filters, before the page filter
+        total = None
+        if include_total:
+            count_stmt = select(func.count()).select_from(stmt.subquery())
+            total = session.scalar(count_stmt) or 0
+
+        if last_id:
+            # keyset pagination, deep pages cost the same as the first one
+            last_log = session.execute(
+                select(WorkflowAppLog.created_at, WorkflowAppLog.id).where(
+                    WorkflowAppLog.tenant_id == app_model.tenant_id,
+                    WorkflowAppLog.app_id == app_model.id,
+                    WorkflowAppLog.id == last_id,
+                )
+            ).first()
+            if not last_log:
+                raise ValueError("Last workflow app log not exists")
+
+            stmt = stmt.where(tuple_(WorkflowAppLog.created_at, WorkflowAppLog.id) < tuple_(*last_log))
+        else:
+            stmt = stmt.offset((page - 1) * limit)
+
+        # Fetch one more item than the limit to know whether there are more items
+        stmt = stmt.order_by(WorkflowAppLog.created_at.desc(), WorkflowAppLog.id.desc()).limit(limit + 1)
 
         # Execute query and get items
-        items = list(session.scalars(offset_stmt).all())
+        items = list(session.scalars(stmt).all())
+        has_more = len(items) > limit
 
         return {
             "page": page,
             "limit": limit,
             "total": total,
-            "has_more": total > page * limit,
-            "data": items,
+            "has_more": has_more,
+            "data": items[:limit],
         }
 
     @staticmethod
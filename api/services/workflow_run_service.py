@@ -2,6 +2,8 @@ import threading
 from collections.abc import Sequence
 from typing import Optional
 
+from sqlalchemy import tuple_
+
 import contexts
 from core.repositories import SQLAlchemyWorkflowNodeExecutionRepository
 from core.workflow.repositories.workflow_node_execution_repository import OrderConfig
@@ -70,34 +72,26 @@ class WorkflowRunService:
         )
 
         if args.get("last_id"):
-            last_workflow_run = base_query.filter(
-                WorkflowRun.id == args.get("last_id"),
-            ).first()
+            last_workflow_run = (
+                db.session.query(WorkflowRun.created_at, WorkflowRun.id)
+                .filter(
+                    WorkflowRun.tenant_id == app_model.tenant_id,
+                    WorkflowRun.app_id == app_model.id,
+                    WorkflowRun.triggered_from == WorkflowRunTriggeredFrom.DEBUGGING.value,
+                    WorkflowRun.id == args.get("last_id"),
+                )
+                .first()
+            )
 
             if not last_workflow_run:
                 raise ValueError("Last workflow run not exists")
 
-            workflow_runs = (
-                base_query.filter(
-                    WorkflowRun.created_at < last_workflow_run.created_at, WorkflowRun.id != last_workflow_run.id
-                )
-                .order_by(WorkflowRun.created_at.desc())
-                .limit(limit)
-                .all()
-            )
-        else:
-            workflow_runs = base_query.order_by(WorkflowRun.created_at.desc()).limit(limit).all()
-
-        has_more = False
-        if len(workflow_runs) == limit:
-            current_page_first_workflow_run = workflow_runs[-1]
-            rest_count = base_query.filter(
-                WorkflowRun.created_at < current_page_first_workflow_run.created_at,
-                WorkflowRun.id != current_page_first_workflow_run.id,
-            ).count()
-
-            if rest_count > 0:
-                has_more = True
+            base_query = base_query.filter(tuple_(WorkflowRun.created_at, WorkflowRun.id) < tuple_(*last_workflow_run))
+
+        # fetch one more workflow run than the limit to know whether there are more
+        workflow_runs = base_query.order_by(WorkflowRun.created_at.desc(), WorkflowRun.id.desc()).limit(limit + 1).all()
+        has_more = len(workflow_runs) > limit
+        workflow_runs = workflow_runs[:limit]
 
         return InfiniteScrollPagination(data=workflow_runs, limit=limit, has_more=has_more)
 
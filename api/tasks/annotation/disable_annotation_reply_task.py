@@ -4,6 +4,7 @@ import time
 import click
 from celery import shared_task  # type: ignore
 
+from core.app.features.annotation_reply.annotation_reply_index import invalidate_annotation_reply_index
 from core.rag.datasource.vdb.vector_factory import Vector
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
@@ -57,6 +58,7 @@ def disable_annotation_reply_task(job_id: str, app_id: str, tenant_id: str):
         # delete annotation setting
         db.session.delete(app_annotation_setting)
         db.session.commit()
+        invalidate_annotation_reply_index(app_id)
 
         end_at = time.perf_counter()
         logging.info(
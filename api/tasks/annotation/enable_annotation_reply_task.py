@@ -5,6 +5,7 @@ import time
 import click
 from celery import shared_task  # type: ignore
 
+from core.app.features.annotation_reply.annotation_reply_index import invalidate_annotation_reply_index
 from core.rag.datasource.vdb.vector_factory import Vector
 from core.rag.models.document import Document
 from extensions.ext_database import db
@@ -109,6 +110,7 @@ def enable_annotation_reply_task(
                 logging.info(click.style("Delete annotation index error: {}".format(str(e)), fg="red"))
             vector.create(documents)
         db.session.commit()
+        invalidate_annotation_reply_index(app_id)
         redis_client.setex(enable_app_annotation_job_key, 600, "completed")
         end_at = time.perf_counter()
         logging.info(
@@ -59,12 +59,16 @@ def document_indexing_task(dataset_id: str, document_ids: list):
         db.session.close()
         return
 
+    documents_by_id = {
+        document.id: document
+        for document in db.session.query(Document).filter(
+            Document.id.in_(document_ids), Document.dataset_id == dataset_id
+        )
+    }
     for document_id in document_ids:
         logging.info(click.style("Start process document: {}".format(document_id), fg="green"))
 
-        document = (
-            db.session.query(Document).filter(Document.id == document_id, Document.dataset_id == dataset_id).first()
-        )
+        document = documents_by_id.get(document_id)
 
         if document:
             document.indexing_status = "parsing"
@@ -72,6 +76,8 @@ def document_indexing_task(dataset_id: str, document_ids: list):
             documents.append(document)
             db.session.add(document)
     db.session.commit()
+    # reload the documents expired by the commit in one query
+    db.session.query(Document).filter(Document.id.in_(documents_by_id)).all()
 
     try:
         indexing_runner = IndexingRunner()
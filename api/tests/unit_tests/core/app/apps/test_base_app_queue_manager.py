@@ -0,0 +1,125 @@
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from configs import dify_config
+from core.app.apps import base_app_queue_manager
+from core.app.apps.base_app_queue_manager import PublishFrom
+from core.app.apps.workflow.app_queue_manager import WorkflowAppQueueManager
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.app.entities.queue_entities import (
+    QueueLLMChunkEvent,
+    QueueNodeStartedEvent,
+    QueueStopEvent,
+    QueueTextChunkEvent,
+)
+from core.model_runtime.entities.llm_entities import LLMResultChunk, LLMResultChunkDelta, LLMUsage
+from core.model_runtime.entities.message_entities import AssistantPromptMessage
+
+
+@pytest.fixture
+def queue_manager(monkeypatch):
+    redis = MagicMock()
+    redis.get.return_value = None
+    monkeypatch.setattr(base_app_queue_manager, "redis_client", redis)
+    monkeypatch.setattr(dify_config, "APP_STREAM_COALESCE_ENABLED", True)
+    monkeypatch.setattr(dify_config, "APP_STREAM_COALESCE_WINDOW_MS", 0)
+    monkeypatch.setattr(dify_config, "APP_STREAM_COALESCE_MAX_CHARS", 512)
+    return WorkflowAppQueueManager(
+        task_id="task-id", user_id="user-id", invoke_from=InvokeFrom.SERVICE_API, app_mode="advanced-chat"
+    )
+
+
+def _llm_chunk(text: str, usage: bool = False) -> QueueLLMChunkEvent:
+    return QueueLLMChunkEvent(
+        chunk=LLMResultChunk(
+            model="gpt-4o",
+            delta=LLMResultChunkDelta(
+                index=0,
+                message=AssistantPromptMessage(content=text),
+                usage=LLMUsage.empty_usage() if usage else None,
+                finish_reason="stop" if usage else None,
+            ),
+        )
+    )
+
+
+def _listen(queue_manager: WorkflowAppQueueManager) -> list:
+    return [message.event for message in queue_manager.listen()]
+
+
+def test_consecutive_text_chunks_are_merged(queue_manager):
+    for event in [
+        QueueTextChunkEvent(text="Hello", from_variable_selector=["llm", "text"]),
+        QueueTextChunkEvent(text=", ", from_variable_selector=["llm", "text"]),
+        QueueTextChunkEvent(text="world", from_variable_selector=["llm", "text"]),
+        QueueTextChunkEvent(text="!", from_variable_selector=["answer", "text"]),
+        QueueNodeStartedEvent.model_construct(node_id="node-id"),
+        QueueTextChunkEvent(text="again", from_variable_selector=["answer", "text"]),
+    ]:
+        queue_manager.publish(event, PublishFrom.APPLICATION_MANAGER)
+    queue_manager.publish(QueueStopEvent(stopped_by=QueueStopEvent.StopBy.USER_MANUAL), PublishFrom.TASK_PIPELINE)
+
+    events = _listen(queue_manager)
+
+    assert [(type(event), getattr(event, "text", None)) for event in events] == [
+        (QueueTextChunkEvent, "Hello, world"),
+        (QueueTextChunkEvent, "!"),
+        (QueueNodeStartedEvent, None),
+        (QueueTextChunkEvent, "again"),
+        (QueueStopEvent, None),
+    ]
+    assert events[0].from_variable_selector == ["llm", "text"]
+
+
+def test_merged_text_chunks_are_bounded(queue_manager, monkeypatch):
+    monkeypatch.setattr(dify_config, "APP_STREAM_COALESCE_MAX_CHARS", 4)
+    for text in "abcdefghij":
+        queue_manager.publish(QueueTextChunkEvent(text=text), PublishFrom.APPLICATION_MANAGER)
+    queue_manager.stop_listen()
+
+    assert [event.text for event in _listen(queue_manager)] == ["abcd", "efgh", "ij"]
+
+
+def test_llm_chunks_with_usage_are_kept_last(queue_manager):
+    for event in [_llm_chunk("Hi"), _llm_chunk(" there"), _llm_chunk("", usage=True), _llm_chunk("late")]:
+        queue_manager.publish(event, PublishFrom.APPLICATION_MANAGER)
+    queue_manager.stop_listen()
+
+    events = _listen(queue_manager)
+
+    assert [event.chunk.delta.message.content for event in events] == ["Hi there", "late"]
+    assert events[0].chunk.delta.usage is not None
+    assert events[0].chunk.delta.finish_reason == "stop"
+
+
+def test_text_chunks_are_not_merged_when_disabled(queue_manager, monkeypatch):
+    monkeypatch.setattr(dify_config, "APP_STREAM_COALESCE_ENABLED", False)
+    for text in "abc":
+        queue_manager.publish(QueueTextChunkEvent(text=text), PublishFrom.APPLICATION_MANAGER)
+    queue_manager.stop_listen()
+
+    assert [event.text for event in _listen(queue_manager)] == ["a", "b", "c"]
+
+
+@pytest.mark.parametrize("coalesce", [False, True])
+def test_benchmark_streamed_text_chunks(benchmark, queue_manager, monkeypatch, coalesce):
+    monkeypatch.setattr(dify_config, "APP_STREAM_COALESCE_ENABLED", coalesce)
+    tokens = 5000
+    events = [QueueTextChunkEvent(text=" token", from_variable_selector=["llm", "text"]) for _ in range(tokens)]
+
+    def stream() -> int:
+        # the graph engine publishes every token before the task pipeline catches up
+        for event in events:
+            queue_manager.publish(event, PublishFrom.APPLICATION_MANAGER)
+        queue_manager.stop_listen()
+        start = time.thread_time()
+        streamed = sum(1 for _ in queue_manager.listen())
+        cpu_time = time.thread_time() - start
+        benchmark.extra_info["streamed_events"] = streamed
+        benchmark.extra_info["cpu_ms_per_1k_tokens"] = cpu_time * 1000 / (tokens / 1000)
+        return streamed
+
+    # 86 tokens of 6 characters reach 512 characters
+    assert benchmark(stream) == (59 if coalesce else tokens)
@@ -0,0 +1,189 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from configs import dify_config
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.app.features.annotation_reply import annotation_reply, annotation_reply_index
+from core.app.features.annotation_reply.annotation_reply import AnnotationReplyFeature
+from core.app.features.annotation_reply.annotation_reply_index import (
+    AnnotationReplyIndex,
+    get_annotation_reply_index,
+    invalidate_annotation_reply_index,
+)
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, bytes] = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value.encode()
+        return True
+
+
+class _FakeEmbeddings:
+    """embeds a text as its normalized letter counts"""
+
+    def __init__(self) -> None:
+        self.queries = 0
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        self.queries += 1
+        vector = np.zeros(26)
+        for char in text.lower():
+            if char.isascii() and char.isalpha():
+                vector[ord(char) - ord("a")] += 1
+        return (vector / np.linalg.norm(vector)).tolist()
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = _FakeRedis()
+    monkeypatch.setattr(annotation_reply_index, "redis_client", redis)
+    monkeypatch.setattr(annotation_reply_index, "_indexes", type(annotation_reply_index._indexes)())
+    return redis
+
+
+@pytest.fixture
+def embeddings(monkeypatch):
+    embeddings = _FakeEmbeddings()
+    monkeypatch.setattr(annotation_reply, "get_annotation_embeddings", lambda *args: embeddings)
+    return embeddings
+
+
+def _index(questions: dict[str, str], score_threshold: float = 0.9, in_process: bool = True) -> AnnotationReplyIndex:
+    index = AnnotationReplyIndex(
+        version="1",
+        enabled=True,
+        score_threshold=score_threshold,
+        embedding_provider_name="openai",
+        embedding_model_name="text-embedding-3-small",
+        collection_binding_id="binding-id",
+        questions={annotation_reply_index._hash_question(question): id_ for id_, question in questions.items()},
+    )
+    if in_process:
+        index.annotation_ids = list(questions)
+        index.embeddings = np.asarray(_FakeEmbeddings().embed_documents(list(questions.values())), dtype=np.float32)
+    return index
+
+
+def test_index_is_rebuilt_once_invalidated(redis, monkeypatch):
+    builds = []
+    monkeypatch.setattr(
+        annotation_reply_index,
+        "_build_index",
+        lambda app_id, tenant_id, version: builds.append(app_id) or AnnotationReplyIndex(version=version),
+    )
+    monkeypatch.setattr(dify_config, "ANNOTATION_REPLY_INDEX_MAX_APPS", 2)
+
+    index = get_annotation_reply_index("app-1", "tenant-id")
+    assert get_annotation_reply_index("app-1", "tenant-id") is index
+
+    invalidate_annotation_reply_index("app-1")
+    assert get_annotation_reply_index("app-1", "tenant-id") is not index
+    assert builds == ["app-1", "app-1"]
+
+    # least recently used apps are evicted
+    get_annotation_reply_index("app-2", "tenant-id")
+    get_annotation_reply_index("app-3", "tenant-id")
+    get_annotation_reply_index("app-1", "tenant-id")
+    assert builds == ["app-1", "app-1", "app-2", "app-3", "app-1"]
+
+
+def test_index_matches_normalized_questions_and_similar_questions():
+    index = _index({"a-1": "What is Dify?", "a-2": "How to deploy"})
+
+    assert index.match_question("  what   is DIFY? ") == "a-1"
+    assert index.match_question("what is dify") is None
+    annotation_id, score = index.search(_FakeEmbeddings().embed_query("how to deploy it"))
+    assert annotation_id == "a-2"
+    assert 0.9 <= score < 1
+    assert index.search(_FakeEmbeddings().embed_query("zzz")) is None
+
+
+@pytest.fixture
+def annotation_service(monkeypatch):
+    service = MagicMock()
+    service.get_annotation_by_id.side_effect = lambda annotation_id: MagicMock(id=annotation_id)
+    monkeypatch.setattr(annotation_reply, "AppAnnotationService", service)
+    return service
+
+
+@pytest.fixture
+def vector(monkeypatch):
+    vector = MagicMock()
+    monkeypatch.setattr(annotation_reply, "Vector", vector)
+    return vector
+
+
+def _query(index: AnnotationReplyIndex, query: str, monkeypatch):
+    monkeypatch.setattr(annotation_reply, "get_annotation_reply_index", lambda app_id, tenant_id: index)
+    return AnnotationReplyFeature().query(
+        app_record=MagicMock(id="app-id", tenant_id="tenant-id"),
+        message=MagicMock(id="message-id"),
+        query=query,
+        user_id="user-id",
+        invoke_from=InvokeFrom.WEB_APP,
+    )
+
+
+def test_exact_match_skips_embedding_and_vector_store(annotation_service, vector, embeddings, monkeypatch):
+    annotation = _query(_index({"a-1": "What is Dify?"}, in_process=False), "what is dify?", monkeypatch)
+
+    assert annotation.id == "a-1"
+    assert annotation_service.add_annotation_history.call_args.args[-1] == 1.0
+    assert embeddings.queries == 0
+    vector.assert_not_called()
+
+
+def test_small_annotation_sets_are_searched_in_process(annotation_service, vector, embeddings, monkeypatch):
+    index = _index({"a-1": "What is Dify?", "a-2": "How to deploy"})
+
+    assert _query(index, "how to deploy it", monkeypatch).id == "a-2"
+    assert _query(index, "unrelated", monkeypatch) is None
+    assert _query(AnnotationReplyIndex(version="1"), "how to deploy", monkeypatch) is None
+    vector.assert_not_called()
+
+
+def test_large_annotation_sets_are_searched_in_the_vector_store(annotation_service, vector, embeddings, monkeypatch):
+    vector.return_value.search_by_vector.return_value = [
+        MagicMock(metadata={"annotation_id": "a-2", "score": 0.95}),
+    ]
+
+    annotation = _query(_index({"a-1": "What is Dify?"}, in_process=False), "how to deploy it", monkeypatch)
+
+    assert annotation.id == "a-2"
+    assert vector.call_args.args[0].collection_binding_id == "binding-id"
+    assert vector.return_value.search_by_vector.call_args.kwargs["score_threshold"] == 0.9
+
+
+def test_benchmark_in_process_annotation_search(benchmark, annotation_service, vector, monkeypatch):
+    rng = np.random.default_rng(0)
+    annotation_ids = [f"a-{i}" for i in range(200)]
+    matrix = rng.normal(size=(200, 1536)).astype(np.float32)
+    index = AnnotationReplyIndex(
+        version="1",
+        enabled=True,
+        score_threshold=0.9,
+        annotation_ids=annotation_ids,
+        embeddings=matrix / np.linalg.norm(matrix, axis=1, keepdims=True),
+    )
+    query_embedding = (matrix[42] + rng.normal(scale=0.1, size=1536)).tolist()
+    monkeypatch.setattr(
+        annotation_reply,
+        "get_annotation_embeddings",
+        lambda *args: MagicMock(embed_query=lambda query: query_embedding),
+    )
+
+    assert benchmark(_query, index, "a question", monkeypatch).id == "a-42"
+    vector.assert_not_called()
@@ -0,0 +1,162 @@
+import contextvars
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.helper.plugin_provider_cache import PluginProviderCache, plugin_model_provider_cache
+from core.model_runtime.model_providers.model_provider_factory import ModelProviderFactory
+from extensions.ext_redis import redis_client
+
+
+class _CountingFetch:
+    def __init__(self, delay: float = 0.0, error: BaseException | None = None) -> None:
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return [f"declaration-{calls}"]
+
+
+def test_cached_until_installation_version_changes():
+    cache = PluginProviderCache(name="test", ttl=60, max_size=10)
+    fetch = _CountingFetch()
+
+    assert cache.get_or_fetch("tenant", "providers", fetch) == ["declaration-1"]
+    assert cache.get_or_fetch("tenant", "providers", fetch) == ["declaration-1"]
+    assert cache.get_or_fetch("other-tenant", "providers", fetch) == ["declaration-2"]
+
+    # a plugin was installed by another process
+    redis_client.get.return_value = b"1"
+    assert cache.get_or_fetch("tenant", "providers", fetch) == ["declaration-3"]
+    assert fetch.calls == 3
+
+
+def test_invalidate_bumps_installation_version():
+    PluginProviderCache.invalidate("tenant")
+
+    redis_client.incr.assert_called_once_with("plugin_installation_version:tenant_id:tenant")
+
+
+def test_finished_installation_task_bumps_installation_version_once(monkeypatch):
+    # the marker of the task is only set by the first poll
+    monkeypatch.setattr(redis_client, "set", MagicMock(side_effect=[True, None]))
+
+    PluginProviderCache.invalidate_on_task_success("tenant", "task")
+    PluginProviderCache.invalidate_on_task_success("tenant", "task")
+
+    redis_client.set.assert_called_with("plugin_installation_task_invalidated:task", 1, nx=True, ex=86400)
+    redis_client.incr.assert_called_once_with("plugin_installation_version:tenant_id:tenant")
+
+
+def test_entries_expire_after_ttl():
+    cache = PluginProviderCache(name="test", ttl=60, max_size=10)
+    fetch = _CountingFetch()
+
+    with patch("core.helper.plugin_provider_cache.time.monotonic", return_value=0):
+        cache.get_or_fetch("tenant", "providers", fetch)
+    with patch("core.helper.plugin_provider_cache.time.monotonic", return_value=61):
+        cache.get_or_fetch("tenant", "providers", fetch)
+
+    assert fetch.calls == 2
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = PluginProviderCache(name="test", ttl=60, max_size=2)
+    fetch = _CountingFetch()
+
+    cache.get_or_fetch("tenant-1", "providers", fetch)
+    cache.get_or_fetch("tenant-2", "providers", fetch)
+    cache.get_or_fetch("tenant-1", "providers", fetch)
+    cache.get_or_fetch("tenant-3", "providers", fetch)
+    assert fetch.calls == 3
+
+    cache.get_or_fetch("tenant-1", "providers", fetch)
+    assert fetch.calls == 3
+    cache.get_or_fetch("tenant-2", "providers", fetch)
+    assert fetch.calls == 4
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache = PluginProviderCache(name="test", ttl=60, max_size=10)
+    fetch = _CountingFetch(delay=0.2)
+    results = []
+
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_fetch("tenant", "providers", fetch)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert fetch.calls == 1
+    assert results == [["declaration-1"]] * 8
+
+
+def test_fetch_errors_are_shared_but_not_cached():
+    cache = PluginProviderCache(name="test", ttl=60, max_size=10)
+    fetch = _CountingFetch(delay=0.2, error=ValueError("plugin daemon unavailable"))
+    errors = []
+
+    def lookup():
+        try:
+            cache.get_or_fetch("tenant", "providers", fetch)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=lookup) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert fetch.calls == 1
+    assert len(errors) == 4
+
+    fetch.error = None
+    assert cache.get_or_fetch("tenant", "providers", fetch) == ["declaration-2"]
+
+
+def test_disabled_cache_always_fetches():
+    cache = PluginProviderCache(name="test", ttl=0, max_size=10)
+    fetch = _CountingFetch()
+
+    cache.get_or_fetch("tenant", "providers", fetch)
+    cache.get_or_fetch("tenant", "providers", fetch)
+
+    assert fetch.calls == 2
+
+
+@pytest.fixture
+def clear_model_provider_cache():
+    plugin_model_provider_cache.clear()
+    yield
+    plugin_model_provider_cache.clear()
+
+
+def test_model_providers_are_fetched_once_across_requests(clear_model_provider_cache):
+    provider = MagicMock(plugin_id="langgenius/openai")
+    provider.declaration.provider = "openai"
+    provider.model_copy.side_effect = lambda deep: provider
+
+    with patch(
+        "core.model_runtime.model_providers.model_provider_factory.PluginModelClient.fetch_model_providers",
+        return_value=[provider],
+    ) as fetch_model_providers:
+        for _ in range(3):
+            # every request runs in a fresh context
+            providers = contextvars.Context().run(ModelProviderFactory("tenant").get_plugin_model_providers)
+
+    assert fetch_model_providers.call_count == 1
+    assert providers[0].declaration.provider == "langgenius/openai/openai"
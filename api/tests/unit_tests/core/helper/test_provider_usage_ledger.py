@@ -0,0 +1,291 @@
+import threading
+from collections import defaultdict
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+from redis.exceptions import ResponseError
+from sqlalchemy.dialects import postgresql
+
+from configs import dify_config
+from core.helper.provider_usage_ledger import ProviderUsageLedger
+
+
+class _FakeRedis:
+    """thread safe in-memory subset of the redis commands used by the ledger"""
+
+    def __init__(self) -> None:
+        self.data: dict[str, object] = {}
+        self.ttls: dict[str, int] = {}
+        self.lock = threading.RLock()
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    def exists(self, key):
+        with self.lock:
+            return int(key in self.data)
+
+    def expire(self, key, ttl):
+        with self.lock:
+            self.ttls[key] = ttl
+
+    def renamenx(self, src, dst):
+        with self.lock:
+            if src not in self.data:
+                raise ResponseError("no such key")
+            if dst in self.data:
+                return False
+            self.data[dst] = self.data.pop(src)
+            return True
+
+    def hget(self, key, field):
+        with self.lock:
+            value = self.data.get(key, {}).get(field)
+            return str(value).encode() if value is not None else None
+
+    def hgetall(self, key):
+        with self.lock:
+            return {field.encode(): str(value).encode() for field, value in self.data.get(key, {}).items()}
+
+    def hset(self, key, field, value):
+        with self.lock:
+            self.data.setdefault(key, {})[field] = value
+
+    def hsetnx(self, key, field, value):
+        with self.lock:
+            self.data.setdefault(key, {}).setdefault(field, value)
+
+    def hincrby(self, key, field, amount):
+        with self.lock:
+            hash_ = self.data.setdefault(key, {})
+            hash_[field] = int(hash_.get(field, 0)) + amount
+            return hash_[field]
+
+    def hdel(self, key, *fields):
+        with self.lock:
+            for field in fields:
+                self.data.get(key, {}).pop(field, None)
+
+    def sadd(self, key, *members):
+        with self.lock:
+            self.data.setdefault(key, set()).update(members)
+
+    def srem(self, key, *members):
+        with self.lock:
+            self.data.get(key, set()).difference_update(members)
+            if not self.data.get(key, True):
+                del self.data[key]
+
+    def srandmember(self, key, count):
+        with self.lock:
+            return [member.encode() for member in list(self.data.get(key, set()))[:count]]
+
+
+class _FakePipeline:
+    def __init__(self, redis: _FakeRedis) -> None:
+        self.redis = redis
+        self.commands: list = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((getattr(self.redis, name), args))
+
+    def execute(self):
+        return [command(*args) for command, args in self.commands]
+
+
+class _FakeProviders:
+    """providers table applying the ledger statements, counting them"""
+
+    def __init__(self) -> None:
+        self.rows: dict[tuple[str, str, str], dict] = {}
+        self.updates: list[tuple[str, list[dict]]] = []
+        self.fail_commit = False
+
+    def session(self, engine):
+        return _FakeSession(self)
+
+
+class _FakeSession:
+    def __init__(self, providers: _FakeProviders) -> None:
+        self.providers = providers
+        self.pending: list = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def connection(self):
+        return self
+
+    def execute(self, stmt, params=None):
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        if sql.startswith("UPDATE"):
+            self.pending.append((sql, params))
+            return MagicMock()
+
+        where = stmt.compile().params
+        result = MagicMock()
+        if len(stmt.selected_columns) == 2:
+            row = self.providers.rows.get(
+                (where["tenant_id_1"], where["provider_name_1"], where["quota_type_1"]),
+            )
+            result.first.return_value = (
+                MagicMock(quota_used=row["quota_used"], quota_limit=row["quota_limit"]) if row else None
+            )
+        else:
+            result.all.return_value = [
+                (tenant_id, provider_name, quota_type, row["quota_limit"])
+                for (tenant_id, provider_name, quota_type), row in self.providers.rows.items()
+            ]
+        return result
+
+    def commit(self):
+        if self.providers.fail_commit:
+            raise ConnectionError("database went away")
+        for sql, params in self.pending:
+            self.providers.updates.append((sql, params))
+            for param in params:
+                if "b_quota_used" in param:
+                    row = self.providers.rows[(param["b_tenant_id"], param["b_provider_name"], param["b_quota_type"])]
+                    row["quota_used"] = max(row["quota_used"], param["b_quota_used"])
+                else:
+                    for (tenant_id, provider_name, _), row in self.providers.rows.items():
+                        if (tenant_id, provider_name) == (param["b_tenant_id"], param["b_provider_name"]):
+                            row["last_used"] = max(row["last_used"] or param["b_last_used"], param["b_last_used"])
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = _FakeRedis()
+    monkeypatch.setattr("core.helper.provider_usage_ledger.redis_client", redis)
+    return redis
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    providers = _FakeProviders()
+    for tenant_id in ("tenant-1", "tenant-2"):
+        providers.rows[(tenant_id, "openai", "trial")] = {"quota_used": 90, "quota_limit": 100, "last_used": None}
+    providers.rows[("tenant-1", "anthropic", "paid")] = {"quota_used": 5, "quota_limit": -1, "last_used": None}
+    monkeypatch.setattr("core.helper.provider_usage_ledger.Session", providers.session)
+    monkeypatch.setattr("core.helper.provider_usage_ledger.db", MagicMock())
+    monkeypatch.setattr(dify_config, "PROVIDER_USAGE_LEDGER_FLUSH_BATCH_SIZE", 500)
+    return providers
+
+
+def _deduct(ledger: ProviderUsageLedger, amount: int, tenant_id: str = "tenant-1") -> bool:
+    return ledger.deduct_quota(tenant_id=tenant_id, provider_name="openai", quota_type="trial", amount=amount)
+
+
+def test_deductions_stop_once_quota_is_used_up(redis, providers):
+    ledger = ProviderUsageLedger()
+
+    assert _deduct(ledger, 20)
+    assert not _deduct(ledger, 1)
+
+    assert ledger.get_quota_used("tenant-1", "openai", "trial") == 110
+    assert ledger.deduct_quota(tenant_id="tenant-1", provider_name="anthropic", quota_type="paid", amount=1000)
+    assert not ledger.deduct_quota(tenant_id="tenant-1", provider_name="missing", quota_type="trial", amount=1)
+    # deductions do not touch the providers table
+    assert providers.updates == []
+
+
+def test_flush_writes_back_in_one_batch(redis, providers):
+    ledger = ProviderUsageLedger()
+    _deduct(ledger, 3)
+    _deduct(ledger, 4, tenant_id="tenant-2")
+    ledger.touch_last_used(tenant_id="tenant-1", provider_name="openai", last_used=datetime(2024, 1, 1))
+    providers.rows[("tenant-1", "openai", "trial")]["quota_limit"] = 1000
+
+    assert ledger.flush() == 3
+
+    quota_sql, quota_params = providers.updates[0]
+    assert "greatest(providers.quota_used" in quota_sql
+    assert len(quota_params) == 2
+    assert providers.rows[("tenant-1", "openai", "trial")]["quota_used"] == 93
+    assert providers.rows[("tenant-2", "openai", "trial")]["quota_used"] == 94
+    assert providers.rows[("tenant-1", "openai", "trial")]["last_used"] == datetime(2024, 1, 1)
+    # quota limit changes are picked up
+    assert _deduct(ledger, 500)
+
+    providers.updates.clear()
+    ledger.flush()
+    assert len(providers.updates) == 1
+
+
+def test_interrupted_flush_is_written_back_once(redis, providers):
+    ledger = ProviderUsageLedger()
+    _deduct(ledger, 3)
+    providers.fail_commit = True
+
+    with pytest.raises(ConnectionError):
+        ledger.flush()
+
+    providers.fail_commit = False
+    _deduct(ledger, 2)
+    ledger.flush()
+    ledger.flush()
+
+    assert providers.rows[("tenant-1", "openai", "trial")]["quota_used"] == 95
+    assert not redis.exists(ProviderUsageLedger._DIRTY_KEY)
+    assert not redis.exists(ProviderUsageLedger._FLUSHING_KEY)
+
+
+def test_flush_ends_under_continuous_deductions(redis, providers, monkeypatch):
+    monkeypatch.setattr(dify_config, "PROVIDER_USAGE_LEDGER_FLUSH_BATCH_SIZE", 1)
+    ledger = ProviderUsageLedger()
+    _deduct(ledger, 1)
+    _deduct(ledger, 1, tenant_id="tenant-2")
+    write_back = ledger._write_back_quota
+
+    def write_back_during_deductions(counters):
+        # every batch races deductions marking their keys again
+        _deduct(ledger, 1)
+        return write_back(counters)
+
+    monkeypatch.setattr(ledger, "_write_back_quota", write_back_during_deductions)
+
+    assert ledger._flush_quota() == 2
+    # the keys updated meanwhile are left to the next flush
+    assert redis.exists(ProviderUsageLedger._DIRTY_KEY)
+    assert not redis.exists(ProviderUsageLedger._FLUSHING_KEY)
+
+
+def _deduct_concurrently(ledger: ProviderUsageLedger, threads: int, deductions: int) -> None:
+    def deduct():
+        for _ in range(deductions):
+            ledger.deduct_quota(tenant_id="tenant-1", provider_name="anthropic", quota_type="paid", amount=1)
+
+    workers = [threading.Thread(target=deduct) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def test_concurrent_deductions_are_counted_exactly(redis, providers):
+    ledger = ProviderUsageLedger()
+
+    _deduct_concurrently(ledger, threads=8, deductions=100)
+    ledger.flush()
+
+    assert providers.rows[("tenant-1", "anthropic", "paid")]["quota_used"] == 805
+    assert len(providers.updates) == 1
+
+
+def test_benchmark_contended_deductions(benchmark, redis, providers):
+    ledger = ProviderUsageLedger()
+    counts: dict[str, int] = defaultdict(int)
+
+    def run():
+        _deduct_concurrently(ledger, threads=8, deductions=50)
+        counts["rounds"] += 1
+        ledger.flush()
+        return providers.rows[("tenant-1", "anthropic", "paid")]["quota_used"]
+
+    assert benchmark(run) == 5 + 400 * counts["rounds"]
+    # one batched write back per flush instead of a row update per deduction
+    assert len(providers.updates) == counts["rounds"]
@@ -0,0 +1,134 @@
+import hashlib
+from unittest.mock import MagicMock
+
+import pytest
+from flask import Flask
+
+from configs import dify_config
+from core.app.apps.base_app_queue_manager import AppQueueManager
+from core.app.entities.queue_entities import QueueMessageReplaceEvent
+from core.moderation.keywords.keyword_matcher import KeywordMatcher, get_keyword_matcher
+from core.moderation.keywords.keywords import KeywordsModeration
+from core.moderation.output_moderation import ModerationRule, OutputModeration
+
+
+def _word(seed: str, length: int) -> str:
+    return hashlib.sha256(seed.encode()).hexdigest()[:length].translate(str.maketrans("0123456789", "ghijklmnop"))
+
+
+def _keywords_config(keywords: list[str]) -> dict:
+    return {
+        "keywords": "\n".join(keywords),
+        "inputs_config": {"enabled": True, "preset_response": "inputs flagged"},
+        "outputs_config": {"enabled": True, "preset_response": "outputs flagged"},
+    }
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("", False),
+        ("nothing to see", False),
+        ("say HELLO there", True),
+        ("ushers", True),
+        ("this is his", True),
+        ("she sells", True),
+        ("hersh", True),
+        ("he", False),
+    ],
+)
+def test_matcher_finds_keywords_ignoring_case(text, expected):
+    matcher = KeywordMatcher(["hello", "she", "his", "hers", ""])
+
+    assert matcher.search(text) is expected
+    assert matcher.search(text) == any(keyword in text.lower() for keyword in ["hello", "she", "his", "hers"])
+
+
+def test_matcher_is_compiled_once_per_config():
+    assert get_keyword_matcher("foo\nbar\n") is get_keyword_matcher("foo\nbar\n")
+    assert get_keyword_matcher("foo\nbar\n").max_keyword_length == 3
+    assert not KeywordMatcher([]).search("anything")
+
+
+def test_streamed_outputs_find_keywords_spanning_chunks():
+    moderation = KeywordsModeration("app-id", "tenant-id", _keywords_config(["forbidden", "x"]))
+    text = ""
+    flagged_at = None
+    for i, token in enumerate(["this is ", "for", "bid", "den text"]):
+        offset = len(text)
+        text += token
+        if moderation.moderation_for_outputs_stream(text, offset).flagged:
+            flagged_at = i
+            break
+
+    assert flagged_at == 3
+    assert moderation.moderation_for_inputs({"name": "FORBIDDEN"}).flagged
+    assert not moderation.moderation_for_inputs({"name": "allowed"}, query="fine").flagged
+
+
+@pytest.fixture
+def output_moderation(monkeypatch):
+    monkeypatch.setattr(dify_config, "MODERATION_BUFFER_SIZE", 10)
+    monkeypatch.setattr(
+        "core.moderation.output_moderation.ModerationFactory",
+        lambda name, app_id, tenant_id, config: KeywordsModeration(app_id, tenant_id, config),
+    )
+    app = Flask(__name__)
+    with app.app_context():
+        yield OutputModeration(
+            tenant_id="tenant-id",
+            app_id="app-id",
+            rule=ModerationRule(type="keywords", config=_keywords_config(["forbidden"])),
+            queue_manager=MagicMock(spec=AppQueueManager),
+        )
+
+
+def test_worker_moderates_once_enough_tokens_are_pending(output_moderation):
+    for token in ["a harmless ", "start, then ", "forbid", "den words ", "and more text"]:
+        output_moderation.append_new_token(token)
+    output_moderation.thread.join(timeout=5)
+
+    assert not output_moderation.thread.is_alive()
+    assert output_moderation.should_direct_output()
+    assert output_moderation.get_final_output() == "outputs flagged"
+    event = output_moderation.queue_manager.publish.call_args.args[0]
+    assert isinstance(event, QueueMessageReplaceEvent)
+    assert event.text == "outputs flagged"
+
+
+def test_stop_thread_wakes_the_worker_up(output_moderation):
+    output_moderation.append_new_token("short")
+    output_moderation.stop_thread()
+    output_moderation.thread.join(timeout=5)
+
+    assert not output_moderation.thread.is_alive()
+    assert not output_moderation.should_direct_output()
+    assert output_moderation.moderation_completion("short but forbidden") == ("outputs flagged", True)
+
+
+def test_benchmark_streamed_output_moderation(benchmark):
+    # keywords of 8 letters or more never match the words of 6 letters or less of the stream
+    keywords = [_word(f"keyword-{i}", 8 + i % 5) for i in range(10000)]
+    tokens = [" " + _word(f"token-{i}", 1 + i % 6) for i in range(20000 - 2)]
+    tokens += [" " + keywords[-1][:4], keywords[-1][4:].upper()]
+    moderation = KeywordsModeration("app-id", "tenant-id", _keywords_config(keywords))
+    buffer_size = 300
+
+    def stream() -> int:
+        # the moderation passes of the worker, one each time buffer_size characters are pending
+        text, pending = "", []
+        pending_length = 0
+        for token in tokens:
+            pending.append(token)
+            pending_length += len(token)
+            if pending_length < buffer_size and token is not tokens[-1]:
+                continue
+            offset = len(text)
+            text += "".join(pending)
+            pending, pending_length = [], 0
+            if moderation.moderation_for_outputs_stream(text, offset).flagged:
+                return len(text)
+        return -1
+
+    # flagged by the last pass only, on the keyword split across the last two tokens
+    assert benchmark(stream) == len("".join(tokens))
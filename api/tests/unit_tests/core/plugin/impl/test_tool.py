@@ -0,0 +1,127 @@
+import tracemalloc
+from collections.abc import Generator
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.plugin.impl.tool import PluginToolManager
+from core.tools.entities.tool_entities import ToolInvokeMessage
+from core.tools.utils.message_transformer import ToolFileMessageTransformer
+
+CHUNK_SIZE = 8192
+
+
+def _blob_chunks(blob_id: str, size: int) -> Generator[ToolInvokeMessage, None, None]:
+    sequence = 0
+    for start in range(0, size, CHUNK_SIZE):
+        yield ToolInvokeMessage(
+            type=ToolInvokeMessage.MessageType.BLOB_CHUNK,
+            message=ToolInvokeMessage.BlobChunkMessage(
+                id=blob_id,
+                sequence=sequence,
+                total_length=size,
+                blob=bytes([sequence % 256]) * min(CHUNK_SIZE, size - start),
+                end=False,
+            ),
+        )
+        sequence += 1
+    yield ToolInvokeMessage(
+        type=ToolInvokeMessage.MessageType.BLOB_CHUNK,
+        message=ToolInvokeMessage.BlobChunkMessage(
+            id=blob_id, sequence=sequence, total_length=size, blob=b"", end=True
+        ),
+        meta={"mime_type": "image/png"},
+    )
+
+
+def _invoke(response) -> Generator[ToolInvokeMessage, None, None]:
+    with patch.object(PluginToolManager, "_request_with_plugin_daemon_response_stream", return_value=response):
+        yield from PluginToolManager().invoke(
+            tenant_id="tenant",
+            user_id="user",
+            tool_provider="langgenius/image/image",
+            tool_name="generate",
+            credentials={},
+            tool_parameters={},
+        )
+
+
+def _consume_blobs(size: int, files: int) -> int:
+    def response():
+        for i in range(files):
+            yield from _blob_chunks(f"blob-{i}", size)
+
+    total = 0
+    for message in _invoke(response()):
+        assert isinstance(message.message, ToolInvokeMessage.BlobFileMessage)
+        total += message.message.size
+        message.message.file.close()
+    return total
+
+
+def test_blob_chunks_are_reassembled_in_a_file():
+    size = 3 * CHUNK_SIZE + 100
+
+    messages = list(_invoke(_blob_chunks("blob", size)))
+
+    assert len(messages) == 1
+    assert messages[0].type == ToolInvokeMessage.MessageType.BLOB
+    assert messages[0].meta == {"mime_type": "image/png"}
+    blob_file = messages[0].message
+    assert isinstance(blob_file, ToolInvokeMessage.BlobFileMessage)
+    assert blob_file.size == size
+    assert blob_file.read() == b"".join(
+        bytes([sequence]) * min(CHUNK_SIZE, size - sequence * CHUNK_SIZE) for sequence in range(4)
+    )
+
+
+def test_large_blobs_spill_to_disk():
+    messages = list(_invoke(_blob_chunks("blob", 2 * PluginToolManager.BLOB_SPOOL_MAX_MEMORY_SIZE)))
+
+    assert messages[0].message.file._rolled
+
+
+def test_blob_over_size_limit_is_rejected():
+    with patch("core.plugin.impl.tool.SpooledTemporaryFile.tell", return_value=30 * 1024 * 1024):
+        with pytest.raises(ValueError, match="limit of 30MB"):
+            list(_invoke(_blob_chunks("blob", CHUNK_SIZE)))
+
+
+def test_peak_memory_does_not_grow_with_blob_size():
+    size = 8 * PluginToolManager.BLOB_SPOOL_MAX_MEMORY_SIZE
+
+    tracemalloc.start()
+    try:
+        total = _consume_blobs(size, files=3)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert total == 3 * size
+    # a buffered implementation holds at least one whole blob
+    assert peak < 2 * PluginToolManager.BLOB_SPOOL_MAX_MEMORY_SIZE
+
+
+def test_blob_file_is_saved_and_closed():
+    blob_file = next(m.message for m in _invoke(_blob_chunks("blob", 2 * CHUNK_SIZE)))
+    message = ToolInvokeMessage(
+        type=ToolInvokeMessage.MessageType.BLOB, message=blob_file, meta={"mime_type": "image/png"}
+    )
+    tool_file_manager = MagicMock()
+    tool_file_manager.create_file_by_stream.return_value = MagicMock(id="tool-file", mimetype="image/png")
+
+    with patch("core.tools.utils.message_transformer.ToolFileManager", return_value=tool_file_manager):
+        messages = list(
+            ToolFileMessageTransformer.transform_tool_invoke_messages(iter([message]), user_id="user", tenant_id="t")
+        )
+
+    assert messages[0].type == ToolInvokeMessage.MessageType.IMAGE_LINK
+    assert messages[0].message.text == "/files/tools/tool-file.png"
+    assert tool_file_manager.create_file_by_stream.call_args.kwargs["size"] == 2 * CHUNK_SIZE
+    assert blob_file.file.closed
+
+
+def test_benchmark_blob_streaming(benchmark):
+    size = 4 * PluginToolManager.BLOB_SPOOL_MAX_MEMORY_SIZE
+
+    assert benchmark(_consume_blobs, size, 2) == 2 * size
@@ -0,0 +1,103 @@
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+from core.indexing_runner import IndexingRunner
+from core.model_runtime.entities.text_embedding_entities import EmbeddingUsage, TextEmbeddingResult
+from core.rag.embedding.cached_embedding import CacheEmbedding
+from core.rag.embedding.embedding_usage import EmbeddingTokenCache, record_embedding_usage
+from core.rag.models.document import ChildDocument, Document
+
+
+def _embedding_model_instance() -> MagicMock:
+    model_instance = MagicMock()
+    model_instance.provider = "openai"
+    model_instance.model = "text-embedding-3-small"
+    model_instance.get_text_embedding_num_tokens.side_effect = lambda texts: [len(text.split()) for text in texts]
+    return model_instance
+
+
+def _embedding_result(texts: list[str], total_tokens: int) -> TextEmbeddingResult:
+    return TextEmbeddingResult(
+        model="text-embedding-3-small",
+        embeddings=[[1.0, 0.0] for _ in texts],
+        usage=EmbeddingUsage(
+            tokens=total_tokens,
+            total_tokens=total_tokens,
+            unit_price=Decimal(0),
+            price_unit=Decimal(0),
+            total_price=Decimal(0),
+            currency="USD",
+            latency=0.1,
+        ),
+    )
+
+
+def test_token_cache_tokenizes_each_text_once():
+    model_instance = _embedding_model_instance()
+    token_cache = EmbeddingTokenCache()
+
+    assert token_cache.get_num_tokens(model_instance, ["a b", "c d e"]) == [2, 3]
+    assert token_cache.get_num_tokens(model_instance, ["c d e", "f"]) == [3, 1]
+
+    tokenized = [call.args[0] for call in model_instance.get_text_embedding_num_tokens.call_args_list]
+    assert tokenized == [["a b", "c d e"], ["f"]]
+
+
+def test_token_cache_is_keyed_by_model():
+    model_instance = _embedding_model_instance()
+    other_model_instance = _embedding_model_instance()
+    other_model_instance.model = "text-embedding-3-large"
+    token_cache = EmbeddingTokenCache()
+
+    token_cache.get_num_tokens(model_instance, ["a b"])
+    assert token_cache.get(other_model_instance, "a b") is None
+
+
+@patch("core.rag.embedding.cached_embedding.db")
+def test_cache_embedding_records_usage_of_embedded_texts(mock_db):
+    model_instance = _embedding_model_instance()
+    model_instance.model_type_instance.get_model_schema.return_value = None
+    model_instance.invoke_text_embedding.side_effect = lambda texts, **kwargs: _embedding_result(texts, 7)
+    mock_db.session.query.return_value.filter_by.return_value.first.return_value = None
+
+    with record_embedding_usage() as usage_recorder:
+        CacheEmbedding(model_instance).embed_documents(["hello", "world"])
+
+    # max chunks defaults to 1 without a model schema, one invocation per text
+    assert usage_recorder.tokens == 14
+    assert usage_recorder.embedded_texts == ["hello", "world"]
+    model_instance.get_text_embedding_num_tokens.assert_not_called()
+
+
+def test_runner_takes_tokens_from_usage_and_cache():
+    model_instance = _embedding_model_instance()
+    runner = IndexingRunner()
+    # counted when the segments were saved
+    runner.embedding_token_cache.get_num_tokens(model_instance, ["cached text here", "new text"])
+    model_instance.get_text_embedding_num_tokens.reset_mock()
+
+    with record_embedding_usage() as usage_recorder:
+        usage_recorder.record(["new text"], _embedding_result(["new text"], 5).usage)
+
+    documents = [Document(page_content="cached text here"), Document(page_content="new text")]
+    assert runner._get_embedding_tokens(model_instance, documents, usage_recorder) == 5 + 3
+    model_instance.get_text_embedding_num_tokens.assert_not_called()
+
+
+def test_runner_counts_parent_chunks_of_parent_child_documents():
+    model_instance = _embedding_model_instance()
+    runner = IndexingRunner()
+    # counted when the segments were saved
+    runner.embedding_token_cache.get_num_tokens(model_instance, ["parent text"])
+    model_instance.get_text_embedding_num_tokens.reset_mock()
+    document = Document(
+        page_content="parent text",
+        children=[ChildDocument(page_content="child one"), ChildDocument(page_content="child two two")],
+    )
+
+    with record_embedding_usage() as usage_recorder:
+        usage_recorder.record(["child one"], _embedding_result(["child one"], 2).usage)
+
+    # the document tokens keep counting the parent chunks, not the embedded children
+    assert runner._get_embedding_tokens(model_instance, [document], usage_recorder) == 2
+    model_instance.get_text_embedding_num_tokens.assert_not_called()
@@ -0,0 +1,179 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from configs import dify_config
+from core.model_runtime.entities.model_entities import ModelPropertyKey
+from core.rag.embedding import cached_embedding
+from core.rag.embedding.cached_embedding import CacheEmbedding
+from core.rag.embedding.query_embedding_batcher import QueryEmbeddingBatcher
+
+
+def _embedding_model_instance(tenant_id: str = "tenant-id", max_chunks: int = 16, latency: float = 0.0) -> MagicMock:
+    model_instance = MagicMock()
+    model_instance.provider = "openai"
+    model_instance.model = "text-embedding-3-small"
+    model_instance.credentials = {"api_key": "key"}
+    model_instance.provider_model_bundle.configuration.tenant_id = tenant_id
+    model_instance.model_type_instance.get_model_schema.return_value = MagicMock(
+        model_properties={ModelPropertyKey.MAX_CHUNKS: max_chunks}
+    )
+    model_instance.calls = []
+
+    def invoke_text_embedding(texts, user, input_type):
+        model_instance.calls.append(list(texts))
+        time.sleep(latency)
+        return MagicMock(embeddings=[[float(len(text)), 1.0] for text in texts])
+
+    model_instance.invoke_text_embedding.side_effect = invoke_text_embedding
+    return model_instance
+
+
+@pytest.fixture(autouse=True)
+def batch_config(monkeypatch):
+    monkeypatch.setattr(dify_config, "QUERY_EMBEDDING_BATCH_WINDOW_MS", 50)
+    monkeypatch.setattr(dify_config, "QUERY_EMBEDDING_BATCH_MAX_SIZE", 32)
+
+
+def _embed_concurrently(batcher: QueryEmbeddingBatcher, requests: list[tuple[MagicMock, str]]) -> list:
+    barrier = threading.Barrier(len(requests))
+    results: list = [None] * len(requests)
+
+    def embed(i: int, model_instance: MagicMock, text: str) -> None:
+        barrier.wait()
+        try:
+            results[i] = batcher.embed_query(model_instance, text)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=embed, args=(i, *request)) for i, request in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_queries_are_embedded_in_one_call():
+    batcher = QueryEmbeddingBatcher()
+    model_instance = _embedding_model_instance()
+    texts = ["q" * i for i in range(1, 9)]
+
+    results = _embed_concurrently(batcher, [(model_instance, text) for text in texts])
+
+    assert results == [[float(len(text)), 1.0] for text in texts]
+    assert len(model_instance.calls) == 1
+    assert sorted(model_instance.calls[0]) == sorted(texts)
+    assert batcher.stats.batches == 1
+    assert batcher.stats.average_batch_size == 8
+
+
+def test_identical_queries_are_embedded_once():
+    batcher = QueryEmbeddingBatcher()
+    model_instance = _embedding_model_instance()
+
+    results = _embed_concurrently(batcher, [(model_instance, text) for text in ["a", "bb"] * 3])
+
+    assert results == [[1.0, 1.0], [2.0, 1.0]] * 3
+    assert sorted(sum(model_instance.calls, [])) == ["a", "bb"]
+    assert batcher.stats.deduplicated == 4
+
+
+def test_batches_are_bounded_by_the_model_max_chunks():
+    batcher = QueryEmbeddingBatcher()
+    model_instance = _embedding_model_instance(max_chunks=3)
+
+    results = _embed_concurrently(batcher, [(model_instance, "q" * i) for i in range(1, 8)])
+
+    assert results == [[float(i), 1.0] for i in range(1, 8)]
+    assert max(len(call) for call in model_instance.calls) == 3
+    assert sum(len(call) for call in model_instance.calls) == 7
+
+
+def test_queries_of_other_tenants_are_not_batched_together():
+    batcher = QueryEmbeddingBatcher()
+    tenant_a, tenant_b = _embedding_model_instance("tenant-a"), _embedding_model_instance("tenant-b")
+
+    _embed_concurrently(batcher, [(tenant_a, "same"), (tenant_b, "same"), (tenant_a, "other")])
+
+    assert [sorted(call) for call in tenant_a.calls] == [["other", "same"]]
+    assert tenant_b.calls == [["same"]]
+
+
+def test_embedding_errors_are_raised_to_every_query():
+    batcher = QueryEmbeddingBatcher()
+    model_instance = _embedding_model_instance()
+    model_instance.invoke_text_embedding.side_effect = RuntimeError("rate limited")
+
+    results = _embed_concurrently(batcher, [(model_instance, text) for text in ["a", "b", "a"]])
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    # nothing is left waiting for the failed batch
+    assert batcher.embed_query(_embedding_model_instance(), "a") == [1.0, 1.0]
+
+
+class _Interrupted(BaseException):
+    pass
+
+
+def test_interrupted_batches_do_not_leave_queries_waiting():
+    batcher = QueryEmbeddingBatcher()
+    model_instance = _embedding_model_instance()
+    # e.g. a timeout raised in the thread embedding the batch
+    model_instance.invoke_text_embedding.side_effect = _Interrupted()
+    barrier = threading.Barrier(3)
+    results: list = [None] * 3
+
+    def embed(i: int, text: str) -> None:
+        barrier.wait()
+        try:
+            batcher.embed_query(model_instance, text)
+        except BaseException as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=embed, args=(i, text)) for i, text in enumerate(["a", "b", "c"])]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert all(isinstance(result, _Interrupted) for result in results)
+    assert batcher.stats.batches == 1
+
+
+def test_cache_embedding_embeds_queries_through_the_batcher(monkeypatch):
+    monkeypatch.setattr(dify_config, "QUERY_EMBEDDING_BATCH_ENABLED", True)
+    monkeypatch.setattr(cached_embedding, "query_embedding_cache", MagicMock(get=MagicMock(return_value=None)))
+    batcher = QueryEmbeddingBatcher()
+    monkeypatch.setattr(cached_embedding, "query_embedding_batcher", batcher)
+    model_instance = _embedding_model_instance()
+
+    assert CacheEmbedding(model_instance).embed_query("abc") == pytest.approx([0.948683, 0.316228], rel=1e-5)
+    assert batcher.stats.batches == 1
+
+
+@pytest.mark.parametrize("batched", [False, True])
+def test_benchmark_concurrent_query_embeddings(benchmark, monkeypatch, batched):
+    monkeypatch.setattr(dify_config, "QUERY_EMBEDDING_BATCH_WINDOW_MS", 5)
+    # every embedding call is a round trip to the plugin daemon and the provider
+    model_instance = _embedding_model_instance(latency=0.02)
+    batcher = QueryEmbeddingBatcher()
+    requests = [(model_instance, f"query {i % 48}") for i in range(64)]
+
+    def embed() -> list:
+        if batched:
+            return _embed_concurrently(batcher, requests)
+        direct = MagicMock(
+            embed_query=lambda model_instance, text: model_instance.invoke_text_embedding(
+                texts=[text], user=None, input_type=None
+            ).embeddings[0]
+        )
+        return _embed_concurrently(direct, requests)
+
+    results = benchmark(embed)
+
+    assert results == [[float(len(text)), 1.0] for _, text in requests]
+    benchmark.extra_info["embedding_calls"] = len(model_instance.calls)
@@ -0,0 +1,157 @@
+import base64
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from core.rag.embedding import cached_embedding, query_embedding_cache
+from core.rag.embedding.cached_embedding import CacheEmbedding
+from core.rag.embedding.query_embedding_cache import QueryEmbeddingCache
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, bytes] = {}
+        self.ttls: dict[str, int] = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    def setex(self, key, ttl, value):
+        self.round_trips += 1
+        self.data[key] = value
+        self.ttls[key] = ttl
+
+
+class _FakePipeline:
+    def __init__(self, redis: _FakeRedis) -> None:
+        self.redis = redis
+        self.commands: list = []
+
+    def get(self, key):
+        self.commands.append(lambda: self.redis.data.get(key))
+
+    def expire(self, key, ttl):
+        def expire():
+            if key not in self.redis.data:
+                return False
+            self.redis.ttls[key] = ttl
+            return True
+
+        self.commands.append(expire)
+
+    def execute(self):
+        self.redis.round_trips += 1
+        return [command() for command in self.commands]
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = _FakeRedis()
+    monkeypatch.setattr(query_embedding_cache, "redis_client", redis)
+    return redis
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=0.0)
+    monkeypatch.setattr(query_embedding_cache, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def _embedding(seed: int, dimension: int = 8) -> list[float]:
+    vector = np.arange(1, dimension + 1, dtype=np.float64) * (seed + 1)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def test_embeddings_are_cached_as_bytes_in_both_tiers(redis):
+    cache = QueryEmbeddingCache(ttl=3600, memory_ttl=600, memory_max_size=1024)
+
+    assert cache.get("openai", "text-embedding-3-small", "what is dify") is None
+    cache.set("openai", "text-embedding-3-small", "what is dify", _embedding(1))
+
+    (key,) = redis.data
+    assert key.startswith("query_embedding:openai_text-embedding-3-small_")
+    assert np.frombuffer(redis.data[key], dtype=np.float64).tolist() == _embedding(1)
+    assert redis.ttls[key] == 3600
+
+    round_trips = redis.round_trips
+    assert cache.get("openai", "text-embedding-3-small", "what is dify") == _embedding(1)
+    # served by the process tier, without redis
+    assert redis.round_trips == round_trips
+    assert (cache.stats.memory_hits, cache.stats.redis_hits, cache.stats.misses) == (1, 0, 1)
+
+
+def test_other_processes_read_redis_and_refresh_its_ttl(redis):
+    cache = QueryEmbeddingCache(ttl=3600, memory_ttl=600, memory_max_size=1024)
+    other = QueryEmbeddingCache(ttl=3600, memory_ttl=600, memory_max_size=1024)
+    cache.set("openai", "text-embedding-3-small", "what is dify", _embedding(1))
+    (key,) = redis.data
+    redis.ttls[key] = 10
+
+    assert other.get("openai", "text-embedding-3-small", "what is dify") == _embedding(1)
+    assert other.get("openai", "text-embedding-3-small", "what is dify") == _embedding(1)
+
+    assert redis.ttls[key] == 3600
+    assert (other.stats.memory_hits, other.stats.redis_hits) == (1, 1)
+    assert other.get("openai", "text-embedding-3-large", "what is dify") is None
+
+
+def test_process_tier_is_bounded_and_expires(redis, clock):
+    # room for two embeddings of 8 float64
+    cache = QueryEmbeddingCache(ttl=3600, memory_ttl=600, memory_max_size=128)
+    for i in range(3):
+        cache.set("openai", "text-embedding-3-small", f"query {i}", _embedding(i))
+    redis.data.clear()
+
+    assert cache.get("openai", "text-embedding-3-small", "query 0") is None
+    assert cache.get("openai", "text-embedding-3-small", "query 2") == _embedding(2)
+    assert cache.stats.evictions == 1
+
+    clock.now = 601
+    assert cache.get("openai", "text-embedding-3-small", "query 2") is None
+    assert cache._memory_size == 64
+
+
+def test_process_tier_can_be_disabled(redis):
+    cache = QueryEmbeddingCache(ttl=3600, memory_ttl=600, memory_max_size=0)
+    cache.set("openai", "text-embedding-3-small", "what is dify", _embedding(1))
+
+    assert cache.get("openai", "text-embedding-3-small", "what is dify") == _embedding(1)
+    assert cache.stats.redis_hits == 1
+
+
+def test_cache_embedding_embeds_uncached_queries_once(redis, monkeypatch):
+    monkeypatch.setattr(
+        cached_embedding, "query_embedding_cache", QueryEmbeddingCache(ttl=3600, memory_ttl=600, memory_max_size=1024)
+    )
+    model_instance = MagicMock(provider="openai", model="text-embedding-3-small")
+    model_instance.invoke_text_embedding.return_value = MagicMock(embeddings=[[3.0, 4.0]])
+
+    assert CacheEmbedding(model_instance).embed_query("what is dify") == [0.6, 0.8]
+    assert CacheEmbedding(model_instance).embed_query("what is dify") == [0.6, 0.8]
+
+    model_instance.invoke_text_embedding.assert_called_once()
+
+
+@pytest.mark.parametrize("tier", ["base64", "redis", "memory"])
+def test_benchmark_query_embedding_cache_hit(benchmark, redis, tier):
+    embedding = _embedding(1, dimension=1536)
+    cache = QueryEmbeddingCache(ttl=3600, memory_ttl=600, memory_max_size=0 if tier == "redis" else 1024 * 1024)
+    cache.set("openai", "text-embedding-3-small", "what is dify", embedding)
+    encoded = base64.b64encode(np.array(embedding).tobytes()).decode("utf-8")
+
+    def get_base64() -> list[float]:
+        # the former lookup: GET and EXPIRE round trips, base64 decoding and a float conversion per item
+        redis.round_trips += 2
+        return [float(x) for x in np.frombuffer(base64.b64decode(encoded), dtype="float")]
+
+    if tier == "base64":
+        result = benchmark(get_base64)
+    else:
+        result = benchmark(cache.get, "openai", "text-embedding-3-small", "what is dify")
+
+    assert result == embedding
+    benchmark.extra_info["redis_round_trips"] = redis.round_trips
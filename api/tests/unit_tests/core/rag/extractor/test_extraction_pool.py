@@ -0,0 +1,96 @@
+import io
+import time
+
+import pytest
+
+from configs import dify_config
+from core.rag.extractor.csv_extractor import CSVExtractor
+from core.rag.extractor.extraction_pool import extract_out_of_process, shutdown_extraction_pool
+from core.rag.extractor.pdf_extractor import PdfExtractor
+
+
+def _make_pdf(page_count: int) -> bytes:
+    """build a PDF with the text "page <i>" on each page"""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for i in range(page_count):
+        stream = f"BT /F1 12 Tf 72 720 Td (page {i}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {page_count} >>"
+
+    pdf = io.BytesIO()
+    pdf.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(pdf.tell())
+        pdf.write(f"{number} 0 obj\n{obj}\nendobj\n".encode())
+    xref = pdf.tell()
+    pdf.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        pdf.write(f"{offset:010d} 00000 n \n".encode())
+    pdf.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return pdf.getvalue()
+
+
+@pytest.fixture(scope="module")
+def extraction_pool():
+    # shared by the tests of the module, spawning the workers takes seconds
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(dify_config, "ETL_PROCESS_POOL_MAX_WORKERS", 2)
+        monkeypatch.setattr(dify_config, "ETL_PDF_PAGES_PER_TASK", 10)
+        yield
+    shutdown_extraction_pool()
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / "document.pdf"
+    path.write_bytes(_make_pdf(95))
+    return str(path)
+
+
+def test_pdf_pages_are_extracted_in_order_by_the_pool(extraction_pool, pdf_path):
+    documents = PdfExtractor(pdf_path).extract()
+
+    assert [document.page_content for document in documents] == [f"page {i}" for i in range(95)]
+    assert [document.metadata["page"] for document in documents] == list(range(95))
+
+
+def test_pdf_extraction_matches_in_process_extraction(extraction_pool, pdf_path, monkeypatch):
+    pooled = PdfExtractor(pdf_path).extract()
+    monkeypatch.setattr(dify_config, "ETL_PROCESS_POOL_MAX_WORKERS", 0)
+
+    assert PdfExtractor(pdf_path).extract() == pooled
+
+
+def test_extractor_runs_out_of_process(extraction_pool, tmp_path):
+    path = tmp_path / "table.csv"
+    path.write_text("name,age\nalice,30\nbob,40\n")
+    extractor = CSVExtractor(str(path))
+
+    assert extract_out_of_process(extractor) == extractor.extract()
+
+
+def test_benchmark_pdf_extraction(benchmark, extraction_pool, tmp_path):
+    path = tmp_path / "large.pdf"
+    path.write_bytes(_make_pdf(1000))
+
+    def extract():
+        # thread CPU time is the time a gevent hub would be blocked by the extraction
+        started_at, cpu_started_at = time.perf_counter(), time.thread_time()
+        documents = PdfExtractor(str(path)).extract()
+        elapsed, blocking = time.perf_counter() - started_at, time.thread_time() - cpu_started_at
+        benchmark.extra_info["pages_per_second"] = len(documents) / elapsed
+        benchmark.extra_info["blocking_seconds"] = blocking
+        return documents
+
+    assert len(benchmark.pedantic(extract, rounds=3)) == 1000
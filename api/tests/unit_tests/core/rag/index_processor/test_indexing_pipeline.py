@@ -0,0 +1,165 @@
+import threading
+import time
+import tracemalloc
+import uuid
+from collections.abc import Iterator
+
+import pytest
+
+from core.rag.index_processor.indexing_pipeline import IndexingPipeline
+from core.rag.models.document import Document
+from core.rag.splitter.text_splitter import RecursiveCharacterTextSplitter
+
+PAGE_COUNT = 2000
+
+
+def _synthetic_pages(page_count: int = PAGE_COUNT) -> Iterator[Document]:
+    """pages are produced lazily, as an extractor reading a large file would"""
+    for page in range(page_count):
+        paragraphs = [f"Page {page} paragraph {p}. " + "lorem ipsum dolor sit amet " * 12 for p in range(6)]
+        yield Document(page_content="\n\n".join(paragraphs), metadata={"page": page})
+
+
+_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
+
+
+def _split(pages: list[Document]) -> list[Document]:
+    chunks = _splitter.split_documents(pages)
+    for chunk in chunks:
+        chunk.metadata["doc_id"] = str(uuid.uuid4())
+    return chunks
+
+
+class _FakeVectorStore:
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.persisted: list[int] = []
+        self.loaded = 0
+
+    def persist(self, chunks: list[Document]) -> None:
+        self.persisted.extend(chunk.metadata["page"] for chunk in chunks)
+
+    def load(self, chunks: list[Document]) -> int:
+        time.sleep(self.latency)
+        with self.lock:
+            self.loaded += len(chunks)
+        return sum(len(chunk.page_content) for chunk in chunks)
+
+
+def _create_pipeline(store: _FakeVectorStore, **kwargs) -> IndexingPipeline:
+    return IndexingPipeline(split_fn=_split, persist_fn=store.persist, load_fn=store.load, **kwargs)
+
+
+def test_pipeline_persists_in_page_order_and_loads_every_chunk():
+    store = _FakeVectorStore()
+    stats = _create_pipeline(store, page_batch_size=7, split_workers=4, load_batch_size=16).run(_synthetic_pages(200))
+
+    assert stats.pages == 200
+    assert stats.chunks == store.loaded == len(store.persisted)
+    assert store.persisted == sorted(store.persisted)
+    assert stats.tokens > 0
+
+
+def test_pipeline_bounds_chunks_in_flight():
+    store = _FakeVectorStore(latency=0.002)
+    pipeline = _create_pipeline(store, page_batch_size=10, load_batch_size=8, load_workers=2, queue_size=2)
+    stats = pipeline.run(_synthetic_pages(300))
+
+    # a slow load stage throttles splitting: at most the queued and loading batches are in flight,
+    # plus the rest of the page batch being handed over
+    assert stats.peak_in_flight_chunks < stats.chunks / 4
+    assert stats.peak_in_flight_chunks <= (2 + 2 + 1) * 8 + len(_split(list(_synthetic_pages(10))))
+
+
+def test_pipeline_loads_the_same_text_in_one_worker():
+    store = _FakeVectorStore(latency=0.001)
+    threads_by_text: dict[str, set[str]] = {}
+
+    def load(chunks: list[Document]) -> int:
+        for chunk in chunks:
+            threads_by_text.setdefault(chunk.page_content, set()).add(threading.current_thread().name)
+        return store.load(chunks)
+
+    def split(pages: list[Document]) -> list[Document]:
+        # every page repeats the same few chunks
+        chunks = [
+            Document(page_content=f"chunk {i}", metadata={"page": page.metadata["page"]})
+            for page in pages
+            for i in range(5)
+        ]
+        for chunk in chunks:
+            chunk.metadata["doc_id"] = str(uuid.uuid4())
+        return chunks
+
+    pipeline = IndexingPipeline(split_fn=split, persist_fn=store.persist, load_fn=load, load_batch_size=2)
+    stats = pipeline.run(_synthetic_pages(100))
+
+    assert stats.chunks == store.loaded == 500
+    assert all(len(threads) == 1 for threads in threads_by_text.values())
+
+
+def test_pipeline_raises_load_error():
+    store = _FakeVectorStore()
+
+    def load(chunks: list[Document]) -> int:
+        if store.loaded > 20:
+            raise RuntimeError("vector store unavailable")
+        return store.load(chunks)
+
+    pipeline = IndexingPipeline(split_fn=_split, persist_fn=store.persist, load_fn=load, load_batch_size=4)
+    with pytest.raises(RuntimeError, match="vector store unavailable"):
+        pipeline.run(_synthetic_pages())
+
+    # the producer stopped early instead of splitting the whole corpus
+    assert len(store.persisted) < PAGE_COUNT
+
+
+def test_pipeline_raises_split_error():
+    store = _FakeVectorStore()
+
+    def split(pages: list[Document]) -> list[Document]:
+        if pages[0].metadata["page"] >= 100:
+            raise ValueError("bad page")
+        return _split(pages)
+
+    pipeline = IndexingPipeline(split_fn=split, persist_fn=store.persist, load_fn=store.load)
+    with pytest.raises(ValueError, match="bad page"):
+        pipeline.run(_synthetic_pages())
+
+
+def _index_sequentially(store: _FakeVectorStore, pages: Iterator[Document]) -> None:
+    """split everything, persist everything, then load, as the phases ran before the pipeline"""
+    chunks = _split(list(pages))
+    store.persist(chunks)
+    for start in range(0, len(chunks), 64):
+        store.load(chunks[start : start + 64])
+
+
+def _peak_memory(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_pipeline_peak_memory_is_lower_than_sequential_phases():
+    sequential_peak = _peak_memory(lambda: _index_sequentially(_FakeVectorStore(), _synthetic_pages()))
+    pipeline_peak = _peak_memory(lambda: _create_pipeline(_FakeVectorStore()).run(_synthetic_pages()))
+
+    assert pipeline_peak < sequential_peak / 2
+
+
+def test_benchmark_pipeline_throughput(benchmark):
+    def run() -> int:
+        stats = _create_pipeline(_FakeVectorStore(latency=0.001)).run(_synthetic_pages())
+        return stats.pages
+
+    pages = benchmark.pedantic(run, rounds=3)
+    benchmark.extra_info["pages"] = pages
+    benchmark.extra_info["peak_traced_memory"] = _peak_memory(
+        lambda: _create_pipeline(_FakeVectorStore(latency=0.001)).run(_synthetic_pages())
+    )
+    assert pages == PAGE_COUNT
@@ -0,0 +1,127 @@
+import math
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.model_runtime.entities.model_entities import ModelPropertyKey
+from core.model_runtime.entities.text_embedding_entities import EmbeddingUsage, TextEmbeddingResult
+from core.rag.embedding.cached_embedding import CacheEmbedding
+from core.rag.index_processor.processor.parent_child_index_processor import ParentChildIndexProcessor
+from core.rag.models.document import ChildDocument, Document
+
+MAX_CHUNKS = 32
+
+
+class _CountingEmbeddingModel:
+    """fake embedding model instance counting the embedding requests"""
+
+    provider = "openai"
+    model = "text-embedding-3-small"
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.embedded_texts: list[str] = []
+        self.model_type_instance = MagicMock()
+        self.model_type_instance.get_model_schema.return_value.model_properties = {
+            ModelPropertyKey.MAX_CHUNKS: MAX_CHUNKS
+        }
+        self.credentials: dict = {}
+
+    def invoke_text_embedding(self, texts: list[str], **kwargs) -> TextEmbeddingResult:
+        assert len(texts) <= MAX_CHUNKS
+        self.requests += 1
+        self.embedded_texts.extend(texts)
+        return TextEmbeddingResult(
+            model=self.model,
+            embeddings=[[float(len(text)), 1.0] for text in texts],
+            usage=EmbeddingUsage(
+                tokens=len(texts),
+                total_tokens=len(texts),
+                unit_price=Decimal(0),
+                price_unit=Decimal(0),
+                total_price=Decimal(0),
+                currency="USD",
+                latency=0.0,
+            ),
+        )
+
+
+class _FakeVector:
+    def __init__(self, embedding_model: _CountingEmbeddingModel) -> None:
+        self.embeddings = CacheEmbedding(embedding_model)  # type: ignore
+        self.upserts: list[list[Document]] = []
+
+    def __call__(self, dataset) -> "_FakeVector":
+        return self
+
+    def create(self, texts: list[Document], **kwargs) -> None:
+        embeddings = self.embeddings.embed_documents([text.page_content for text in texts])
+        assert len(embeddings) == len(texts)
+        self.upserts.append(texts)
+
+
+def _parents(parent_count: int, children_per_parent: int = 2) -> list[Document]:
+    return [
+        Document(
+            page_content=f"parent {p}",
+            metadata={"doc_id": f"parent-{p}"},
+            children=[
+                ChildDocument(page_content=f"parent {p} child {c}", metadata={"doc_id": f"child-{p}-{c}"})
+                for c in range(children_per_parent)
+            ],
+        )
+        for p in range(parent_count)
+    ]
+
+
+@pytest.fixture
+def vector():
+    embedding_model = _CountingEmbeddingModel()
+    fake_vector = _FakeVector(embedding_model)
+    with (
+        patch("core.rag.index_processor.processor.parent_child_index_processor.Vector", fake_vector),
+        patch("core.rag.embedding.cached_embedding.db") as mock_db,
+    ):
+        mock_db.session.query.return_value.filter_by.return_value.first.return_value = None
+        yield fake_vector, embedding_model
+
+
+def test_load_embeds_children_of_all_parents_in_full_batches(vector):
+    fake_vector, embedding_model = vector
+    dataset = MagicMock(indexing_technique="high_quality")
+
+    ParentChildIndexProcessor().load(dataset, _parents(3000))
+
+    assert embedding_model.requests == math.ceil(6000 / MAX_CHUNKS)
+    assert len(fake_vector.upserts) == 1
+    expected_order = [f"child-{p}-{c}" for p in range(3000) for c in range(2)]
+    assert [document.metadata["doc_id"] for document in fake_vector.upserts[0]] == expected_order
+    assert embedding_model.embedded_texts == [f"parent {p} child {c}" for p in range(3000) for c in range(2)]
+
+
+def test_load_skips_parents_without_children(vector):
+    fake_vector, embedding_model = vector
+    dataset = MagicMock(indexing_technique="high_quality")
+
+    ParentChildIndexProcessor().load(dataset, _parents(3, children_per_parent=0))
+
+    assert embedding_model.requests == 0
+    assert fake_vector.upserts == []
+
+
+def test_benchmark_load_three_thousand_parents(vector, benchmark):
+    fake_vector, embedding_model = vector
+    dataset = MagicMock(indexing_technique="high_quality")
+    parents = _parents(3000)
+
+    def load() -> tuple[int, int]:
+        embedding_model.requests = 0
+        fake_vector.upserts.clear()
+        ParentChildIndexProcessor().load(dataset, parents)
+        return embedding_model.requests, len(fake_vector.upserts)
+
+    requests, upserts = benchmark(load)
+    benchmark.extra_info["embedding_requests"] = requests
+    benchmark.extra_info["upserts"] = upserts
+    assert requests == math.ceil(6000 / MAX_CHUNKS)
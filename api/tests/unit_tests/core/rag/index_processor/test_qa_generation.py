@@ -0,0 +1,115 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from core.model_runtime.errors.invoke import InvokeRateLimitError
+from core.rag.index_processor.qa_generation import QAGenerationCheckpoint, QAGenerationScheduler
+from core.rag.models.document import Document
+
+
+def _chunks(count: int) -> list[Document]:
+    return [Document(page_content=f"chunk {i}", metadata={"doc_hash": f"hash-{i}"}) for i in range(count)]
+
+
+def _qa_pairs(chunk: Document) -> list[dict[str, str]]:
+    return [{"question": f"what is {chunk.page_content}", "answer": chunk.page_content}]
+
+
+def test_slow_request_does_not_stall_the_window():
+    def generate(chunk: Document) -> list[dict[str, str]]:
+        time.sleep(0.5 if chunk.metadata["doc_hash"] == "hash-0" else 0.01)
+        return _qa_pairs(chunk)
+
+    scheduler = QAGenerationScheduler(generate_fn=generate, max_concurrency=3)
+    started_at = time.perf_counter()
+    results = scheduler.run(_chunks(40))
+    elapsed = time.perf_counter() - started_at
+
+    assert results == [_qa_pairs(chunk) for chunk in _chunks(40)]
+    assert scheduler.peak_in_flight == 3
+    # the other two slots keep working while the slow request runs, batches of 3 would take ~0.6s
+    assert elapsed < 0.55
+
+
+def test_rate_limit_halves_concurrency_and_retries():
+    lock = threading.Lock()
+    calls = {"count": 0}
+
+    def generate(chunk: Document) -> list[dict[str, str]]:
+        with lock:
+            calls["count"] += 1
+            rate_limited = calls["count"] <= 4
+        if rate_limited:
+            raise InvokeRateLimitError("rate limited")
+        return _qa_pairs(chunk)
+
+    scheduler = QAGenerationScheduler(generate_fn=generate, max_concurrency=8, backoff=0)
+    results = scheduler.run(_chunks(8))
+
+    assert results == [_qa_pairs(chunk) for chunk in _chunks(8)]
+    assert scheduler.rate_limited_count == 4
+    # all four rejected requests were started in the same window, concurrency was halved once
+    assert scheduler.concurrency <= 5
+
+
+def test_rate_limit_retries_are_bounded():
+    def generate(chunk: Document) -> list[dict[str, str]]:
+        if chunk.metadata["doc_hash"] == "hash-1":
+            raise InvokeRateLimitError("rate limited")
+        return _qa_pairs(chunk)
+
+    scheduler = QAGenerationScheduler(generate_fn=generate, max_concurrency=2, max_retries=2, backoff=0)
+    results = scheduler.run(_chunks(3))
+
+    assert results[1] is None
+    assert results[0] == _qa_pairs(_chunks(1)[0])
+    assert scheduler.rate_limited_count == 3
+    assert scheduler.concurrency == 1
+
+
+def test_failed_generation_is_skipped():
+    def generate(chunk: Document) -> list[dict[str, str]]:
+        if chunk.metadata["doc_hash"] == "hash-0":
+            raise ValueError("invalid response")
+        return _qa_pairs(chunk)
+
+    results = QAGenerationScheduler(generate_fn=generate).run(_chunks(2))
+
+    assert results[0] is None
+    assert results[1] == _qa_pairs(_chunks(2)[1])
+
+
+def test_checkpoint_resumes_generated_chunks():
+    store: dict[str, dict[str, str]] = {}
+    fake_redis = MagicMock()
+    fake_redis.hget.side_effect = lambda key, field: store.get(key, {}).get(field)
+    fake_pipeline = fake_redis.pipeline.return_value
+    fake_pipeline.hset.side_effect = lambda key, field, value: store.setdefault(key, {}).__setitem__(field, value)
+    fake_redis.delete.side_effect = lambda key: store.pop(key, None)
+    generated: list[str] = []
+
+    def generate(chunk: Document, fail: bool = False) -> list[dict[str, str]]:
+        generated.append(chunk.metadata["doc_hash"])
+        if fail and chunk.metadata["doc_hash"] == "hash-3":
+            raise ValueError("worker lost")
+        return _qa_pairs(chunk)
+
+    with patch("core.rag.index_processor.qa_generation.redis_client", fake_redis):
+        checkpoint = QAGenerationCheckpoint(document_id="document", document_language="English", ttl=60)
+        QAGenerationScheduler(generate_fn=lambda chunk: generate(chunk, fail=True), checkpoint=checkpoint).run(
+            _chunks(5)
+        )
+        generated.clear()
+
+        # the retried task only generates the chunk that failed
+        results = QAGenerationScheduler(generate_fn=generate, checkpoint=checkpoint).run(_chunks(5))
+
+        assert results == [_qa_pairs(chunk) for chunk in _chunks(5)]
+        assert generated == ["hash-3"]
+        assert list(store) == ["qa_generation_checkpoint:document"]
+        fake_pipeline.expire.assert_called_with("qa_generation_checkpoint:document", 60)
+
+        # the indexed document drops its generated QA pairs
+        QAGenerationCheckpoint.delete("document")
+
+    assert store == {}
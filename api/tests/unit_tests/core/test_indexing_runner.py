@@ -0,0 +1,134 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from flask import Flask
+
+from configs import dify_config
+from core import indexing_runner
+from core.indexing_runner import DocumentIsPausedError, IndexingRunner
+
+
+@pytest.fixture
+def mock_db(monkeypatch):
+    mock_db = MagicMock()
+    datasets = [MagicMock(id="dataset-id")]
+    processing_rules = [MagicMock(id="rule-id")]
+    mock_db.session.query.side_effect = lambda model: MagicMock(
+        filter=lambda *args: MagicMock(all=lambda: datasets if model is indexing_runner.Dataset else processing_rules)
+    )
+    # merged rows are the rows themselves
+    mock_db.session.merge.side_effect = lambda row, load: row
+    monkeypatch.setattr(indexing_runner, "db", mock_db)
+    return mock_db
+
+
+@pytest.fixture
+def flask_app():
+    app = Flask(__name__)
+    with app.app_context():
+        yield app
+
+
+def _documents(count: int) -> list[MagicMock]:
+    return [
+        MagicMock(id=f"document-{i}", dataset_id="dataset-id", dataset_process_rule_id="rule-id") for i in range(count)
+    ]
+
+
+def test_documents_are_indexed_in_order_with_one_dataset_query(mock_db, monkeypatch):
+    monkeypatch.setattr(dify_config, "INDEXING_DOCUMENT_WORKERS", 1)
+    runner = IndexingRunner()
+    calls = []
+    monkeypatch.setattr(
+        runner, "_run_document", lambda document, dataset, rule: calls.append((document.id, dataset.id, rule.id))
+    )
+    documents = _documents(3)
+
+    runner.run(documents)
+
+    assert calls == [(f"document-{i}", "dataset-id", "rule-id") for i in range(3)]
+    assert mock_db.session.query.call_count == 2
+
+
+def test_documents_are_indexed_concurrently_up_to_the_worker_count(mock_db, flask_app, monkeypatch):
+    monkeypatch.setattr(dify_config, "INDEXING_DOCUMENT_WORKERS", 3)
+    runner = IndexingRunner()
+    lock = threading.Lock()
+    running, max_running, done = 0, 0, []
+
+    def run_document(document, dataset, rule):
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+            done.append(document.id)
+        if document.id == "document-1":
+            raise DocumentIsPausedError("Document paused, document id: document-1")
+
+    monkeypatch.setattr(runner, "_run_document", run_document)
+
+    # a paused document is reported once the other documents are indexed
+    with pytest.raises(DocumentIsPausedError):
+        runner.run(_documents(9))
+
+    assert max_running == 3
+    assert sorted(done) == sorted(f"document-{i}" for i in range(9))
+
+
+def test_chunk_loads_are_bounded_across_documents(mock_db, flask_app, monkeypatch):
+    monkeypatch.setattr(dify_config, "INDEXING_PIPELINE_EMBEDDING_WORKERS", 3)
+    runner = IndexingRunner()
+    monkeypatch.setattr(runner, "_check_document_paused_status", lambda document_id: None)
+    lock = threading.Lock()
+    running, max_running = 0, 0
+
+    def load(dataset, documents, with_keywords):
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+
+    index_processor = MagicMock()
+    index_processor.load.side_effect = load
+
+    def process_chunks(document: MagicMock) -> None:
+        # the load threads of one document
+        threads = [
+            threading.Thread(
+                target=runner._process_chunk,
+                args=(flask_app, index_processor, [], MagicMock(), document, None),
+            )
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    documents = [threading.Thread(target=process_chunks, args=(document,)) for document in _documents(4)]
+    for document in documents:
+        document.start()
+    for document in documents:
+        document.join()
+
+    assert index_processor.load.call_count == 20
+    assert max_running == 3
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_benchmark_indexing_documents(benchmark, mock_db, flask_app, monkeypatch, workers):
+    monkeypatch.setattr(dify_config, "INDEXING_DOCUMENT_WORKERS", workers)
+    runner = IndexingRunner()
+    # indexing a document mostly waits for the storage, the embedding model and the vector store
+    monkeypatch.setattr(runner, "_run_document", lambda document, dataset, rule: time.sleep(0.01))
+    documents = _documents(16)
+
+    benchmark(runner.run, documents)
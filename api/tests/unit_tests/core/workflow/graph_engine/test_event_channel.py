@@ -0,0 +1,151 @@
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.workflow.entities.variable_pool import VariablePool
+from core.workflow.enums import SystemVariableKey
+from core.workflow.graph_engine.entities.event import (
+    GraphRunFailedEvent,
+    GraphRunSucceededEvent,
+    NodeRunSucceededEvent,
+    ParallelBranchRunSucceededEvent,
+)
+from core.workflow.graph_engine.entities.graph import Graph
+from core.workflow.graph_engine.graph_engine import GraphEngine, GraphEngineEventChannel, GraphEngineThreadPool
+from models.enums import UserFrom
+from models.workflow import WorkflowType
+
+BRANCH_COUNT = 50
+
+
+def _build_parallel_chatflow_config(branch_count: int) -> dict:
+    nodes = [{"id": "start", "data": {"type": "start", "title": "start"}}]
+    edges = []
+    for i in range(branch_count):
+        node_id = f"answer{i}"
+        nodes.append({"id": node_id, "data": {"type": "answer", "title": node_id, "answer": str(i)}})
+        edges.append({"id": f"start-{node_id}", "source": "start", "target": node_id})
+
+    return {"nodes": nodes, "edges": edges}
+
+
+def _create_graph_engine(graph_config: dict) -> GraphEngine:
+    return GraphEngine(
+        tenant_id="111",
+        app_id="222",
+        workflow_type=WorkflowType.CHAT,
+        workflow_id="333",
+        graph_config=graph_config,
+        user_id="444",
+        user_from=UserFrom.ACCOUNT,
+        invoke_from=InvokeFrom.WEB_APP,
+        call_depth=0,
+        graph=Graph.init(graph_config=graph_config),
+        variable_pool=VariablePool(
+            system_variables={SystemVariableKey.QUERY: "hi", SystemVariableKey.FILES: []},
+            user_inputs={},
+        ),
+        max_execution_steps=500,
+        max_execution_time=1200,
+    )
+
+
+def test_channel_yields_task_events_until_all_tasks_done():
+    channel = GraphEngineEventChannel()
+    thread_pool = GraphEngineThreadPool(max_workers=4, max_submit_count=100)
+
+    def task(q: GraphEngineEventChannel, index: int) -> None:
+        for step in range(3):
+            q.put((index, step))
+
+    for index in range(10):
+        channel.submit(thread_pool, task, q=channel, index=index)
+
+    events = list(channel.events())
+    channel.wait()
+
+    assert len(events) == 30
+    for index in range(10):
+        # events of one task keep their order
+        assert [step for i, step in events if i == index] == [0, 1, 2]
+
+
+def test_channel_raises_when_task_dies_without_reporting():
+    channel = GraphEngineEventChannel()
+    thread_pool = GraphEngineThreadPool(max_workers=2, max_submit_count=100)
+
+    def task(q: GraphEngineEventChannel) -> None:
+        q.put("before")
+        raise RuntimeError("worker crashed")
+
+    channel.submit(thread_pool, task, q=channel)
+
+    events = channel.events()
+    assert next(events) == "before"
+    with pytest.raises(RuntimeError, match="worker crashed"):
+        next(events)
+
+
+def test_thread_pool_submit_count_is_thread_safe():
+    thread_pool = GraphEngineThreadPool(max_workers=8, max_submit_count=10_000)
+    barrier = threading.Barrier(8)
+
+    def submit_many() -> None:
+        barrier.wait()
+        for _ in range(500):
+            thread_pool.submit(lambda: None)
+
+    submitters = [threading.Thread(target=submit_many) for _ in range(8)]
+    for submitter in submitters:
+        submitter.start()
+    for submitter in submitters:
+        submitter.join()
+
+    thread_pool.shutdown(wait=True)
+    assert thread_pool.submit_count == 0
+
+
+def test_thread_pool_rejected_submit_does_not_leak_count():
+    thread_pool = GraphEngineThreadPool(max_workers=1, max_submit_count=1)
+    release = threading.Event()
+    thread_pool.submit(release.wait)
+
+    with pytest.raises(ValueError, match="Max submit count"):
+        thread_pool.submit(lambda: None)
+
+    assert thread_pool.submit_count == 1
+    release.set()
+    thread_pool.shutdown(wait=True)
+    assert thread_pool.submit_count == 0
+
+
+@patch("extensions.ext_database.db.session.remove")
+@patch("extensions.ext_database.db.session.close")
+def test_run_fifty_parallel_branches(mock_close, mock_remove):
+    items = list(_create_graph_engine(_build_parallel_chatflow_config(BRANCH_COUNT)).run())
+
+    assert not any(isinstance(item, GraphRunFailedEvent) for item in items)
+    assert isinstance(items[-1], GraphRunSucceededEvent)
+    assert len([item for item in items if isinstance(item, ParallelBranchRunSucceededEvent)]) == BRANCH_COUNT
+    assert len([item for item in items if isinstance(item, NodeRunSucceededEvent)]) == BRANCH_COUNT + 1
+
+
+@patch("extensions.ext_database.db.session.remove")
+@patch("extensions.ext_database.db.session.close")
+def test_benchmark_fifty_parallel_branches_latency(mock_close, mock_remove, benchmark):
+    graph_config = _build_parallel_chatflow_config(BRANCH_COUNT)
+
+    def run_and_measure_tail() -> float:
+        """time between the last branch finishing and the graph run completing"""
+        last_branch_finished_at = 0.0
+        for item in _create_graph_engine(graph_config).run():
+            if isinstance(item, ParallelBranchRunSucceededEvent):
+                last_branch_finished_at = time.perf_counter()
+
+        return time.perf_counter() - last_branch_finished_at
+
+    tail_latency = benchmark(run_and_measure_tail)
+    assert tail_latency < 1
@@ -0,0 +1,198 @@
+import uuid
+from collections.abc import Generator
+from datetime import UTC, datetime
+
+from core.workflow.entities.variable_pool import VariablePool
+from core.workflow.graph_engine.entities.event import (
+    GraphEngineEvent,
+    NodeRunStartedEvent,
+    NodeRunStreamChunkEvent,
+    NodeRunSucceededEvent,
+)
+from core.workflow.graph_engine.entities.graph import CompiledGraphCache, Graph, GraphEdge, compiled_graph_cache
+from core.workflow.graph_engine.entities.runtime_route_state import RouteNodeState
+from core.workflow.nodes.answer.answer_stream_processor import AnswerStreamProcessor
+from core.workflow.nodes.enums import NodeType
+from core.workflow.nodes.start.entities import StartNodeData
+
+
+def _build_nested_parallel_graph_config(branches: int = 5, sub_branches: int = 2, chain_length: int = 14) -> dict:
+    """
+    start -> `branches` parallel branches, each branch forks into `sub_branches` nested parallel chains
+    which join again before the branch converges on the answer node.
+    """
+    nodes = [{"id": "start", "data": {"type": "start", "title": "start"}}]
+    edges = []
+
+    def add_node(node_id: str) -> None:
+        nodes.append({"id": node_id, "data": {"type": "code", "title": node_id}})
+
+    def add_edge(source: str, target: str) -> None:
+        edges.append({"id": f"{source}-{target}", "source": source, "target": target})
+
+    for b in range(branches):
+        fork_id = f"b{b}-fork"
+        join_id = f"b{b}-join"
+        add_node(fork_id)
+        add_node(join_id)
+        add_edge("start", fork_id)
+        for s in range(sub_branches):
+            previous = fork_id
+            for c in range(chain_length):
+                node_id = f"b{b}-s{s}-c{c}"
+                add_node(node_id)
+                add_edge(previous, node_id)
+                previous = node_id
+            add_edge(previous, join_id)
+        add_edge(join_id, "answer")
+
+    nodes.append({"id": "answer", "data": {"type": "answer", "title": "answer", "answer": "{{#start.query#}}"}})
+
+    # sub graph of an iteration, compiled with its own root node
+    nodes.append({"id": "iteration-start", "data": {"type": "iteration-start", "title": "iteration-start"}})
+    add_node("iteration-code")
+    add_edge("iteration-start", "iteration-code")
+    return {"nodes": nodes, "edges": edges}
+
+
+GRAPH_CONFIG = _build_nested_parallel_graph_config()
+
+FAIL_BRANCH_GRAPH_CONFIG = {
+    "nodes": [
+        {"id": "start", "data": {"type": "start", "title": "start"}},
+        {"id": "llm", "data": {"type": "llm", "title": "llm", "error_strategy": "fail-branch"}},
+        {"id": "answer", "data": {"type": "answer", "title": "answer", "answer": "{{#llm.text#}}"}},
+        {"id": "answer_fail", "data": {"type": "answer", "title": "answer_fail", "answer": "failed"}},
+    ],
+    "edges": [
+        {"id": "start-llm", "source": "start", "target": "llm"},
+        {"id": "llm-answer", "source": "llm", "sourceHandle": "source", "target": "answer"},
+        {"id": "llm-answer_fail", "source": "llm", "sourceHandle": "fail-branch", "target": "answer_fail"},
+    ],
+}
+
+
+def _publish_llm_stream_events(graph: Graph) -> Generator[GraphEngineEvent, None, None]:
+    mock_node_data = StartNodeData(**{"title": "demo", "variables": []})
+    for node_id in ("start", "llm"):
+        node_execution_id = str(uuid.uuid4())
+        node_type = NodeType(graph.node_id_config_mapping[node_id]["data"]["type"])
+        route_node_state = RouteNodeState(node_id=node_id, start_at=datetime.now(UTC).replace(tzinfo=None))
+        yield NodeRunStartedEvent(
+            id=node_execution_id,
+            node_id=node_id,
+            node_type=node_type,
+            node_data=mock_node_data,
+            route_node_state=route_node_state,
+        )
+        if node_id == "llm":
+            yield NodeRunStreamChunkEvent(
+                id=node_execution_id,
+                node_id=node_id,
+                node_type=node_type,
+                node_data=mock_node_data,
+                chunk_content="hello",
+                route_node_state=route_node_state,
+                from_variable_selector=[node_id, "text"],
+            )
+
+        route_node_state.status = RouteNodeState.Status.SUCCESS
+        route_node_state.finished_at = datetime.now(UTC).replace(tzinfo=None)
+        yield NodeRunSucceededEvent(
+            id=node_execution_id,
+            node_id=node_id,
+            node_type=node_type,
+            node_data=mock_node_data,
+            route_node_state=route_node_state,
+        )
+
+
+def test_benchmark_graph_has_150_nodes():
+    assert len(GRAPH_CONFIG["nodes"]) >= 150
+
+
+def test_cached_graph_matches_compiled_graph():
+    cache = CompiledGraphCache(capacity=8)
+    compiled = Graph.init(graph_config=GRAPH_CONFIG)
+    cached = cache.get_or_compile(cache_key="workflow-1:hash", graph_config=GRAPH_CONFIG)
+
+    assert cached.cache_key == "workflow-1:hash"
+    assert cached.node_ids == compiled.node_ids
+    assert cached.node_parallel_mapping.keys() == compiled.node_parallel_mapping.keys()
+    assert len(cached.parallel_mapping) == len(compiled.parallel_mapping)
+    assert cached.answer_stream_generate_routes == compiled.answer_stream_generate_routes
+    assert cached.end_stream_param == compiled.end_stream_param
+
+
+def test_cache_hit_returns_fork_sharing_compiled_structures():
+    cache = CompiledGraphCache(capacity=8)
+    first = cache.get_or_compile(cache_key="workflow-1:hash", graph_config=GRAPH_CONFIG)
+    second = cache.get_or_compile(cache_key="workflow-1:hash", graph_config=GRAPH_CONFIG)
+
+    assert len(cache) == 1
+    assert first is not second
+    assert first.parallel_mapping is second.parallel_mapping
+    assert first.node_id_config_mapping is second.node_id_config_mapping
+
+    # per run mutations must not leak into other runs
+    first.edge_mapping["answer"] = [GraphEdge(source_node_id="answer", target_node_id="start")]
+    first.node_ids.append("extra")
+    assert "answer" not in second.edge_mapping
+    assert "extra" not in second.node_ids
+
+
+def test_stream_processor_runs_do_not_mutate_cached_graph():
+    cache = CompiledGraphCache(capacity=8)
+
+    for _ in range(2):
+        graph = cache.get_or_compile(cache_key="fail-branch", graph_config=FAIL_BRANCH_GRAPH_CONFIG)
+        processor = AnswerStreamProcessor(graph=graph, variable_pool=VariablePool())
+        events = list(processor.process(_publish_llm_stream_events(graph)))
+
+        # the success branch answer streams the llm chunk once the dependency on llm is dropped
+        llm_chunks = [
+            event.chunk_content
+            for event in events
+            if isinstance(event, NodeRunStreamChunkEvent) and event.from_variable_selector == ["llm", "text"]
+        ]
+        assert llm_chunks == ["hello"]
+        assert graph.answer_stream_generate_routes.answer_dependencies["answer"] == []
+
+        cached = cache.get(cache_key="fail-branch")
+        assert cached is not None
+        assert cached.answer_stream_generate_routes.answer_dependencies == {"answer": ["llm"], "answer_fail": ["llm"]}
+
+
+def test_cache_is_keyed_by_root_node_and_bounded():
+    cache = CompiledGraphCache(capacity=2)
+    root_graph = cache.get_or_compile(cache_key="k1", graph_config=GRAPH_CONFIG)
+    sub_graph = cache.get_or_compile(cache_key="k1", graph_config=GRAPH_CONFIG, root_node_id="iteration-start")
+
+    assert root_graph.root_node_id == "start"
+    assert sub_graph.root_node_id == "iteration-start"
+    assert len(cache) == 2
+
+    cache.get_or_compile(cache_key="k2", graph_config=GRAPH_CONFIG)
+    assert len(cache) == 2
+    assert ("k1", None) not in cache
+    assert ("k1", "iteration-start") in cache
+    assert ("k2", None) in cache
+
+
+def test_init_without_cache_key_does_not_use_cache():
+    compiled_graph_cache.clear()
+    graph = Graph.init(graph_config=GRAPH_CONFIG)
+
+    assert graph.cache_key is None
+    assert len(compiled_graph_cache) == 0
+
+
+def test_benchmark_graph_init_uncached(benchmark):
+    benchmark(Graph.init, graph_config=GRAPH_CONFIG)
+
+
+def test_benchmark_graph_init_cached(benchmark):
+    compiled_graph_cache.clear()
+    Graph.init(graph_config=GRAPH_CONFIG, cache_key="benchmark")
+
+    benchmark(Graph.init, graph_config=GRAPH_CONFIG, cache_key="benchmark")
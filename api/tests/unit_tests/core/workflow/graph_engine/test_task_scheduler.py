@@ -0,0 +1,216 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from unittest.mock import patch
+
+from flask import Flask
+
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.workflow.entities.variable_pool import VariablePool
+from core.workflow.enums import SystemVariableKey
+from core.workflow.graph_engine.entities.event import GraphRunSucceededEvent
+from core.workflow.graph_engine.entities.graph import Graph
+from core.workflow.graph_engine.graph_engine import GraphEngine, GraphEngineThreadPool
+from core.workflow.graph_engine.task_scheduler import WorkflowTaskScheduler
+from core.workflow.nodes.answer.answer_node import AnswerNode
+from models.enums import UserFrom
+from models.workflow import WorkflowType
+
+
+class _RunningCounter:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+
+    def task(self, release: threading.Event) -> str:
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        release.wait(5)
+        with self.lock:
+            self.running -= 1
+        return threading.current_thread().name
+
+
+def test_group_max_workers_caps_running_tasks():
+    scheduler = WorkflowTaskScheduler(max_workers=10, tenant_max_workers=10, admission_timeout=5)
+    thread_pool = GraphEngineThreadPool(max_workers=2, tenant_id="tenant", scheduler=scheduler)
+    counter = _RunningCounter()
+    release = threading.Event()
+
+    futures = [thread_pool.submit(counter.task, release) for _ in range(2)]
+    assert scheduler.stats()["running"] == 2
+
+    # the third task is queued with its group and started once a slot is released
+    futures.append(thread_pool.submit(counter.task, release))
+    assert scheduler.stats()["queued"] == 1
+    release.set()
+    wait(futures)
+
+    assert counter.peak == 2
+    assert scheduler.stats()["inline"] == 0
+    assert scheduler.stats()["running"] == 0
+
+
+def test_group_tasks_beyond_the_cap_are_queued_without_blocking_the_submitter():
+    scheduler = WorkflowTaskScheduler(max_workers=50, tenant_max_workers=50, admission_timeout=5)
+    thread_pool = GraphEngineThreadPool(max_workers=10, tenant_id="tenant", scheduler=scheduler)
+    counter = _RunningCounter()
+    release = threading.Event()
+
+    started_at = time.monotonic()
+    futures = [thread_pool.submit(counter.task, release) for _ in range(100)]
+    assert time.monotonic() - started_at < 1
+    assert scheduler.stats()["queued"] == 90
+    release.set()
+    names = [future.result() for future in futures]
+
+    assert counter.peak == 10
+    assert scheduler.stats()["inline"] == 0
+    assert threading.current_thread().name not in names
+
+
+def test_queued_tasks_report_errors_and_skip_cancelled_tasks():
+    scheduler = WorkflowTaskScheduler(max_workers=10, tenant_max_workers=10, admission_timeout=0)
+    thread_pool = GraphEngineThreadPool(max_workers=1, tenant_id="tenant", scheduler=scheduler)
+    release = threading.Event()
+    counter = _RunningCounter()
+
+    blocking = thread_pool.submit(counter.task, release)
+    failing = thread_pool.submit(lambda: 1 / 0)
+    cancelled = thread_pool.submit(counter.task, release)
+    assert cancelled.cancel()
+    release.set()
+
+    assert isinstance(failing.exception(5), ZeroDivisionError)
+    wait([blocking])
+    assert scheduler.stats() | {"submitted": 0} == {
+        "max_workers": 10,
+        "running": 0,
+        "waiting": 0,
+        "queued": 0,
+        "active_tenants": 0,
+        "submitted": 0,
+        "inline": 0,
+    }
+
+
+def test_saturated_scheduler_runs_task_inline():
+    scheduler = WorkflowTaskScheduler(max_workers=1, tenant_max_workers=1, admission_timeout=0)
+    thread_pool = GraphEngineThreadPool(max_workers=10, tenant_id="tenant", scheduler=scheduler)
+    release = threading.Event()
+    counter = _RunningCounter()
+
+    blocking = thread_pool.submit(counter.task, release)
+    inline = thread_pool.submit(threading.current_thread)
+    release.set()
+
+    assert inline.done()
+    assert inline.result() is threading.current_thread()
+    assert scheduler.stats()["inline"] == 1
+    wait([blocking])
+
+
+def test_tenants_get_fair_share_of_workers():
+    scheduler = WorkflowTaskScheduler(max_workers=4, tenant_max_workers=4, admission_timeout=0)
+    release = threading.Event()
+    counter = _RunningCounter()
+    tenant_a = GraphEngineThreadPool(max_workers=10, tenant_id="a", scheduler=scheduler)
+    tenant_b = GraphEngineThreadPool(max_workers=10, tenant_id="b", scheduler=scheduler)
+
+    futures = [tenant_a.submit(counter.task, release) for _ in range(2)]
+    futures.append(tenant_b.submit(counter.task, release))
+
+    # two active tenants, tenant a already holds its share of 2 and waits for one of its slots
+    assert scheduler.tenant_quota() == 2
+    queued = tenant_a.submit(lambda: threading.current_thread().name)
+    assert scheduler.stats()["queued"] == 1
+    release.set()
+    assert queued.result(5).startswith("workflow-task")
+    wait(futures)
+
+
+def test_tasks_of_pool_tasks_are_not_held_back_by_the_tenant_cap():
+    scheduler = WorkflowTaskScheduler(max_workers=4, tenant_max_workers=1, admission_timeout=0)
+    parent_pool = GraphEngineThreadPool(max_workers=10, tenant_id="tenant", scheduler=scheduler)
+    child_pool = GraphEngineThreadPool(max_workers=10, tenant_id="tenant", scheduler=scheduler)
+
+    def parent() -> list[str]:
+        # the parent holds the only slot of its tenant while waiting for its children
+        children = [child_pool.submit(lambda: threading.current_thread().name) for _ in range(3)]
+        return [child.result(5) for child in children]
+
+    names = parent_pool.submit(parent).result(5)
+
+    assert all(name.startswith("workflow-task") for name in names)
+    assert scheduler.stats()["inline"] == 0
+
+
+def _build_sleeping_chatflow_config(branch_count: int) -> dict:
+    nodes = [{"id": "start", "data": {"type": "start", "title": "start"}}]
+    edges = []
+    for i in range(branch_count):
+        node_id = f"answer{i}"
+        nodes.append({"id": node_id, "data": {"type": "answer", "title": node_id, "answer": str(i)}})
+        edges.append({"id": f"start-{node_id}", "source": "start", "target": node_id})
+
+    return {"nodes": nodes, "edges": edges}
+
+
+def _run_workflow(app: Flask, tenant_id: str, graph_config: dict) -> list:
+    with app.app_context():
+        graph_engine = GraphEngine(
+            tenant_id=tenant_id,
+            app_id="app",
+            workflow_type=WorkflowType.CHAT,
+            workflow_id="workflow",
+            graph_config=graph_config,
+            user_id="user",
+            user_from=UserFrom.ACCOUNT,
+            invoke_from=InvokeFrom.WEB_APP,
+            call_depth=0,
+            graph=Graph.init(graph_config=graph_config),
+            variable_pool=VariablePool(
+                system_variables={SystemVariableKey.QUERY: "hi", SystemVariableKey.FILES: []},
+                user_inputs={},
+            ),
+            max_execution_steps=500,
+            max_execution_time=1200,
+        )
+        return list(graph_engine.run())
+
+
+@patch("extensions.ext_database.db.session.remove")
+@patch("extensions.ext_database.db.session.close")
+def test_load_many_concurrent_workflows_with_sleeping_nodes(mock_close, mock_remove, app):
+    run_count = 40
+    scheduler = WorkflowTaskScheduler(max_workers=16, tenant_max_workers=8, admission_timeout=0.05)
+    graph_config = _build_sleeping_chatflow_config(branch_count=8)
+    original_run = AnswerNode._run
+
+    def sleeping_run(self):
+        time.sleep(0.01)
+        return original_run(self)
+
+    threads_before = threading.active_count()
+    peak_threads = threads_before
+    with (
+        patch("core.workflow.graph_engine.graph_engine.workflow_task_scheduler", scheduler),
+        patch.object(AnswerNode, "_run", new=sleeping_run),
+        ThreadPoolExecutor(max_workers=run_count) as runs,
+    ):
+        futures = [runs.submit(_run_workflow, app, f"tenant-{index % 4}", graph_config) for index in range(run_count)]
+        while not all(future.done() for future in futures):
+            peak_threads = max(peak_threads, threading.active_count())
+            time.sleep(0.005)
+
+        results = [future.result() for future in futures]
+
+    assert all(isinstance(events[-1], GraphRunSucceededEvent) for events in results)
+    # one thread per run driving it, plus the bounded shared workers
+    assert peak_threads - threads_before <= run_count + scheduler.max_workers
+    stats = scheduler.stats()
+    assert stats["running"] == 0
+    assert stats["waiting"] == 0
+    assert stats["submitted"] == run_count * 8
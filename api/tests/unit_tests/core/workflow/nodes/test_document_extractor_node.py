@@ -1,11 +1,13 @@
 import io
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
 
 import pandas as pd
 import pytest
 from docx.oxml.text.paragraph import CT_P
 
+from configs import dify_config
 from core.file import File, FileTransferMethod
+from core.rag.extractor.extraction_pool import shutdown_extraction_pool
 from core.variables import ArrayFileSegment
 from core.variables.segments import ArrayStringSegment
 from core.variables.variables import StringVariable
@@ -15,8 +17,10 @@ from core.workflow.nodes.document_extractor import DocumentExtractorNode, Docume
 from core.workflow.nodes.document_extractor.node import (
     _extract_text_from_docx,
     _extract_text_from_excel,
+    _extract_text_from_files,
     _extract_text_from_pdf,
     _extract_text_from_plain_text,
+    _get_pdf_page_ranges,
 )
 from core.workflow.nodes.enums import NodeType
 
@@ -365,3 +369,111 @@ def test_extract_text_from_excel_numeric_type_column(mock_excel_file):
     expected_manual = "| 1.0 | 1.1 |\n| --- | --- |\n| Test | Test |\n\n"
 
     assert expected_manual == result
+
+
+def _make_pdf(page_count: int) -> bytes:
+    """build a PDF with the text "page <i>" on each page"""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for i in range(page_count):
+        stream = f"BT /F1 12 Tf 72 720 Td (page {i}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {page_count} >>"
+
+    pdf = io.BytesIO()
+    pdf.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(pdf.tell())
+        pdf.write(f"{number} 0 obj\n{obj}\nendobj\n".encode())
+    xref = pdf.tell()
+    pdf.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        pdf.write(f"{offset:010d} 00000 n \n".encode())
+    pdf.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return pdf.getvalue()
+
+
+def _mock_file(content: bytes, extension: str) -> Mock:
+    file = Mock(spec=File)
+    file.filename = f"file{extension}"
+    file.extension = extension
+    file.mime_type = None
+    file.transfer_method = FileTransferMethod.LOCAL_FILE
+    file.content = content
+    return file
+
+
+@pytest.fixture
+def cache_storage(monkeypatch):
+    files: dict[str, bytes] = {}
+
+    storage = MagicMock()
+    storage.exists.side_effect = files.__contains__
+    # backends such as S3 raise their own error for a missing object
+    storage.load_once.side_effect = lambda filename: files[filename]
+    storage.save.side_effect = files.__setitem__
+    monkeypatch.setattr("core.workflow.nodes.document_extractor.node.storage", storage)
+    monkeypatch.setattr("core.workflow.nodes.document_extractor.node._download_file_content", lambda file: file.content)
+    return files
+
+
+def test_extracted_text_is_cached_by_content(cache_storage, monkeypatch, caplog):
+    monkeypatch.setattr(dify_config, "ETL_PROCESS_POOL_MAX_WORKERS", 0)
+    monkeypatch.setattr(dify_config, "DOCUMENT_EXTRACTOR_CACHE_ENABLED", True)
+    files = [_mock_file(b"hello", ".txt"), _mock_file(b"hello", ".txt"), _mock_file(b"world", ".md")]
+
+    with patch(
+        "core.workflow.nodes.document_extractor.node._extract_text_from_plain_text",
+        side_effect=lambda content: content.decode(),
+    ) as extract:
+        assert _extract_text_from_files(files) == ["hello", "hello", "world"]
+        assert _extract_text_from_files(files) == ["hello", "hello", "world"]
+
+    assert extract.call_count == 2
+    assert len(cache_storage) == 2
+    # a missing text is a plain cache miss
+    assert not caplog.records
+
+
+def test_extracted_text_is_not_cached_by_default(cache_storage, monkeypatch):
+    monkeypatch.setattr(dify_config, "ETL_PROCESS_POOL_MAX_WORKERS", 0)
+
+    assert _extract_text_from_files([_mock_file(b"hello", ".txt")]) == ["hello"]
+    assert not cache_storage
+
+
+def test_extract_text_in_the_extraction_pool(cache_storage, monkeypatch):
+    monkeypatch.setattr(dify_config, "ETL_PROCESS_POOL_MAX_WORKERS", 2)
+    monkeypatch.setattr(dify_config, "ETL_PDF_PAGES_PER_TASK", 2)
+    monkeypatch.setattr(dify_config, "DOCUMENT_EXTRACTOR_CACHE_ENABLED", True)
+    files = [_mock_file(_make_pdf(5), ".pdf"), _mock_file(b"hello", ".txt")]
+
+    try:
+        assert _extract_text_from_files(files) == ["page 0page 1page 2page 3page 4", "hello"]
+        assert _get_pdf_page_ranges(files[0], files[0].content) == [(0, 2), (2, 4), (4, 5)]
+    finally:
+        shutdown_extraction_pool()
+    assert len(cache_storage) == 2
+
+
+def test_benchmark_cached_extraction(benchmark, cache_storage, monkeypatch):
+    monkeypatch.setattr(dify_config, "ETL_PROCESS_POOL_MAX_WORKERS", 0)
+    monkeypatch.setattr(dify_config, "DOCUMENT_EXTRACTOR_CACHE_ENABLED", True)
+    files = [_mock_file(_make_pdf(20), ".pdf") for _ in range(10)]
+    _extract_text_from_files(files)
+
+    with patch("core.workflow.nodes.document_extractor.node._extract_text_from_pdf") as extract:
+        texts = benchmark(_extract_text_from_files, files)
+
+    extract.assert_not_called()
+    assert texts[0].startswith("page 0page 1")
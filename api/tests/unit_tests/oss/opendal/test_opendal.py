@@ -1,5 +1,7 @@
+import io
 from collections.abc import Generator
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
@@ -83,3 +85,74 @@ class TestOpenDAL:
 
         self.storage.delete(filename)
         assert not self.storage.exists(filename)
+
+    def test_save_stream(self):
+        """Test saving a stream."""
+        filename = "stream.txt"
+        data = b"0123456789" * 1000
+
+        with patch("extensions.storage.opendal_storage.dify_config.STORAGE_MULTIPART_CHUNK_SIZE", 1024):
+            self.storage.save_stream(filename, io.BytesIO(data))
+
+        assert self.storage.load_once(filename) == data
+        self.storage.delete(filename)
+
+    def test_open_writer(self):
+        """Test writing a file incrementally."""
+        filename = "writer.txt"
+
+        with self.storage.open_writer(filename) as writer:
+            writer.write(b"hello ")
+            writer.write(b"world")
+
+        assert self.storage.load_once(filename) == b"hello world"
+        self.storage.delete(filename)
+
+    def test_open_writer_discards_partial_file_on_error(self):
+        """Test a failed write does not leave a partial file."""
+        filename = "partial.txt"
+
+        def write_partial():
+            with self.storage.open_writer(filename) as writer:
+                writer.write(b"partial")
+                raise ValueError("upstream failed")
+
+        with pytest.raises(ValueError):
+            write_partial()
+
+        assert not self.storage.exists(filename)
+
+    def test_load_stream_chunk_size(self):
+        """Test streamed reads use the configured chunk size."""
+        filename = "chunks.txt"
+        self.storage.save(filename, b"x" * 10)
+
+        with patch("extensions.storage.opendal_storage.dify_config.STORAGE_READ_CHUNK_SIZE", 4):
+            chunks = list(self.storage.load_stream(filename))
+
+        assert chunks == [b"xxxx", b"xxxx", b"xx"]
+        self.storage.delete(filename)
+
+    def test_load_range(self):
+        """Test loading a byte range."""
+        filename = "range.txt"
+        self.storage.save(filename, b"0123456789")
+
+        assert self.storage.load_range(filename, 2, 3) == b"234"
+        assert self.storage.load_range(filename, 7) == b"789"
+        self.storage.delete(filename)
+
+    @pytest.mark.parametrize(
+        "read",
+        [
+            lambda storage: storage.load_once("missing.txt"),
+            lambda storage: list(storage.load_stream("missing.txt")),
+            lambda storage: storage.load_range("missing.txt", 0, 1),
+            lambda storage: storage.download("missing.txt", str(Path(get_opendal_bucket()) / "missing-target.txt")),
+        ],
+    )
+    def test_reads_map_not_found_without_exists_check(self, read):
+        """Test reads of a missing file raise FileNotFoundError without an exists round-trip."""
+        with patch.object(self.storage, "exists", side_effect=AssertionError("unexpected exists check")):
+            with pytest.raises(FileNotFoundError):
+                read(self.storage)
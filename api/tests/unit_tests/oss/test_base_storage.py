@@ -0,0 +1,74 @@
+import io
+from collections.abc import Generator
+
+import pytest
+
+from extensions.storage.base_storage import BaseStorage
+
+
+class InMemoryStorage(BaseStorage):
+    """storage implementing only the abstract methods, to exercise the default implementations"""
+
+    def __init__(self):
+        self.files: dict[str, bytes] = {}
+
+    def save(self, filename, data):
+        self.files[filename] = data
+
+    def load_once(self, filename: str) -> bytes:
+        if filename not in self.files:
+            raise FileNotFoundError("File not found")
+        return self.files[filename]
+
+    def load_stream(self, filename: str) -> Generator:
+        yield self.load_once(filename)
+
+    def download(self, filename, target_filepath):
+        raise NotImplementedError
+
+    def exists(self, filename):
+        return filename in self.files
+
+    def delete(self, filename):
+        self.files.pop(filename, None)
+
+
+def test_default_save_stream():
+    storage = InMemoryStorage()
+
+    storage.save_stream("file.txt", io.BytesIO(b"streamed"))
+
+    assert storage.files["file.txt"] == b"streamed"
+
+
+def test_default_open_writer_saves_on_exit():
+    storage = InMemoryStorage()
+
+    with storage.open_writer("file.txt") as writer:
+        writer.write(b"written ")
+        writer.write(b"in parts")
+        assert "file.txt" not in storage.files
+
+    assert storage.files["file.txt"] == b"written in parts"
+
+
+def test_default_open_writer_does_not_save_on_error():
+    storage = InMemoryStorage()
+
+    def write_partial():
+        with storage.open_writer("file.txt") as writer:
+            writer.write(b"partial")
+            raise ValueError("upstream failed")
+
+    with pytest.raises(ValueError):
+        write_partial()
+
+    assert "file.txt" not in storage.files
+
+
+def test_default_load_range():
+    storage = InMemoryStorage()
+    storage.save("file.txt", b"0123456789")
+
+    assert storage.load_range("file.txt", 3, 4) == b"3456"
+    assert storage.load_range("file.txt", 8) == b"89"
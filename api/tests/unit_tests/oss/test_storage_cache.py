@@ -0,0 +1,120 @@
+import base64
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+from extensions.storage.storage_cache import StorageCache
+
+
+@pytest.fixture
+def storage():
+    files = {f"upload_files/{i}.png": bytes([i]) * 100 for i in range(10)}
+    storage = MagicMock()
+    storage.load_once.side_effect = lambda filename: files[filename]
+
+    def download(filename, target_filepath):
+        with open(target_filepath, "wb") as file:
+            file.write(files[filename])
+
+    storage.download.side_effect = download
+    return storage
+
+
+def _cache(storage, tmp_path, max_size=10_000, memory_max_size=1_000, memory_max_object_size=500) -> StorageCache:
+    return StorageCache(
+        storage,
+        directory=str(tmp_path / "cache"),
+        max_size=max_size,
+        memory_max_size=memory_max_size,
+        memory_max_object_size=memory_max_object_size,
+    )
+
+
+def test_load_reads_through_memory_and_disk(storage, tmp_path):
+    cache = _cache(storage, tmp_path)
+
+    assert cache.load("upload_files/1.png", "1") == b"\x01" * 100
+    assert cache.load("upload_files/1.png", "1") == b"\x01" * 100
+    # another process of the host only shares the disk tier
+    other = _cache(storage, tmp_path)
+    assert other.load("upload_files/1.png", "1") == b"\x01" * 100
+
+    assert storage.load_once.call_count == 1
+    assert (cache.stats.misses, cache.stats.memory_hits) == (1, 1)
+    assert other.stats.disk_hits == 1
+    assert cache.stats.hit_rate == 0.5
+
+
+def test_new_version_is_loaded_from_storage(storage, tmp_path):
+    cache = _cache(storage, tmp_path)
+
+    cache.load("upload_files/1.png", "1")
+    cache.load("upload_files/1.png", "2")
+
+    assert storage.load_once.call_count == 2
+
+
+def test_base64_is_memoized(storage, tmp_path):
+    cache = _cache(storage, tmp_path)
+
+    encoded = [cache.load_base64("upload_files/2.png", "2") for _ in range(3)]
+
+    assert encoded == [base64.b64encode(b"\x02" * 100).decode()] * 3
+    assert storage.load_once.call_count == 1
+    assert cache.stats.memory_hits == 2
+
+
+def test_large_objects_are_only_cached_on_disk(storage, tmp_path):
+    cache = _cache(storage, tmp_path, memory_max_object_size=50)
+
+    cache.load("upload_files/3.png", "3")
+    cache.load("upload_files/3.png", "3")
+
+    assert cache.stats.disk_hits == 1
+    assert storage.load_once.call_count == 1
+
+
+def test_least_recently_used_files_are_evicted(storage, tmp_path):
+    cache = _cache(storage, tmp_path, max_size=450, memory_max_size=0)
+
+    for i in range(4):
+        cache.load(f"upload_files/{i}.png", str(i))
+    os.utime(cache._cache_path("upload_files/0.png", "0"), (0, 0))
+    os.utime(cache._cache_path("upload_files/1.png", "1"), (1, 1))
+    cache.load("upload_files/4.png", "4")
+
+    assert cache.stats.evictions == 1
+    assert not cache._cache_path("upload_files/0.png", "0").exists()
+    assert cache._cache_path("upload_files/1.png", "1").exists()
+    assert sum(path.stat().st_size for path in (tmp_path / "cache").glob("*/*")) <= 450
+
+
+def test_download_is_copied_from_disk(storage, tmp_path):
+    cache = _cache(storage, tmp_path)
+
+    for target in ("a.png", "b.png"):
+        cache.download("upload_files/5.png", "5", str(tmp_path / target))
+
+    assert storage.download.call_count == 1
+    assert (tmp_path / "b.png").read_bytes() == b"\x05" * 100
+
+
+def test_disabled_cache_reads_storage(storage, tmp_path):
+    cache = _cache(storage, tmp_path, max_size=0)
+
+    cache.load("upload_files/1.png", "1")
+    cache.load_base64("upload_files/1.png", "1")
+
+    assert storage.load_once.call_count == 2
+    assert not (tmp_path / "cache").exists()
+
+
+def test_benchmark_history_image_encoding(benchmark, storage, tmp_path):
+    cache = _cache(storage, tmp_path)
+
+    def encode_history():
+        return [cache.load_base64(f"upload_files/{i}.png", str(i)) for i in range(10)]
+
+    assert len(benchmark(encode_history)) == 10
+    assert storage.load_once.call_count == 10
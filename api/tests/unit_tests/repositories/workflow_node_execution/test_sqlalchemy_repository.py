@@ -11,8 +11,10 @@ import pytest
 from pytest_mock import MockerFixture
 from sqlalchemy.orm import Session, sessionmaker
 
+from core.app.entities.task_entities import NodeFinishStreamResponse
 from core.model_runtime.utils.encoders import jsonable_encoder
 from core.repositories import SQLAlchemyWorkflowNodeExecutionRepository
+from core.variables.segments import ArrayAnySegment, ArrayStringSegment
 from core.workflow.entities.workflow_node_execution import (
     WorkflowNodeExecution,
     WorkflowNodeExecutionMetadataKey,
@@ -20,6 +22,8 @@ from core.workflow.entities.workflow_node_execution import (
 )
 from core.workflow.nodes.enums import NodeType
 from core.workflow.repositories.workflow_node_execution_repository import OrderConfig
+from core.workflow.workflow_type_encoder import WorkflowRuntimeTypeConverter
+from libs.jsonutil import dumps_json
 from models.account import Account, Tenant
 from models.workflow import WorkflowNodeExecutionModel, WorkflowNodeExecutionTriggeredFrom
 
@@ -400,3 +404,67 @@ def test_to_domain_model(repository):
     assert domain_model.metadata == metadata_dict
     assert domain_model.created_at == db_model.created_at
     assert domain_model.finished_at == db_model.finished_at
+
+
+def _execution_with_outputs(outputs: dict) -> WorkflowNodeExecution:
+    return WorkflowNodeExecution(
+        id="test-id",
+        workflow_id="test-workflow-id",
+        workflow_execution_id="test-workflow-run-id",
+        index=1,
+        node_id="test-node-id",
+        node_type=NodeType.ITERATION,
+        title="Test Node",
+        inputs={"items": ArrayStringSegment(value=["a", "b"])},
+        outputs=outputs,
+        status=WorkflowNodeExecutionStatus.SUCCEEDED,
+        created_at=datetime.now(),
+        finished_at=datetime.now(),
+    )
+
+
+def test_to_db_model_encodes_outputs_once(repository, mocker: MockerFixture):
+    domain_model = _execution_with_outputs({"output": ArrayStringSegment(value=["ünïcode", "text"])})
+    to_json_encodable = mocker.spy(WorkflowRuntimeTypeConverter, "to_json_encodable")
+
+    db_model = repository.to_db_model(domain_model)
+    repository.to_db_model(domain_model)
+
+    assert db_model.inputs_dict == {"items": ["a", "b"]}
+    assert db_model.outputs_dict == {"output": ["ünïcode", "text"]}
+    # the stream response reuses the conversion of the repository
+    assert domain_model.get_encoded_payload("outputs").data == {"output": ["ünïcode", "text"]}
+    assert to_json_encodable.call_count == 2
+
+    domain_model.update_from_mapping(outputs={"output": ArrayStringSegment(value=["changed"])})
+    assert repository.to_db_model(domain_model).outputs_dict == {"output": ["changed"]}
+
+
+def test_benchmark_large_iteration_output(benchmark, repository):
+    # about 5MB of JSON, as collected by an iteration node
+    output = [{"index": i, "text": "lorem ipsum dolor sit amet " * 6, "score": i / 7} for i in range(25000)]
+
+    def persist_and_stream():
+        domain_model = _execution_with_outputs({"output": ArrayAnySegment(value=output)})
+        db_model = repository.to_db_model(domain_model)
+        response = NodeFinishStreamResponse(
+            task_id="test-task-id",
+            workflow_run_id="test-workflow-run-id",
+            data=NodeFinishStreamResponse.Data(
+                id=domain_model.id,
+                node_id=domain_model.node_id,
+                node_type=domain_model.node_type,
+                index=domain_model.index,
+                title=domain_model.title,
+                outputs=domain_model.get_encoded_payload("outputs").data,
+                status=domain_model.status,
+                elapsed_time=domain_model.elapsed_time,
+                created_at=0,
+                finished_at=0,
+            ),
+        )
+        return len(db_model.outputs), len(dumps_json(response.to_dict()))
+
+    persisted_size, streamed_size = benchmark(persist_and_stream)
+    assert persisted_size > 5_000_000
+    assert streamed_size > persisted_size
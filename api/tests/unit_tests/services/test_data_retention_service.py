@@ -0,0 +1,200 @@
+import datetime
+import time
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from models.types import StringUUID
+from services import data_retention_service
+from services.data_retention_service import (
+    EMBEDDING_RETENTION,
+    MESSAGE_RETENTION,
+    WORKFLOW_RUN_RETENTION,
+    DataRetentionService,
+)
+
+# only the columns the retention reads, the model tables have postgres server defaults
+_SCHEMA = [
+    "CREATE TABLE apps (id VARCHAR PRIMARY KEY, tenant_id VARCHAR)",
+    "CREATE TABLE messages (id VARCHAR PRIMARY KEY, app_id VARCHAR, created_at DATETIME)",
+    "CREATE INDEX message_created_at_idx ON messages (created_at)",
+    *[
+        f"CREATE TABLE {table} (id VARCHAR PRIMARY KEY, message_id VARCHAR)"
+        for table in [
+            "message_feedbacks",
+            "message_annotations",
+            "message_chains",
+            "message_agent_thoughts",
+            "message_files",
+            "saved_messages",
+        ]
+    ],
+    "CREATE INDEX message_file_message_idx ON message_files (message_id)",
+    "CREATE TABLE workflow_runs (id VARCHAR PRIMARY KEY, tenant_id VARCHAR, created_at DATETIME)",
+    "CREATE TABLE workflow_node_executions (id VARCHAR PRIMARY KEY, workflow_run_id VARCHAR)",
+    "CREATE TABLE workflow_app_logs (id VARCHAR PRIMARY KEY, workflow_run_id VARCHAR)",
+    "CREATE TABLE embeddings (id VARCHAR PRIMARY KEY, created_at DATETIME)",
+]
+
+_NOW = datetime.datetime(2025, 6, 1)
+
+
+def _created_at(days_ago: int) -> str:
+    # formatted as sqlalchemy stores datetimes in sqlite, compared as strings
+    return (_NOW - datetime.timedelta(days=days_ago)).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, bytes] = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = _FakeRedis()
+    redis.data["features:sandbox-tenant"] = b"sandbox"
+    redis.data["features:team-tenant"] = b"team"
+    monkeypatch.setattr(data_retention_service, "redis_client", redis)
+    return redis
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    # sqlite stands in for postgres, uuids are bound as strings as they are with postgres
+    monkeypatch.setattr(StringUUID, "process_bind_param", lambda self, value, dialect: value and str(value))
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        for statement in _SCHEMA:
+            conn.execute(text(statement))
+        conn.execute(
+            text("INSERT INTO apps VALUES ('sandbox-app', 'sandbox-tenant'), ('team-app', 'team-tenant')"),
+        )
+    return engine
+
+
+def _insert_messages(engine, app_id: str, count: int, days_ago: int) -> list[str]:
+    ids = [str(uuid.uuid4()) for _ in range(count)]
+    created_at = _created_at(days_ago)
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO messages VALUES (:id, :app_id, :created_at)"),
+            [{"id": id_, "app_id": app_id, "created_at": created_at} for id_ in ids],
+        )
+        for table in ["message_feedbacks", "message_files"]:
+            conn.execute(
+                text(f"INSERT INTO {table} VALUES (:id, :message_id)"),
+                [{"id": str(uuid.uuid4()), "message_id": id_} for id_ in ids],
+            )
+    return ids
+
+
+def _count(engine, table: str) -> int:
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT count(*) FROM {table}")).scalar_one()
+
+
+def _clean(engine, target, **kwargs) -> int:
+    kwargs = {"batch_size": 7, "batch_interval": 0, "max_runtime": 0, **kwargs}
+    return DataRetentionService(engine).clean(target, _NOW - datetime.timedelta(days=30), **kwargs)
+
+
+def test_expired_sandbox_messages_are_deleted_with_their_related_rows(engine, redis):
+    _insert_messages(engine, "sandbox-app", 20, days_ago=40)
+    _insert_messages(engine, "team-app", 5, days_ago=40)
+    _insert_messages(engine, "missing-app", 3, days_ago=40)
+    kept = _insert_messages(engine, "sandbox-app", 4, days_ago=10)
+
+    assert _clean(engine, MESSAGE_RETENTION) == 20
+
+    assert _count(engine, "messages") == 12
+    assert _count(engine, "message_feedbacks") == 12
+    assert _count(engine, "message_files") == 12
+    with engine.connect() as conn:
+        sandbox_ids = conn.execute(text("SELECT id FROM messages WHERE app_id = 'sandbox-app'")).scalars().all()
+    assert sorted(sandbox_ids) == sorted(kept)
+    assert not redis.data.get("data_retention_cursor:messages")
+
+
+def test_stopped_run_is_resumed_from_its_cursor(engine, redis, monkeypatch):
+    _insert_messages(engine, "sandbox-app", 30, days_ago=40)
+    monotonic = iter(range(100))
+    monkeypatch.setattr(
+        data_retention_service, "time", SimpleNamespace(perf_counter=lambda: next(monotonic), sleep=time.sleep)
+    )
+
+    # stops after the second batch
+    assert _clean(engine, MESSAGE_RETENTION, max_runtime=2) == 14
+    assert redis.data["data_retention_cursor:messages"]
+
+    _insert_messages(engine, "sandbox-app", 3, days_ago=50)
+    # rows before the cursor are left to the next full run
+    assert _clean(engine, MESSAGE_RETENTION) == 16
+    assert "data_retention_cursor:messages" not in redis.data
+    assert _clean(engine, MESSAGE_RETENTION) == 3
+    assert _count(engine, "messages") == 0
+
+
+def test_expired_workflow_runs_and_embeddings_are_deleted(engine, redis):
+    expired = _created_at(40)
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO workflow_runs VALUES (:id, :tenant_id, :created_at)"),
+            [
+                {"id": f"run-{i}", "tenant_id": "sandbox-tenant" if i % 2 else "team-tenant", "created_at": expired}
+                for i in range(10)
+            ],
+        )
+        conn.execute(
+            text("INSERT INTO workflow_node_executions VALUES (:id, :run_id)"),
+            [{"id": f"node-{i}-{j}", "run_id": f"run-{i}"} for i in range(10) for j in range(3)],
+        )
+        conn.execute(
+            text("INSERT INTO embeddings VALUES (:id, :created_at)"),
+            [{"id": f"embedding-{i}", "created_at": expired if i < 8 else _created_at(0)} for i in range(10)],
+        )
+
+    assert _clean(engine, WORKFLOW_RUN_RETENTION) == 5
+    assert _count(engine, "workflow_node_executions") == 15
+    assert _clean(engine, EMBEDDING_RETENTION) == 8
+    assert _count(engine, "embeddings") == 2
+
+
+def test_tenant_plans_are_resolved_once_per_batch(engine, redis, monkeypatch):
+    get_features = MagicMock()
+    get_features.return_value.billing.subscription.plan = "sandbox"
+    monkeypatch.setattr(data_retention_service.FeatureService, "get_features", get_features)
+    del redis.data["features:sandbox-tenant"]
+    _insert_messages(engine, "sandbox-app", 20, days_ago=40)
+
+    assert _clean(engine, MESSAGE_RETENTION, batch_size=10) == 20
+    get_features.assert_called_once_with("sandbox-tenant")
+    assert redis.data["features:sandbox-tenant"] == b"sandbox"
+
+
+def test_benchmark_message_retention(benchmark, engine, redis):
+    def setup():
+        with engine.begin() as conn:
+            for table in ["messages", "message_feedbacks", "message_files"]:
+                conn.execute(text(f"DELETE FROM {table}"))
+        _insert_messages(engine, "sandbox-app", 9000, days_ago=40)
+        _insert_messages(engine, "team-app", 1000, days_ago=40)
+
+    deleted = benchmark.pedantic(_clean, args=(engine, MESSAGE_RETENTION), kwargs={"batch_size": 1000}, setup=setup)
+
+    assert deleted == 9000
+    assert _count(engine, "messages") == 1000
@@ -0,0 +1,137 @@
+import json
+from collections import namedtuple
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask_restful import marshal
+
+from fields.dataset_fields import dataset_detail_fields
+from fields.document_fields import document_with_segments_fields
+from models.dataset import Dataset, Document
+from models.model import Tag
+from services.dataset_statistics_service import DatasetStatisticsService
+
+DocumentStatistics = namedtuple(
+    "DocumentStatistics", ["dataset_id", "document_count", "available_document_count", "word_count", "doc_form"]
+)
+SegmentStatistics = namedtuple(
+    "SegmentStatistics", ["document_id", "segment_count", "hit_count", "total_segments", "completed_segments"]
+)
+
+
+class _CountingSession:
+    """fake session returning canned rows by the table of the first selected column, counting the queries"""
+
+    def __init__(self, rows_by_table: dict[str, list]) -> None:
+        self.rows_by_table = rows_by_table
+        self.query_count = 0
+
+    def _result(self, statement) -> MagicMock:
+        self.query_count += 1
+        table = statement.column_descriptions[0]["entity"].__tablename__
+        result = MagicMock()
+        result.all.return_value = self.rows_by_table.get(table, [])
+        return result
+
+    def execute(self, statement) -> MagicMock:
+        return self._result(statement)
+
+    def scalars(self, statement) -> MagicMock:
+        return self._result(statement)
+
+    def query(self, *args, **kwargs):
+        raise AssertionError("listing statistics must not be queried row by row")
+
+    def get(self, *args, **kwargs):
+        raise AssertionError("listing statistics must not be queried row by row")
+
+
+def _datasets(count: int) -> list[Dataset]:
+    return [
+        Dataset(
+            id=f"dataset-{i}",
+            tenant_id="tenant",
+            name=f"dataset {i}",
+            provider="vendor",
+            permission="only_me",
+            indexing_technique="high_quality",
+            built_in_field_enabled=False,
+        )
+        for i in range(count)
+    ]
+
+
+def _documents(count: int) -> list[Document]:
+    return [
+        Document(
+            id=f"document-{i}",
+            dataset_id="dataset",
+            name=f"document {i}",
+            data_source_type="upload_file",
+            data_source_info=json.dumps({"upload_file_id": f"file-{i}"}),
+            dataset_process_rule_id="rule",
+            doc_metadata=None,
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("page_size", [1, 20, 100])
+def test_dataset_page_costs_constant_query_count(page_size):
+    datasets = _datasets(page_size)
+    tag = Tag(id="tag", tenant_id="tenant", type="knowledge", name="tag")
+    session = _CountingSession(
+        {
+            "app_dataset_joins": [("dataset-0", 3)],
+            "documents": [DocumentStatistics("dataset-0", 5, 4, 1200, "text_model")],
+            "document_segments": [("dataset-0", 42)],
+            "tag_bindings": [("dataset-0", "tenant", tag)],
+        }
+    )
+
+    with patch("services.dataset_statistics_service.db.session", session):
+        DatasetStatisticsService.preload_datasets(datasets)
+        data = marshal(datasets, dataset_detail_fields)
+
+    # app counts, document statistics, segment counts, tags and metadata, whatever the page size
+    assert session.query_count == 5
+    assert data[0]["app_count"] == 3
+    assert data[0]["document_count"] == 5
+    assert data[0]["word_count"] == 1200
+    assert data[0]["doc_form"] == "text_model"
+    assert data[0]["tags"] == [{"id": "tag", "name": "tag", "type": "knowledge"}]
+    assert datasets[0].available_document_count == 4
+    assert datasets[0].available_segment_count == 42
+    assert data[-1]["document_count"] == (5 if page_size == 1 else 0)
+
+
+@pytest.mark.parametrize("page_size", [1, 20, 100])
+def test_document_page_costs_constant_query_count(page_size):
+    documents = _documents(page_size)
+    upload_file = MagicMock(id="file-0", extension="pdf", mime_type="application/pdf", created_by="user")
+    upload_file.name = "file.pdf"
+    upload_file.size = 1024
+    upload_file.created_at.timestamp.return_value = 0
+    process_rule = MagicMock(id="rule")
+    process_rule.to_dict.return_value = {"mode": "automatic"}
+    session = _CountingSession(
+        {
+            "document_segments": [SegmentStatistics("document-0", 10, 7, 9, 8)],
+            "upload_files": [upload_file],
+            "dataset_process_rules": [process_rule],
+        }
+    )
+
+    with patch("services.dataset_statistics_service.db.session", session):
+        DatasetStatisticsService.preload_documents(documents, with_segment_progress=True)
+        data = marshal(documents, document_with_segments_fields)
+
+    # segment statistics, upload files and process rules, whatever the page size
+    assert session.query_count == 3
+    assert data[0]["hit_count"] == 7
+    assert data[0]["completed_segments"] == 8
+    assert data[0]["total_segments"] == 9
+    assert data[0]["data_source_detail_dict"]["upload_file"]["name"] == "file.pdf"
+    assert data[0]["process_rule_dict"] == {"mode": "automatic"}
+    assert documents[0].segment_count == 10
+    assert data[-1]["hit_count"] == (7 if page_size == 1 else 0)
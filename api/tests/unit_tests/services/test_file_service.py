@@ -0,0 +1,51 @@
+import hashlib
+import io
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from models.account import Account
+from services.errors.file import FileTooLargeError
+from services.file_service import FileService
+
+
+@pytest.fixture
+def account():
+    account = Account(name="user", email="user@example.com")
+    account.id = "account"
+    account._current_tenant = MagicMock(id="tenant")
+    return account
+
+
+@pytest.fixture
+def storage():
+    with (
+        patch("services.file_service.storage") as storage,
+        patch("services.file_service.db"),
+        patch("services.file_service.file_helpers.get_signed_file_url", return_value="signed-url"),
+    ):
+        yield storage
+
+
+def test_upload_stream_is_streamed_to_storage(account, storage):
+    content = b"streamed content" * 1000
+    stream = io.BytesIO(content)
+
+    with patch("services.file_service.dify_config.STORAGE_READ_CHUNK_SIZE", 1024):
+        upload_file = FileService.upload_file(filename="file.txt", content=stream, mimetype="text/plain", user=account)
+
+    storage.save_stream.assert_called_once_with(upload_file.key, stream)
+    storage.save.assert_not_called()
+    assert upload_file.size == len(content)
+    assert upload_file.hash == hashlib.sha3_256(content).hexdigest()
+    assert stream.tell() == 0
+
+
+def test_upload_stream_size_is_checked_before_reading(account, storage):
+    stream = io.BytesIO(b"x" * 2 * 1024 * 1024)
+
+    with patch("services.file_service.dify_config.UPLOAD_FILE_SIZE_LIMIT", 1):
+        with pytest.raises(FileTooLargeError):
+            FileService.upload_file(filename="file.txt", content=stream, mimetype="text/plain", user=account)
+
+    storage.save_stream.assert_not_called()
@@ -0,0 +1,151 @@
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask_restful import marshal
+
+from fields.conversation_fields import message_detail_fields
+from fields.message_fields import message_fields
+from models.account import Account
+from models.model import App, Message, MessageAgentThought, MessageAnnotation, MessageFeedback
+from services.message_page_loader import MessagePageLoader
+
+
+class _CountingSession:
+    """fake session returning canned rows by the table of the first selected column, counting the queries"""
+
+    def __init__(self, rows_by_table: dict[str, list]) -> None:
+        self.rows_by_table = rows_by_table
+        self.query_count = 0
+
+    def _result(self, statement) -> MagicMock:
+        self.query_count += 1
+        table = statement.column_descriptions[0]["entity"].__tablename__
+        result = MagicMock()
+        result.all.return_value = self.rows_by_table.get(table, [])
+        return result
+
+    def execute(self, statement) -> MagicMock:
+        return self._result(statement)
+
+    def scalars(self, statement) -> MagicMock:
+        return self._result(statement)
+
+    def query(self, *args, **kwargs):
+        raise AssertionError("message relationships must not be queried row by row")
+
+    def commit(self):
+        raise AssertionError("listing messages must not commit")
+
+
+def _messages(count: int) -> list[Message]:
+    messages = []
+    for i in range(count):
+        message = Message(
+            id=f"message-{i}",
+            app_id="app",
+            conversation_id="conversation",
+            query=f"question {i}",
+            answer=f"answer {i}",
+            message_tokens=10,
+            answer_tokens=20,
+            provider_response_latency=0.5,
+            from_source="api",
+            status="normal",
+            created_at=datetime(2024, 1, 1),
+        )
+        message._inputs = {}
+        messages.append(message)
+    return messages
+
+
+def _session() -> _CountingSession:
+    created_at = datetime(2024, 1, 1)
+    account = Account(id="account", name="admin", email="admin@example.com")
+    annotation = MessageAnnotation(
+        id="annotation",
+        app_id="app",
+        message_id="message-0",
+        question="question 0",
+        content="annotated",
+        account_id="account",
+        created_at=created_at,
+    )
+    return _CountingSession(
+        {
+            "message_feedbacks": [
+                MessageFeedback(id="user-feedback", message_id="message-0", rating="like", from_source="user"),
+                MessageFeedback(
+                    id="admin-feedback",
+                    message_id="message-0",
+                    rating="dislike",
+                    from_source="admin",
+                    from_account_id="account",
+                ),
+            ],
+            "message_annotations": [annotation],
+            "app_annotation_hit_histories": [("message-0", annotation)],
+            "message_agent_thoughts": [
+                MessageAgentThought(
+                    id=f"thought-{position}",
+                    message_id="message-0",
+                    position=position,
+                    thought=f"thought {position}",
+                    created_at=created_at,
+                )
+                for position in (1, 2)
+            ],
+            "accounts": [account],
+            "apps": [App(id="app", tenant_id="tenant")],
+        }
+    )
+
+
+@pytest.mark.parametrize("page_size", [1, 20, 100])
+def test_message_page_costs_constant_query_count(page_size):
+    messages = _messages(page_size)
+    session = _session()
+
+    with patch("services.message_page_loader.db.session", session), patch("models.model.db.session", session):
+        MessagePageLoader.preload(messages)
+        details = marshal(messages, message_detail_fields)
+        data = marshal(messages, message_fields)
+
+    # feedbacks, annotations, annotation hits, agent thoughts, message files, accounts and apps
+    assert session.query_count == 7
+    assert [feedback["rating"] for feedback in details[0]["feedbacks"]] == ["like", "dislike"]
+    assert details[0]["feedbacks"][1]["from_account"]["name"] == "admin"
+    assert details[0]["annotation"]["content"] == "annotated"
+    assert details[0]["annotation"]["account"]["name"] == "admin"
+    assert details[0]["annotation_hit_history"]["annotation_id"] == "annotation"
+    assert [thought["position"] for thought in details[0]["agent_thoughts"]] == [1, 2]
+    assert data[0]["feedback"] == {"rating": "like"}
+    assert messages[0].admin_feedback.rating == "dislike"
+    if page_size > 1:
+        assert details[-1]["feedbacks"] == []
+        assert details[-1]["annotation"] is None
+        assert details[-1]["annotation_hit_history"] is None
+        assert data[-1]["feedback"] is None
+        assert data[-1]["agent_thoughts"] == []
+        assert data[-1]["message_files"] == []
+
+
+def test_preload_empty_page_costs_no_query():
+    session = _session()
+
+    with patch("services.message_page_loader.db.session", session):
+        MessagePageLoader.preload([])
+
+    assert session.query_count == 0
+
+
+def test_benchmark_message_page(benchmark):
+    def load_page():
+        messages = _messages(100)
+        session = _session()
+        with patch("services.message_page_loader.db.session", session), patch("models.model.db.session", session):
+            MessagePageLoader.preload(messages)
+            marshal(messages, message_detail_fields)
+        return session.query_count
+
+    assert benchmark(load_page) == 7
@@ -0,0 +1,138 @@
+import datetime
+import uuid
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import MetaData, create_engine, insert
+from sqlalchemy.orm import Session
+
+from core.workflow.entities.workflow_execution import WorkflowExecutionStatus
+from models.types import StringUUID
+from models.workflow import WorkflowAppLog, WorkflowRun
+from services.workflow_app_service import WorkflowAppService
+
+_NOW = datetime.datetime(2025, 6, 1)
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    # sqlite stands in for postgres, uuids are bound as strings as they are with postgres
+    monkeypatch.setattr(StringUUID, "process_bind_param", lambda self, value, dialect: value and str(value))
+    engine = create_engine("sqlite://")
+    metadata = MetaData()
+    for model in (WorkflowAppLog, WorkflowRun):
+        table = model.__table__.to_metadata(metadata)
+        for column in table.columns:
+            column.server_default = None
+    metadata.create_all(engine)
+    return engine
+
+
+def _insert_logs(engine, app_model, count: int) -> list[str]:
+    """insert logs by pairs sharing a created_at, returned newest first"""
+    logs, runs = [], []
+    for i in range(count):
+        run_id = str(uuid.uuid4())
+        created_at = _NOW - datetime.timedelta(seconds=i // 2)
+        logs.append(
+            {
+                "id": str(uuid.uuid4()),
+                "tenant_id": app_model.tenant_id,
+                "app_id": app_model.id,
+                "workflow_id": "workflow-id",
+                "workflow_run_id": run_id,
+                "created_from": "service-api",
+                "created_by_role": "account",
+                "created_by": "account-id",
+                "created_at": created_at,
+            }
+        )
+        runs.append(
+            {
+                "id": run_id,
+                "tenant_id": app_model.tenant_id,
+                "app_id": app_model.id,
+                "workflow_id": "workflow-id",
+                "type": "workflow",
+                "triggered_from": "app-run",
+                "version": "1",
+                "status": "succeeded" if i % 3 else "failed",
+                "elapsed_time": 0,
+                "total_tokens": 0,
+                "total_steps": 0,
+                "created_by_role": "account",
+                "created_by": "account-id",
+                "created_at": created_at,
+            }
+        )
+    with Session(engine) as session:
+        session.execute(insert(WorkflowAppLog), logs)
+        session.execute(insert(WorkflowRun), runs)
+        session.commit()
+    return [log["id"] for log in sorted(logs, key=lambda log: (log["created_at"], log["id"]), reverse=True)]
+
+
+@pytest.fixture
+def app_model():
+    return MagicMock(id=str(uuid.uuid4()), tenant_id=str(uuid.uuid4()))
+
+
+def _paginate(engine, app_model, **kwargs) -> dict:
+    with Session(engine) as session:
+        pagination = WorkflowAppService().get_paginate_workflow_app_logs(session=session, app_model=app_model, **kwargs)
+        pagination["data"] = [log.id for log in pagination["data"]]
+        return pagination
+
+
+def test_keyset_pages_walk_every_log_once(engine, app_model):
+    log_ids = _insert_logs(engine, app_model, 25)
+
+    pages, last_id = [], None
+    while True:
+        pagination = _paginate(engine, app_model, limit=10, last_id=last_id, include_total=False)
+        pages.append(pagination["data"])
+        assert pagination["total"] is None
+        if not pagination["has_more"]:
+            break
+        last_id = pagination["data"][-1]
+
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert sum(pages, []) == log_ids
+
+
+def test_offset_pages_match_keyset_pages(engine, app_model):
+    log_ids = _insert_logs(engine, app_model, 25)
+
+    first = _paginate(engine, app_model, page=1, limit=10)
+    last = _paginate(engine, app_model, page=3, limit=10)
+
+    assert first == {"page": 1, "limit": 10, "total": 25, "has_more": True, "data": log_ids[:10]}
+    assert last == {"page": 3, "limit": 10, "total": 25, "has_more": False, "data": log_ids[20:]}
+    assert _paginate(engine, app_model, page=1, limit=25)["has_more"] is False
+
+
+def test_keyset_pages_keep_filters(engine, app_model):
+    _insert_logs(engine, app_model, 30)
+
+    first = _paginate(engine, app_model, limit=5, status=WorkflowExecutionStatus.FAILED)
+    second = _paginate(engine, app_model, limit=5, status=WorkflowExecutionStatus.FAILED, last_id=first["data"][-1])
+
+    assert first["total"] == second["total"] == 10
+    assert (len(first["data"]), first["has_more"]) == (5, True)
+    assert (len(second["data"]), second["has_more"]) == (5, False)
+    assert not set(first["data"]) & set(second["data"])
+
+    with pytest.raises(ValueError):
+        _paginate(engine, app_model, last_id=str(uuid.uuid4()))
+
+
+@pytest.mark.parametrize("keyset", [False, True])
+def test_benchmark_deep_workflow_app_log_page(benchmark, engine, app_model, keyset):
+    log_ids = _insert_logs(engine, app_model, 20000)
+    # the 900th page of 20 logs
+    kwargs = {"last_id": log_ids[17979]} if keyset else {"page": 900}
+
+    pagination = benchmark(_paginate, engine, app_model, limit=20, include_total=False, **kwargs)
+
+    assert pagination["data"] == log_ids[17980:18000]
+    assert pagination["has_more"] is True